@@ -1,5 +1,15 @@
 import { api } from './client';
-import type { CatalogSearchOut, CategoriesOut, CatalogItem } from '@/types/api';
+import type {
+  CatalogFacetsOut,
+  CatalogSearchOut,
+  CategoriesOut,
+  CatalogItem,
+  FilmographyOut,
+  PersonRole,
+  SearchSort,
+  SeriesEpisodesOut,
+  SuggestOut,
+} from '@/types/api';
 
 export interface CatalogSearchParams {
   q?: string;
@@ -12,33 +22,76 @@ export interface CatalogSearchParams {
   genre?: string;
   mood?: string;
   era?: string;
+  min_duration?: number;
+  max_duration?: number;
+  year_from?: number;
+  year_to?: number;
+  sort?: SearchSort;
   limit?: number;
   offset?: number;
+  cursor?: string;
+  fuzzy?: boolean;
+  group_by?: 'series';
+}
+
+export type CatalogFacetParams = Omit<
+  CatalogSearchParams,
+  'limit' | 'offset' | 'cursor' | 'fuzzy' | 'group_by' | 'sort' | 'min_duration' | 'max_duration' | 'year_from' | 'year_to'
+>;
+
+function filterParams(params: CatalogFacetParams): URLSearchParams {
+  const searchParams = new URLSearchParams();
+  if (params.q) searchParams.set('q', params.q);
+  if (params.category) {
+    params.category.forEach((c) => searchParams.append('category', c));
+  }
+  if (params.series) searchParams.set('series', params.series);
+  if (params.title) searchParams.set('title', params.title);
+  if (params.theme) searchParams.set('theme', params.theme);
+  if (params.actor) searchParams.set('actor', params.actor);
+  if (params.director) searchParams.set('director', params.director);
+  if (params.genre) searchParams.set('genre', params.genre);
+  if (params.mood) searchParams.set('mood', params.mood);
+  if (params.era) searchParams.set('era', params.era);
+  return searchParams;
 }
 
 export const catalogApi = {
   search: (params: CatalogSearchParams) => {
-    const searchParams = new URLSearchParams();
-    if (params.q) searchParams.set('q', params.q);
-    if (params.category) {
-      params.category.forEach((c) => searchParams.append('category', c));
-    }
-    if (params.series) searchParams.set('series', params.series);
-    if (params.title) searchParams.set('title', params.title);
-    if (params.theme) searchParams.set('theme', params.theme);
-    if (params.actor) searchParams.set('actor', params.actor);
-    if (params.director) searchParams.set('director', params.director);
-    if (params.genre) searchParams.set('genre', params.genre);
-    if (params.mood) searchParams.set('mood', params.mood);
-    if (params.era) searchParams.set('era', params.era);
-    
+    const searchParams = filterParams(params);
     if (params.limit) searchParams.set('limit', String(params.limit));
     if (params.offset) searchParams.set('offset', String(params.offset));
+    if (params.cursor) searchParams.set('cursor', params.cursor);
+    if (params.fuzzy) searchParams.set('fuzzy', 'true');
+    if (params.group_by) searchParams.set('group_by', params.group_by);
+    if (params.sort) searchParams.set('sort', params.sort);
+    if (params.min_duration != null) searchParams.set('min_duration', String(params.min_duration));
+    if (params.max_duration != null) searchParams.set('max_duration', String(params.max_duration));
+    if (params.year_from != null) searchParams.set('year_from', String(params.year_from));
+    if (params.year_to != null) searchParams.set('year_to', String(params.year_to));
     return api.get<CatalogSearchOut>(`/catalog/search?${searchParams}`);
   },
 
+  suggest: (q: string, limit?: number) => {
+    const searchParams = new URLSearchParams({ q });
+    if (limit) searchParams.set('limit', String(limit));
+    return api.get<SuggestOut>(`/catalog/suggest?${searchParams}`);
+  },
+
+  getSeriesEpisodes: (titleBase: string) =>
+    api.get<SeriesEpisodesOut>(`/catalog/series/${encodeURIComponent(titleBase)}/episodes`),
+
+  getFacets: (params: CatalogFacetParams = {}) =>
+    api.get<CatalogFacetsOut>(`/catalog/facets?${filterParams(params)}`),
+
   getCategories: () => api.get<CategoriesOut>('/catalog/categories'),
 
+  getFilmography: (name: string, role?: PersonRole) => {
+    const searchParams = new URLSearchParams({ name });
+    if (role) searchParams.set('role', role);
+    return api.get<FilmographyOut>(`/catalog/filmography?${searchParams}`);
+  },
+
   getPendingCount: () => api.get<{ count: number }>('/catalog/pending-count'),
 
   get: (videoId: string) => api.get<CatalogItem>(`/catalog/${videoId}`),
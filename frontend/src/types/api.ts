@@ -103,12 +103,74 @@ export interface CatalogItem {
   thumbnail_url?: string | null;
 }
 
+export interface SeriesGroup {
+  title_base: string;
+  episode_count: number;
+  first_season?: number | null;
+  last_season?: number | null;
+  total_duration_seconds: number;
+  is_tv: boolean;
+  video_id?: string | null;
+  thumbnail_url?: string | null;
+  year?: number | null;
+}
+
+export type SearchSort = 'relevance' | 'title' | 'duration' | 'year' | 'recent' | 'popular';
+
 export interface CatalogSearchOut {
   items: CatalogItem[];
   total: number;
   snapshot_id: string;
+  next_cursor?: string | null;
+  fuzzy?: boolean;
+  groups?: SeriesGroup[];
+}
+
+export interface SeriesEpisode extends CatalogItem {
+  season?: number | null;
+  episode?: number | null;
+  episode_title?: string | null;
+}
+
+export interface SeriesEpisodesOut {
+  title_base: string;
+  items: SeriesEpisode[];
+}
+
+export interface Suggestion {
+  kind: 'title' | 'series';
+  text: string;
+  video_id?: string | null;
+  plays: number;
+}
+
+export interface SuggestOut {
+  items: Suggestion[];
 }
 
 export interface CategoriesOut {
   categories: string[];
 }
+
+export interface FacetValue {
+  value: string;
+  count: number;
+}
+
+export interface CatalogFacetsOut {
+  genre: FacetValue[];
+  mood: FacetValue[];
+  era: FacetValue[];
+  category: FacetValue[];
+}
+
+export type PersonRole = 'actor' | 'director';
+
+export interface FilmographyItem extends CatalogItem {
+  roles: PersonRole[];
+}
+
+export interface FilmographyOut {
+  name: string;
+  items: FilmographyItem[];
+}
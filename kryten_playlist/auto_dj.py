@@ -0,0 +1,349 @@
+"""Keep the queue topped up from the catalog (auto-DJ).
+
+When enabled, ``AutoDj.run`` reads the robot's playlist bucket every few
+seconds (and straight after each ``changemedia``), and once the queued
+runtime still to play drops below ``min_runtime_seconds`` it appends a
+duration-fitted block of about ``fill_seconds``:
+
+- candidates come from a pool loaded once per catalog version, with a
+  bitmask per genre and scheduling flag (as in ``catalog/schedule.py``),
+  so a tick costs two KV reads, a catalog version check and a few
+  bitmask operations;
+- the last ``recent_limit`` items played or queued are kept in a rolling
+  exclusion mask, and whatever is already in the queue is left out too;
+- each fill takes the next genre of ``genres`` in turn, falling back to the
+  whole pool when that genre has nothing left to give;
+- the scheduling flags apply to the fill's own time slot: weekend_only
+  items only on weekends, prime_time_only items only in prime time, and
+  holiday_content never.
+
+Items just sent to the robot count towards the runtime until they show up
+in its bucket, so a slow robot does not get the same gap filled twice.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator
+
+import aiosqlite
+
+from kryten_playlist.catalog.duration_fitting import FitResult, fit_pool
+from kryten_playlist.catalog.models import video_id_from_media_id
+from kryten_playlist.catalog.schedule import ScheduleBlock
+from kryten_playlist.queue_apply import apply_video_ids_to_queue
+from kryten_playlist.storage.catalog_index import rows_mask, shuffled_rows
+from kryten_playlist.storage.catalog_meta import get_catalog_version
+from kryten_playlist.storage.catalog_schema import get_catalog_schema
+from kryten_playlist.storage.facets import FACET_TABLES, canonical_facet
+from kryten_playlist.storage.sqlite import ReadPool
+
+logger = logging.getLogger(__name__)
+
+# Seconds an enqueued item counts as queued before it shows up in the bucket
+PENDING_GRACE_SECONDS = 120.0
+# A fill this close to fill_seconds is good enough
+FILL_TOLERANCE_SECONDS = 60
+
+
+@dataclass(frozen=True)
+class QueueRuntime:
+    """What the robot's queue holds from the current item on."""
+
+    count: int  # items still to play, the current one included
+    remaining_seconds: int
+    video_ids: frozenset[str]  # catalog items anywhere in the queue
+
+
+async def read_queue_runtime(client: Any, channel: str) -> QueueRuntime:
+    """Queue length and runtime left, from the robot's playlist bucket."""
+    bucket = f"kryten_{channel}_playlist"
+    items = await client.kv_get(bucket, "items", default=[], parse_json=True) or []
+    current = await client.kv_get(bucket, "current", default=None, parse_json=True)
+    entries = [it for it in items if isinstance(it, dict)] if isinstance(items, list) else []
+    current = current if isinstance(current, dict) else {}
+
+    # Everything from the current item on is still to play
+    current_uid = str(current.get("uid") or "")
+    uids = [str(it.get("uid") or "") for it in entries]
+    start = uids.index(current_uid) if current_uid and current_uid in uids else 0
+
+    remaining = 0.0
+    video_ids: set[str] = set()
+    for n, item in enumerate(entries):
+        media = item.get("media", item)
+        vid = video_id_from_media_id(str(media.get("id") or ""))
+        if vid:
+            video_ids.add(vid)
+        if n < start:
+            continue
+        seconds = float(media.get("seconds") or 0)
+        if n == start and current_uid == uids[n]:
+            seconds -= float(current.get("currentTime") or 0)
+        remaining += max(0.0, seconds)
+    return QueueRuntime(
+        count=len(uids) - start,
+        remaining_seconds=int(remaining),
+        video_ids=frozenset(video_ids),
+    )
+
+
+class AutoDj:
+    """Appends duration-fitted items whenever the queue runs low."""
+
+    def __init__(
+        self,
+        source: ReadPool | aiosqlite.Connection,
+        *,
+        client: Any,
+        channel: Callable[[], str],
+        min_runtime_seconds: int = 1800,
+        fill_seconds: int = 3600,
+        genres: list[str] | None = None,
+        recent_limit: int = 200,
+        max_items: int = 50,
+        seed: int | None = None,
+        clock: Callable[[], datetime] = lambda: datetime.now().astimezone(),
+    ):
+        self._source = source
+        self._client = client
+        self._channel = channel
+        self.min_runtime_seconds = max(0, int(min_runtime_seconds))
+        self.fill_seconds = max(1, int(fill_seconds))
+        self.genres = [g for g in (canonical_facet("genre", name) for name in genres or []) if g]
+        self.max_items = max(1, int(max_items))
+        self._clock = clock
+        self._rng = random.Random(seed)
+        self._wake = asyncio.Event()
+
+        # Candidate pool for the current catalog version
+        self._version: str | None = None
+        self._pool: list[tuple[str, str, int]] = []
+        self._positions: dict[str, int] = {}
+        self._genre_masks: dict[str, int] = {}
+        self._weekend_only = 0
+        self._prime_time_only = 0
+        self._holiday = 0
+
+        # Rolling exclusion: the last recent_limit video ids, and their pool bits
+        self._recent: deque[str] = deque(maxlen=max(1, int(recent_limit)))
+        self._excluded = 0
+        self._rotation = 0
+        self.last_genre: str | None = None
+        # video_id -> (duration, monotonic time sent) until the bucket shows it
+        self._pending: dict[str, tuple[int, float]] = {}
+
+    @contextlib.asynccontextmanager
+    async def _reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        if isinstance(self._source, ReadPool):
+            async with self._source.acquire() as conn:
+                yield conn
+        else:
+            yield self._source
+
+    @property
+    def pool_size(self) -> int:
+        return len(self._pool)
+
+    async def refresh_pool(self) -> bool:
+        """Reload the candidate pool if the catalog moved on. Returns True if reloaded."""
+        async with self._reader() as conn:
+            version = await get_catalog_version(conn)
+            key = version.key if version is not None else ""
+            if self._version is not None and key == self._version:
+                return False
+            schema = await get_catalog_schema(self._source, conn)
+
+            def col(name: str, default: str = "0") -> str:
+                return name if schema.has(name) else f"{default} AS {name}"
+
+            # The canonical name behind genre_id; the genre column is the raw text
+            genre = (
+                f"(SELECT name FROM {FACET_TABLES['genre']} WHERE id = genre_id) AS genre"
+                if schema.has("genre_id")
+                else col("genre", "NULL")
+            )
+            cursor = await conn.execute(
+                f"SELECT video_id, {schema.title_expr}, duration_seconds, {genre}, "
+                f"{col('weekend_only')}, {col('prime_time_only')}, {col('holiday_content')} "
+                "FROM catalog_item WHERE duration_seconds > 0 AND duration_seconds <= ? "
+                "AND mediacms_category IS NOT NULL ORDER BY rowid",
+                (self.fill_seconds,),
+            )
+            rows = await cursor.fetchall()
+
+        pool: list[tuple[str, str, int]] = []
+        genre_rows: dict[str, list[int]] = {}
+        weekend_rows: list[int] = []
+        prime_rows: list[int] = []
+        holiday_rows: list[int] = []
+        for i, (vid, title, duration, genre, weekend, prime, holiday) in enumerate(rows):
+            pool.append((str(vid), str(title or vid), int(duration)))
+            name = canonical_facet("genre", genre) if genre else None
+            if name:
+                genre_rows.setdefault(name, []).append(i)
+            for flag, flagged in zip(
+                (weekend, prime, holiday), (weekend_rows, prime_rows, holiday_rows)
+            ):
+                if flag:
+                    flagged.append(i)
+
+        size = len(pool)
+        self._pool = pool
+        self._positions = {vid: i for i, (vid, _title, _duration) in enumerate(pool)}
+        self._genre_masks = {name: rows_mask(found, size) for name, found in genre_rows.items()}
+        self._weekend_only = rows_mask(weekend_rows, size)
+        self._prime_time_only = rows_mask(prime_rows, size)
+        self._holiday = rows_mask(holiday_rows, size)
+        self._excluded = self._mask_of(self._recent)
+        self._version = key
+        logger.info(f"Auto-DJ pool loaded: {size} candidates")
+        return True
+
+    def _mask_of(self, video_ids: Iterable[str]) -> int:
+        mask = 0
+        for vid in video_ids:
+            i = self._positions.get(vid)
+            if i is not None:
+                mask |= 1 << i
+        return mask
+
+    def note_played(self, media_id: str) -> None:
+        """Record a play (or a pick), excluding it until it leaves the window.
+
+        Accepts a catalog video ID or a manifest URL from a ``changemedia``.
+        """
+        vid = video_id_from_media_id(media_id)
+        if not vid or vid in self._recent:
+            return
+        if len(self._recent) == self._recent.maxlen:
+            evicted = self._recent[0]
+            i = self._positions.get(evicted)
+            if i is not None:
+                self._excluded &= ~(1 << i)
+        self._recent.append(vid)
+        i = self._positions.get(vid)
+        if i is not None:
+            self._excluded |= 1 << i
+
+    def wake(self) -> None:
+        """Check the queue now instead of at the next poll."""
+        self._wake.set()
+
+    def _eligible(self, now: datetime, queued: frozenset[str]) -> int:
+        """Pool rows the next fill may use, moving the genre rotation on."""
+        slot = ScheduleBlock(start=now, end=now + timedelta(seconds=self.fill_seconds))
+        mask = (1 << len(self._pool)) - 1
+        mask &= ~(self._excluded | self._mask_of(queued) | self._holiday)
+        if not slot.is_weekend:
+            mask &= ~self._weekend_only
+        if not slot.is_prime_time:
+            mask &= ~self._prime_time_only
+
+        # Next genre in the rotation that still has something eligible
+        for step in range(len(self.genres)):
+            genre = self.genres[(self._rotation + step) % len(self.genres)]
+            narrowed = mask & self._genre_masks.get(genre, 0)
+            if narrowed:
+                self._rotation = (self._rotation + step + 1) % len(self.genres)
+                self.last_genre = genre
+                return narrowed
+        self.last_genre = None
+        return mask
+
+    def _draw(self, mask: int) -> Iterator[tuple[str, str, int]]:
+        pool = self._pool
+        for i in shuffled_rows(mask, self._rng):
+            yield pool[i]
+
+    def plan_fill(self, runtime: QueueRuntime, now: datetime | None = None) -> FitResult | None:
+        """The items to append for this queue state, or None if it has enough."""
+        self._expire_pending(runtime.video_ids)
+        remaining = runtime.remaining_seconds + sum(d for d, _sent in self._pending.values())
+        if remaining >= self.min_runtime_seconds:
+            return None
+        mask = self._eligible(now or self._clock(), runtime.video_ids)
+        return fit_pool(
+            self._draw(mask),
+            self.fill_seconds,
+            tolerance=FILL_TOLERANCE_SECONDS,
+            max_items=self.max_items,
+        )
+
+    def _expire_pending(self, queued: frozenset[str]) -> None:
+        cutoff = time.monotonic() - PENDING_GRACE_SECONDS
+        self._pending = {
+            vid: (duration, sent)
+            for vid, (duration, sent) in self._pending.items()
+            if vid not in queued and sent > cutoff
+        }
+
+    async def tick(self) -> int:
+        """Top the queue up if it is running low. Returns the items enqueued."""
+        channel = self._channel()
+        if not channel:
+            return 0
+        await self.refresh_pool()
+        runtime = await read_queue_runtime(self._client, channel)
+        fill = self.plan_fill(runtime)
+        if fill is None or not fill.items:
+            return 0
+
+        video_ids = [str(it["video_id"]) for it in fill.items]
+        result = await apply_video_ids_to_queue(
+            client=self._client,
+            sqlite_conn=self._source,
+            channel=channel,
+            video_ids=video_ids,
+            mode="append",
+        )
+        if result.status != "ok":
+            logger.warning(f"Auto-DJ could not append to the queue: {result.error}")
+            return 0
+
+        # Only what was actually enqueued counts as queued or recently picked
+        failed = {str(f.get("video_id") or "") for f in result.failed or []}
+        sent = time.monotonic()
+        appended = 0
+        for it in fill.items:
+            vid = str(it["video_id"])
+            if vid in failed:
+                continue
+            duration = int(it["duration_seconds"])
+            self._pending[vid] = (duration, sent)
+            self.note_played(vid)
+            appended += duration
+        if failed:
+            logger.warning(f"Auto-DJ could not append {len(failed)} items: {sorted(failed)}")
+        logger.info(
+            f"Auto-DJ appended {result.enqueued_count} items ({appended}s, "
+            f"genre {self.last_genre or 'any'}) with {runtime.remaining_seconds}s left in the queue"
+        )
+        return result.enqueued_count
+
+    async def run(self, shutdown_event: asyncio.Event, *, poll_seconds: float = 15.0) -> None:
+        """Tick every ``poll_seconds``, or on ``wake``, until ``shutdown_event`` is set."""
+        while not shutdown_event.is_set():
+            self._wake.clear()
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"Auto-DJ tick failed: {e}")
+            waiters = [
+                asyncio.ensure_future(shutdown_event.wait()),
+                asyncio.ensure_future(self._wake.wait()),
+            ]
+            try:
+                await asyncio.wait(
+                    waiters, timeout=poll_seconds, return_when=asyncio.FIRST_COMPLETED
+                )
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
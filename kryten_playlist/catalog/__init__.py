@@ -14,6 +14,11 @@ from kryten_playlist.catalog.models import (
     SnapshotMetadata,
     generate_snapshot_id,
 )
+from kryten_playlist.catalog.synth import (
+    SynthConnector,
+    SynthOptions,
+    write_synth_catalog,
+)
 from kryten_playlist.catalog.title_sanitizer import (
     ParsedTitle,
     parse_title,
@@ -27,9 +32,12 @@ __all__ = [
     "MediaCMSConnector",
     "ParsedTitle",
     "SnapshotMetadata",
+    "SynthConnector",
+    "SynthOptions",
     "cytube_manifest_url",
     "generate_snapshot_id",
     "init_enhanced_schema",
     "parse_title",
     "sanitize_title",
+    "write_synth_catalog",
 ]
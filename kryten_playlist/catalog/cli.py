@@ -1,9 +1,10 @@
 import asyncio
+import time
 from pathlib import Path
 
 import click
 
-from kryten_playlist.catalog import enrich, ingest
+from kryten_playlist.catalog import enrich, ingest, synth
 from kryten_playlist.catalog.config import load_config
 
 
@@ -41,6 +42,76 @@ def ingest_cmd(
     )
 
 
+@cli.command(name="synth")
+@click.option(
+    "--count",
+    default=10_000,
+    type=click.IntRange(1, 1_000_000),
+    help="Number of items to generate",
+    show_default=True,
+)
+@click.option("--seed", default=0, help="Random seed; the same seed gives the same catalog")
+@click.option(
+    "--tv-ratio",
+    default=0.35,
+    type=click.FloatRange(0, 1),
+    help="Share of items that are TV episodes",
+    show_default=True,
+)
+@click.option(
+    "--enriched-ratio",
+    default=0.9,
+    type=click.FloatRange(0, 1),
+    help="Share of items with LLM fields filled (sqlite only)",
+    show_default=True,
+)
+@click.option(
+    "--through",
+    type=click.Choice(["sqlite", "ingest"]),
+    default="sqlite",
+    help="Bulk-load enriched rows directly, or feed raw items through the ingest path",
+    show_default=True,
+)
+@click.pass_context
+def synth_cmd(
+    ctx: click.Context, count: int, seed: int, tv_ratio: float, enriched_ratio: float, through: str
+) -> None:
+    """Generate a synthetic catalog for load testing."""
+    started = time.perf_counter()
+    if through == "ingest":
+        connector = synth.SynthConnector(count, seed=seed, tv_ratio=tv_ratio)
+        stats = asyncio.run(
+            ingest.ingest_catalog("synth", ctx.obj["db"], connector=connector)
+        )
+        written = stats["items"]
+    else:
+        options = synth.SynthOptions(
+            count=count, seed=seed, tv_ratio=tv_ratio, enriched_ratio=enriched_ratio
+        )
+        try:
+            written = asyncio.run(synth.load_synth_catalog(ctx.obj["db"], options))
+        except ValueError as e:
+            raise click.ClickException(str(e)) from e
+    click.echo(f"Wrote {written:,} synthetic items in {time.perf_counter() - started:.1f}s")
+
+
+@cli.command(name="backfill-people")
+@click.option("--batch-size", default=500, help="Items per commit")
+@click.pass_context
+def backfill_people_cmd(ctx: click.Context, batch_size: int) -> None:
+    """Rebuild the actor/director index from enriched cast and director fields."""
+    count = asyncio.run(ingest.reindex_people(ctx.obj["db"], batch_size=batch_size))
+    click.echo(f"Indexed people for {count:,} items")
+
+
+@cli.command(name="normalize-facets")
+@click.pass_context
+def normalize_facets_cmd(ctx: click.Context) -> None:
+    """Re-map genre, mood and era values onto the canonical vocabulary."""
+    count = asyncio.run(ingest.renormalize_facets(ctx.obj["db"]))
+    click.echo(f"Updated {count:,} facet values")
+
+
 @cli.group(name="enrich")
 @click.option(
     "--config",
@@ -159,9 +230,10 @@ def enrich_single_cmd(ctx: click.Context, query: str, dry_run: bool) -> None:
 @click.option("--batch-size", default=100, help="Batch size for DB commits")
 @click.option("--enriched-only", is_flag=True, help="Only re-enrich items that already have descriptions")
 @click.option("--verify-model", help="Model to use for verification pass (e.g. meta-llama/llama-3.3-70b-instruct:free)")
+@click.option("--seed", type=int, help="Random seed, to draw the same sample again")
 @click.pass_context
 def enrich_sample_cmd(
-    ctx: click.Context, count: int, dry_run: bool, tv_only: bool, movies_only: bool, unenriched_only: bool, concurrency: int, batch_size: int, enriched_only: bool, verify_model: str | None
+    ctx: click.Context, count: int, dry_run: bool, tv_only: bool, movies_only: bool, unenriched_only: bool, concurrency: int, batch_size: int, enriched_only: bool, verify_model: str | None, seed: int | None
 ) -> None:
     """Enrich a random sample of items."""
     llm = _require_llm(ctx)
@@ -205,7 +277,8 @@ def enrich_sample_cmd(
             verifier_client=verifier_client,
             alternate_client=alternate_client,
             delay=delay,
-            jitter=jitter
+            jitter=jitter,
+            seed=seed,
         )
     )
 
@@ -220,6 +293,7 @@ def enrich_sample_cmd(
 @click.option("--force-all", is_flag=True, help="Re-process ALL items (ignore enriched status)")
 @click.option("--raw-output", is_flag=True, help="Disable human-readable output formatting")
 @click.option("--random-order", is_flag=True, help="Process items in random order")
+@click.option("--seed", type=int, help="Random seed for --random-order")
 @click.option("--verify", is_flag=True, help="Enable 2-pass verification (double checks facts with LLM)")
 @click.option("--batch-size", default=100, help="Batch size for DB commits")
 @click.option("--verify-model", help="Model to use for verification pass")
@@ -235,6 +309,7 @@ def enrich_batch_cmd(
     force_all: bool,
     raw_output: bool,
     random_order: bool,
+    seed: int | None,
     verify: bool,
     batch_size: int,
     verify_model: str | None,
@@ -288,7 +363,8 @@ def enrich_batch_cmd(
             batch_size=batch_size,
             verifier_client=verifier_client,
             alternate_client=alternate_client,
-            jitter=jitter
+            jitter=jitter,
+            seed=seed,
         )
     )
 
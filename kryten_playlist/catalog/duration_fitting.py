@@ -5,12 +5,27 @@ Build playlists that fit specific time slots or durations.
 
 from __future__ import annotations
 
+import bisect
+import random
+import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Iterable, Iterator
 
 import aiosqlite
 
+from kryten_playlist.catalog.fit_solver import SubsetSumSolver
+from kryten_playlist.storage.catalog_index import CatalogIndexManager, shuffled_rows
+from kryten_playlist.storage.catalog_meta import get_catalog_version
+from kryten_playlist.storage.catalog_subsets import ENRICHED_PREDICATE, VISIBLE_PREDICATE
+from kryten_playlist.storage.facets import FACET_TABLES, canonical_facet
+from kryten_playlist.storage.sampling import sample_rows
+from kryten_playlist.storage.search_cache import CandidatePoolCache
+
+# Candidates considered per fit, and wall-clock seconds allowed to solve it
+DEFAULT_POOL_SIZE = 20000
+DEFAULT_TIME_BUDGET = 0.1
+
 
 @dataclass
 class FitResult:
@@ -20,6 +35,13 @@ class FitResult:
     total_duration: int  # seconds
     target_duration: int  # seconds
     slack: int  # seconds (positive = under, negative = over)
+    optimality_gap: int = 0  # seconds the best possible fill could still add
+    solve_ms: float = 0.0
+
+    @property
+    def optimal(self) -> bool:
+        """Whether no other selection from the pool fills the slot better."""
+        return self.optimality_gap == 0
 
     @property
     def utilization(self) -> float:
@@ -29,52 +51,160 @@ class FitResult:
         return min(100.0, 100.0 * self.total_duration / self.target_duration)
 
 
-async def fit_to_duration(
-    conn: aiosqlite.Connection,
+class _Fill:
+    """Feeds candidates to the solver until the fill is good enough."""
+
+    def __init__(
+        self,
+        target_seconds: int,
+        *,
+        tolerance: int,
+        resolution: int,
+        max_items: int,
+        time_budget: float,
+        pool_size: int,
+    ) -> None:
+        self.target = target_seconds
+        self.solver = SubsetSumSolver(
+            target_seconds, tolerance=tolerance, resolution=resolution, max_items=max_items
+        )
+        self.pool: list[tuple[str, str, int]] = []
+        self.pool_size = pool_size
+        self.deadline = time.perf_counter() + time_budget
+        self.exhausted = True
+
+    def offer(self, video_id: str, title: str, duration: int) -> bool:
+        """Add a candidate; True once no further candidates are wanted."""
+        self.pool.append((video_id, title, duration))
+        # Stop once the fill is within tolerance, out of time, or the pool is
+        # full; a pool cut short is not every candidate, so not provably optimal
+        if (
+            self.solver.add(duration)
+            or time.perf_counter() >= self.deadline
+            or len(self.pool) >= self.pool_size
+        ):
+            self.exhausted = False
+            return True
+        return False
+
+    def result(self) -> FitResult:
+        solution = self.solver.solve(exhausted=self.exhausted)
+        return FitResult(
+            items=[
+                {"video_id": video_id, "title": title, "duration_seconds": duration}
+                for video_id, title, duration in (self.pool[i] for i in solution.picks)
+            ],
+            total_duration=solution.total,
+            target_duration=self.target,
+            slack=self.target - solution.total,
+            optimality_gap=solution.gap,
+            solve_ms=solution.solve_ms,
+        )
+
+
+class CandidatePool:
+    """Every item matching a set of fit filters, shortest first.
+
+    Pools are cached per filter signature (see ``CandidatePoolCache``), so
+    repeated fits over the same filters draw their candidates in memory:
+    items too long for the slot are a suffix cut off by bisection, and the
+    rest are walked in the requested order.
+    """
+
+    def __init__(self, rows: Iterable[tuple[str, str, int]]):
+        self.rows = sorted((tuple(row) for row in rows), key=lambda row: row[2])
+        self.durations = [row[2] for row in self.rows]
+        self._by_title: list[int] | None = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def candidates(
+        self,
+        max_duration: int,
+        *,
+        order_by: str = "random",
+        seed: int | None = None,
+    ) -> Iterator[tuple[str, str, int]]:
+        """Items no longer than ``max_duration``, in ``order_by`` order."""
+        n = bisect.bisect_right(self.durations, max_duration)
+        order: Iterable[int]
+        if order_by == "duration_asc":
+            order = range(n)
+        elif order_by == "duration_desc":
+            order = range(n - 1, -1, -1)
+        elif order_by == "title":
+            if self._by_title is None:
+                self._by_title = sorted(range(len(self.rows)), key=lambda i: self.rows[i][1])
+            order = (i for i in self._by_title if i < n)
+        else:
+            order = shuffled_rows((1 << n) - 1, random.Random(seed))
+        rows = self.rows
+        for i in order:
+            yield rows[i]
+
+
+def fit_pool(
+    candidates: Iterable[tuple[str, str, int]],
     target_seconds: int,
     *,
-    filter_tv: bool | None = None,
-    filter_tags: list[str] | None = None,
-    filter_categories: list[str] | None = None,
-    filter_era: str | None = None,
-    filter_genre: str | None = None,
-    exclude_weekend_only: bool = False,
+    tolerance: int = 0,
+    resolution: int = 1,
     max_items: int = 100,
-    order_by: str = "random",
+    time_budget: float = DEFAULT_TIME_BUDGET,
+    pool_size: int = DEFAULT_POOL_SIZE,
 ) -> FitResult:
-    """Select items that fit within a target duration.
+    """Fit ``(video_id, title, duration)`` candidates, in preference order, to a target.
 
-    Args:
-        conn: Database connection.
-        target_seconds: Target total duration in seconds.
-        filter_tv: If True, only TV; if False, only movies; if None, both.
-        filter_tags: Only items with ALL of these tags.
-        filter_categories: Only items in ANY of these categories.
-        filter_era: Only items from this era (e.g., "1980s").
-        filter_genre: Only items with this genre.
-        exclude_weekend_only: Exclude items marked weekend_only.
-        max_items: Maximum items to return.
-        order_by: "random", "duration_asc", "duration_desc", "title".
-
-    Returns:
-        FitResult with selected items.
+    The in-memory core of ``fit_to_duration``; the options mean the same.
+    Candidates are consumed lazily, so a generator stops being advanced
+    as soon as the fill is good enough.
     """
-    # Build query
+    fill = _Fill(
+        target_seconds,
+        tolerance=tolerance,
+        resolution=resolution,
+        max_items=max_items,
+        time_budget=time_budget,
+        pool_size=pool_size,
+    )
+    for video_id, title, duration in candidates:
+        if fill.offer(video_id, title, duration):
+            break
+    return fill.result()
+
+
+def _filter_conditions(
+    *,
+    filter_tv: bool | None,
+    filter_tags: list[str] | None,
+    filter_categories: list[str] | None,
+    filter_era: str | None,
+    filter_genre: str | None,
+    exclude_weekend_only: bool,
+    include_uncategorized: bool,
+) -> tuple[list[str], list[Any]]:
+    """WHERE conditions and their parameters for a fit's filters."""
     conditions = ["duration_seconds IS NOT NULL", "duration_seconds > 0"]
     params: list[Any] = []
 
+    # The same access rule as search: enriched only, and uncategorized
+    # items only for callers allowed to see them
+    conditions.append(ENRICHED_PREDICATE)
+    if not include_uncategorized:
+        conditions.append(f"({VISIBLE_PREDICATE})")
+
     if filter_tv is True:
         conditions.append("is_tv = 1")
     elif filter_tv is False:
         conditions.append("is_tv = 0")
 
-    if filter_era:
-        conditions.append("era = ?")
-        params.append(filter_era)
-
-    if filter_genre:
-        conditions.append("genre = ?")
-        params.append(filter_genre)
+    # Facets match on the indexed lookup ids of their canonical names
+    for facet, value in (("era", filter_era), ("genre", filter_genre)):
+        canonical = canonical_facet(facet, value) if value else None
+        if canonical:
+            conditions.append(f"{facet}_id = (SELECT id FROM {FACET_TABLES[facet]} WHERE name = ?)")
+            params.append(canonical)
 
     if exclude_weekend_only:
         conditions.append("weekend_only = 0")
@@ -109,46 +239,159 @@ async def fit_to_duration(
             )
             params.append(tag)
 
+    return conditions, params
+
+
+async def fit_to_duration(
+    conn: aiosqlite.Connection,
+    target_seconds: int,
+    *,
+    filter_tv: bool | None = None,
+    filter_tags: list[str] | None = None,
+    filter_categories: list[str] | None = None,
+    filter_era: str | None = None,
+    filter_genre: str | None = None,
+    exclude_weekend_only: bool = False,
+    include_uncategorized: bool = False,
+    max_items: int = 100,
+    order_by: str = "random",
+    seed: int | None = None,
+    tolerance: int = 0,
+    resolution: int = 1,
+    time_budget: float = DEFAULT_TIME_BUDGET,
+    pool_size: int = DEFAULT_POOL_SIZE,
+    index: CatalogIndexManager | None = None,
+    pool_cache: CandidatePoolCache | None = None,
+) -> FitResult:
+    """Select the items that fill a target duration most completely.
+
+    Candidates are taken in ``order_by`` order and handed to a subset-sum
+    solver (see ``fit_solver``), which picks the combination closest to the
+    target without going over; earlier candidates are preferred among
+    equally good fills.
+
+    Args:
+        conn: Database connection.
+        target_seconds: Target total duration in seconds.
+        filter_tv: If True, only TV; if False, only movies; if None, both.
+        filter_tags: Only items with ALL of these tags.
+        filter_categories: Only items in ANY of these categories.
+        filter_era: Only items from this era (e.g., "1980s" or "80s").
+        filter_genre: Only items with this genre (synonyms such as "sci-fi" accepted).
+        exclude_weekend_only: Exclude items marked weekend_only.
+        include_uncategorized: Also consider uncategorized items (admins and
+            blessed users, as in search).
+        max_items: Maximum items to return.
+        order_by: Candidate preference: "random", "duration_asc",
+            "duration_desc", "title".
+        seed: Seed for order_by="random"; the same seed repeats the same fill.
+        tolerance: Stop looking once a fill within this many seconds of the
+            target is found.
+        resolution: Bucket durations to this many seconds (60 = minutes);
+            coarser is faster but may leave up to a bucket per item unused.
+        time_budget: Seconds to spend gathering and solving; the best fill
+            found so far is returned when it runs out.
+        pool_size: Maximum candidates to consider.
+        index: Catalog index to draw candidates from while one is loaded,
+            instead of querying SQLite (not for tag or category filters).
+        pool_cache: Cache of candidate pools per filter signature; when
+            given (and the index is not used) candidates are drawn from the
+            cached pool, so repeated fits over the same filters skip the query.
+
+    Returns:
+        FitResult with selected items.
+    """
+    # Nothing longer than the slot can be part of a fill
+    conditions, params = _filter_conditions(
+        filter_tv=filter_tv,
+        filter_tags=filter_tags,
+        filter_categories=filter_categories,
+        filter_era=filter_era,
+        filter_genre=filter_genre,
+        exclude_weekend_only=exclude_weekend_only,
+        include_uncategorized=include_uncategorized,
+    )
+    conditions.append("duration_seconds <= ?")
+    params.append(target_seconds)
+    where = " AND ".join(conditions)
+    columns = "video_id, sanitized_title, duration_seconds"
+
     # Order clause
     order_clause = {
-        "random": "RANDOM()",
         "duration_asc": "duration_seconds ASC",
         "duration_desc": "duration_seconds DESC",
         "title": "sanitized_title ASC",
-    }.get(order_by, "RANDOM()")
+    }.get(order_by)
+
+    options = {
+        "tolerance": tolerance,
+        "resolution": resolution,
+        "max_items": max_items,
+        "time_budget": time_budget,
+        "pool_size": pool_size,
+    }
+    loaded = index.current if index is not None else None
+    if loaded is not None and not (filter_tags or filter_categories):
+        candidates = loaded.fit_candidates(
+            max_duration=target_seconds,
+            is_tv=filter_tv,
+            exclude_weekend_only=exclude_weekend_only,
+            include_uncategorized=include_uncategorized,
+            genre=filter_genre,
+            era=filter_era,
+            order_by=order_by,
+            seed=seed,
+        )
+        return fit_pool(candidates, target_seconds, **options)
+
+    version = await get_catalog_version(conn) if pool_cache is not None else None
+    if pool_cache is not None and version is not None:
+        base, base_params = _filter_conditions(
+            filter_tv=filter_tv,
+            filter_tags=filter_tags,
+            filter_categories=filter_categories,
+            filter_era=filter_era,
+            filter_genre=filter_genre,
+            exclude_weekend_only=exclude_weekend_only,
+            include_uncategorized=include_uncategorized,
+        )
+        signature = (
+            "fit_pool",
+            filter_tv,
+            tuple(sorted(set(filter_tags or ()))),
+            tuple(sorted(set(filter_categories or ()))),
+            canonical_facet("era", filter_era) if filter_era else None,
+            canonical_facet("genre", filter_genre) if filter_genre else None,
+            exclude_weekend_only,
+            include_uncategorized,
+        )
 
-    where = " AND ".join(conditions)
-    query = f"""
-        SELECT video_id, sanitized_title, duration_seconds
-        FROM catalog_item
-        WHERE {where}
-        ORDER BY {order_clause}
-    """
+        async def load() -> CandidatePool:
+            cursor = await conn.execute(
+                f"SELECT {columns} FROM catalog_item WHERE {' AND '.join(base)} "
+                "ORDER BY duration_seconds",
+                base_params,
+            )
+            return CandidatePool(await cursor.fetchall())
 
-    cursor = await conn.execute(query, params)
-    candidates = await cursor.fetchall()
+        pool = await pool_cache.get_or_compute(version.key, signature, load)
+        candidates = pool.candidates(target_seconds, order_by=order_by, seed=seed)
+        return fit_pool(candidates, target_seconds, **options)
 
-    # Greedy selection: pick items until we hit the target
-    selected: list[dict[str, Any]] = []
-    total = 0
+    if order_clause is not None:
+        # LIMIT pool_size: a full page leaves the fill not provably optimal
+        cursor = await conn.execute(
+            f"SELECT {columns} FROM catalog_item WHERE {where} ORDER BY {order_clause} LIMIT ?",
+            (*params, pool_size),
+        )
+        return fit_pool(await cursor.fetchall(), target_seconds, **options)
 
-    for video_id, title, duration in candidates:
-        if len(selected) >= max_items:
+    # Random: draw candidates as the solver needs them, not shuffle them all
+    fill = _Fill(target_seconds, **options)
+    async for video_id, title, duration in sample_rows(conn, columns, where, params, seed=seed):
+        if fill.offer(video_id, title, duration):
             break
-        if total + duration <= target_seconds:
-            selected.append({
-                "video_id": video_id,
-                "title": title,
-                "duration_seconds": duration,
-            })
-            total += duration
-
-    return FitResult(
-        items=selected,
-        total_duration=total,
-        target_duration=target_seconds,
-        slack=target_seconds - total,
-    )
+    return fill.result()
 
 
 async def fit_to_end_time(
@@ -5,6 +5,24 @@ This module defines the extended SQLite schema for storing enriched catalog data
 
 from __future__ import annotations
 
+import logging
+import sqlite3
+
+from kryten_playlist.storage.catalog_meta import init_catalog_meta
+from kryten_playlist.storage.catalog_schema import invalidate_catalog_schema
+from kryten_playlist.storage.catalog_subsets import init_catalog_subsets
+from kryten_playlist.storage.facets import (
+    FACETS,
+    init_facet_tables,
+    needs_facet_normalization,
+    normalize_facets,
+)
+from kryten_playlist.storage.people import backfill_people
+from kryten_playlist.storage.popularity import init_popularity_table
+from kryten_playlist.storage.trigram import TRIGRAM_TABLE, TRIGRAM_VOCAB
+
+logger = logging.getLogger(__name__)
+
 # SQL schema for the enhanced catalog
 ENHANCED_SCHEMA = """
 -- Core catalog items with enhanced metadata
@@ -32,6 +50,9 @@ CREATE TABLE IF NOT EXISTS catalog_item (
     genre TEXT,  -- Primary genre
     mood TEXT,  -- e.g., "dark", "uplifting", "comedic"
     era TEXT,  -- e.g., "1980s", "2010s", "classic"
+    genre_id INTEGER,  -- catalog_genre.id of the normalized genre
+    mood_id INTEGER,  -- catalog_mood.id
+    era_id INTEGER,  -- catalog_era.id
     content_rating TEXT,  -- e.g., "PG", "R", "TV-MA"
     llm_notes TEXT,  -- Free-form LLM observations
 
@@ -82,6 +103,28 @@ CREATE TABLE IF NOT EXISTS catalog_item_tag (
     FOREIGN KEY (tag_id) REFERENCES catalog_tag(id) ON DELETE CASCADE
 );
 
+-- People (cast and directors) normalized out of cast_list/director
+CREATE TABLE IF NOT EXISTS catalog_person (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,  -- Display name as first seen
+    name_key TEXT NOT NULL UNIQUE,  -- Normalized for lookups
+    surname_key TEXT NOT NULL  -- Surname-first normalized key
+);
+
+-- Many-to-many: items to people, by role ('actor' or 'director')
+CREATE TABLE IF NOT EXISTS item_person (
+    video_id TEXT NOT NULL,
+    person_id INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    billing INTEGER NOT NULL DEFAULT 0,  -- Position in the credits
+    PRIMARY KEY (video_id, role, person_id),
+    FOREIGN KEY (video_id) REFERENCES catalog_item(video_id) ON DELETE CASCADE,
+    FOREIGN KEY (person_id) REFERENCES catalog_person(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_catalog_person_surname ON catalog_person(surname_key);
+CREATE INDEX IF NOT EXISTS idx_item_person_person ON item_person(person_id, role, video_id);
+
 -- Full-text search virtual table
 CREATE VIRTUAL TABLE IF NOT EXISTS catalog_fts USING fts5(
     video_id,
@@ -123,6 +166,39 @@ CREATE INDEX IF NOT EXISTS idx_catalog_item_era ON catalog_item(era);
 CREATE INDEX IF NOT EXISTS idx_catalog_item_genre ON catalog_item(genre);
 """
 
+# Trigram title index for typo-tolerant matching (needs SQLite 3.34+). Only
+# title changes touch it, so enrichment updates skip the trigger.
+TITLE_TRIGRAM_SCHEMA = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {TRIGRAM_TABLE} USING fts5(
+    sanitized_title,
+    title_base,
+    raw_title,
+    content='catalog_item',
+    content_rowid='rowid',
+    tokenize='trigram'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS {TRIGRAM_VOCAB} USING fts5vocab({TRIGRAM_TABLE}, 'row');
+
+CREATE TRIGGER IF NOT EXISTS catalog_title_trgm_insert AFTER INSERT ON catalog_item BEGIN
+    INSERT INTO {TRIGRAM_TABLE}(rowid, sanitized_title, title_base, raw_title)
+    VALUES (NEW.rowid, NEW.sanitized_title, NEW.title_base, NEW.raw_title);
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_title_trgm_delete AFTER DELETE ON catalog_item BEGIN
+    INSERT INTO {TRIGRAM_TABLE}({TRIGRAM_TABLE}, rowid, sanitized_title, title_base, raw_title)
+    VALUES ('delete', OLD.rowid, OLD.sanitized_title, OLD.title_base, OLD.raw_title);
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_title_trgm_update
+AFTER UPDATE OF sanitized_title, title_base, raw_title ON catalog_item BEGIN
+    INSERT INTO {TRIGRAM_TABLE}({TRIGRAM_TABLE}, rowid, sanitized_title, title_base, raw_title)
+    VALUES ('delete', OLD.rowid, OLD.sanitized_title, OLD.title_base, OLD.raw_title);
+    INSERT INTO {TRIGRAM_TABLE}(rowid, sanitized_title, title_base, raw_title)
+    VALUES (NEW.rowid, NEW.sanitized_title, NEW.title_base, NEW.raw_title);
+END;
+"""
+
 
 async def init_enhanced_schema(conn) -> None:
     """Initialize the enhanced catalog schema."""
@@ -138,7 +214,68 @@ async def init_enhanced_schema(conn) -> None:
     if "sanitized_category" not in columns:
         await conn.execute("ALTER TABLE catalog_item ADD COLUMN sanitized_category TEXT NULL")
 
+    # Migration: facet lookup ids (values are filled by normalize_facets below)
+    await init_facet_tables(conn)
+    for facet in FACETS:
+        if f"{facet}_id" not in columns:
+            await conn.execute(f"ALTER TABLE catalog_item ADD COLUMN {facet}_id INTEGER NULL")
+        await conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_catalog_item_{facet}_id ON catalog_item({facet}_id)"
+        )
+
     await conn.execute("CREATE INDEX IF NOT EXISTS idx_catalog_item_mediacms_category ON catalog_item(mediacms_category)")
     await conn.execute("CREATE INDEX IF NOT EXISTS idx_catalog_item_sanitized_category ON catalog_item(sanitized_category)")
+    # Keyset pagination resumes from (sanitized_title, video_id)
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_catalog_item_title_video ON catalog_item(sanitized_title, video_id)")
+    # ... and likewise for sort=duration|year|recent
+    for column in ("duration_seconds", "year", "created_at"):
+        await conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_catalog_item_{column}_video ON catalog_item({column}, video_id)"
+        )
+
+    await init_catalog_meta(conn)
+    await init_popularity_table(conn)
+    cursor = await conn.execute("PRAGMA table_info(catalog_item)")
+    await init_catalog_subsets(conn, {row[1] for row in await cursor.fetchall()})
+
+    # Backfill the FTS index for databases whose rows predate catalog_fts
+    # (the sync triggers only cover rows written after they were created).
+    cursor = await conn.execute("SELECT EXISTS(SELECT 1 FROM catalog_item)")
+    has_items = (await cursor.fetchone())[0]
+    cursor = await conn.execute("SELECT EXISTS(SELECT 1 FROM catalog_fts_docsize)")
+    has_fts_rows = (await cursor.fetchone())[0]
+    if has_items and not has_fts_rows:
+        await rebuild_fts_index(conn)
+
+    try:
+        await conn.executescript(TITLE_TRIGRAM_SCHEMA)
+    except sqlite3.OperationalError as e:
+        logger.warning("Trigram title index unavailable (%s); fuzzy search disabled", e)
+    else:
+        cursor = await conn.execute(f"SELECT EXISTS(SELECT 1 FROM {TRIGRAM_TABLE}_docsize)")
+        if has_items and not (await cursor.fetchone())[0]:
+            await rebuild_trigram_index(conn)
 
     await conn.commit()
+
+    # Likewise populate the people tables for items enriched before they existed.
+    cursor = await conn.execute("SELECT EXISTS(SELECT 1 FROM item_person)")
+    has_people = (await cursor.fetchone())[0]
+    if has_items and not has_people:
+        await backfill_people(conn)
+
+    # ...and map free-form genre/mood/era values onto the facet vocabulary.
+    if has_items and await needs_facet_normalization(conn):
+        await normalize_facets(conn)
+
+    invalidate_catalog_schema()
+
+
+async def rebuild_fts_index(conn) -> None:
+    """Rebuild catalog_fts from the contents of catalog_item."""
+    await conn.execute("INSERT INTO catalog_fts(catalog_fts) VALUES('rebuild')")
+
+
+async def rebuild_trigram_index(conn) -> None:
+    """Rebuild the trigram title index from the contents of catalog_item."""
+    await conn.execute(f"INSERT INTO {TRIGRAM_TABLE}({TRIGRAM_TABLE}) VALUES('rebuild')")
@@ -43,6 +43,13 @@ import aiosqlite
 import httpx
 import json_repair
 
+from kryten_playlist.catalog.enhanced_schema import init_enhanced_schema
+from kryten_playlist.storage.catalog_meta import mark_catalog_changed
+from kryten_playlist.storage.facets import set_item_facets
+from kryten_playlist.storage.people import set_item_people
+from kryten_playlist.storage.sampling import sample_rows
+from kryten_playlist.storage.search_cache import invalidate_search_caches
+
 logging.basicConfig(
     level=logging.ERROR,
     format="%(asctime)s [%(levelname)s] %(message)s",
@@ -535,6 +542,13 @@ async def enrich_item(
                 ),
             )
 
+            await set_item_facets(
+                conn, video_id, genre=data.get("genre"), mood=data.get("mood"), era=data.get("era")
+            )
+            await set_item_people(
+                conn, video_id, cast=data.get("cast_list"), director=data.get("director")
+            )
+
             # Handle tags
             tags = data.get("tags", [])
             for tag_name in tags:
@@ -571,6 +585,7 @@ async def enrich_single(
 ) -> None:
     """Enrich a single item by searching for it."""
     async with aiosqlite.connect(db_path) as conn:
+        await init_enhanced_schema(conn)
         cursor = await conn.execute(
             """
             SELECT video_id, sanitized_title, is_tv, year
@@ -593,6 +608,10 @@ async def enrich_single(
         print("Calling LLM...")
 
         result = await enrich_item(conn, llm, video_id, title, bool(is_tv), year, dry_run)
+        if result.success and not dry_run:
+            await mark_catalog_changed(conn)
+            await conn.commit()
+            invalidate_search_caches()
         print(result.display())
 
 
@@ -611,8 +630,9 @@ async def enrich_sample(
     alternate_client: LLMClient | None = None,
     delay: float = 0.5,
     jitter: int = 0,
+    seed: int | None = None,
 ) -> None:
-    """Enrich a random sample of items."""
+    """Enrich a random sample of items (reproducible when ``seed`` is given)."""
     # We can reuse enrich_batch logic by setting limit=count, random_order=True
     # and properly setting the filters.
 
@@ -634,6 +654,7 @@ async def enrich_sample(
         verifier_client=verifier_client,
         alternate_client=alternate_client,
         jitter=jitter,
+        seed=seed,
     )
 
 
@@ -682,6 +703,59 @@ def format_avg_time(seconds_per_item: float) -> str:
     return f"{minutes:.1f} m/item"
 
 
+ENRICHMENT_COLUMNS = "video_id, sanitized_title, is_tv, year"
+
+
+def enrichment_filter(
+    *,
+    tv_only: bool = False,
+    movies_only: bool = False,
+    force_all: bool = False,
+    enriched_only: bool = False,
+) -> str:
+    """WHERE expression over catalog_item for the items enrich_batch works on ("" for all)."""
+    conditions = []
+    if enriched_only:
+        conditions.append("llm_enriched_at IS NOT NULL")
+    elif not force_all:
+        conditions.append("llm_enriched_at IS NULL")
+
+    if tv_only:
+        conditions.append("is_tv = 1")
+    if movies_only:
+        conditions.append("is_tv = 0")
+
+    return " AND ".join(conditions)
+
+
+def enrichment_selector(
+    *,
+    tv_only: bool = False,
+    movies_only: bool = False,
+    force_all: bool = False,
+    enriched_only: bool = False,
+    limit: int | None = None,
+) -> tuple[str, str]:
+    """Build the statements enrich_batch uses to pick its work in title order.
+
+    Returns ``(count_sql, select_sql)``; the select yields
+    ``ENRICHMENT_COLUMNS`` rows. Random order goes through ``sample_rows``
+    with ``enrichment_filter`` instead.
+    """
+    where = enrichment_filter(
+        tv_only=tv_only, movies_only=movies_only, force_all=force_all, enriched_only=enriched_only
+    )
+    where_clause = f"WHERE {where}" if where else ""
+    limit_clause = f"LIMIT {int(limit)}" if limit else ""
+
+    count_sql = f"SELECT COUNT(*) FROM catalog_item {where_clause}"
+    select_sql = (
+        f"SELECT {ENRICHMENT_COLUMNS} FROM catalog_item "
+        f"{where_clause} ORDER BY sanitized_title {limit_clause}"
+    ).strip()
+    return count_sql, select_sql
+
+
 async def enrich_batch(
     db_path: str,
     llm: LLMClient,
@@ -700,6 +774,7 @@ async def enrich_batch(
     verifier_client: LLMClient | None = None,
     alternate_client: LLMClient | None = None,
     jitter: int = 0,
+    seed: int | None = None,
 ) -> None:
     """Enrich items with optional concurrency.
 
@@ -721,32 +796,26 @@ async def enrich_batch(
         verifier_client: Optional second LLM client for verification
         alternate_client: Optional second LLM client for retrying failed enrichments
         jitter: Random jitter in milliseconds to add to delay
+        seed: Seed for random_order, to repeat the same sample
     """
     async with aiosqlite.connect(db_path) as conn:
-        # Count total
-        conditions = []
-        if enriched_only:
-            conditions.append("llm_enriched_at IS NOT NULL")
-        elif not force_all:
-            conditions.append("llm_enriched_at IS NULL")
+        await init_enhanced_schema(conn)
 
-        if tv_only:
-            conditions.append("is_tv = 1")
-        if movies_only:
-            conditions.append("is_tv = 0")
-
-        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
-
-        cursor = await conn.execute(
-            f"SELECT COUNT(*) FROM catalog_item {where_clause}"
+        # Count total
+        count_sql, select_sql = enrichment_selector(
+            tv_only=tv_only,
+            movies_only=movies_only,
+            force_all=force_all,
+            enriched_only=enriched_only,
+            limit=limit,
         )
+        cursor = await conn.execute(count_sql)
         total = (await cursor.fetchone())[0]
 
         if total == 0:
             print("No items found matching criteria.")
             return
 
-        limit_clause = f"LIMIT {limit}" if limit else ""
         actual_count = min(total, limit) if limit else total
 
         print("\n🚀 Starting batch enrichment")
@@ -761,8 +830,6 @@ async def enrich_batch(
             print("   [DRY RUN] Changes will NOT be saved")
         print()
 
-        order_clause = "ORDER BY RANDOM()" if random_order else "ORDER BY sanitized_title"
-
         # Use cursor iteration instead of fetchall to handle large datasets
         # But for concurrency, we need to buffer some items
         # Strategy: Fetch in chunks of batch_size
@@ -883,17 +950,23 @@ async def enrich_batch(
             # No, concurrent updates might not commit immediately, so they might still show up.
 
             # Best approach: Fetch ALL IDs first (lightweight), then process in chunks.
-            if offset == 0:
-                # Only run the query once to get IDs
-                id_cursor = await conn.execute(
-                    f"""
-                    SELECT video_id, sanitized_title, is_tv, year
-                    FROM catalog_item
-                    {where_clause}
-                    {order_clause}
-                    {limit_clause}
-                    """
+            if offset == 0 and random_order:
+                # Draw the sample up front: O(actual_count) probes, no sort
+                where = enrichment_filter(
+                    tv_only=tv_only,
+                    movies_only=movies_only,
+                    force_all=force_all,
+                    enriched_only=enriched_only,
                 )
+                all_rows = [
+                    row
+                    async for row in sample_rows(
+                        conn, ENRICHMENT_COLUMNS, where, k=actual_count, seed=seed
+                    )
+                ]
+            elif offset == 0:
+                # Only run the query once to get IDs
+                id_cursor = await conn.execute(select_sql)
                 all_rows = await id_cursor.fetchall()
                 # Now we iterate over this list in memory (it's list of tuples, memory efficient enough for <100k items)
 
@@ -911,7 +984,9 @@ async def enrich_batch(
 
             # Commit after each batch if not dry run
             if not dry_run:
+                await mark_catalog_changed(conn)
                 await conn.commit()
+                invalidate_search_caches()
 
             offset += len(chunk)
             remaining -= len(chunk)
@@ -0,0 +1,229 @@
+"""Subset-sum solver for filling a time slot as fully as possible.
+
+A greedy fill takes candidates in order and skips whatever overflows, which
+routinely strands 10-20 minutes of a slot. ``SubsetSumSolver`` instead finds
+the subset of candidates whose total duration comes closest to the target
+without going over:
+
+- candidates are fed one at a time, in preference order, and each one
+  extends a bitset of reachable totals (bit ``s`` set = some subset of the
+  candidates so far sums to ``s``), bucketed to ``resolution`` seconds.
+  One shift-and-or per candidate keeps pools of tens of thousands within
+  milliseconds, and feeding stops as soon as a total within ``tolerance``
+  of the target is reachable by a selection of at most ``max_items``
+  candidates;
+- for each newly reachable total the solver remembers the candidate that
+  first reached it (and how many candidates that selection takes), so a
+  selection is recovered by walking back from the total, and earlier
+  (preferred) candidates win ties;
+- a candidate whose duration already appears often enough to fill the slot
+  on its own adds no new totals and costs only a dict lookup;
+- small pools (up to ``MITM_MAX_ITEMS``) are solved exactly by
+  meet-in-the-middle instead, at full second resolution and honouring
+  ``max_items`` exactly.
+
+Durations are rounded up to the bucket and the target down, so a selection
+never overruns the slot whatever the resolution.
+"""
+
+from __future__ import annotations
+
+import bisect
+import time
+from dataclasses import dataclass
+
+# Pools up to this size are solved by enumerating both halves
+MITM_MAX_ITEMS = 20
+# Reachable totals tried, best first, for one that fits within max_items
+MAX_RECONSTRUCTIONS = 256
+
+
+@dataclass
+class FitSolution:
+    """Indices of the chosen candidates and how good the choice is."""
+
+    picks: list[int]  # indices into the candidates fed, in feed order
+    total: int  # seconds
+    bound: int  # seconds; no selection from the pool can beat this
+    solve_ms: float
+
+    @property
+    def gap(self) -> int:
+        """Seconds between the selection and the proven bound (0 = optimal)."""
+        return max(0, self.bound - self.total)
+
+
+class SubsetSumSolver:
+    """Incremental bounded subset-sum over candidate durations."""
+
+    def __init__(
+        self,
+        target: int,
+        *,
+        tolerance: int = 0,
+        resolution: int = 1,
+        max_items: int | None = None,
+    ) -> None:
+        if resolution < 1:
+            raise ValueError("resolution must be at least 1 second")
+        self.target = max(0, target)
+        self.resolution = resolution
+        self.max_items = max_items
+        self.durations: list[int] = []
+        self._cap = self.target // resolution
+        self._goal = max(0, self._cap - max(0, tolerance) // resolution)
+        self._mask = (1 << (self._cap + 1)) - 1
+        self._reach = 1
+        self._parent = [-1] * (self._cap + 1)
+        # total -> candidates in the selection walked back from it
+        self._counts = [0] * (self._cap + 1)
+        self._limit = self._cap + 1 if max_items is None else max(0, max_items)
+        self._done = self._goal == 0
+        self._weights: list[int] = []
+        # weight -> candidates of that weight fed so far
+        self._copies: dict[int, int] = {}
+        self._started = time.perf_counter()
+
+    def _weight(self, duration: int) -> int:
+        return -(-duration // self.resolution)
+
+    @property
+    def done(self) -> bool:
+        """True once at most ``max_items`` candidates reach a total within tolerance."""
+        return self._done
+
+    def add(self, duration: int) -> bool:
+        """Feed the next candidate; returns ``done``."""
+        index = len(self.durations)
+        weight = self._weight(duration)
+        self.durations.append(duration)
+        self._weights.append(weight)
+        copies = self._copies.get(weight, 0)
+        # Once cap // weight copies are in, another one reaches nothing new
+        if 0 < weight <= self._cap and copies < self._cap // weight:
+            self._copies[weight] = copies + 1
+            reach = self._reach
+            new = ((reach << weight) & self._mask) & ~reach
+            if new:
+                self._reach = reach | new
+                parent, counts, limit = self._parent, self._counts, self._limit
+                for total in _set_bits(new):
+                    parent[total] = index
+                    counts[total] = count = counts[total - weight] + 1
+                    if total >= self._goal and count <= limit:
+                        self._done = True
+        return self._done
+
+    def _walk(self, total: int) -> list[int]:
+        picks = []
+        while total:
+            index = self._parent[total]
+            picks.append(index)
+            total -= self._weights[index]
+        picks.reverse()
+        return picks
+
+    def solve(self, *, exhausted: bool = False) -> FitSolution:
+        """Pick the best selection from the candidates fed so far.
+
+        ``exhausted`` says the pool held no further candidates, which lets
+        the solver prove its answer optimal rather than bounding it by the
+        target.
+        """
+        if len(self.durations) <= MITM_MAX_ITEMS:
+            picks = _meet_in_the_middle(self.durations, self.target, self.max_items)
+            total = sum(self.durations[i] for i in picks)
+            bound = total if exhausted else self.target
+            return FitSolution(picks, total, bound, self._elapsed())
+
+        best = self._reach.bit_length() - 1
+        picks = self._fitting_walk(best)
+        if picks is None:
+            picks = _longest_first(self.durations, self.target, self.max_items)
+        total = sum(self.durations[i] for i in picks)
+
+        bound = self.target
+        if exhausted:
+            # At second resolution the best reachable total is the exact
+            # optimum (ignoring max_items, so still a valid bound)
+            bound = best if self.resolution == 1 else min(self.target, sum(self.durations))
+        return FitSolution(picks, total, bound, self._elapsed())
+
+    def _fitting_walk(self, best: int) -> list[int] | None:
+        reach = self._reach
+        for _ in range(MAX_RECONSTRUCTIONS):
+            if best < 0:
+                break
+            picks = self._walk(best)
+            if self.max_items is None or len(picks) <= self.max_items:
+                return picks
+            reach &= (1 << best) - 1
+            best = reach.bit_length() - 1
+        return None
+
+    def _elapsed(self) -> float:
+        return 1000.0 * (time.perf_counter() - self._started)
+
+
+def _set_bits(value: int) -> list[int]:
+    """Positions of the set bits of a non-negative int, ascending."""
+    if value.bit_count() <= 32:
+        bits = []
+        while value:
+            low = value & -value
+            bits.append(low.bit_length() - 1)
+            value ^= low
+        return bits
+    digits = bin(value)[:1:-1]
+    bits = []
+    pos = digits.find("1")
+    while pos >= 0:
+        bits.append(pos)
+        pos = digits.find("1", pos + 1)
+    return bits
+
+
+def _subset_sums(durations: list[int], offset: int, target: int) -> list[tuple[int, int, int]]:
+    """Every subset total up to ``target`` as (total, count, bitmask of indices)."""
+    sums = [(0, 0, 0)]
+    for i, duration in enumerate(durations):
+        bit = 1 << (offset + i)
+        sums += [(s + duration, c + 1, m | bit) for s, c, m in sums if s + duration <= target]
+    return sums
+
+
+def _meet_in_the_middle(durations: list[int], target: int, max_items: int | None) -> list[int]:
+    half = len(durations) // 2
+    left = _subset_sums(durations[:half], 0, target)
+    right = _subset_sums(durations[half:], half, target)
+    limit = len(durations) if max_items is None else max_items
+
+    # Right-half totals per item count, sorted for bisecting
+    by_count: dict[int, tuple[list[int], list[int]]] = {}
+    for count in range(len(durations) - half + 1):
+        pairs = sorted((s, m) for s, c, m in right if c == count)
+        by_count[count] = ([s for s, _ in pairs], [m for _, m in pairs])
+
+    best_total, best_mask = 0, 0
+    for total, count, mask in left:
+        if count > limit:
+            continue
+        for other, (sums, masks) in by_count.items():
+            if count + other > limit or not sums:
+                continue
+            j = bisect.bisect_right(sums, target - total) - 1
+            if j >= 0 and total + sums[j] > best_total:
+                best_total, best_mask = total + sums[j], mask | masks[j]
+    return [i for i in range(len(durations)) if best_mask >> i & 1]
+
+
+def _longest_first(durations: list[int], target: int, max_items: int | None) -> list[int]:
+    """Greedy fill taking the longest candidates first, for when max_items binds."""
+    picks, total = [], 0
+    for i in sorted(range(len(durations)), key=lambda i: -durations[i]):
+        if max_items is not None and len(picks) >= max_items:
+            break
+        if 0 < durations[i] and total + durations[i] <= target:
+            picks.append(i)
+            total += durations[i]
+    return sorted(picks)
@@ -21,8 +21,12 @@ import aiosqlite
 
 from kryten_playlist.catalog.enhanced_schema import init_enhanced_schema
 from kryten_playlist.catalog.mediacms_connector import MediaCMSConnector
-from kryten_playlist.catalog.models import generate_snapshot_id
+from kryten_playlist.catalog.models import CatalogConnector, generate_snapshot_id
 from kryten_playlist.catalog.title_sanitizer import parse_title
+from kryten_playlist.storage.catalog_meta import mark_catalog_changed
+from kryten_playlist.storage.facets import normalize_facets
+from kryten_playlist.storage.people import backfill_people
+from kryten_playlist.storage.search_cache import invalidate_search_caches
 
 logging.basicConfig(
     level=logging.INFO,
@@ -36,12 +40,18 @@ async def ingest_catalog(
     db_path: str,
     timeout: float = 30.0,
     concurrency: int = 24,
+    *,
+    connector: CatalogConnector | None = None,
 ) -> dict[str, int]:
     """Ingest catalog from MediaCMS into local SQLite database.
 
+    ``connector`` replaces the MediaCMS source (e.g. a ``SynthConnector``
+    for load tests); ``base_url`` is then only used for logging.
+
     Returns dict with counts: {"items": N, "categories": N, "new": N, "updated": N}
     """
-    connector = MediaCMSConnector(base_url=base_url, timeout=timeout, concurrency=concurrency)
+    if connector is None:
+        connector = MediaCMSConnector(base_url=base_url, timeout=timeout, concurrency=concurrency)
     snapshot_id = generate_snapshot_id()
     now = datetime.now(timezone.utc).isoformat()
 
@@ -174,9 +184,12 @@ async def ingest_catalog(
 
             if stats["items"] % 100 == 0:
                 logger.info("Processed %d items...", stats["items"])
+                await mark_catalog_changed(conn)
                 await conn.commit()
 
+        await mark_catalog_changed(conn, snapshot_id=snapshot_id)
         await conn.commit()
+        invalidate_search_caches()
 
     elapsed = datetime.now() - start_time
     total_seconds = elapsed.total_seconds()
@@ -199,6 +212,20 @@ async def ingest_catalog(
     return stats
 
 
+async def reindex_people(db_path: str, *, batch_size: int = 500) -> int:
+    """Rebuild catalog_person/item_person from every item's cast and director."""
+    async with aiosqlite.connect(db_path) as conn:
+        await init_enhanced_schema(conn)
+        return await backfill_people(conn, batch_size=batch_size)
+
+
+async def renormalize_facets(db_path: str) -> int:
+    """Re-map every item's genre/mood/era onto the canonical facet vocabulary."""
+    async with aiosqlite.connect(db_path) as conn:
+        await init_enhanced_schema(conn)
+        return await normalize_facets(conn)
+
+
 async def show_stats(db_path: str) -> None:
     """Show statistics about the catalog database."""
     if not Path(db_path).exists():
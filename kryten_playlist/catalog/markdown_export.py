@@ -7,6 +7,8 @@ from typing import Any
 
 import aiosqlite
 
+from kryten_playlist.storage.id_lookup import fetch_by_video_ids
+
 
 async def export_playlist_markdown(
     db_path: str,
@@ -34,8 +36,6 @@ async def export_playlist_markdown(
     if not video_ids:
         return f"# {playlist_name}\n\n*Empty playlist*\n"
 
-    placeholders = ",".join("?" * len(video_ids))
-
     lines = [
         f"# {playlist_name}",
         "",
@@ -49,8 +49,9 @@ async def export_playlist_markdown(
         conn.row_factory = aiosqlite.Row
 
         # Fetch item details
-        cursor = await conn.execute(
-            f"""
+        item_rows = await fetch_by_video_ids(
+            conn,
+            """
             SELECT
                 video_id,
                 sanitized_title,
@@ -64,26 +65,29 @@ async def export_playlist_markdown(
                 cast_list,
                 director
             FROM catalog_item
-            WHERE video_id IN ({placeholders})
+            WHERE video_id IN {ids}
             """,
             video_ids,
+            private_connection=True,
         )
-        rows = {row["video_id"]: dict(row) for row in await cursor.fetchall()}
+        rows = {row["video_id"]: dict(row) for row in item_rows}
 
         # Fetch tags for items
         tags_by_video: dict[str, list[str]] = {}
         if include_tags:
-            cursor = await conn.execute(
-                f"""
+            tag_rows = await fetch_by_video_ids(
+                conn,
+                """
                 SELECT cit.video_id, ct.name
                 FROM catalog_item_tag cit
                 JOIN catalog_tag ct ON cit.tag_id = ct.id
-                WHERE cit.video_id IN ({placeholders})
+                WHERE cit.video_id IN {ids}
                 ORDER BY cit.confidence DESC
                 """,
                 video_ids,
+                private_connection=True,
             )
-            for row in await cursor.fetchall():
+            for row in tag_rows:
                 tags_by_video.setdefault(row[0], []).append(row[1])
 
     # Generate markdown in playlist order
@@ -10,6 +10,7 @@ from typing import Any, AsyncIterator, Protocol
 
 DEFAULT_MEDIACMS_BASE_URL = "https://www.420grindhouse.com"
 VIDEO_ID_PATTERN = re.compile(r"^[a-zA-Z0-9_-]+$")
+MANIFEST_PATH_PATTERN = re.compile(r"/api/v1/media/cytube/([a-zA-Z0-9_-]+)\.json")
 
 
 def _now_iso() -> str:
@@ -45,6 +46,19 @@ def generate_manifest_url(video_id: str, base_url: str = DEFAULT_MEDIACMS_BASE_U
     return f"{base}/api/v1/media/cytube/{vid}.json?format=json"
 
 
+def video_id_from_media_id(media_id: str) -> str | None:
+    """Recover the catalog video ID from a CyTube media id.
+
+    Items queued from the catalog carry their manifest URL as the media id
+    (see ``generate_manifest_url``); a bare video ID is returned as is.
+    """
+    mid = (media_id or "").strip()
+    match = MANIFEST_PATH_PATTERN.search(mid)
+    if match:
+        return match.group(1)
+    return mid if VIDEO_ID_PATTERN.match(mid) else None
+
+
 @dataclass(frozen=True)
 class CatalogItem:
     """A single catalog item as emitted by a connector."""
@@ -10,6 +10,9 @@ from typing import AsyncIterator
 import aiosqlite
 
 from kryten_playlist.catalog.models import CatalogItem
+from kryten_playlist.storage.catalog_meta import mark_catalog_changed
+from kryten_playlist.storage.catalog_schema import invalidate_catalog_schema
+from kryten_playlist.storage.search_cache import invalidate_search_caches
 
 logger = logging.getLogger(__name__)
 
@@ -94,10 +97,13 @@ async def rebuild_catalog(
 
             count += 1
 
+        await mark_catalog_changed(conn, snapshot_id=snapshot_id)
         await conn.execute("COMMIT")
     except Exception:
         await conn.execute("ROLLBACK")
         raise
 
+    invalidate_catalog_schema()
+    invalidate_search_caches()
     logger.info("Catalog rebuild complete: %d items for snapshot_id=%s", count, snapshot_id)
     return count
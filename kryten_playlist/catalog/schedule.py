@@ -0,0 +1,266 @@
+"""Plan a day or week of programming blocks in one pass.
+
+Each ``ScheduleBlock`` is a time slot with its own filters. ``plan_schedule``
+loads the candidate items once into a single pool and fills every block
+from it with the duration-fitting solver, drawing each block's candidates
+from the pool in seeded random order, so no item is scheduled twice and no
+block costs a query of its own.
+
+The catalog's scheduling flags decide where an item may go:
+
+- ``weekend_only`` items only play in blocks starting on a Saturday or Sunday;
+- ``prime_time_only`` items only play in blocks overlapping prime time
+  (``PRIME_TIME``, in the block's own timezone);
+- ``holiday_content`` items only play in blocks marked ``holiday``, and
+  holiday blocks play nothing else.
+
+Eligibility is computed as bitmasks over the pool (one per flag and filter
+value), and the blocks with the fewest eligible items are filled first so
+the general blocks do not use up what a narrow block needs.
+"""
+
+from __future__ import annotations
+
+import random
+import time as _time
+from dataclasses import dataclass, field, replace
+from datetime import datetime, time, timedelta
+from typing import Iterator
+
+import aiosqlite
+
+from kryten_playlist.catalog.duration_fitting import (
+    DEFAULT_TIME_BUDGET,
+    FitResult,
+    fit_pool,
+)
+from kryten_playlist.storage.catalog_index import rows_mask, shuffled_rows
+from kryten_playlist.storage.facets import FACET_TABLES, canonical_facet
+
+# Local hours that count as prime time
+PRIME_TIME = (time(19, 0), time(23, 0))
+
+_POOL_COLUMNS = (
+    "video_id, sanitized_title, duration_seconds, is_tv, genre_id, mood_id, era_id, "
+    "weekend_only, prime_time_only, holiday_content"
+)
+
+
+@dataclass
+class ScheduleBlock:
+    """One slot of a schedule and what may play in it."""
+
+    start: datetime
+    end: datetime
+    name: str = ""
+    filter_tv: bool | None = None
+    filter_genre: str | None = None
+    filter_mood: str | None = None
+    filter_era: str | None = None
+    holiday: bool = False
+    max_items: int = 100
+    tolerance: int = 0
+
+    @property
+    def target_seconds(self) -> int:
+        return max(0, int((self.end - self.start).total_seconds()))
+
+    @property
+    def is_weekend(self) -> bool:
+        return self.start.weekday() >= 5
+
+    @property
+    def is_prime_time(self) -> bool:
+        """Whether the block overlaps prime time on the day it starts."""
+        day = self.start.date()
+        opens = datetime.combine(day, PRIME_TIME[0], tzinfo=self.start.tzinfo)
+        closes = datetime.combine(day, PRIME_TIME[1], tzinfo=self.start.tzinfo)
+        return self.start < closes and self.end > opens
+
+
+@dataclass
+class BlockPlan:
+    """The fill chosen for one block."""
+
+    block: ScheduleBlock
+    result: FitResult
+    eligible: int  # unscheduled pool items the block could use when filled
+
+    @property
+    def utilization(self) -> float:
+        return self.result.utilization
+
+
+@dataclass
+class SchedulePlan:
+    """Every block's fill, in start order."""
+
+    blocks: list[BlockPlan] = field(default_factory=list)
+    pool_size: int = 0
+    solve_ms: float = 0.0
+
+    @property
+    def total_duration(self) -> int:
+        return sum(b.result.total_duration for b in self.blocks)
+
+    @property
+    def target_duration(self) -> int:
+        return sum(b.result.target_duration for b in self.blocks)
+
+    @property
+    def utilization(self) -> float:
+        """Percentage of all scheduled time that is filled."""
+        if self.target_duration == 0:
+            return 0.0
+        return min(100.0, 100.0 * self.total_duration / self.target_duration)
+
+
+def repeat_daily(blocks: list[ScheduleBlock], days: int = 7) -> list[ScheduleBlock]:
+    """The given blocks on each of ``days`` consecutive days."""
+    return [
+        replace(block, start=block.start + timedelta(days=d), end=block.end + timedelta(days=d))
+        for d in range(days)
+        for block in blocks
+    ]
+
+
+def _draw(pool: list[tuple], mask: int, rng: random.Random, drawn: list[int]) -> Iterator[tuple]:
+    """Fit candidates from the pool rows in ``mask``, noting each row drawn."""
+    for i in shuffled_rows(mask, rng):
+        drawn.append(i)
+        yield pool[i][:3]
+
+
+async def _facet_ids(
+    conn: aiosqlite.Connection, blocks: list[ScheduleBlock]
+) -> dict[tuple[str, str], int | None]:
+    """Lookup ids of every facet value the blocks filter on."""
+    ids: dict[tuple[str, str], int | None] = {}
+    for block in blocks:
+        for facet, value in (
+            ("genre", block.filter_genre),
+            ("mood", block.filter_mood),
+            ("era", block.filter_era),
+        ):
+            name = canonical_facet(facet, value) if value else None
+            if name and (facet, name) not in ids:
+                cursor = await conn.execute(
+                    f"SELECT id FROM {FACET_TABLES[facet]} WHERE name = ?", (name,)
+                )
+                row = await cursor.fetchone()
+                ids[(facet, name)] = row[0] if row else None
+    return ids
+
+
+async def plan_schedule(
+    conn: aiosqlite.Connection,
+    blocks: list[ScheduleBlock],
+    *,
+    seed: int | None = None,
+    resolution: int = 1,
+    time_budget: float = DEFAULT_TIME_BUDGET,
+) -> SchedulePlan:
+    """Fill every block from one shared candidate pool, never repeating an item.
+
+    Args:
+        conn: Database connection.
+        blocks: The slots to fill; they must not overlap.
+        seed: Seed for the candidate draws; the same seed repeats the same plan.
+        resolution: Passed to the fitting solver (seconds per duration bucket).
+        time_budget: Seconds the solver may spend on each block.
+
+    Returns:
+        SchedulePlan with a BlockPlan per block, in start order.
+
+    Raises:
+        ValueError: If two blocks overlap.
+    """
+    started = _time.perf_counter()
+    ordered = sorted(blocks, key=lambda b: b.start)
+    for earlier, later in zip(ordered, ordered[1:]):
+        if later.start < earlier.end:
+            raise ValueError(f"schedule blocks overlap at {later.start.isoformat()}")
+    if not ordered:
+        return SchedulePlan()
+
+    facet_ids = await _facet_ids(conn, ordered)
+    cursor = await conn.execute(
+        f"SELECT {_POOL_COLUMNS} FROM catalog_item "
+        "WHERE duration_seconds IS NOT NULL AND duration_seconds > 0 AND duration_seconds <= ?",
+        (max(b.target_seconds for b in ordered),),
+    )
+    pool = [tuple(row) for row in await cursor.fetchall()]
+    size = len(pool)
+    rng = random.Random(seed)
+
+    # Pool positions carrying each flag and each facet id the blocks ask for
+    tv_rows: list[int] = []
+    weekend_rows: list[int] = []
+    prime_rows: list[int] = []
+    holiday_rows: list[int] = []
+    wanted = {(facet, id_) for (facet, _name), id_ in facet_ids.items() if id_ is not None}
+    facet_rows: dict[tuple[str, int], list[int]] = {key: [] for key in wanted}
+    for i, (_vid, _title, _duration, is_tv, genre_id, mood_id, era_id, *flags) in enumerate(pool):
+        if is_tv:
+            tv_rows.append(i)
+        for flag, rows in zip(flags, (weekend_rows, prime_rows, holiday_rows)):
+            if flag:
+                rows.append(i)
+        if wanted:
+            for key in (("genre", genre_id), ("mood", mood_id), ("era", era_id)):
+                if key in facet_rows:
+                    facet_rows[key].append(i)
+    everything = (1 << size) - 1
+    tv = rows_mask(tv_rows, size)
+    weekend_only = rows_mask(weekend_rows, size)
+    prime_time_only = rows_mask(prime_rows, size)
+    holiday = rows_mask(holiday_rows, size)
+    facet_masks = {key: rows_mask(rows, size) for key, rows in facet_rows.items()}
+
+    def eligible(block: ScheduleBlock) -> int:
+        mask = everything
+        if block.filter_tv is not None:
+            mask &= tv if block.filter_tv else ~tv
+        if not block.is_weekend:
+            mask &= ~weekend_only
+        if not block.is_prime_time:
+            mask &= ~prime_time_only
+        mask &= holiday if block.holiday else ~holiday
+        for facet, value in (
+            ("genre", block.filter_genre),
+            ("mood", block.filter_mood),
+            ("era", block.filter_era),
+        ):
+            name = canonical_facet(facet, value) if value else None
+            if name:
+                id_ = facet_ids[(facet, name)]
+                mask &= facet_masks.get((facet, id_), 0) if id_ is not None else 0
+        return mask
+
+    masks = [eligible(block) for block in ordered]
+    plans: list[BlockPlan | None] = [None] * len(ordered)
+    used = 0
+    # Narrowest blocks first
+    for n in sorted(range(len(ordered)), key=lambda n: (masks[n].bit_count(), n)):
+        block = ordered[n]
+        available = masks[n] & ~used
+        drawn: list[int] = []
+        result = fit_pool(
+            _draw(pool, available, rng, drawn),
+            block.target_seconds,
+            tolerance=block.tolerance,
+            resolution=resolution,
+            max_items=block.max_items,
+            time_budget=time_budget,
+        )
+        picked = {item["video_id"] for item in result.items}
+        for i in drawn:
+            if pool[i][0] in picked:
+                used |= 1 << i
+        plans[n] = BlockPlan(block=block, result=result, eligible=available.bit_count())
+
+    return SchedulePlan(
+        blocks=[p for p in plans if p is not None],
+        pool_size=size,
+        solve_ms=1000.0 * (_time.perf_counter() - started),
+    )
@@ -0,0 +1,446 @@
+"""Synthetic catalogs for load testing and benchmarks.
+
+Generates a reproducible catalog of any size that looks like the real one
+from the code's point of view:
+
+- raw titles carry the noise ``title_sanitizer`` has to strip (dotted and
+  underscored filenames, release tags, codecs, extensions, ``1x02`` episode
+  codes), so ingest exercises the real parsing path;
+- TV series come as whole seasons of consecutive episodes, movies as
+  singletons, in a configurable ratio;
+- categories use MediaCMS's numbered names ("3.Horror Movies") with a skewed
+  distribution, plus a few uncategorized items;
+- most items carry enrichment (genre, mood, era, cast, director, synopsis,
+  tags, scheduling flags) drawn from the canonical facet vocabulary, and
+  cast members are reused across the catalog with a long tail.
+
+The same seed always yields the same catalog. ``SynthConnector`` emits the
+raw ``CatalogItem``s like any ``CatalogConnector``; ``write_synth_catalog``
+loads an enriched catalog straight into an empty enhanced-schema database.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Iterator, Optional
+
+import aiosqlite
+
+from kryten_playlist.catalog.enhanced_schema import init_enhanced_schema
+from kryten_playlist.catalog.models import CatalogItem, generate_snapshot_id
+from kryten_playlist.catalog.title_sanitizer import parse_title
+from kryten_playlist.storage.catalog_meta import mark_catalog_changed
+from kryten_playlist.storage.facets import GENRE_VOCABULARY, MOOD_VOCABULARY, facet_id
+from kryten_playlist.storage.people import ROLE_ACTOR, ROLE_DIRECTOR, person_key, surname_key
+from kryten_playlist.storage.search_cache import invalidate_search_caches
+from kryten_playlist.storage.trigram import TRIGRAM_TABLE
+
+# Title words; none of them collide with the release tags title_sanitizer strips
+_WORDS = (
+    "night dead dawn day star space island lake house return revenge city dark blood moon "
+    "shadow zombie alien robot mountain river love last first killer ghost planet war "
+    "devil witch vampire mummy beast creature swamp jungle desert ocean storm fire ice "
+    "steel iron golden silver crimson black white red blue green savage deadly secret "
+    "lost forbidden hidden haunted cursed frozen burning midnight twilight thunder "
+    "dragon tiger wolf spider serpent hawk cobra phantom specter terror horror fury"
+).split()
+_SMALL = ("of", "the", "from", "in", "and", "to", "beyond", "under")
+_FIRST = (
+    "Ken Ann Joe Mia Sam Liv Rex Eve Max Ida Lou Ada Ray Joy Gus Fay Vic Bea Hal Nan "
+    "Roy Dot Wes Kay Cal Meg Ned Zoe Abe Gil Lee Pam Tom Sue Ike Viv Moe Lyn Art Deb"
+).split()
+_LAST = (
+    "Foree Jones Romero Carpenter Hooper Craven Cunningham Raimi Argento Fulci Bava Corman "
+    "Castle Whale Browning Tourneur Lewton Siegel Fisher Sangster Francis Baker Lee Cushing "
+    "Price Karloff Lugosi Chaney Rathbone Atwill Zucco Naish Carradine Lorre Rains Bond"
+).split()
+_RESOLUTIONS = ("1080p", "720p", "480p", "2160p")
+_SOURCES = ("BluRay", "WEBRip", "DVDRip", "HDTV", "BDRip", "WEB-DL")
+_CODECS = ("x264", "x265", "HEVC", "XviD")
+_EXTENSIONS = ("mkv", "mp4", "avi", "m4v")
+_RATINGS = ("G", "PG", "PG-13", "R", "NR")
+_TV_RATINGS = ("TV-G", "TV-PG", "TV-14", "TV-MA")
+_TAGS = (
+    "cult classic", "gore", "creature feature", "b-movie", "so bad its good", "practical effects",
+    "drive-in", "holiday", "road movie", "found footage", "time travel", "heist",
+)
+
+# MediaCMS category -> (weight, genres it leans towards); TV items use the TV ones
+MOVIE_CATEGORIES: dict[str, tuple[int, tuple[str, ...]]] = {
+    "1.Action & Adventure": (14, ("Action", "Adventure", "Martial Arts", "War", "Western")),
+    "2.Sci-Fi & Fantasy": (12, ("Science Fiction", "Fantasy")),
+    "3.Horror Movies": (22, ("Horror", "Thriller")),
+    "4.Comedy": (12, ("Comedy",)),
+    "5.Cult & Exploitation": (10, ("Exploitation", "Crime", "Horror")),
+    "6.Drama & Crime": (10, ("Drama", "Crime", "Mystery", "Romance")),
+    "9.Documentaries": (3, ("Documentary",)),
+}
+TV_CATEGORIES: dict[str, tuple[int, tuple[str, ...]]] = {
+    "7.TV Shows": (20, ("Drama", "Comedy", "Science Fiction", "Mystery", "Crime")),
+    "8.Cartoons": (6, ("Animation", "Family")),
+}
+
+_CATEGORY_PREFIX = re.compile(r"^\d+\.\s*")
+_ID_ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_ID_SPACE = len(_ID_ALPHABET) ** 9
+# Odd and not a multiple of 31, so coprime with the id space: ids never repeat
+_ID_STRIDE = 2_487_947_369_287_701
+
+
+@dataclass(frozen=True)
+class SynthOptions:
+    """Shape of a synthetic catalog."""
+
+    count: int
+    seed: int = 0
+    tv_ratio: float = 0.35  # share of items that are TV episodes
+    enriched_ratio: float = 0.9  # share of items with LLM fields filled
+    uncategorized_ratio: float = 0.04
+
+
+@dataclass(frozen=True)
+class SynthItem:
+    """One generated item: what a connector emits plus its enrichment."""
+
+    item: CatalogItem
+    title_base: str  # clean title the raw title was dirtied from
+    created_at: str
+    enrichment: Optional[dict[str, Any]] = None
+    tags: tuple[str, ...] = field(default_factory=tuple)
+
+
+def _video_id(index: int, seed: int) -> str:
+    n = (index * _ID_STRIDE + seed * 7919) % _ID_SPACE
+    chars = []
+    for _ in range(9):
+        n, r = divmod(n, len(_ID_ALPHABET))
+        chars.append(_ID_ALPHABET[r])
+    return "".join(chars)
+
+
+def _weighted(rng: random.Random, table: dict[str, tuple[int, tuple[str, ...]]]) -> str:
+    names = list(table)
+    return rng.choices(names, weights=[weight for weight, _ in table.values()])[0]
+
+
+def _title(rng: random.Random) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.choice((1, 2, 2, 3, 3, 4)))]
+    if len(words) > 1 and rng.random() < 0.4:
+        words.insert(rng.randrange(1, len(words)), rng.choice(_SMALL))
+    if rng.random() < 0.25:
+        words.insert(0, "the")
+    title = " ".join(w.capitalize() if i == 0 or w not in _SMALL else w for i, w in enumerate(words))
+    if rng.random() < 0.08:
+        title += f" {rng.choice(('II', 'III', 'Part 2', 'Returns', 'Reborn'))}"
+    return title
+
+
+def _movie_filename(rng: random.Random, title: str, year: int) -> str:
+    dotted = title.replace(" ", ".")
+    style = rng.random()
+    if style < 0.3:
+        return f"{dotted}.{year}.{rng.choice(_RESOLUTIONS)}.{rng.choice(_SOURCES)}.{rng.choice(_CODECS)}.{rng.choice(_EXTENSIONS)}"
+    if style < 0.5:
+        return f"{title} ({year})"
+    if style < 0.65:
+        return f"{title} {year} [{rng.choice(_RESOLUTIONS)}]"
+    if style < 0.8:
+        return f"{title.replace(' ', '_')}_{year}_{rng.choice(_SOURCES)}.{rng.choice(_EXTENSIONS)}"
+    if style < 0.9:
+        return f"  {title} - {year} "
+    return title
+
+
+def _episode_filename(rng: random.Random, show: str, season: int, episode: int, episode_title: str) -> str:
+    style = rng.random()
+    if style < 0.35:
+        dotted = f"{show}.S{season:02d}E{episode:02d}.{episode_title}".replace(" ", ".")
+        return f"{dotted}.{rng.choice(_RESOLUTIONS)}.HDTV.{rng.choice(_CODECS)}.{rng.choice(_EXTENSIONS)}"
+    if style < 0.6:
+        return f"{show} - {season}x{episode:02d} - {episode_title}"
+    if style < 0.8:
+        return f"{show} S{season:02d}E{episode:02d}"
+    return f"{show.replace(' ', '_')}_S{season:02d}E{episode:02d}_{episode_title.replace(' ', '_')}"
+
+
+class _People:
+    """Zipf-ish cast pool: a few names everywhere, a long tail of one-offs."""
+
+    def __init__(self, rng: random.Random, size: int):
+        names = [f"{first} {last}" for first in _FIRST for last in _LAST]
+        rng.shuffle(names)
+        self._names = names[: max(10, size)]
+        self._weights = [1.0 / (rank + 1) for rank in range(len(self._names))]
+
+    def pick(self, rng: random.Random, k: int) -> list[str]:
+        picked: dict[str, None] = {}
+        while len(picked) < k:
+            picked.setdefault(rng.choices(self._names, weights=self._weights)[0], None)
+        return list(picked)
+
+
+def _enrichment(
+    rng: random.Random,
+    people: _People,
+    *,
+    category: Optional[str],
+    categories: dict[str, tuple[int, tuple[str, ...]]],
+    year: int,
+    is_tv: bool,
+    title: str,
+    enriched_at: str,
+) -> dict[str, Any]:
+    leaning = categories.get(category, (0, ()))[1]
+    genre = rng.choice(leaning) if leaning and rng.random() < 0.8 else rng.choice(list(GENRE_VOCABULARY))
+    return {
+        "genre": genre,
+        "mood": rng.choice(list(MOOD_VOCABULARY)),
+        "era": f"{year // 10 * 10}s" if rng.random() < 0.9 else "Classic",
+        "cast_list": json.dumps(people.pick(rng, rng.randint(2, 5))),
+        "director": people.pick(rng, 1)[0],
+        "synopsis": f"{title}: a {genre.lower()} {'series' if is_tv else 'feature'} "
+        f"about the {rng.choice(_WORDS)} and the {rng.choice(_WORDS)}.",
+        "content_rating": rng.choice(_TV_RATINGS if is_tv else _RATINGS),
+        "weekend_only": int(rng.random() < 0.05),
+        "prime_time_only": int(rng.random() < 0.08),
+        "holiday_content": int(rng.random() < 0.03),
+        "llm_enriched_at": enriched_at,
+    }
+
+
+def synth_items(options: SynthOptions) -> Iterator[SynthItem]:
+    """Generate ``options.count`` items, deterministically for a seed."""
+    rng = random.Random(options.seed)
+    people = _People(rng, max(50, options.count // 40))
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    index = 0
+    tv_items = 0
+
+    def created() -> str:
+        # Uploads spread over two years, in roughly increasing order
+        offset = index / max(options.count, 1) * 730 + rng.uniform(-3, 3)
+        return (start + timedelta(days=max(0.0, offset))).isoformat()
+
+    def category_for(table: dict[str, tuple[int, tuple[str, ...]]]) -> Optional[str]:
+        if rng.random() < options.uncategorized_ratio:
+            return None
+        return _weighted(rng, table)
+
+    while index < options.count:
+        year = int(min(2024, max(1920, rng.gauss(1982, 18))))
+        # A series adds dozens of episodes at once; start one whenever TV has
+        # fallen behind its share so the ratio holds at any catalog size
+        if tv_items < options.tv_ratio * (index + 1):
+            show = _title(rng)
+            category = category_for(TV_CATEGORIES)
+            half_hour = rng.random() < 0.5
+            enriched = rng.random() < options.enriched_ratio
+            for season in range(1, rng.choice((1, 1, 2, 3, 4, 6)) + 1):
+                for episode in range(1, rng.randint(6, 22) + 1):
+                    if index >= options.count:
+                        break
+                    episode_title = _title(rng)
+                    runtime = rng.randint(21 * 60, 25 * 60) if half_hour else rng.randint(42 * 60, 50 * 60)
+                    yield SynthItem(
+                        item=CatalogItem(
+                            video_id=_video_id(index, options.seed),
+                            title=_episode_filename(rng, show, season, episode, episode_title),
+                            categories=[category] if category else [],
+                            mediacms_category=category,
+                            sanitized_category=_CATEGORY_PREFIX.sub("", category) if category else None,
+                            duration_seconds=runtime,
+                            thumbnail_url=f"https://media.example.invalid/thumbs/{index}.jpg",
+                        ),
+                        title_base=show,
+                        created_at=created(),
+                        enrichment=_enrichment(
+                            rng, people, category=category, categories=TV_CATEGORIES, year=year,
+                            is_tv=True, title=show, enriched_at=created(),
+                        ) if enriched else None,
+                        tags=tuple(rng.sample(_TAGS, rng.randint(0, 2))) if enriched else (),
+                    )
+                    index += 1
+                    tv_items += 1
+                year += 1
+            continue
+
+        title = _title(rng)
+        category = category_for(MOVIE_CATEGORIES)
+        runtime = int(min(220, max(55, rng.gauss(98, 16)))) * 60 + rng.randint(0, 59)
+        enriched = rng.random() < options.enriched_ratio
+        yield SynthItem(
+            item=CatalogItem(
+                video_id=_video_id(index, options.seed),
+                title=_movie_filename(rng, title, year),
+                categories=[category] if category else [],
+                mediacms_category=category,
+                sanitized_category=_CATEGORY_PREFIX.sub("", category) if category else None,
+                # A few uploads never had their duration probed
+                duration_seconds=runtime if rng.random() > 0.02 else None,
+                thumbnail_url=f"https://media.example.invalid/thumbs/{index}.jpg",
+            ),
+            title_base=title,
+            created_at=created(),
+            enrichment=_enrichment(
+                rng, people, category=category, categories=MOVIE_CATEGORIES, year=year,
+                is_tv=False, title=title, enriched_at=created(),
+            ) if enriched else None,
+            tags=tuple(rng.sample(_TAGS, rng.randint(0, 3))) if enriched else (),
+        )
+        index += 1
+
+
+class SynthConnector:
+    """``CatalogConnector`` emitting a synthetic catalog's raw items."""
+
+    def __init__(self, count: int, *, seed: int = 0, tv_ratio: float = 0.35):
+        self._options = SynthOptions(count=count, seed=seed, tv_ratio=tv_ratio)
+
+    async def iter_items(self) -> AsyncIterator[CatalogItem]:
+        for synth in synth_items(self._options):
+            yield synth.item
+
+
+_ITEM_COLUMNS = (
+    "video_id", "raw_title", "thumbnail_url", "duration_seconds", "sanitized_title", "title_base",
+    "year", "season", "episode", "episode_title", "is_tv", "synopsis", "cast_list", "director",
+    "genre", "mood", "era", "genre_id", "mood_id", "era_id", "content_rating", "weekend_only",
+    "prime_time_only", "holiday_content", "snapshot_id", "created_at", "updated_at",
+    "llm_enriched_at", "mediacms_category", "sanitized_category",
+)
+
+
+async def write_synth_catalog(
+    conn: aiosqlite.Connection,
+    options: SynthOptions,
+    *,
+    snapshot_id: Optional[str] = None,
+    batch_size: int = 5000,
+) -> int:
+    """Load a synthetic, enriched catalog into an empty database and commit.
+
+    Rows are written the way ingest plus enrichment would leave them (parsed
+    titles, facet ids, people, categories, tags) but in bulk: the per-row
+    FTS and trigram sync triggers are dropped for the load, and
+    ``init_enhanced_schema`` recreates them and rebuilds both indexes once
+    at the end. Raises ValueError if ``catalog_item`` already has rows.
+    Returns the number of items written.
+    """
+    await init_enhanced_schema(conn)
+    cursor = await conn.execute("SELECT EXISTS(SELECT 1 FROM catalog_item)")
+    if (await cursor.fetchone())[0]:
+        raise ValueError("catalog_item is not empty; synthesize into a new database")
+
+    snapshot_id = snapshot_id or generate_snapshot_id()
+    await conn.execute("DROP TRIGGER IF EXISTS catalog_fts_insert")
+    await conn.execute(f"DROP TRIGGER IF EXISTS {TRIGRAM_TABLE}_insert")
+
+    facet_ids: dict[tuple[str, str], int] = {}
+    category_ids: dict[str, int] = {}
+    person_ids: dict[str, int] = {}
+    tag_ids: dict[str, int] = {}
+
+    async def lookup(cache: dict, key: Any, insert_sql: str, select_sql: str, params: tuple) -> int:
+        if key not in cache:
+            await conn.execute(insert_sql, params)
+            cursor = await conn.execute(select_sql, params[:1])
+            cache[key] = (await cursor.fetchone())[0]
+        return cache[key]
+
+    async def person(name: str) -> int:
+        key = person_key(name)
+        return await lookup(
+            person_ids, key,
+            "INSERT OR IGNORE INTO catalog_person (name_key, name, surname_key) VALUES (?, ?, ?)",
+            "SELECT id FROM catalog_person WHERE name_key = ?",
+            (key, name, surname_key(key)),
+        )
+
+    count = 0
+    items_sql = (
+        f"INSERT INTO catalog_item ({', '.join(_ITEM_COLUMNS)}) "
+        f"VALUES ({', '.join('?' * len(_ITEM_COLUMNS))})"
+    )
+    batch: list[SynthItem] = []
+
+    async def flush() -> None:
+        rows, links, credits, tagged = [], [], [], []
+        for synth in batch:
+            item, data = synth.item, synth.enrichment or {}
+            parsed = parse_title(item.title)
+            ids = {}
+            for facet in ("genre", "mood", "era"):
+                name = data.get(facet)
+                if name and (facet, name) not in facet_ids:
+                    facet_ids[(facet, name)] = await facet_id(conn, facet, name)
+                ids[facet] = facet_ids.get((facet, name))
+            rows.append((
+                item.video_id, item.title, item.thumbnail_url, item.duration_seconds,
+                parsed.sanitized, parsed.title_base, parsed.year, parsed.season, parsed.episode,
+                parsed.episode_title, int(parsed.is_tv), data.get("synopsis"), data.get("cast_list"),
+                data.get("director"), data.get("genre"), data.get("mood"), data.get("era"),
+                ids["genre"], ids["mood"], ids["era"], data.get("content_rating"),
+                data.get("weekend_only", 0), data.get("prime_time_only", 0),
+                data.get("holiday_content", 0), snapshot_id, synth.created_at,
+                data.get("llm_enriched_at", synth.created_at), data.get("llm_enriched_at"),
+                item.mediacms_category, item.sanitized_category,
+            ))
+            for name in item.categories:
+                category_id = await lookup(
+                    category_ids, name,
+                    "INSERT OR IGNORE INTO catalog_category (name) VALUES (?)",
+                    "SELECT id FROM catalog_category WHERE name = ?",
+                    (name,),
+                )
+                links.append((item.video_id, category_id))
+            if data:
+                for billing, name in enumerate(json.loads(data["cast_list"])):
+                    credits.append((item.video_id, await person(name), ROLE_ACTOR, billing))
+                credits.append((item.video_id, await person(data["director"]), ROLE_DIRECTOR, 0))
+            for name in synth.tags:
+                tag_id = await lookup(
+                    tag_ids, name,
+                    "INSERT OR IGNORE INTO catalog_tag (name, is_llm_generated) VALUES (?, 1)",
+                    "SELECT id FROM catalog_tag WHERE name = ?",
+                    (name,),
+                )
+                tagged.append((item.video_id, tag_id))
+
+        await conn.executemany(items_sql, rows)
+        await conn.executemany(
+            "INSERT INTO catalog_item_category (video_id, category_id) VALUES (?, ?)", links
+        )
+        await conn.executemany(
+            "INSERT OR IGNORE INTO item_person (video_id, person_id, role, billing) VALUES (?, ?, ?, ?)",
+            credits,
+        )
+        await conn.executemany(
+            "INSERT INTO catalog_item_tag (video_id, tag_id, confidence) VALUES (?, ?, 0.9)", tagged
+        )
+        await conn.commit()
+        batch.clear()
+
+    for synth in synth_items(options):
+        batch.append(synth)
+        count += 1
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+
+    # Restores the sync triggers and rebuilds FTS and trigram indexes
+    await init_enhanced_schema(conn)
+    await mark_catalog_changed(conn, snapshot_id=snapshot_id)
+    await conn.commit()
+    invalidate_search_caches()
+    return count
+
+
+async def load_synth_catalog(db_path: str, options: SynthOptions) -> int:
+    """Open ``db_path`` and load a synthetic catalog into it."""
+    async with aiosqlite.connect(db_path) as conn:
+        return await write_synth_catalog(conn, options)
@@ -19,7 +19,7 @@ _ENCODING = re.compile(
     r"1080p|720p|480p|2160p|4k|uhd|"
     r"bluray|blu-ray|bdrip|brrip|dvdrip|hdtv|webrip|web-dl|webdl|hdrip|"
     r"aac|ac3|dts|flac|mp3|"
-    r"5\.1|7\.1|"
+    r"(?<!\d)[57]\.1(?!\d)|"  # audio channels, not the tail of "1965.1080p"
     r"repack|proper|extended|unrated|directors\.?cut|"
     r"yify|yts|rarbg|ettv|eztv|lol|dimension|"
     r"\d{3,4}mb)"
@@ -70,6 +70,94 @@ class Config:
         """Get SQLite catalog database path."""
         return self.get("sqlite_path", "./data/catalog.sqlite3")
 
+    @property
+    def sqlite_read_pool_size(self) -> int:
+        """Read-only SQLite connections used for catalog queries (0 = share the writer)."""
+        return max(0, int(self.get("sqlite_read_pool_size", 4)))
+
+    @property
+    def catalog_index_enabled(self) -> bool:
+        """Serve item lookups from an in-memory columnar copy of the catalog."""
+        return bool(self.get("catalog_index_enabled", False))
+
+    @property
+    def catalog_index_memory_mb(self) -> int:
+        """Memory budget for the in-memory catalog index; it is not loaded if larger."""
+        return max(1, int(self.get("catalog_index_memory_mb", 256)))
+
+    @property
+    def catalog_index_poll_seconds(self) -> float:
+        """How often to check the catalog version for an index reload."""
+        return max(1.0, float(self.get("catalog_index_poll_seconds", 30)))
+
+    @property
+    def catalog_search_cache_size(self) -> int:
+        """Max cached search pages/category lists (0 disables the result cache)."""
+        return max(0, int(self.get("catalog_search_cache_size", 512)))
+
+    @property
+    def catalog_search_cache_ttl_seconds(self) -> float:
+        """How long a cached search result may be served."""
+        return max(1.0, float(self.get("catalog_search_cache_ttl_seconds", 300)))
+
+    @property
+    def fit_pool_cache_size(self) -> int:
+        """Max cached duration-fitting candidate pools (0 disables the pool cache)."""
+        return max(0, int(self.get("fit_pool_cache_size", 8)))
+
+    @property
+    def catalog_suggest_enabled(self) -> bool:
+        """Serve title autocomplete from an in-memory prefix index."""
+        return bool(self.get("catalog_suggest_enabled", True))
+
+    @property
+    def catalog_suggest_plays_refresh_seconds(self) -> float:
+        """How often autocomplete re-ranks suggestions by play count."""
+        return max(1.0, float(self.get("catalog_suggest_plays_refresh_seconds", 300)))
+
+    @property
+    def popularity_refresh_seconds(self) -> float:
+        """How often play/like counts are copied into the search ranking table."""
+        return max(10.0, float(self.get("popularity_refresh_seconds", 300)))
+
+    @property
+    def auto_dj_enabled(self) -> bool:
+        """Append fitted items from the catalog whenever the queue runs low."""
+        return bool(self.get("auto_dj_enabled", False))
+
+    @property
+    def auto_dj_min_runtime_seconds(self) -> int:
+        """Queued runtime left below which the auto-DJ tops the queue up."""
+        return max(0, int(self.get("auto_dj_min_runtime_seconds", 1800)))
+
+    @property
+    def auto_dj_fill_seconds(self) -> int:
+        """Runtime the auto-DJ appends each time it tops the queue up."""
+        return max(60, int(self.get("auto_dj_fill_seconds", 3600)))
+
+    @property
+    def auto_dj_poll_seconds(self) -> float:
+        """How often the auto-DJ checks the queue (it also checks on each media change)."""
+        return max(1.0, float(self.get("auto_dj_poll_seconds", 15)))
+
+    @property
+    def auto_dj_recent_limit(self) -> int:
+        """How many recently played or queued items the auto-DJ will not pick again."""
+        return max(1, int(self.get("auto_dj_recent_limit", 200)))
+
+    @property
+    def auto_dj_max_items(self) -> int:
+        """Most items the auto-DJ appends at once."""
+        return max(1, int(self.get("auto_dj_max_items", 50)))
+
+    @property
+    def auto_dj_genres(self) -> list[str]:
+        """Genres the auto-DJ rotates through, one per top-up (empty = any genre)."""
+        genres = self.get("auto_dj_genres", [])
+        if isinstance(genres, list):
+            return [str(g).strip() for g in genres if str(g).strip()]
+        return []
+
     @property
     def http_host(self) -> str:
         """HTTP bind host for FastAPI (when enabled)."""
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Literal, Optional
+from typing import Any, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -76,16 +76,96 @@ class CatalogItemOut(BaseModel):
     thumbnail_url: Optional[str] = None
 
 
+class SeriesGroupOut(BaseModel):
+    """One series (or standalone title) in a group_by=series search."""
+
+    title_base: str
+    episode_count: int
+    first_season: Optional[int] = None
+    last_season: Optional[int] = None
+    total_duration_seconds: int = 0
+    is_tv: bool = False
+    video_id: Optional[str] = None  # set when the group is a single item
+    thumbnail_url: Optional[str] = None
+    year: Optional[int] = None
+
+
+SearchSort = Literal["relevance", "title", "duration", "year", "recent", "popular"]
+
+
 class CatalogSearchOut(BaseModel):
     snapshot_id: str
     items: list[CatalogItemOut]
     total: int
+    next_cursor: Optional[str] = None
+    fuzzy: bool = False  # items are typo-tolerant title matches
+    groups: list[SeriesGroupOut] = Field(default_factory=list)  # group_by=series; total counts groups
+
+
+class SeriesEpisodeOut(CatalogItemOut):
+    season: Optional[int] = None
+    episode: Optional[int] = None
+    episode_title: Optional[str] = None
+
+
+class SeriesEpisodesOut(BaseModel):
+    title_base: str
+    items: list[SeriesEpisodeOut]
+
+
+SuggestionKind = Literal["title", "series"]
+
+
+class SuggestionOut(BaseModel):
+    kind: SuggestionKind
+    text: str
+    video_id: Optional[str] = None  # set for titles
+    plays: int = 0
+
+
+class SuggestOut(BaseModel):
+    items: list[SuggestionOut]
+
+
+class SearchExplainOut(BaseModel):
+    """How /catalog/search runs a query."""
+
+    query: str  # normalized query-language text
+    plan: list[str]  # index or scan chosen for each term
+    sql: str
+    params: list[Any]
+    sqlite_plan: list[str]  # EXPLAIN QUERY PLAN details
+    plan_cached: bool
 
 
 class CategoriesOut(BaseModel):
     categories: list[str]
 
 
+class FacetValueOut(BaseModel):
+    value: str
+    count: int
+
+
+class CatalogFacetsOut(BaseModel):
+    genre: list[FacetValueOut]
+    mood: list[FacetValueOut]
+    era: list[FacetValueOut]
+    category: list[FacetValueOut]
+
+
+PersonRole = Literal["actor", "director"]
+
+
+class FilmographyItemOut(CatalogItemOut):
+    roles: list[PersonRole] = Field(default_factory=list)
+
+
+class FilmographyOut(BaseModel):
+    name: str
+    items: list[FilmographyItemOut]
+
+
 class PendingCountOut(BaseModel):
     count: int
 
@@ -221,6 +301,47 @@ class TopLikedOut(BaseModel):
     items: list[StatsItemOut]
 
 
+class DbPoolStatsOut(BaseModel):
+    """Read pool checkout metrics; all times in milliseconds."""
+
+    enabled: bool
+    size: int = 0
+    idle: int = 0
+    checkouts: int = 0
+    waits: int = 0
+    wait_avg_ms: float = 0.0
+    wait_p95_ms: float = 0.0
+    wait_max_ms: float = 0.0
+    hold_avg_ms: float = 0.0
+    hold_p50_ms: float = 0.0
+    hold_p95_ms: float = 0.0
+    hold_max_ms: float = 0.0
+
+
+class SearchCacheStatsOut(BaseModel):
+    """Search result cache counters."""
+
+    enabled: bool
+    entries: int = 0
+    max_entries: int = 0
+    ttl_seconds: float = 0.0
+    hits: int = 0
+    misses: int = 0
+    expirations: int = 0
+    hit_rate: float = 0.0
+
+
+class CatalogIndexStatsOut(BaseModel):
+    """State of the in-memory catalog index."""
+
+    enabled: bool
+    over_budget: bool = False
+    budget_bytes: int = 0
+    rows: int = 0
+    memory_bytes: int = 0
+    version: Optional[str] = None
+
+
 class CurrentVideoOut(BaseModel):
     video_id: Optional[str] = None
     title: Optional[str] = None
@@ -0,0 +1,274 @@
+"""Fit a lineup to a time slot, then preview, save or queue it.
+
+Shared by ``POST /api/v1/fit`` and the ``playlist.cmd.fit`` command. The
+lineup comes from ``fit_to_duration`` (or ``fit_to_end_time`` for a
+showtime); candidate pools are cached per filter signature in a
+``CandidatePoolCache``, so repeated previews with new targets or seeds
+skip the catalog query.
+"""
+
+from __future__ import annotations
+
+import contextlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Literal
+
+import aiosqlite
+
+from kryten_playlist.auth.otp import parse_iso
+from kryten_playlist.catalog.duration_fitting import FitResult, fit_to_duration, fit_to_end_time
+from kryten_playlist.queue_apply import QueueApplyMode, apply_video_ids_to_queue
+from kryten_playlist.storage.search_cache import CandidatePoolCache
+from kryten_playlist.storage.sqlite import ReadPool
+from kryten_playlist.web.routes.playlists import insert_playlist
+
+FitAction = Literal["preview", "save", "queue"]
+
+FIT_ACTIONS = ("preview", "save", "queue")
+FIT_ORDERS = ("random", "duration_asc", "duration_desc", "title")
+QUEUE_MODES = ("preserve_current", "append", "hard_replace", "insert_next")
+
+# Longest slot a single fit may target
+MAX_FIT_SECONDS = 7 * 24 * 3600
+MAX_FIT_ITEMS = 1000
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    """Aware UTC time; naive times are taken as UTC, as ``parse_iso`` does."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+@dataclass
+class FitRequest:
+    """What to fit, and what to do with the lineup."""
+
+    target_seconds: int | None = None
+    end_time: datetime | None = None
+    start_time: datetime | None = None
+    filter_tv: bool | None = None
+    filter_tags: list[str] | None = None
+    filter_categories: list[str] | None = None
+    filter_era: str | None = None
+    filter_genre: str | None = None
+    exclude_weekend_only: bool = False
+    max_items: int = 100
+    order_by: str = "random"
+    seed: int | None = None
+    tolerance: int = 0
+    action: FitAction = "preview"
+    name: str = ""
+    mode: QueueApplyMode = "append"
+
+    def validate(self) -> None:
+        """Normalize the times to UTC; raise ValueError if the request cannot be fitted."""
+        self.end_time = _as_utc(self.end_time)
+        self.start_time = _as_utc(self.start_time)
+        if (self.target_seconds is None) == (self.end_time is None):
+            raise ValueError("Give exactly one of target_seconds or end_time")
+        if self.target_seconds is not None and not 0 < self.target_seconds <= MAX_FIT_SECONDS:
+            raise ValueError(f"target_seconds must be between 1 and {MAX_FIT_SECONDS}")
+        if not 1 <= self.max_items <= MAX_FIT_ITEMS:
+            raise ValueError(f"max_items must be between 1 and {MAX_FIT_ITEMS}")
+        if self.tolerance < 0:
+            raise ValueError("tolerance must not be negative")
+        if self.order_by not in FIT_ORDERS:
+            raise ValueError(f"Invalid order_by: {self.order_by}")
+        if self.action not in FIT_ACTIONS:
+            raise ValueError(f"Invalid action: {self.action}")
+        if self.mode not in QUEUE_MODES:
+            raise ValueError(f"Invalid mode: {self.mode}")
+        if self.action == "save" and not self.name.strip():
+            raise ValueError("A playlist name is required to save a fit")
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> FitRequest:
+        """Build and validate a request from a command payload.
+
+        Raises:
+            ValueError: If a field has the wrong type or the request is invalid.
+        """
+
+        def _int(key: str) -> int | None:
+            value = data.get(key)
+            if value is None or value == "":
+                return None
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{key} must be an integer")
+
+        def _time(key: str) -> datetime | None:
+            value = data.get(key)
+            if not value:
+                return None
+            try:
+                return parse_iso(str(value))
+            except ValueError:
+                raise ValueError(f"{key} must be an ISO-8601 timestamp")
+
+        def _names(key: str) -> list[str] | None:
+            value = data.get(key)
+            if not value:
+                return None
+            if isinstance(value, str):
+                value = [value]
+            return [str(v).strip() for v in value if str(v).strip()] or None
+
+        filter_tv = data.get("filter_tv")
+        request = cls(
+            target_seconds=_int("target_seconds"),
+            end_time=_time("end_time"),
+            start_time=_time("start_time"),
+            filter_tv=None if filter_tv is None else bool(filter_tv),
+            filter_tags=_names("filter_tags"),
+            filter_categories=_names("filter_categories"),
+            filter_era=str(data.get("filter_era") or "") or None,
+            filter_genre=str(data.get("filter_genre") or "") or None,
+            exclude_weekend_only=bool(data.get("exclude_weekend_only", False)),
+            max_items=_int("max_items") or 100,
+            order_by=str(data.get("order_by") or "random"),
+            seed=_int("seed"),
+            tolerance=_int("tolerance") or 0,
+            action=str(data.get("action") or "preview"),  # type: ignore[arg-type]
+            name=str(data.get("name") or ""),
+            mode=str(data.get("mode") or "append"),  # type: ignore[arg-type]
+        )
+        request.validate()
+        return request
+
+
+@dataclass(frozen=True)
+class FitApplyResult:
+    status: Literal["ok", "error"]
+    action: FitAction = "preview"
+    fit: FitResult | None = None
+    playlist_id: str | None = None
+    enqueued_count: int = 0
+    failed: list[dict] | None = None
+    error: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        fit = self.fit
+        return {
+            "status": self.status,
+            "action": self.action,
+            "items": list(fit.items) if fit else [],
+            "total_duration": fit.total_duration if fit else 0,
+            "target_duration": fit.target_duration if fit else 0,
+            "slack": fit.slack if fit else 0,
+            "utilization": round(fit.utilization, 2) if fit else 0.0,
+            "optimality_gap": fit.optimality_gap if fit else 0,
+            "solve_ms": round(fit.solve_ms, 3) if fit else 0.0,
+            "playlist_id": self.playlist_id,
+            "enqueued_count": int(self.enqueued_count or 0),
+            "failed": list(self.failed or []),
+            "error": self.error,
+        }
+
+
+@contextlib.asynccontextmanager
+async def _connection(sqlite_conn: Any) -> AsyncIterator[aiosqlite.Connection]:
+    if isinstance(sqlite_conn, ReadPool):
+        async with sqlite_conn.acquire() as conn:
+            yield conn
+    else:
+        yield sqlite_conn
+
+
+async def fit_lineup(
+    request: FitRequest,
+    *,
+    sqlite_conn: Any,
+    catalog_index: Any = None,
+    pool_cache: CandidatePoolCache | None = None,
+    include_uncategorized: bool = False,
+) -> FitResult:
+    """The fitted lineup for a request, without acting on it.
+
+    ``include_uncategorized`` is the caller's role decision, as in search:
+    only admins and blessed users may be offered uncategorized items.
+    """
+    options: dict[str, Any] = {
+        "filter_tv": request.filter_tv,
+        "filter_tags": request.filter_tags,
+        "filter_categories": request.filter_categories,
+        "filter_era": request.filter_era,
+        "filter_genre": request.filter_genre,
+        "exclude_weekend_only": request.exclude_weekend_only,
+        "include_uncategorized": include_uncategorized,
+        "max_items": request.max_items,
+        "order_by": request.order_by,
+        "seed": request.seed,
+        "tolerance": request.tolerance,
+        "index": catalog_index,
+        "pool_cache": pool_cache,
+    }
+    async with _connection(sqlite_conn) as conn:
+        if request.end_time is not None:
+            return await fit_to_end_time(conn, request.end_time, start_time=request.start_time, **options)
+        return await fit_to_duration(conn, int(request.target_seconds or 0), **options)
+
+
+async def run_fit(
+    request: FitRequest,
+    *,
+    sqlite_conn: Any,
+    catalog_index: Any = None,
+    pool_cache: CandidatePoolCache | None = None,
+    kv: Any = None,
+    client: Any = None,
+    channel: str = "",
+    owner: str = "",
+    include_uncategorized: bool = False,
+) -> FitApplyResult:
+    """Fit the lineup and carry out ``request.action``.
+
+    ``kv`` and ``owner`` are needed to save, ``client`` and ``channel`` to
+    queue. Permission checks (blessed to save or queue, admin for
+    hard_replace) are the caller's, and so is ``include_uncategorized``.
+    """
+    fit = await fit_lineup(
+        request,
+        sqlite_conn=sqlite_conn,
+        catalog_index=catalog_index,
+        pool_cache=pool_cache,
+        include_uncategorized=include_uncategorized,
+    )
+    video_ids = [str(it["video_id"]) for it in fit.items]
+
+    if request.action == "save":
+        try:
+            playlist_id = await insert_playlist(
+                kv,
+                owner=owner,
+                name=request.name.strip(),
+                video_ids=video_ids,
+            )
+        except ValueError as e:
+            return FitApplyResult(status="error", action="save", fit=fit, error=str(e))
+        return FitApplyResult(status="ok", action="save", fit=fit, playlist_id=playlist_id)
+
+    if request.action == "queue":
+        result = await apply_video_ids_to_queue(
+            client=client,
+            sqlite_conn=sqlite_conn,
+            catalog_index=catalog_index,
+            channel=channel,
+            video_ids=video_ids,
+            mode=request.mode,
+        )
+        return FitApplyResult(
+            status=result.status,
+            action="queue",
+            fit=fit,
+            enqueued_count=result.enqueued_count,
+            failed=result.failed,
+            error=result.error,
+        )
+
+    return FitApplyResult(status="ok", action="preview", fit=fit)
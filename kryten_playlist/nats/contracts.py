@@ -10,3 +10,4 @@ CMD_QUEUE_APPLY = "queue_apply"
 CMD_BLESSED_ADD = "blessed_add"
 CMD_BLESSED_REMOVE = "blessed_remove"
 CMD_BLESSED_LIST = "blessed_list"
+CMD_FIT = "fit"
@@ -79,16 +79,35 @@ async def apply_playlist_to_queue(
     channel: str,
     playlist_id: str,
     mode: QueueApplyMode,
+    catalog_index: Any = None,
 ) -> QueueApplyResult:
     playlist_doc = await _load_playlist_doc(kv, playlist_id)
     if not playlist_doc:
         return QueueApplyResult(status="error", error="Playlist not found", failed=[])
 
-    video_ids = _extract_video_ids(playlist_doc)
+    return await apply_video_ids_to_queue(
+        client=client,
+        sqlite_conn=sqlite_conn,
+        channel=channel,
+        video_ids=_extract_video_ids(playlist_doc),
+        mode=mode,
+        catalog_index=catalog_index,
+    )
+
+
+async def apply_video_ids_to_queue(
+    *,
+    client: Any,
+    sqlite_conn: Any,
+    channel: str,
+    video_ids: list[str],
+    mode: QueueApplyMode,
+    catalog_index: Any = None,
+) -> QueueApplyResult:
     if not video_ids:
         return QueueApplyResult(status="ok", enqueued_count=0, failed=[])
 
-    repo = CatalogRepository(sqlite_conn)
+    repo = CatalogRepository(sqlite_conn, index=catalog_index)
     by_id = await repo.get_items_by_video_ids(video_ids)
 
     failed: list[dict] = []
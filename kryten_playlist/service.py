@@ -14,23 +14,40 @@ from kryten_playlist.admin_cmds import (
     record_catalog_refresh_request,
     remove_blessed,
 )
+from kryten_playlist.auto_dj import AutoDj
 from kryten_playlist.catalog_refresh_watcher import run_catalog_refresh_watcher
 from kryten_playlist.config import Config
+from kryten_playlist.fit_apply import FitRequest, run_fit
 from kryten_playlist.nats.contracts import (
     CMD_BLESSED_ADD,
     CMD_BLESSED_LIST,
     CMD_BLESSED_REMOVE,
     CMD_CATALOG_REFRESH,
+    CMD_FIT,
     CMD_QUEUE_APPLY,
     cmd_subject,
 )
 from kryten_playlist.nats.kv import KvJson, KvNamespace
 from kryten_playlist.queue_apply import apply_playlist_to_queue
+from kryten_playlist.storage.catalog_index import CatalogIndexManager
+from kryten_playlist.storage.popularity import PopularityMaterializer
 from kryten_playlist.storage.schema import init_catalog_schema
-from kryten_playlist.storage.sqlite import SqliteConfig, SqliteDb
+from kryten_playlist.storage.search_cache import (
+    CandidatePoolCache,
+    FacetCountsCache,
+    SearchResultCache,
+    TotalsCache,
+)
+from kryten_playlist.storage.sqlite import ReadPool, SqliteConfig, SqliteDb
+from kryten_playlist.storage.suggest import SuggestIndexManager
 from kryten_playlist.web.app import create_app
 from kryten_playlist.web.deps import resolve_role
-from kryten_playlist.web.routes.stats import increment_play_count, set_current_video
+from kryten_playlist.web.routes.stats import (
+    get_like_counts,
+    get_play_counts,
+    increment_play_count,
+    set_current_video,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -71,6 +88,20 @@ class PlaylistService:
         self._catalog_refresh_task: Optional[asyncio.Task[None]] = None
         self._kv: KvJson | None = None
         self._sqlite_conn: Any | None = None
+        self._sqlite_read_pool: ReadPool | None = None
+        self._popularity_conn: Any | None = None
+        self._catalog_index: CatalogIndexManager | None = None
+        self._catalog_index_task: Optional[asyncio.Task[None]] = None
+        self._catalog_suggest: SuggestIndexManager | None = None
+        self._catalog_suggest_task: Optional[asyncio.Task[None]] = None
+        self._fit_pools: CandidatePoolCache | None = (
+            CandidatePoolCache(self.config.fit_pool_cache_size)
+            if self.config.fit_pool_cache_size > 0
+            else None
+        )
+        self._popularity_task: Optional[asyncio.Task[None]] = None
+        self._auto_dj: AutoDj | None = None
+        self._auto_dj_task: Optional[asyncio.Task[None]] = None
         self._resolved_channel: str | None = None
         self._resolved_domain: str | None = None
 
@@ -227,6 +258,56 @@ class PlaylistService:
         self._sqlite_conn = await sqlite.connect()
         await init_catalog_schema(self._sqlite_conn)
 
+        # Catalog reads go through a pool of read-only connections; the
+        # connection above stays the single writer (refresh/rebuild).
+        if self.config.sqlite_read_pool_size > 0:
+            self._sqlite_read_pool = ReadPool(sqlite, size=self.config.sqlite_read_pool_size)
+            await self._sqlite_read_pool.open()
+
+        if self.config.catalog_index_enabled:
+            self._catalog_index = CatalogIndexManager(
+                self._sqlite_read_pool or self._sqlite_conn,
+                memory_budget_mb=self.config.catalog_index_memory_mb,
+            )
+            await self._catalog_index.refresh()
+            self._catalog_index_task = asyncio.create_task(
+                self._catalog_index.run(
+                    self._shutdown_event,
+                    poll_seconds=self.config.catalog_index_poll_seconds,
+                )
+            )
+
+        kv = self._kv
+        # Its own connection: committing on the writer could publish half of a
+        # catalog rebuild. WAL and the busy timeout order it with the writer.
+        self._popularity_conn = await sqlite.connect()
+        popularity = PopularityMaterializer(
+            self._popularity_conn,
+            plays=lambda: get_play_counts(kv),
+            likes=lambda: get_like_counts(kv),
+        )
+        self._popularity_task = asyncio.create_task(
+            popularity.run(
+                self._shutdown_event,
+                interval_seconds=self.config.popularity_refresh_seconds,
+            )
+        )
+
+        if self.config.catalog_suggest_enabled:
+            self._catalog_suggest = SuggestIndexManager(
+                self._sqlite_read_pool or self._sqlite_conn,
+                plays=lambda: get_play_counts(kv),
+                plays_refresh_seconds=self.config.catalog_suggest_plays_refresh_seconds,
+            )
+            # First build happens in the background; /catalog/suggest falls
+            # back to a title search until it is ready.
+            self._catalog_suggest_task = asyncio.create_task(
+                self._catalog_suggest.run(
+                    self._shutdown_event,
+                    poll_seconds=self.config.catalog_index_poll_seconds,
+                )
+            )
+
         # Command subjects (request/reply)
         async def _ensure_admin(
             *,
@@ -314,7 +395,8 @@ class PlaylistService:
             result = await apply_playlist_to_queue(
                 client=self.client,
                 kv=self._kv,
-                sqlite_conn=self._sqlite_conn,
+                sqlite_conn=self._sqlite_read_pool or self._sqlite_conn,
+                catalog_index=self._catalog_index,
                 channel=self.resolved_channel,
                 playlist_id=playlist_id,
                 mode=mode,  # type: ignore[arg-type]
@@ -324,6 +406,73 @@ class PlaylistService:
             payload["correlation_id"] = correlation_id
             return payload
 
+        async def _handle_fit_cmd(request: dict[str, Any]) -> dict[str, Any]:
+            correlation_id = str(request.get("correlation_id") or "")
+            namespace = str(request.get("namespace") or "")
+            requested_by = str(request.get("requested_by") or "")
+
+            if namespace and namespace != self.config.namespace:
+                return {
+                    "correlation_id": correlation_id,
+                    "status": "error",
+                    "error": "namespace_mismatch",
+                }
+
+            try:
+                fit_request = FitRequest.from_dict(request)
+            except ValueError as e:
+                return {
+                    "correlation_id": correlation_id,
+                    "status": "error",
+                    "error": "invalid_request",
+                    "detail": str(e),
+                }
+
+            if not self._kv or not self._sqlite_conn:
+                return {
+                    "correlation_id": correlation_id,
+                    "status": "error",
+                    "error": "service_not_ready",
+                }
+
+            # Previews are read-only; saving and queueing follow queue_apply
+            role = await resolve_role(requested_by, self._kv)
+            if fit_request.action != "preview":
+                if role not in ("blessed", "admin") or (
+                    fit_request.action == "queue"
+                    and fit_request.mode == "hard_replace"
+                    and role != "admin"
+                ):
+                    return {
+                        "correlation_id": correlation_id,
+                        "status": "error",
+                        "error": "forbidden",
+                    }
+
+            if fit_request.action == "queue" and not self.resolved_channel:
+                return {
+                    "correlation_id": correlation_id,
+                    "status": "error",
+                    "error": "no_resolved_channel",
+                }
+
+            result = await run_fit(
+                fit_request,
+                sqlite_conn=self._sqlite_read_pool or self._sqlite_conn,
+                catalog_index=self._catalog_index,
+                pool_cache=self._fit_pools,
+                kv=self._kv,
+                client=self.client,
+                channel=self.resolved_channel,
+                owner=requested_by,
+                # The same rule search applies to web sessions
+                include_uncategorized=role == "admin" or requested_by in self.config.blessed_users,
+            )
+
+            payload = result.as_dict()
+            payload["correlation_id"] = correlation_id
+            return payload
+
         async def _handle_blessed_list_cmd(request: dict[str, Any]) -> dict[str, Any]:
             correlation_id = str(request.get("correlation_id") or "")
             namespace = str(request.get("namespace") or "")
@@ -435,6 +584,11 @@ class PlaylistService:
             _handle_queue_apply_cmd,
         )
 
+        await self.client.subscribe_request_reply(
+            cmd_subject(self.config.nats_subject_prefix, CMD_FIT),
+            _handle_fit_cmd,
+        )
+
         await self.client.subscribe_request_reply(
             cmd_subject(self.config.nats_subject_prefix, CMD_BLESSED_LIST),
             _handle_blessed_list_cmd,
@@ -485,6 +639,24 @@ class PlaylistService:
         async def _changemedia(event: Any) -> None:
             await self._handle_change_media(event)
 
+        if self.config.auto_dj_enabled:
+            self._auto_dj = AutoDj(
+                self._sqlite_read_pool or self._sqlite_conn,
+                client=self.client,
+                channel=lambda: self.resolved_channel,
+                min_runtime_seconds=self.config.auto_dj_min_runtime_seconds,
+                fill_seconds=self.config.auto_dj_fill_seconds,
+                genres=self.config.auto_dj_genres,
+                recent_limit=self.config.auto_dj_recent_limit,
+                max_items=self.config.auto_dj_max_items,
+            )
+            self._auto_dj_task = asyncio.create_task(
+                self._auto_dj.run(
+                    self._shutdown_event,
+                    poll_seconds=self.config.auto_dj_poll_seconds,
+                )
+            )
+
         if self._enable_web:
             logger.info("DEBUG: Starting web server task")
             self._web_task = asyncio.create_task(self._run_web())
@@ -525,11 +697,37 @@ class PlaylistService:
                 logger.error(f"Error waiting for catalog refresh task: {e}")
             logger.debug("Catalog refresh task cancelled")
 
+        if self._catalog_index_task is not None:
+            self._catalog_index_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await self._catalog_index_task
+
+        if self._catalog_suggest_task is not None:
+            self._catalog_suggest_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await self._catalog_suggest_task
+
+        if self._popularity_task is not None:
+            self._popularity_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await self._popularity_task
+
+        if self._auto_dj_task is not None:
+            self._auto_dj_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await self._auto_dj_task
+
         # Disconnect from NATS
         logger.debug("Disconnecting from NATS...")
         await self.client.disconnect()
         logger.debug("Disconnected from NATS")
 
+        if self._sqlite_read_pool is not None:
+            await self._sqlite_read_pool.close()
+
+        if self._popularity_conn is not None:
+            await self._popularity_conn.close()
+
         if self._sqlite_conn is not None:
             logger.debug("Closing SQLite connection...")
             await self._sqlite_conn.close()
@@ -591,6 +789,10 @@ class PlaylistService:
 
         logger.info("Now playing: %s (%s)", title or video_id, video_id)
 
+        if self._auto_dj is not None:
+            self._auto_dj.note_played(video_id)
+            self._auto_dj.wake()
+
         if self._kv:
             try:
                 # Update current video for "like current" feature
@@ -624,6 +826,20 @@ class PlaylistService:
         app.state.client = self.client
         app.state.kv = self._kv
         app.state.sqlite = self._sqlite_conn
+        app.state.sqlite_read_pool = self._sqlite_read_pool
+        app.state.catalog_index = self._catalog_index
+        app.state.catalog_suggest = self._catalog_suggest
+        app.state.catalog_totals = TotalsCache()
+        app.state.catalog_facets = FacetCountsCache()
+        app.state.catalog_results = (
+            SearchResultCache(
+                self.config.catalog_search_cache_size,
+                self.config.catalog_search_cache_ttl_seconds,
+            )
+            if self.config.catalog_search_cache_size > 0
+            else None
+        )
+        app.state.fit_pools = self._fit_pools
         # Expose service for resolved channel access
         app.state.service = self
 
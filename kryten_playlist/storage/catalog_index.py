@@ -0,0 +1,510 @@
+"""In-memory columnar snapshot of the catalog for hot lookups.
+
+Playlist detail, queue apply and the top-played/top-liked stats all resolve
+lists of video ids into item dicts. Going through SQLite for that means a
+round trip through the aiosqlite thread plus building every row twice. A
+``CatalogIndex`` instead holds the catalog as parallel columns (``array``
+for numbers, interned lists for strings) with a ``video_id -> row`` map, so
+those lookups are plain Python indexing.
+
+Duration fitting draws its candidates from the index too: flag and facet
+filters become row bitmasks (one Python int per filter, combined with ``&``
+at C speed and cached for the life of the index), and the duration cut-off
+is a bisect into the rows pre-sorted by duration, so a fit never builds a
+row per candidate it does not use.
+
+An index is immutable once built. ``CatalogIndexManager`` owns the current
+one, rebuilds it when the catalog version moves, and publishes the new index
+with a single attribute assignment, so a reader always sees one complete
+snapshot. Loading stops (and the index stays disabled) if the estimated size
+goes over the configured memory budget; callers then fall back to SQLite.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import contextlib
+import logging
+import random
+import sys
+import time
+from array import array
+from typing import Any, AsyncIterator, Iterable, Iterator, Optional
+
+import aiosqlite
+
+from kryten_playlist.storage.catalog_meta import CatalogVersion, get_catalog_version
+from kryten_playlist.storage.catalog_schema import get_catalog_schema
+from kryten_playlist.storage.facets import FACET_TABLES, FACETS, canonical_facet
+from kryten_playlist.storage.sqlite import ReadPool
+
+logger = logging.getLogger(__name__)
+
+# Row flags
+FLAG_LISTED = 1  # mediacms_category IS NOT NULL (what get_items_by_video_ids returns)
+FLAG_TV = 2
+FLAG_WEEKEND_ONLY = 4
+FLAG_VISIBLE = 8  # categorized, as search shows to everyone (catalog_subsets.VISIBLE_PREDICATE)
+FLAG_ENRICHED = 16  # llm_enriched_at IS NOT NULL
+
+_NULL_INT = -1
+_FETCH_SIZE = 2000
+# Below this share of candidate rows, random fits enumerate the candidates
+# instead of drawing rows and rejecting misses
+_MIN_DRAW_DENSITY = 0.02
+# Per-row cost of the fixed-width columns, postings, and list/dict slots
+_ROW_OVERHEAD = 4 * 8 + 2 + 1 + 6 * 4 + 5 * 8 + 100
+
+
+class MemoryBudgetExceededError(RuntimeError):
+    """Raised while loading when the index would not fit the budget."""
+
+
+class _Interner:
+    """Maps repeated strings to small integer codes (0 is None)."""
+
+    def __init__(self) -> None:
+        self.values: list[Optional[str]] = [None]
+        self.codes: dict[str, int] = {}
+
+    def code(self, value: Any) -> int:
+        if value is None:
+            return 0
+        text = str(value)
+        code = self.codes.get(text)
+        if code is None:
+            code = len(self.values)
+            self.codes[text] = code
+            self.values.append(text)
+        return code
+
+
+def rows_mask(rows: Iterable[int], size: int) -> int:
+    """Bitmask with bit i set for each row i in ``rows`` (all below ``size``)."""
+    digits = bytearray(b"0" * size)
+    for i in rows:
+        digits[i] = 0x31
+    digits.reverse()
+    return int(digits, 2) if digits else 0
+
+
+def shuffled_rows(mask: int, rng: random.Random) -> Iterator[int]:
+    """The rows set in ``mask`` in random order, drawn as they are consumed.
+
+    Dense masks are sampled by drawing rows and rejecting misses until half
+    the rows are out; the rest (and sparse masks) are enumerated and
+    shuffled lazily.
+    """
+    count = mask.bit_count()
+    size = mask.bit_length()
+    seen: set[int] = set()
+    if count >= _MIN_DRAW_DENSITY * size:
+        bits = mask.to_bytes(size // 8 + 1, "little")
+        while len(seen) < count // 2:
+            i = rng.randrange(size)
+            if i not in seen and bits[i >> 3] >> (i & 7) & 1:
+                seen.add(i)
+                yield i
+    digits = bin(mask)[:1:-1]
+    rest = []
+    pos = digits.find("1")
+    while pos >= 0:
+        if pos not in seen:
+            rest.append(pos)
+        pos = digits.find("1", pos + 1)
+    for j in range(len(rest)):
+        k = rng.randrange(j, len(rest))
+        rest[j], rest[k] = rest[k], rest[j]
+        yield rest[j]
+
+
+class CatalogIndex:
+    """Immutable columnar copy of ``catalog_item`` for one catalog version."""
+
+    def __init__(
+        self,
+        *,
+        version: CatalogVersion,
+        video_ids: list[str],
+        titles: list[str],
+        thumbnails: list[Optional[str]],
+        synopses: list[Optional[str]],
+        durations: array,
+        years: array,
+        flags: bytearray,
+        snapshots: tuple[array, list[Optional[str]]],
+        facets: dict[str, tuple[array, list[Optional[str]]]],
+        facet_keys: dict[str, tuple[array, list[Optional[str]]]],
+        memory_bytes: int,
+    ):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.memory_bytes = memory_bytes
+        self._video_ids = video_ids
+        self._titles = titles
+        self._thumbnails = thumbnails
+        self._synopses = synopses
+        self._durations = durations
+        self._years = years
+        self._flags = flags
+        self._snapshots = snapshots
+        self._facets = facets
+        self._facet_keys = facet_keys
+        self._rows = {vid: i for i, vid in enumerate(video_ids)}
+        # facet -> canonical name code -> rows carrying it
+        self._postings: dict[str, dict[int, array]] = {}
+        for facet, (codes, _values) in facet_keys.items():
+            postings: dict[int, array] = {}
+            for i, code in enumerate(codes):
+                if code:
+                    postings.setdefault(code, array("I")).append(i)
+            self._postings[facet] = postings
+        # Built on first use: filter bitmasks and fit orders
+        self._masks: dict[Any, int] = {}
+        self._orders: dict[str, tuple[array, list]] = {}
+
+    def __len__(self) -> int:
+        return len(self._video_ids)
+
+    def _row(self, video_id: str) -> Optional[int]:
+        i = self._rows.get(video_id)
+        if i is None or not self._flags[i] & FLAG_LISTED:
+            return None
+        return i
+
+    def _item(self, i: int) -> dict:
+        duration = self._durations[i]
+        year = self._years[i]
+        snap_codes, snap_values = self._snapshots
+        item = {
+            "video_id": self._video_ids[i],
+            "title": self._titles[i],
+        }
+        for facet in FACETS:
+            codes, values = self._facets[facet]
+            item[facet] = values[codes[i]]
+        item.update(
+            {
+                "year": None if year == _NULL_INT else year,
+                "synopsis": self._synopses[i],
+                "duration_seconds": None if duration == _NULL_INT else duration,
+                "thumbnail_url": self._thumbnails[i],
+                "snapshot_id": snap_values[snap_codes[i]],
+            }
+        )
+        return item
+
+    def get_items(self, video_ids: Iterable[str]) -> dict[str, dict]:
+        """Same contract as ``CatalogRepository.get_items_by_video_ids``."""
+        out: dict[str, dict] = {}
+        for v in video_ids or []:
+            vid = str(v).strip()
+            if not vid or vid in out:
+                continue
+            i = self._row(vid)
+            if i is not None:
+                out[vid] = self._item(i)
+        return out
+
+    def get_item(self, video_id: str) -> Optional[dict]:
+        i = self._row(str(video_id).strip())
+        return None if i is None else self._item(i)
+
+    def _mask(self, key: tuple) -> int:
+        """Bitmask of the rows passing one filter (bit i = row i)."""
+        mask = self._masks.get(key)
+        if mask is None:
+            kind, value = key
+            if kind == "flag":
+                table = bytes(0x31 if b & value else 0x30 for b in range(256))
+                digits = self._flags.translate(table)
+                digits.reverse()
+                mask = int(digits, 2) if digits else 0
+            elif kind == "facet":
+                facet, code = value
+                mask = rows_mask(self._postings[facet].get(code, ()), len(self))
+            else:  # "timed": rows with a known, positive duration
+                mask = rows_mask((i for i, d in enumerate(self._durations) if d > 0), len(self))
+            self._masks[key] = mask
+        return mask
+
+    def _order(self, name: str) -> tuple[array, list]:
+        """Timed rows sorted by duration or title, with the sort keys."""
+        order = self._orders.get(name)
+        if order is None:
+            column = self._durations if name == "duration" else self._titles
+            rows = sorted(
+                (i for i, d in enumerate(self._durations) if d > 0), key=column.__getitem__
+            )
+            order = (array("I", rows), [column[i] for i in rows])
+            self._orders[name] = order
+        return order
+
+    def fit_candidates(
+        self,
+        *,
+        max_duration: int,
+        is_tv: Optional[bool] = None,
+        exclude_weekend_only: bool = False,
+        include_uncategorized: bool = False,
+        genre: Optional[str] = None,
+        era: Optional[str] = None,
+        order_by: str = "random",
+        seed: Optional[int] = None,
+    ) -> Iterator[tuple[str, str, int]]:
+        """Yield ``(video_id, title, duration)`` fit candidates in preference order.
+
+        The in-memory counterpart of ``duration_fitting.fit_to_duration``'s
+        candidate query: timed items no longer than ``max_duration``, in
+        ``order_by`` order ("duration_asc", "duration_desc", "title", or a
+        seeded random order for anything else). Like search, only enriched
+        items qualify, and uncategorized ones only with ``include_uncategorized``.
+        """
+        mask = self._mask(("timed", None)) & self._mask(("flag", FLAG_ENRICHED))
+        if not include_uncategorized:
+            mask &= self._mask(("flag", FLAG_VISIBLE))
+        if is_tv is not None:
+            tv = self._mask(("flag", FLAG_TV))
+            mask &= tv if is_tv else ~tv
+        if exclude_weekend_only:
+            mask &= ~self._mask(("flag", FLAG_WEEKEND_ONLY))
+        for facet, value in (("genre", genre), ("era", era)):
+            name = canonical_facet(facet, value) if value else None
+            if not name:
+                continue
+            try:
+                code = self._facet_keys[facet][1].index(name, 1)
+            except ValueError:
+                return
+            mask &= self._mask(("facet", (facet, code)))
+
+        by_duration, durations = self._order("duration")
+        # Rows [0, cut) of the duration order fit the slot
+        cut = bisect.bisect_right(durations, max_duration)
+
+        if order_by in ("duration_asc", "duration_desc", "title"):
+            bits = mask.to_bytes(len(self._video_ids) // 8 + 1, "little")
+            if order_by == "title":
+                rows: Iterable[int] = self._order("title")[0]
+            elif order_by == "duration_asc":
+                rows = by_duration[:cut]
+            else:
+                rows = reversed(by_duration[:cut])
+            for i in rows:
+                if bits[i >> 3] >> (i & 7) & 1 and self._durations[i] <= max_duration:
+                    yield self._video_ids[i], self._titles[i], self._durations[i]
+            return
+
+        if cut <= len(by_duration) // 2:
+            # Most rows are too long for the slot: leave them out of the draw
+            mask &= rows_mask(by_duration[:cut], len(self))
+        for i in shuffled_rows(mask, random.Random(seed)):
+            if self._durations[i] <= max_duration:
+                yield self._video_ids[i], self._titles[i], self._durations[i]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "rows": len(self),
+            "memory_bytes": self.memory_bytes,
+            "version": self.version.key,
+        }
+
+
+def _estimate(strings: Iterable[Optional[str]]) -> int:
+    return sum(sys.getsizeof(s) for s in strings if s is not None)
+
+
+async def load_catalog_index(
+    conn: aiosqlite.Connection,
+    *,
+    version: CatalogVersion,
+    memory_budget_bytes: int,
+    schema_owner: object | None = None,
+) -> CatalogIndex:
+    """Read every catalog item into a new CatalogIndex.
+
+    Rows are streamed in batches and the running size estimate is checked
+    after each batch; raises MemoryBudgetExceededError as soon as it is over.
+    """
+    schema = await get_catalog_schema(schema_owner or conn, conn)
+    extra = [
+        "ci.mediacms_category IS NOT NULL AS listed",
+        "ci.is_tv AS is_tv" if schema.has("is_tv") else "0 AS is_tv",
+        "ci.weekend_only AS weekend_only" if schema.has("weekend_only") else "0 AS weekend_only",
+        "(ci.mediacms_category IS NOT NULL AND ci.mediacms_category != 'Uncategorized') AS visible",
+        "ci.llm_enriched_at IS NOT NULL AS enriched" if schema.has("llm_enriched_at") else "0 AS enriched",
+    ]
+    # Facet filters match the canonical name behind <facet>_id, not the raw text
+    keyed = [facet for facet in FACETS if schema.has(f"{facet}_id")]
+    extra += [f"(SELECT name FROM {FACET_TABLES[facet]} WHERE id = ci.{facet}_id) AS {facet}_key" for facet in keyed]
+    select = schema.item_select.replace(" FROM catalog_item ci", ", " + ", ".join(extra) + " FROM catalog_item ci")
+
+    video_ids: list[str] = []
+    titles: list[str] = []
+    thumbnails: list[Optional[str]] = []
+    synopses: list[Optional[str]] = []
+    durations = array("q")
+    years = array("h")
+    flags = bytearray()
+    snapshots = _Interner()
+    snap_codes = array("H")
+    facet_interners = {facet: _Interner() for facet in FACETS}
+    facet_codes = {facet: array("I") for facet in FACETS}
+    key_interners = {facet: _Interner() for facet in FACETS}
+    key_codes = {facet: array("I") for facet in FACETS}
+
+    size = 0
+    cursor = await conn.execute(f"{select} ORDER BY ci.rowid")
+    while True:
+        rows = await cursor.fetchmany(_FETCH_SIZE)
+        if not rows:
+            break
+        for r in rows:
+            vid = str(r["video_id"])
+            title = str(r["title"] or "")
+            thumb = r["thumbnail_url"]
+            synopsis = r["synopsis"]
+            video_ids.append(vid)
+            titles.append(title)
+            thumbnails.append(thumb)
+            synopses.append(synopsis)
+            duration = r["duration_seconds"]
+            durations.append(_NULL_INT if duration is None else int(duration))
+            try:
+                year = int(r["year"]) if r["year"] is not None else _NULL_INT
+            except (TypeError, ValueError):
+                year = _NULL_INT
+            years.append(year if -32768 <= year <= 32767 else _NULL_INT)
+            flags.append(
+                (FLAG_LISTED if r["listed"] else 0)
+                | (FLAG_TV if r["is_tv"] else 0)
+                | (FLAG_WEEKEND_ONLY if r["weekend_only"] else 0)
+                | (FLAG_VISIBLE if r["visible"] else 0)
+                | (FLAG_ENRICHED if r["enriched"] else 0)
+            )
+            snap_codes.append(snapshots.code(r["snapshot_id"]))
+            for facet in FACETS:
+                raw = r[facet]
+                facet_codes[facet].append(facet_interners[facet].code(raw))
+                key = r[f"{facet}_key"] if facet in keyed else canonical_facet(facet, raw) if raw else None
+                key_codes[facet].append(key_interners[facet].code(key))
+            size += _ROW_OVERHEAD + _estimate((vid, title, thumb, synopsis))
+
+        if size > memory_budget_bytes:
+            raise MemoryBudgetExceededError(
+                f"catalog index needs more than {memory_budget_bytes} bytes "
+                f"({len(video_ids)} rows read so far)"
+            )
+
+    # Interned strings are stored once
+    size += _estimate(snapshots.values)
+    size += sum(_estimate(i.values) for i in facet_interners.values())
+    size += sum(_estimate(i.values) for i in key_interners.values())
+
+    return CatalogIndex(
+        version=version,
+        video_ids=video_ids,
+        titles=titles,
+        thumbnails=thumbnails,
+        synopses=synopses,
+        durations=durations,
+        years=years,
+        flags=flags,
+        snapshots=(snap_codes, snapshots.values),
+        facets={f: (facet_codes[f], facet_interners[f].values) for f in FACETS},
+        facet_keys={f: (key_codes[f], key_interners[f].values) for f in FACETS},
+        memory_bytes=size,
+    )
+
+
+class CatalogIndexManager:
+    """Keeps ``current`` in step with the catalog version.
+
+    A new ``snapshot_id`` (ingest or rebuild) triggers a reload on the next
+    ``refresh``. Generation-only bumps (enrichment batches) are coalesced:
+    the index is rebuilt at most once per ``min_reload_seconds`` for them.
+    """
+
+    def __init__(
+        self,
+        source: aiosqlite.Connection | ReadPool,
+        *,
+        memory_budget_mb: int = 256,
+        min_reload_seconds: float = 60.0,
+    ):
+        self._source = source
+        self._budget = max(1, int(memory_budget_mb)) * 1024 * 1024
+        self._min_reload = float(min_reload_seconds)
+        self._lock = asyncio.Lock()
+        self.current: Optional[CatalogIndex] = None
+        self.over_budget = False
+        self._rejected: Optional[CatalogVersion] = None
+
+    @contextlib.asynccontextmanager
+    async def _reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        if isinstance(self._source, ReadPool):
+            async with self._source.acquire() as conn:
+                yield conn
+        else:
+            yield self._source
+
+    def _is_fresh(self, version: CatalogVersion) -> bool:
+        cur = self.current
+        if cur is None:
+            return False
+        if cur.version == version:
+            return True
+        if cur.version.snapshot_id != version.snapshot_id:
+            return False
+        return time.monotonic() - cur.loaded_at < self._min_reload
+
+    async def refresh(self) -> bool:
+        """Reload the index if the catalog moved on. Returns True if swapped."""
+        async with self._lock:
+            async with self._reader() as conn:
+                version = await get_catalog_version(conn)
+                if version is None or version == self._rejected or self._is_fresh(version):
+                    return False
+                started = time.perf_counter()
+                try:
+                    index = await load_catalog_index(
+                        conn,
+                        version=version,
+                        memory_budget_bytes=self._budget,
+                        schema_owner=self._source,
+                    )
+                except MemoryBudgetExceededError as e:
+                    if not self.over_budget:
+                        logger.warning(f"Catalog index disabled: {e}")
+                    self.over_budget = True
+                    self._rejected = version
+                    self.current = None
+                    return False
+
+            self.over_budget = False
+            self._rejected = None
+            self.current = index
+            logger.info(
+                f"Catalog index loaded: {len(index)} rows, "
+                f"{index.memory_bytes / 1024 / 1024:.1f} MiB, version {version.key}, "
+                f"{(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+            return True
+
+    async def run(self, shutdown_event: asyncio.Event, *, poll_seconds: float = 30.0) -> None:
+        """Poll the catalog version until ``shutdown_event`` is set."""
+        while not shutdown_event.is_set():
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Catalog index refresh failed: {e}")
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(shutdown_event.wait(), timeout=poll_seconds)
+
+    def stats(self) -> dict[str, Any]:
+        cur = self.current
+        base = {"enabled": cur is not None, "over_budget": self.over_budget, "budget_bytes": self._budget}
+        if cur is not None:
+            base.update(cur.stats())
+        return base
@@ -0,0 +1,87 @@
+"""Catalog version tracking.
+
+Ingest, rebuild and enrichment run in separate processes (the CLI) as well as
+inside the service, so in-memory caches cannot rely on being told about every
+change. Writers instead record a version in the ``catalog_meta`` table:
+
+- ``snapshot_id``: the snapshot written by the last ingest/rebuild.
+- ``generation``: bumped on every committed catalog change (ingest, rebuild,
+  enrichment batch).
+
+Readers fetch both with a single primary-key lookup and use the pair as part of
+their cache keys, so stale entries simply stop matching.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+
+import aiosqlite
+
+CATALOG_META_SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalog_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+)
+"""
+
+
+@dataclass(frozen=True)
+class CatalogVersion:
+    snapshot_id: str
+    generation: int
+
+    @property
+    def key(self) -> str:
+        """Compact string form used in cache keys."""
+        return f"{self.snapshot_id}#{self.generation}"
+
+
+async def init_catalog_meta(conn: aiosqlite.Connection) -> None:
+    """Create the catalog_meta table (caller commits)."""
+    await conn.execute(CATALOG_META_SCHEMA)
+
+
+async def mark_catalog_changed(
+    conn: aiosqlite.Connection,
+    *,
+    snapshot_id: str | None = None,
+) -> None:
+    """Bump the catalog generation (and optionally record a new snapshot_id).
+
+    Call inside the writer's transaction, before it commits, so the new
+    version becomes visible together with the data it describes.
+    """
+    await conn.execute(
+        "INSERT INTO catalog_meta(key, value) VALUES('generation', '1') "
+        "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+    )
+    if snapshot_id is not None:
+        await conn.execute(
+            "INSERT INTO catalog_meta(key, value) VALUES('snapshot_id', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (snapshot_id,),
+        )
+
+
+async def get_catalog_version(conn: aiosqlite.Connection) -> CatalogVersion | None:
+    """Return the current catalog version, or None if it is not tracked.
+
+    None means the database has no catalog_meta table yet; callers should
+    skip caching rather than cache against an unknown version.
+    """
+    try:
+        cursor = await conn.execute(
+            "SELECT key, value FROM catalog_meta WHERE key IN ('snapshot_id', 'generation')"
+        )
+        rows = await cursor.fetchall()
+    except sqlite3.OperationalError:
+        return None
+
+    values = {r[0]: r[1] for r in rows}
+    try:
+        generation = int(values.get("generation") or 0)
+    except ValueError:
+        generation = 0
+    return CatalogVersion(snapshot_id=str(values.get("snapshot_id") or ""), generation=generation)
@@ -1,61 +1,256 @@
 from __future__ import annotations
 
+import base64
+import contextlib
+import dataclasses
+import json
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
 
 import aiosqlite
 
+from kryten_playlist.storage.catalog_index import CatalogIndex, CatalogIndexManager
+from kryten_playlist.storage.catalog_meta import get_catalog_version
+from kryten_playlist.storage.catalog_schema import CatalogSchema, get_catalog_schema
+from kryten_playlist.storage.catalog_subsets import read_pending_count
+from kryten_playlist.storage.facets import (
+    FACET_TABLES,
+    FACETS,
+    canonical_facet,
+    facet_filter_sql,
+    facet_like_sql,
+)
+from kryten_playlist.storage.fts import bm25_expr, fts_and, fts_column_filter
+from kryten_playlist.storage.id_lookup import fetch_by_video_ids, order_by_request, unique_ids
+from kryten_playlist.storage.people import (
+    ROLE_ACTOR,
+    ROLE_DIRECTOR,
+    person_filter_params,
+    person_filter_sql,
+    person_key,
+)
+from kryten_playlist.storage.popularity import POPULARITY_BOOST, POPULARITY_TABLE
+from kryten_playlist.storage.search_cache import FacetCountsCache, SearchResultCache, TotalsCache
+from kryten_playlist.storage.search_query import compile_query, plan_cache_stats
+from kryten_playlist.storage.sqlite import ReadPool
+from kryten_playlist.storage.trigram import (
+    MIN_SCORE,
+    best_similarity,
+    candidate_filter,
+    match_trigrams,
+    rarest_trigrams,
+    word_trigrams,
+)
+
 
 @dataclass(frozen=True)
 class CatalogSearchResult:
     snapshot_id: str
     items: list[dict]
     total: int
+    next_cursor: Optional[str] = None
 
 
-class CatalogRepository:
-    def __init__(self, conn: aiosqlite.Connection):
-        self._conn = conn
-        # Ensure row_factory for dict-like row access
-        self._conn.row_factory = aiosqlite.Row
+@dataclass(frozen=True)
+class CatalogSeriesResult:
+    snapshot_id: str
+    groups: list[dict]
+    total: int
+
 
-    async def _detect_schema(self) -> tuple[str, list[str]]:
-        """Returns (title_selection, search_columns).
+@dataclass(frozen=True)
+class SearchFilters:
+    """Filters shared by search and facet counts."""
 
-        Detects if we are using the legacy schema (title column) or
-        enriched schema (sanitized_title/raw_title).
+    q: Optional[str] = None
+    categories: tuple[str, ...] = ()
+    series: Optional[str] = None
+    title: Optional[str] = None
+    theme: Optional[str] = None
+    actor: Optional[str] = None
+    director: Optional[str] = None
+    genre: Optional[str] = None
+    mood: Optional[str] = None
+    era: Optional[str] = None
+    # Inclusive bounds; duration in seconds
+    min_duration: Optional[int] = None
+    max_duration: Optional[int] = None
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+    include_uncategorized: bool = False
+
+    def normalized(self) -> "SearchFilters":
+        """Equivalent filters in canonical form, suitable as a cache key.
+
+        Text is whitespace-collapsed and casefolded (matching is already
+        case-insensitive), facets are mapped onto their vocabulary and
+        categories are de-duplicated and sorted.
         """
-        cursor = await self._conn.execute("PRAGMA table_info(catalog_item)")
-        columns = {row["name"] for row in await cursor.fetchall()}
-
-        if "title" in columns:
-            return "title", ["title"]
-        elif "sanitized_title" in columns:
-            search_cols = ["sanitized_title"]
-            if "raw_title" in columns:
-                search_cols.append("raw_title")
-            return "sanitized_title as title", search_cols
+
+        def text(value: Optional[str]) -> Optional[str]:
+            folded = " ".join(str(value or "").split()).casefold()
+            return folded or None
+
+        return SearchFilters(
+            q=text(self.q),
+            categories=tuple(sorted({c.strip() for c in self.categories if c and c.strip()})),
+            series=text(self.series),
+            title=text(self.title),
+            theme=text(self.theme),
+            actor=text(self.actor),
+            director=text(self.director),
+            genre=canonical_facet("genre", self.genre),
+            mood=canonical_facet("mood", self.mood),
+            era=canonical_facet("era", self.era),
+            min_duration=self.min_duration,
+            max_duration=self.max_duration,
+            year_from=self.year_from,
+            year_to=self.year_to,
+            include_uncategorized=bool(self.include_uncategorized),
+        )
+
+
+@dataclass(frozen=True)
+class SearchPlan:
+    """How a search is executed (see ``CatalogRepository.explain_search``)."""
+
+    query: str  # normalized query-language text
+    plan: list[str]
+    sql: str
+    params: list[object]
+    sqlite_plan: list[str]
+    plan_cached: bool
+
+
+@dataclass
+class _FilterQuery:
+    from_sql: str
+    where: list[str]
+    params: list[object]
+    sort_mode: str
+    sort_sql: str
+    # Pages are ordered by (sort_sql, tie_sql), both descending if set
+    tie_sql: str = "ci.video_id"
+    descending: bool = False
+    plan: list[str] = dataclasses.field(default_factory=list)
+
+    @property
+    def where_sql(self) -> str:
+        return "" if not self.where else ("WHERE " + " AND ".join(self.where))
+
+    def page_sql(self, schema: CatalogSchema, where_sql: str) -> str:
+        """One page of items; binds ``params``, then LIMIT and OFFSET."""
+        direction = "DESC" if self.descending else "ASC"
+        return (
+            f"{schema.search_select}, {self.sort_sql} AS sort_key "
+            f"FROM {self.from_sql} {where_sql} "
+            f"ORDER BY sort_key {direction}, {self.tie_sql} {direction} LIMIT ? OFFSET ?"
+        )
+
+    def keyset_sql(self) -> str:
+        """Rows after a cursor's (sort_key, video_id) position."""
+        return f"({self.sort_sql}, {self.tie_sql}) {'<' if self.descending else '>'} (?, ?)"
+
+
+# sort option -> (catalog_item column, descending)
+_COLUMN_SORTS = {
+    "duration": ("duration_seconds", False),
+    "year": ("year", True),
+    "recent": ("created_at", True),
+}
+
+
+def encode_cursor(mode: str, sort_value: Any, video_id: str) -> str:
+    """Encode a keyset position as an opaque URL-safe token."""
+    raw = json.dumps([mode, sort_value, video_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, mode: str) -> tuple[Any, str]:
+    """Decode a cursor produced by encode_cursor.
+
+    Raises ValueError if the token is malformed or was issued for a
+    different sort mode.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cur_mode, sort_value, video_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+    if cur_mode != mode or not isinstance(video_id, str):
+        raise ValueError("invalid cursor")
+    return sort_value, video_id
+
+
+class CatalogRepository:
+    """Read-side access to the catalog.
+
+    ``conn`` is either a single connection or a ReadPool; with a pool each
+    public call checks out its own read-only connection, so concurrent
+    requests do not serialize on one aiosqlite worker thread.
+
+    With a CatalogIndexManager, item lookups by video_id are answered from
+    its in-memory index whenever one is loaded.
+    """
+
+    def __init__(
+        self,
+        conn: aiosqlite.Connection | ReadPool,
+        *,
+        totals_cache: TotalsCache | None = None,
+        facet_cache: FacetCountsCache | None = None,
+        index: CatalogIndexManager | None = None,
+        result_cache: SearchResultCache | None = None,
+    ):
+        self._pool = conn if isinstance(conn, ReadPool) else None
+        self._conn = None if self._pool is not None else conn
+        self._totals_cache = totals_cache
+        self._facet_cache = facet_cache
+        self._index = index
+        self._result_cache = result_cache
+        if self._conn is not None:
+            # Ensure row_factory for dict-like row access
+            self._conn.row_factory = aiosqlite.Row
+
+    @contextlib.asynccontextmanager
+    async def _reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        if self._pool is not None:
+            async with self._pool.acquire() as conn:
+                yield conn
         else:
-            return "video_id as title", ["video_id"]
+            yield self._conn
+
+    async def _schema(self, conn: aiosqlite.Connection) -> CatalogSchema:
+        """Schema variant in use, detected once per connection or pool."""
+        return await get_catalog_schema(self._pool or self._conn, conn)
+
+    def _loaded_index(self) -> CatalogIndex | None:
+        return self._index.current if self._index is not None else None
 
     async def get_items_by_video_ids(self, video_ids: list[str]) -> dict[str, dict]:
         """Fetch catalog items by video_id.
 
-        Returns a mapping of video_id -> item dict.
-        Missing ids are omitted from the result.
+        Returns a mapping of video_id -> item dict in request order.
+        Missing ids are omitted from the result. Any number of ids is
+        fine; with a read pool, large sets are joined through a temp table.
         """
-        ids = [str(v).strip() for v in (video_ids or []) if str(v).strip()]
+        ids = unique_ids(video_ids)
         if not ids:
             return {}
 
-        title_sel, _ = await self._detect_schema()
-        placeholders = ",".join(["?"] * len(ids))
-        cursor = await self._conn.execute(
-            f"SELECT video_id, {title_sel}, duration_seconds, thumbnail_url, snapshot_id, genre, mood, era, year, synopsis "
-            f"FROM catalog_item WHERE video_id IN ({placeholders}) AND mediacms_category IS NOT NULL",
-            ids,
-        )
-        rows = await cursor.fetchall()
+        index = self._loaded_index()
+        if index is not None:
+            return index.get_items(ids)
+
+        async with self._reader() as conn:
+            schema = await self._schema(conn)
+            rows = await fetch_by_video_ids(
+                conn,
+                f"{schema.item_select} "
+                "WHERE ci.video_id IN {ids} AND ci.mediacms_category IS NOT NULL",
+                ids,
+                private_connection=self._pool is not None,
+            )
 
         out: dict[str, dict] = {}
         for r in rows:
@@ -71,7 +266,7 @@ class CatalogRepository:
                 "thumbnail_url": r["thumbnail_url"],
                 "snapshot_id": r["snapshot_id"],
             }
-        return out
+        return order_by_request(ids, out)
 
     async def get_item(self, video_id: str) -> dict | None:
         """Fetch a single catalog item by video_id."""
@@ -79,13 +274,17 @@ class CatalogRepository:
         if not vid:
             return None
 
-        title_sel, _ = await self._detect_schema()
-        cursor = await self._conn.execute(
-            f"SELECT video_id, {title_sel}, duration_seconds, thumbnail_url, snapshot_id, genre, mood, era, year, synopsis "
-            "FROM catalog_item WHERE video_id = ? AND mediacms_category IS NOT NULL",
-            (vid,),
-        )
-        r = await cursor.fetchone()
+        index = self._loaded_index()
+        if index is not None:
+            return index.get_item(vid)
+
+        async with self._reader() as conn:
+            schema = await self._schema(conn)
+            cursor = await conn.execute(
+                f"{schema.item_select} WHERE ci.video_id = ? AND ci.mediacms_category IS NOT NULL",
+                (vid,),
+            )
+            r = await cursor.fetchone()
         if not r:
             return None
 
@@ -102,23 +301,43 @@ class CatalogRepository:
             "snapshot_id": r["snapshot_id"],
         }
 
+    async def _cached(
+        self,
+        conn: aiosqlite.Connection,
+        signature: tuple,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Serve ``compute()`` through the result cache when one is configured."""
+        if self._result_cache is not None:
+            version = await get_catalog_version(conn)
+            if version is not None:
+                return await self._result_cache.get_or_compute(version.key, signature, compute)
+        return await compute()
+
     async def get_categories(self) -> list[str]:
         """Get distinct genres from catalog."""
         try:
-            cursor = await self._conn.execute(
-                "SELECT category FROM catalog_category ORDER BY category ASC"
-            )
-            rows = await cursor.fetchall()
-            return [r["category"] for r in rows]
+            async with self._reader() as conn:
+
+                async def compute() -> list[str]:
+                    schema = await self._schema(conn)
+                    cursor = await conn.execute(schema.categories_sql)
+                    return [r["category"] for r in await cursor.fetchall()]
+
+                return list(await self._cached(conn, ("categories",), compute))
         except Exception:
             return []
 
     async def get_pending_count(self) -> int:
         """Count items that are waiting for enrichment."""
-        cursor = await self._conn.execute(
-            "SELECT COUNT(*) FROM catalog_item WHERE llm_enriched_at IS NULL"
-        )
-        row = await cursor.fetchone()
+        async with self._reader() as conn:
+            count = await read_pending_count(conn)
+            if count is not None:
+                return count
+            cursor = await conn.execute(
+                "SELECT COUNT(*) FROM catalog_item WHERE llm_enriched_at IS NULL"
+            )
+            row = await cursor.fetchone()
         return row[0] if row else 0
 
     async def search(
@@ -138,86 +357,576 @@ class CatalogRepository:
         era: Optional[str] = None,
         # Access control
         include_uncategorized: bool = False,
+        # Keyset pagination (takes precedence over offset)
+        cursor: Optional[str] = None,
+        # Typo-tolerant title matching for q (one page, best matches first)
+        fuzzy: bool = False,
+        # Runtime (seconds) and release year bounds, inclusive
+        min_duration: Optional[int] = None,
+        max_duration: Optional[int] = None,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        # relevance (default), title, duration, year, recent or popular
+        sort: Optional[str] = None,
     ) -> CatalogSearchResult:
-        """Search catalog items using LIKE and facets."""
-        q = (q or "").strip()
+        """Search catalog items.
+
+        Free text and the text facets (series, title, actor, director, theme)
+        are matched through the catalog_fts index and ranked by bm25 when the
+        enhanced schema is present. Legacy databases without the FTS table
+        fall back to LIKE substring matching.
+
+        Pass the previous page's ``next_cursor`` as ``cursor`` to resume from
+        the last (sort_key, video_id) seen instead of skipping ``offset`` rows.
+        With ``fuzzy``, ``q`` is matched against titles through the trigram
+        index instead and the best ``limit`` matches are returned ranked by
+        similarity, so misspellings ("grindhose") still find the title. The
+        other filters apply as usual; offset and cursor are ignored.
+
+        ``sort`` overrides the default order (bm25 for text, else title):
+        ``duration`` is shortest first, ``year`` newest release first,
+        ``recent`` most recently added first and ``popular`` by play/like
+        score. Without text these walk an index on the sort column and stop
+        after one page instead of sorting every match; sorting by duration
+        or year leaves out items where it is unknown.
+
+        Totals are cached per filter signature and catalog version when a
+        TotalsCache is configured; whole result pages likewise (keyed by the
+        normalized filters and page position) with a SearchResultCache.
+        """
+        filters = SearchFilters(
+            q=q,
+            categories=tuple(categories or ()),
+            series=series,
+            title=title,
+            theme=theme,
+            actor=actor,
+            director=director,
+            genre=genre,
+            mood=mood,
+            era=era,
+            min_duration=min_duration,
+            max_duration=max_duration,
+            year_from=year_from,
+            year_to=year_to,
+            include_uncategorized=include_uncategorized,
+        ).normalized()
+        async with self._reader() as conn:
+            if fuzzy and filters.q:
+                return await self._cached(
+                    conn,
+                    ("fuzzy", filters, limit),
+                    lambda: self._fuzzy_search(conn, filters, limit),
+                )
+            return await self._cached(
+                conn,
+                ("search", filters, limit, offset, cursor, sort),
+                lambda: self._search(conn, filters, limit, offset, cursor, sort),
+            )
+
+    def _build_query(
+        self,
+        schema: CatalogSchema,
+        f: SearchFilters,
+        sort: Optional[str] = None,
+    ) -> _FilterQuery:
+        """Translate search filters into FROM/WHERE SQL for ``schema``.
 
-        where = []
-        params: list[object] = []
+        ``q`` is query-language text (see ``storage/search_query.py``); the
+        other text fields are plain text ANDed with it.
+        """
+        compiled = compile_query(f.q, schema) if f.q else None
+        actor, director = f.actor, f.director
 
-        title_sel, search_cols = await self._detect_schema()
+        where = list(compiled.where) if compiled else []
+        params: list[object] = list(compiled.params) if compiled else []
+        plan = list(compiled.plan) if compiled else []
 
-        if q:
-            clauses = [f"{col} LIKE ?" for col in search_cols]
-            where.append(f"({' OR '.join(clauses)})")
-            params.extend([f"%{q}%"] * len(search_cols))
+        search_cols = schema.search_columns
+        use_fts = schema.has_fts
 
-        if categories:
-            placeholders = ",".join(["?"] * len(categories))
-            where.append(f"video_id IN (SELECT video_id FROM catalog_item_category WHERE category IN ({placeholders}))")
-            params.extend(categories)
+        # People facets are indexed name/surname prefix lookups when the
+        # people tables exist; otherwise they fall through to FTS/LIKE below.
+        if schema.has_people:
+            for role, name in ((ROLE_ACTOR, actor), (ROLE_DIRECTOR, director)):
+                if name and person_key(name):
+                    where.append(person_filter_sql(role))
+                    params.extend(person_filter_params(name))
+            actor = director = None
 
-        # Facet filters
-        if series:
-            # Series typically implies title_base match
-            where.append("title_base LIKE ?")
-            params.append(f"%{series}%")
+        match_expr = None
+        if use_fts:
+            match_expr = fts_and(
+                compiled.fts if compiled else None,
+                fts_column_filter(("title_base",), f.series),
+                fts_column_filter(("sanitized_title",), f.title),
+                fts_column_filter(("cast_list",), actor),
+                fts_column_filter(("director",), director),
+                fts_column_filter(("synopsis", "llm_notes"), f.theme),
+            )
+        else:
+            # Facet filters
+            if f.series:
+                # Series typically implies title_base match
+                where.append("ci.title_base LIKE ?")
+                params.append(f"%{f.series}%")
 
-        if title:
-            # Specific title search (sanitized_title or raw_title)
-            where.append("sanitized_title LIKE ?")
-            params.append(f"%{title}%")
+            if f.title:
+                # Specific title search (sanitized_title or raw_title)
+                where.append("ci.sanitized_title LIKE ?")
+                params.append(f"%{f.title}%")
 
-        if actor:
-            where.append("cast_list LIKE ?")
-            params.append(f"%{actor}%")
+            if actor:
+                where.append("ci.cast_list LIKE ?")
+                params.append(f"%{actor}%")
 
-        if director:
-            where.append("director LIKE ?")
-            params.append(f"%{director}%")
+            if director:
+                where.append("ci.director LIKE ?")
+                params.append(f"%{director}%")
 
-        if genre:
-            where.append("genre LIKE ?")
-            params.append(f"%{genre}%")
+            if f.theme:
+                # Searching synopsis and llm_notes for theme
+                where.append("(ci.synopsis LIKE ? OR ci.llm_notes LIKE ?)")
+                params.extend([f"%{f.theme}%", f"%{f.theme}%"])
 
-        if mood:
-            where.append("mood LIKE ?")
-            params.append(f"%{mood}%")
+        if f.categories:
+            placeholders = ",".join(["?"] * len(f.categories))
+            where.append(schema.category_filter.format(placeholders=placeholders))
+            params.extend(f.categories)
 
-        if era:
-            where.append("era LIKE ?")
-            params.append(f"%{era}%")
+        for facet, value in (("genre", f.genre), ("mood", f.mood), ("era", f.era)):
+            if not value:
+                continue
+            canonical = canonical_facet(facet, value)
+            if not canonical:
+                continue
+            if schema.has(f"{facet}_id"):
+                # Indexed equality on the normalized lookup id
+                where.append(facet_filter_sql(facet))
+                params.append(canonical)
+            else:
+                # Raw text: any spelling of the value
+                sql, like_params = facet_like_sql(facet, canonical)
+                where.append(sql)
+                params.extend(like_params)
 
-        if theme:
-            # Searching synopsis and llm_notes for theme
-            where.append("(synopsis LIKE ? OR llm_notes LIKE ?)")
-            params.extend([f"%{theme}%", f"%{theme}%"])
+        for column, low, high in (
+            ("duration_seconds", f.min_duration, f.max_duration),
+            ("year", f.year_from, f.year_to),
+        ):
+            if low is None and high is None:
+                continue
+            if not schema.has(column):
+                raise ValueError(f"{column} filters are not available for this catalog")
+            # Range on the column's index
+            if low is not None:
+                where.append(f"ci.{column} >= ?")
+                params.append(int(low))
+            if high is not None:
+                where.append(f"ci.{column} <= ?")
+                params.append(int(high))
 
         # Access control
-        if not include_uncategorized:
+        if not f.include_uncategorized:
             # Exclude items that are NULL or explicitly "Uncategorized"
-            where.append("(mediacms_category IS NOT NULL AND mediacms_category != 'Uncategorized')")
+            where.append("(ci.mediacms_category IS NOT NULL AND ci.mediacms_category != 'Uncategorized')")
 
         # Global filter: only show enriched items
-        where.append("llm_enriched_at IS NOT NULL")
+        where.append("ci.llm_enriched_at IS NOT NULL")
 
-        where_sql = "" if not where else ("WHERE " + " AND ".join(where))
+        from_sql = "catalog_item ci"
+        if match_expr:
+            where.insert(0, "catalog_fts MATCH ?")
+            params.insert(0, match_expr)
+            # CROSS JOIN pins catalog_fts as the outer loop. Left to itself the
+            # planner may drive from a facet index and re-run the MATCH for
+            # every row it finds there.
+            from_sql = "catalog_fts CROSS JOIN catalog_item ci ON ci.rowid = catalog_fts.rowid"
+        pop_join = f" LEFT JOIN {POPULARITY_TABLE} pop ON pop.video_id = ci.video_id"
 
-        count_cursor = await self._conn.execute(
-            f"SELECT COUNT(*) AS cnt FROM catalog_item {where_sql}",
-            params,
+        sort = sort or "relevance"
+        if sort == "relevance" and match_expr:
+            sort_sql = bm25_expr()
+            order_note = "order: bm25 rank"
+            if schema.has_popularity:
+                # bm25 is negative (lower is better): scaling it up by the
+                # precomputed score lifts popular titles among close matches
+                from_sql += pop_join
+                sort_sql = f"{sort_sql} * (1.0 + {POPULARITY_BOOST} * ifnull(pop.score, 0))"
+                order_note += " boosted by catalog_popularity"
+            return _FilterQuery(
+                from_sql=from_sql,
+                where=where,
+                params=params,
+                sort_mode="rank",
+                sort_sql=sort_sql,
+                plan=[*plan, order_note],
+            )
+        if sort in ("relevance", "title"):
+            return _FilterQuery(
+                from_sql=from_sql,
+                where=where,
+                params=params,
+                sort_mode="title",
+                sort_sql=f"ci.{search_cols[0]}",
+                plan=[*plan, f"order: {search_cols[0]}"],
+            )
+        if sort in _COLUMN_SORTS:
+            column, descending = _COLUMN_SORTS[sort]
+            if not schema.has(column):
+                raise ValueError(f"sort={sort} is not available for this catalog")
+            if column != "created_at":
+                # NULLs would sort first and cannot be paged past by keyset
+                where.append(f"ci.{column} IS NOT NULL")
+            return _FilterQuery(
+                from_sql=from_sql,
+                where=where,
+                params=params,
+                sort_mode=sort,
+                sort_sql=f"ci.{column}",
+                descending=descending,
+                plan=[*plan, f"order: {column} {'DESC' if descending else 'ASC'}"],
+            )
+        if sort == "popular":
+            if not schema.has_popularity:
+                raise ValueError("sort=popular is not available for this catalog")
+            if match_expr:
+                return _FilterQuery(
+                    from_sql=from_sql + pop_join,
+                    where=where,
+                    params=params,
+                    sort_mode=sort,
+                    sort_sql="ifnull(pop.score, 0)",
+                    descending=True,
+                    plan=[*plan, "order: catalog_popularity score DESC"],
+                )
+            # Drive from the score index; every catalog item has a row
+            return _FilterQuery(
+                from_sql=f"{POPULARITY_TABLE} pop JOIN catalog_item ci ON ci.video_id = pop.video_id",
+                where=where,
+                params=params,
+                sort_mode=sort,
+                sort_sql="pop.score",
+                tie_sql="pop.video_id",
+                descending=True,
+                plan=[*plan, "order: catalog_popularity score index DESC"],
+            )
+        raise ValueError(f"unknown sort: {sort}")
+
+    async def _search(
+        self,
+        conn: aiosqlite.Connection,
+        filters: SearchFilters,
+        limit: int,
+        offset: int,
+        cursor: Optional[str],
+        sort: Optional[str] = None,
+    ) -> CatalogSearchResult:
+        schema = await self._schema(conn)
+        query = self._build_query(schema, filters, sort)
+        from_sql, params = query.from_sql, query.params
+        sort_mode = query.sort_mode
+        where_sql = query.where_sql
+
+        total = await self._count(conn, from_sql, where_sql, params)
+
+        page_where = where_sql
+        page_params = list(params)
+        if cursor:
+            after_key, after_vid = decode_cursor(cursor, sort_mode)
+            keyset = query.keyset_sql()
+            page_where = f"{where_sql} AND {keyset}" if where_sql else f"WHERE {keyset}"
+            page_params.extend([after_key, after_vid])
+            offset = 0
+
+        cursor_obj = await conn.execute(
+            query.page_sql(schema, page_where),
+            [*page_params, limit, offset],
         )
-        total_row = await count_cursor.fetchone()
-        total = int(total_row["cnt"] if total_row else 0)
+        rows = await cursor_obj.fetchall()
+
+        next_cursor = None
+        if len(rows) == limit:
+            last = rows[-1]
+            next_cursor = encode_cursor(sort_mode, last["sort_key"], str(last["video_id"]))
 
-        cursor = await self._conn.execute(
-            f"SELECT video_id, {title_sel}, duration_seconds, thumbnail_url, snapshot_id, genre, mood, era, year, synopsis "
-            f"FROM catalog_item {where_sql} ORDER BY {search_cols[0]} ASC LIMIT ? OFFSET ?",
-            [*params, limit, offset],
+        snapshot_id = rows[0]["snapshot_id"] if rows else ""
+        items = []
+        for r in rows:
+            items.append(
+                {
+                    "video_id": r["video_id"],
+                    "title": r["title"],
+                    "genre": r["genre"],
+                    "mood": r["mood"],
+                    "era": r["era"],
+                    "year": r["year"],
+                    "synopsis": r["synopsis"],
+                    "duration_seconds": r["duration_seconds"],
+                    "thumbnail_url": r["thumbnail_url"],
+                }
+            )
+
+        return CatalogSearchResult(
+            snapshot_id=snapshot_id, items=items, total=total, next_cursor=next_cursor
+        )
+
+    async def _fuzzy_search(
+        self,
+        conn: aiosqlite.Connection,
+        filters: SearchFilters,
+        limit: int,
+    ) -> CatalogSearchResult:
+        schema = await self._schema(conn)
+        if not schema.has_trigram:
+            return await self._search(conn, filters, limit, 0, None)
+
+        # Only the free text is matched fuzzily; field terms filter as usual
+        parsed = compile_query(filters.q, schema).query
+        grams = await rarest_trigrams(conn, match_trigrams(parsed.text))
+        if not grams:
+            return CatalogSearchResult(snapshot_id="", items=[], total=0)
+
+        rest = str(parsed.without_text()) or None
+        query = self._build_query(schema, dataclasses.replace(filters, q=rest))
+        candidates_sql, candidate_params = candidate_filter(grams)
+        where = [*query.where, candidates_sql]
+        cursor = await conn.execute(
+            f"{schema.search_select}, ci.title_base, ci.raw_title "
+            f"FROM {query.from_sql} WHERE {' AND '.join(where)}",
+            [*query.params, *candidate_params],
+        )
+        rows = await cursor.fetchall()
+
+        q_grams = word_trigrams(parsed.text)
+        scored = []
+        for r in rows:
+            score = best_similarity(q_grams, (r["title"], r["title_base"], r["raw_title"]))
+            if score >= MIN_SCORE:
+                scored.append((score, r))
+        scored.sort(key=lambda sr: (-sr[0], str(sr[1]["title"]), str(sr[1]["video_id"])))
+        scored = scored[:limit]
+
+        items = [
+            {
+                "video_id": r["video_id"],
+                "title": r["title"],
+                "genre": r["genre"],
+                "mood": r["mood"],
+                "era": r["era"],
+                "year": r["year"],
+                "synopsis": r["synopsis"],
+                "duration_seconds": r["duration_seconds"],
+                "thumbnail_url": r["thumbnail_url"],
+                "score": round(score, 4),
+            }
+            for score, r in scored
+        ]
+        snapshot_id = scored[0][1]["snapshot_id"] if scored else ""
+        return CatalogSearchResult(snapshot_id=snapshot_id, items=items, total=len(items))
+
+    async def search_series(
+        self,
+        filters: SearchFilters,
+        *,
+        limit: int,
+        offset: int,
+    ) -> CatalogSeriesResult:
+        """Search with matches collapsed to one row per ``title_base``.
+
+        Each group carries its episode count, season range and total
+        runtime from one aggregated query; standalone titles are groups of
+        one and also carry their ``video_id``. Text searches order groups
+        by their best match, otherwise by ``title_base``, which walks
+        ``idx_catalog_item_season_episode`` instead of sorting.
+        """
+        filters = filters.normalized()
+        async with self._reader() as conn:
+            return await self._cached(
+                conn,
+                ("series", filters, limit, offset),
+                lambda: self._search_series(conn, filters, limit, offset),
+            )
+
+    async def _search_series(
+        self,
+        conn: aiosqlite.Connection,
+        filters: SearchFilters,
+        limit: int,
+        offset: int,
+    ) -> CatalogSeriesResult:
+        schema = await self._schema(conn)
+        if not schema.has("title_base"):
+            raise ValueError("grouping by series needs the enhanced catalog")
+        query = self._build_query(schema, filters)
+        where_sql = query.where_sql
+
+        total = await self._count(
+            conn, f"(SELECT DISTINCT ci.title_base FROM {query.from_sql} {where_sql})", "", query.params
+        )
+
+        aggregates = (
+            "SELECT ci.title_base, COUNT(*) AS episode_count, "
+            "MIN(ci.season) AS first_season, MAX(ci.season) AS last_season, "
+            "SUM(ci.duration_seconds) AS total_duration_seconds, MAX(ci.is_tv) AS is_tv, "
+            "MIN(ci.video_id) AS video_id, MAX(ci.thumbnail_url) AS thumbnail_url, "
+            "MIN(ci.year) AS year, MAX(ci.snapshot_id) AS snapshot_id"
         )
+        if query.sort_mode == "rank":
+            # bm25() cannot appear inside an aggregate: rank the matches first.
+            # OFFSET 0 keeps SQLite from flattening the CTE back into the
+            # aggregate (AS MATERIALIZED would need SQLite 3.35)
+            columns = (
+                "title_base", "season", "duration_seconds", "is_tv",
+                "video_id", "thumbnail_url", "year", "snapshot_id",
+            )
+            sql = (
+                f"WITH m AS (SELECT {', '.join('ci.' + c for c in columns)}, "
+                f"{query.sort_sql} AS sort_key FROM {query.from_sql} {where_sql} LIMIT -1 OFFSET 0) "
+                f"{aggregates}, MIN(ci.sort_key) AS sort_key FROM m ci GROUP BY ci.title_base "
+                "ORDER BY sort_key ASC, ci.title_base ASC LIMIT ? OFFSET ?"
+            )
+        else:
+            sql = (
+                f"{aggregates} FROM {query.from_sql} {where_sql} GROUP BY ci.title_base "
+                "ORDER BY ci.title_base ASC LIMIT ? OFFSET ?"
+            )
+        cursor = await conn.execute(sql, [*query.params, limit, offset])
         rows = await cursor.fetchall()
 
+        groups = [
+            {
+                "title_base": r["title_base"],
+                "episode_count": r["episode_count"],
+                "first_season": r["first_season"],
+                "last_season": r["last_season"],
+                "total_duration_seconds": r["total_duration_seconds"] or 0,
+                "is_tv": bool(r["is_tv"]),
+                "video_id": r["video_id"] if r["episode_count"] == 1 else None,
+                "thumbnail_url": r["thumbnail_url"],
+                "year": r["year"],
+            }
+            for r in rows
+        ]
         snapshot_id = rows[0]["snapshot_id"] if rows else ""
+        return CatalogSeriesResult(snapshot_id=snapshot_id or "", groups=groups, total=total)
+
+    async def get_series_episodes(
+        self,
+        title_base: str,
+        *,
+        include_uncategorized: bool = False,
+    ) -> list[dict]:
+        """Visible items of one series in season/episode order."""
+        async with self._reader() as conn:
+            schema = await self._schema(conn)
+            if not schema.has("title_base"):
+                return []
+            where = ["ci.title_base = ?", "ci.llm_enriched_at IS NOT NULL"]
+            if not include_uncategorized:
+                where.append("(ci.mediacms_category IS NOT NULL AND ci.mediacms_category != 'Uncategorized')")
+            # (title_base, season, episode, rowid) is exactly the index order
+            cursor = await conn.execute(
+                f"{schema.search_select}, ci.season, ci.episode, ci.episode_title "
+                f"FROM catalog_item ci WHERE {' AND '.join(where)} "
+                "ORDER BY ci.season, ci.episode, ci.rowid",
+                [title_base],
+            )
+            rows = await cursor.fetchall()
+
+        return [
+            {
+                "video_id": r["video_id"],
+                "title": r["title"],
+                "genre": r["genre"],
+                "mood": r["mood"],
+                "era": r["era"],
+                "year": r["year"],
+                "synopsis": r["synopsis"],
+                "duration_seconds": r["duration_seconds"],
+                "thumbnail_url": r["thumbnail_url"],
+                "season": r["season"],
+                "episode": r["episode"],
+                "episode_title": r["episode_title"],
+            }
+            for r in rows
+        ]
+
+    async def explain_search(
+        self,
+        filters: SearchFilters,
+        *,
+        limit: int = 50,
+        sort: Optional[str] = None,
+    ) -> SearchPlan:
+        """The SQL a search runs, the index chosen per term and SQLite's plan."""
+        filters = filters.normalized()
+        async with self._reader() as conn:
+            schema = await self._schema(conn)
+            hits = plan_cache_stats()["hits"]
+            query = self._build_query(schema, filters, sort)
+            plan_cached = plan_cache_stats()["hits"] > hits
+
+            sql = query.page_sql(schema, query.where_sql)
+            params = [*query.params, limit, 0]
+            cursor = await conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            sqlite_plan = [str(r[3]) for r in await cursor.fetchall()]
+
+        return SearchPlan(
+            query=str(compile_query(filters.q, schema).query) if filters.q else "",
+            plan=query.plan,
+            sql=sql,
+            params=params,
+            sqlite_plan=sqlite_plan,
+            plan_cached=plan_cached,
+        )
+
+    async def get_filmography(
+        self,
+        name: str,
+        *,
+        role: Optional[str] = None,
+        include_uncategorized: bool = False,
+    ) -> tuple[str, list[dict]] | None:
+        """Every visible item crediting the person named ``name``.
+
+        Matches the normalized name exactly and returns ``(display_name,
+        items)``, each item carrying the person's ``roles`` on it, or None
+        if nobody by that name has a visible credit.
+        """
+        key = person_key(name)
+        if not key:
+            return None
+
+        async with self._reader() as conn:
+            schema = await self._schema(conn)
+            if not schema.has_people:
+                return None
+
+            where = ["p.name_key = ?", "ci.llm_enriched_at IS NOT NULL"]
+            params: list[object] = [key]
+            if role:
+                where.append("ip.role = ?")
+                params.append(role)
+            if not include_uncategorized:
+                where.append("(ci.mediacms_category IS NOT NULL AND ci.mediacms_category != 'Uncategorized')")
+
+            cursor = await conn.execute(
+                f"{schema.search_select}, p.name AS person_name, "
+                "group_concat(ip.role) AS roles, min(ip.billing) AS billing "
+                "FROM catalog_person p "
+                "JOIN item_person ip ON ip.person_id = p.id "
+                "JOIN catalog_item ci ON ci.video_id = ip.video_id "
+                f"WHERE {' AND '.join(where)} "
+                "GROUP BY ci.video_id "
+                "ORDER BY ci.year IS NULL, ci.year ASC, title ASC",
+                params,
+            )
+            rows = await cursor.fetchall()
+
+        if not rows:
+            return None
+
         items = []
         for r in rows:
             items.append(
@@ -231,7 +940,95 @@ class CatalogRepository:
                     "synopsis": r["synopsis"],
                     "duration_seconds": r["duration_seconds"],
                     "thumbnail_url": r["thumbnail_url"],
+                    "roles": sorted(set(str(r["roles"] or "").split(","))),
                 }
             )
+        return str(rows[0]["person_name"]), items
+
+    async def facet_counts(
+        self, filters: SearchFilters
+    ) -> dict[str, list[tuple[str, int]]]:
+        """Count items per genre, mood, era and category under ``filters``.
+
+        The filtered id set is materialized once and grouped for every facet
+        in a single UNION ALL statement. Results are cached per filter
+        signature and catalog version when a FacetCountsCache is configured.
+        Each facet's values are ordered by count, then name.
+        """
+        async with self._reader() as conn:
+            schema = await self._schema(conn)
+            query = self._build_query(schema, filters)
+            signature = ("facets", query.from_sql, query.where_sql, tuple(query.params))
+
+            version = None
+            if self._facet_cache is not None:
+                version = await get_catalog_version(conn)
+                if version is not None:
+                    cached = self._facet_cache.get(version.key, signature)
+                    if cached is not None:
+                        return cached
+
+            m_columns = ["ci.video_id"]
+            branches = []
+            for facet in FACETS:
+                if schema.has(f"{facet}_id"):
+                    m_columns.append(f"ci.{facet}_id")
+                    branches.append(
+                        f"SELECT '{facet}', t.name, COUNT(*) FROM m "
+                        f"JOIN {FACET_TABLES[facet]} t ON t.id = m.{facet}_id GROUP BY t.name"
+                    )
+                elif schema.has(facet):
+                    m_columns.append(f"ci.{facet}")
+                    branches.append(
+                        f"SELECT '{facet}', m.{facet}, COUNT(*) FROM m "
+                        f"WHERE m.{facet} IS NOT NULL GROUP BY m.{facet}"
+                    )
+            branches.append(schema.category_counts_sql)
+
+            # m is used by every branch, so SQLite materializes it once
+            # (without AS MATERIALIZED, which needs SQLite 3.35)
+            cursor = await conn.execute(
+                f"WITH m AS (SELECT {', '.join(m_columns)} "
+                f"FROM {query.from_sql} {query.where_sql}) "
+                + " UNION ALL ".join(branches),
+                query.params,
+            )
+            rows = await cursor.fetchall()
+
+        counts: dict[str, list[tuple[str, int]]] = {facet: [] for facet in (*FACETS, "category")}
+        for facet, value, count in rows:
+            counts[facet].append((str(value), int(count)))
+        for values in counts.values():
+            values.sort(key=lambda vc: (-vc[1], vc[0]))
+
+        if self._facet_cache is not None and version is not None:
+            self._facet_cache.put(version.key, signature, counts)
+        return counts
+
+    async def _count(
+        self,
+        conn: aiosqlite.Connection,
+        from_sql: str,
+        where_sql: str,
+        params: list[object],
+    ) -> int:
+        """Count matching rows, consulting the totals cache when configured."""
+        version = None
+        signature = (from_sql, where_sql, tuple(params))
+        if self._totals_cache is not None:
+            version = await get_catalog_version(conn)
+            if version is not None:
+                cached = self._totals_cache.get(version.key, signature)
+                if cached is not None:
+                    return cached
+
+        count_cursor = await conn.execute(
+            f"SELECT COUNT(*) AS cnt FROM {from_sql} {where_sql}",
+            params,
+        )
+        total_row = await count_cursor.fetchone()
+        total = int(total_row["cnt"] if total_row else 0)
 
-        return CatalogSearchResult(snapshot_id=snapshot_id, items=items, total=total)
+        if self._totals_cache is not None and version is not None:
+            self._totals_cache.put(version.key, signature, total)
+        return total
@@ -0,0 +1,154 @@
+"""Cached description of the catalog schema variant in use.
+
+The catalog database comes in two shapes (see ``storage/schema.py`` and
+``catalog/enhanced_schema.py``) and the repository needs to know which one it
+is talking to before it can build a query. Detecting that costs a few PRAGMA
+round trips through the aiosqlite thread, so the result is detected once per
+connection (or read pool) and kept here together with the SELECT statements
+rendered for that variant.
+
+The schema only changes when ``init_catalog_schema``, ``init_enhanced_schema``
+or ``rebuild_catalog`` run; each of them calls ``invalidate_catalog_schema``.
+"""
+
+from __future__ import annotations
+
+import weakref
+from dataclasses import dataclass
+
+import aiosqlite
+
+_ITEM_COLUMNS = (
+    "duration_seconds",
+    "thumbnail_url",
+    "snapshot_id",
+    "genre",
+    "mood",
+    "era",
+    "year",
+    "synopsis",
+)
+
+
+@dataclass(frozen=True)
+class CatalogSchema:
+    columns: frozenset[str]
+    title_expr: str
+    search_columns: tuple[str, ...]
+    has_fts: bool
+    has_people: bool  # catalog_person/item_person tables
+    has_trigram: bool  # catalog_title_trgm fuzzy title index
+    has_tags: bool  # catalog_tag/catalog_item_tag tables
+    has_popularity: bool  # materialized catalog_popularity scores
+    # Pre-rendered statements for this variant
+    item_select: str
+    search_select: str
+    categories_sql: str
+    category_filter: str  # format string with a {placeholders} slot
+    category_name_filter: str  # one case-insensitive category name parameter
+    category_counts_sql: str  # (facet, value, count) rows over a CTE named m
+
+    @property
+    def is_enhanced(self) -> bool:
+        return "sanitized_title" in self.columns
+
+    def has(self, column: str) -> bool:
+        return column in self.columns
+
+
+def _build(columns: set[str], category_columns: set[str], tables: set[str]) -> CatalogSchema:
+    if "title" in columns:
+        title_expr, search_cols = "title", ("title",)
+    elif "sanitized_title" in columns:
+        search = ["sanitized_title"]
+        if "raw_title" in columns:
+            search.append("raw_title")
+        title_expr, search_cols = "sanitized_title AS title", tuple(search)
+    else:
+        title_expr, search_cols = "video_id AS title", ("video_id",)
+
+    item_columns = ", ".join(f"ci.{c}" for c in _ITEM_COLUMNS)
+
+    if "name" in category_columns:
+        # Enhanced: catalog_category(id, name) + catalog_item_category(video_id, category_id)
+        categories_sql = "SELECT name AS category FROM catalog_category ORDER BY name ASC"
+        category_filter = (
+            "ci.video_id IN (SELECT cic.video_id FROM catalog_item_category cic "
+            "JOIN catalog_category cc ON cc.id = cic.category_id WHERE cc.name IN ({placeholders}))"
+        )
+        category_name_filter = (
+            "ci.video_id IN (SELECT cic.video_id FROM catalog_item_category cic "
+            "JOIN catalog_category cc ON cc.id = cic.category_id WHERE cc.name = ? COLLATE NOCASE)"
+        )
+        category_counts_sql = (
+            "SELECT 'category', cc.name, COUNT(*) FROM m "
+            "JOIN catalog_item_category cic ON cic.video_id = m.video_id "
+            "JOIN catalog_category cc ON cc.id = cic.category_id GROUP BY cc.name"
+        )
+    else:
+        categories_sql = "SELECT category FROM catalog_category ORDER BY category ASC"
+        category_filter = (
+            "ci.video_id IN (SELECT video_id FROM catalog_item_category "
+            "WHERE category IN ({placeholders}))"
+        )
+        category_name_filter = (
+            "ci.video_id IN (SELECT video_id FROM catalog_item_category "
+            "WHERE category = ? COLLATE NOCASE)"
+        )
+        category_counts_sql = (
+            "SELECT 'category', cic.category, COUNT(*) FROM m "
+            "JOIN catalog_item_category cic ON cic.video_id = m.video_id GROUP BY cic.category"
+        )
+
+    return CatalogSchema(
+        columns=frozenset(columns),
+        title_expr=title_expr,
+        search_columns=search_cols,
+        has_fts="catalog_fts" in tables and "sanitized_title" in columns,
+        has_people="item_person" in tables,
+        has_trigram="catalog_title_trgm" in tables,
+        has_tags="catalog_item_tag" in tables,
+        has_popularity="catalog_popularity" in tables,
+        item_select=f"SELECT ci.video_id, ci.{title_expr}, {item_columns} FROM catalog_item ci",
+        search_select=f"SELECT ci.video_id, ci.{title_expr}, {item_columns}",
+        categories_sql=categories_sql,
+        category_filter=category_filter,
+        category_name_filter=category_name_filter,
+        category_counts_sql=category_counts_sql,
+    )
+
+
+async def detect_catalog_schema(conn: aiosqlite.Connection) -> CatalogSchema:
+    """Inspect the database behind ``conn`` (uncached)."""
+    cursor = await conn.execute("PRAGMA table_info(catalog_item)")
+    columns = {row[1] for row in await cursor.fetchall()}
+    cursor = await conn.execute("PRAGMA table_info(catalog_category)")
+    category_columns = {row[1] for row in await cursor.fetchall()}
+    cursor = await conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' "
+        "AND name IN ('catalog_fts', 'item_person', 'catalog_title_trgm', 'catalog_item_tag', "
+        "'catalog_popularity')"
+    )
+    tables = {row[0] for row in await cursor.fetchall()}
+    return _build(columns, category_columns, tables)
+
+
+_cache: "weakref.WeakKeyDictionary[object, CatalogSchema]" = weakref.WeakKeyDictionary()
+
+
+async def get_catalog_schema(owner: object, conn: aiosqlite.Connection) -> CatalogSchema:
+    """Return the cached schema for ``owner``, detecting it through ``conn``.
+
+    ``owner`` is whatever identifies the database for the caller: the
+    connection itself, or the ReadPool it was checked out from.
+    """
+    schema = _cache.get(owner)
+    if schema is None:
+        schema = await detect_catalog_schema(conn)
+        _cache[owner] = schema
+    return schema
+
+
+def invalidate_catalog_schema() -> None:
+    """Forget every cached schema; the next query re-detects."""
+    _cache.clear()
@@ -0,0 +1,108 @@
+"""Partial indexes over the catalog subsets that queries filter to.
+
+Every search is restricted to enriched items (``llm_enriched_at IS NOT
+NULL``), and viewers additionally only see categorized ones; the enrichment
+tools work through the complement, items still waiting for enrichment.
+Each subset gets partial indexes, so the default title order walks just the
+rows it may return and the matching COUNT(*) reads a small index instead of
+the table:
+
+- ``idx_catalog_item_visible_title`` / ``_visible_category``: what viewers
+  can search;
+- ``idx_catalog_item_enriched_title``: what blessed users and admins can
+  search (``include_uncategorized``);
+- ``idx_catalog_item_pending_title`` / ``_pending_tv_title``: the
+  enrichment backlog.
+
+SQLite only uses a partial index when the query's WHERE clause repeats the
+index's terms, so the predicates below must match those in ``catalog_repo``
+and ``enrich.enrichment_selector`` term for term.
+
+The pending total is also kept as a counter row in ``catalog_meta``,
+maintained by triggers on ``catalog_item`` and recounted whenever the schema
+is initialized, so the header's pending-count poll is one primary-key read.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+
+import aiosqlite
+
+ENRICHED_PREDICATE = "llm_enriched_at IS NOT NULL"
+PENDING_PREDICATE = "llm_enriched_at IS NULL"
+VISIBLE_PREDICATE = "mediacms_category IS NOT NULL AND mediacms_category != 'Uncategorized'"
+
+PENDING_COUNT_KEY = "pending_count"
+
+_PENDING_TRIGGERS = f"""
+CREATE TRIGGER IF NOT EXISTS catalog_pending_insert AFTER INSERT ON catalog_item
+WHEN NEW.llm_enriched_at IS NULL BEGIN
+    UPDATE catalog_meta SET value = CAST(value AS INTEGER) + 1 WHERE key = '{PENDING_COUNT_KEY}';
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_pending_delete AFTER DELETE ON catalog_item
+WHEN OLD.llm_enriched_at IS NULL BEGIN
+    UPDATE catalog_meta SET value = CAST(value AS INTEGER) - 1 WHERE key = '{PENDING_COUNT_KEY}';
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_pending_update AFTER UPDATE OF llm_enriched_at ON catalog_item
+WHEN (OLD.llm_enriched_at IS NULL) != (NEW.llm_enriched_at IS NULL) BEGIN
+    UPDATE catalog_meta
+    SET value = CAST(value AS INTEGER) + (NEW.llm_enriched_at IS NULL) - (OLD.llm_enriched_at IS NULL)
+    WHERE key = '{PENDING_COUNT_KEY}';
+END;
+"""
+
+
+async def init_catalog_subsets(conn: aiosqlite.Connection, columns: set[str]) -> None:
+    """Create the subset indexes and pending counter (caller commits).
+
+    ``columns`` are catalog_item's columns; catalogs without enrichment
+    fields have no subsets to index. Needs ``catalog_meta`` to exist.
+    """
+    if "llm_enriched_at" not in columns:
+        return
+    title = "title" if "title" in columns else "sanitized_title"
+
+    # name -> (key columns, subset)
+    subsets = {
+        "enriched_title": ((title, "video_id"), ENRICHED_PREDICATE),
+        "pending_title": ((title, "video_id"), PENDING_PREDICATE),
+    }
+    if "is_tv" in columns:
+        # enrich --tv-only/--movies-only pick their batch here rather than
+        # testing every item of that type for llm_enriched_at
+        subsets["pending_tv_title"] = (("is_tv", title, "video_id"), PENDING_PREDICATE)
+    if "mediacms_category" in columns:
+        visible = f"{VISIBLE_PREDICATE} AND {ENRICHED_PREDICATE}"
+        subsets["visible_title"] = ((title, "video_id"), visible)
+        # The planner reaches for a mediacms_category range whenever the
+        # visibility terms are present (e.g. the unfiltered COUNT); keyed on
+        # it, that range covers just the subset
+        subsets["visible_category"] = (("mediacms_category", "llm_enriched_at"), visible)
+    for name, (key, predicate) in subsets.items():
+        await conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_catalog_item_{name} "
+            f"ON catalog_item({', '.join(key)}) WHERE {predicate}"
+        )
+
+    await conn.executescript(_PENDING_TRIGGERS)
+    # Recount (cheap on the pending index) so the counter also recovers from
+    # writes made while the triggers were missing
+    await conn.execute(
+        "INSERT OR REPLACE INTO catalog_meta(key, value) "
+        f"SELECT '{PENDING_COUNT_KEY}', COUNT(*) FROM catalog_item WHERE {PENDING_PREDICATE}"
+    )
+
+
+async def read_pending_count(conn: aiosqlite.Connection) -> int | None:
+    """Return the maintained pending total, or None if it is not tracked."""
+    try:
+        cursor = await conn.execute(
+            "SELECT value FROM catalog_meta WHERE key = ?", (PENDING_COUNT_KEY,)
+        )
+        row = await cursor.fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return max(0, int(row[0])) if row else None
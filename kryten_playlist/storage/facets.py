@@ -0,0 +1,285 @@
+"""Canonical vocabulary for the genre, mood and era facets.
+
+Enrichment returns these as free-form LLM strings ("Sci-Fi", "science
+fiction", "80's", "Horror/Comedy"). Each is mapped to one canonical name
+per concept, whose integer id into a per-facet lookup table
+(``catalog_genre``, ``catalog_mood``, ``catalog_era``) is stored in
+``<facet>_id``; that is what searches and fitting filter on. The text column
+keeps the raw value as enriched, so compound values lose none of their parts
+for display and text search.
+
+Values that match nothing in the vocabulary get a non-canonical lookup row
+(title-cased).
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+import aiosqlite
+
+from kryten_playlist.storage.catalog_meta import mark_catalog_changed
+
+FACETS = ("genre", "mood", "era")
+
+FACET_TABLES = {
+    "genre": "catalog_genre",
+    "mood": "catalog_mood",
+    "era": "catalog_era",
+}
+
+# canonical name -> synonyms (matched after stripping case and punctuation)
+GENRE_VOCABULARY: dict[str, tuple[str, ...]] = {
+    "Action": ("action thriller",),
+    "Adventure": ("swashbuckler",),
+    "Animation": ("animated", "cartoon", "anime"),
+    "Comedy": ("comedic", "comedies", "slapstick", "parody", "spoof", "satire", "romantic comedy", "rom-com"),
+    "Crime": ("gangster", "heist", "noir", "film noir", "neo-noir"),
+    "Documentary": ("docu", "documentaries", "mockumentary"),
+    "Drama": ("dramas", "melodrama", "period drama"),
+    "Exploitation": ("grindhouse", "blaxploitation", "sexploitation", "b-movie", "b movie"),
+    "Family": ("kids", "children", "childrens"),
+    "Fantasy": ("sword and sorcery", "fairy tale"),
+    "Horror": ("slasher", "supernatural horror", "zombie", "giallo", "creature feature", "monster"),
+    "Martial Arts": ("kung fu", "wuxia", "karate"),
+    "Musical": ("music", "concert"),
+    "Mystery": ("whodunit", "detective"),
+    "Romance": ("romantic", "love story"),
+    "Science Fiction": ("sci-fi", "scifi", "sf", "science-fiction", "space opera", "cyberpunk"),
+    "Sports": ("sport",),
+    "Thriller": ("suspense", "psychological thriller", "erotic thriller"),
+    "War": ("war film", "military"),
+    "Western": ("westerns", "spaghetti western", "cowboy"),
+}
+
+MOOD_VOCABULARY: dict[str, tuple[str, ...]] = {
+    "Campy": ("cheesy", "camp", "schlocky", "kitschy", "so bad its good"),
+    "Cerebral": ("thought-provoking", "intellectual", "philosophical", "mind-bending"),
+    "Comedic": ("funny", "humorous", "comic", "goofy", "silly", "zany"),
+    "Dark": ("bleak", "grim", "sinister", "disturbing"),
+    "Eerie": ("creepy", "scary", "spooky", "unsettling", "atmospheric", "haunting"),
+    "Gritty": ("raw", "violent", "brutal", "gory"),
+    "Lighthearted": ("light", "light-hearted", "fun", "playful", "breezy", "whimsical"),
+    "Melancholic": ("sad", "melancholy", "somber", "bittersweet", "tragic"),
+    "Nostalgic": ("retro", "sentimental"),
+    "Romantic": ("romance", "sensual"),
+    "Tense": ("suspenseful", "thrilling", "intense", "gripping"),
+    "Uplifting": ("heartwarming", "feel-good", "feel good", "inspiring", "inspirational", "hopeful"),
+}
+
+ERA_VOCABULARY: dict[str, tuple[str, ...]] = {
+    "Classic": ("golden age", "classic hollywood", "old hollywood", "vintage", "silent era", "silent"),
+    **{f"{decade}s": () for decade in range(1900, 2030, 10)},
+}
+
+VOCABULARIES = {
+    "genre": GENRE_VOCABULARY,
+    "mood": MOOD_VOCABULARY,
+    "era": ERA_VOCABULARY,
+}
+
+_SPLIT_RE = re.compile(r"\s*(?:[,/;|&+]|\band\b)\s*")
+_DECADE_RE = re.compile(r"\b(?:'|’)?(1[89]|20)?(\d)0(?:'|’)?s\b")
+_DECADE_WORDS = {
+    "twenties": 1920,
+    "thirties": 1930,
+    "forties": 1940,
+    "fifties": 1950,
+    "sixties": 1960,
+    "seventies": 1970,
+    "eighties": 1980,
+    "nineties": 1990,
+}
+
+
+def _match_key(text: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", text.casefold())
+
+
+def _build_lookup(vocabulary: dict[str, tuple[str, ...]]) -> dict[str, str]:
+    lookup: dict[str, str] = {}
+    for canonical, synonyms in vocabulary.items():
+        for term in (canonical, *synonyms):
+            lookup[_match_key(term)] = canonical
+    return lookup
+
+
+_LOOKUPS = {facet: _build_lookup(vocab) for facet, vocab in VOCABULARIES.items()}
+
+
+def _decade(text: str) -> Optional[str]:
+    m = _DECADE_RE.search(text.casefold())
+    if m:
+        century, digit = m.group(1), int(m.group(2))
+        if century:
+            return f"{century}{digit}0s"
+        # Two-digit decades: 00s/10s are this century, the rest the last one
+        return f"{2000 + digit * 10 if digit < 2 else 1900 + digit * 10}s"
+    for word, decade in _DECADE_WORDS.items():
+        if word in text.casefold():
+            return f"{decade}s"
+    return None
+
+
+def canonical_facet(facet: str, value: object) -> Optional[str]:
+    """Map a raw facet value onto the canonical vocabulary.
+
+    Compound values ("Horror/Comedy") resolve to their first recognized
+    part. Unrecognized values are returned title-cased; blanks give None.
+    """
+    text = " ".join(str(value or "").replace("_", " ").split())
+    if not text:
+        return None
+
+    lookup = _LOOKUPS[facet]
+    found = lookup.get(_match_key(text))
+    if found:
+        return found
+
+    parts = [p for p in _SPLIT_RE.split(text) if p.strip()]
+    for part in parts:
+        found = lookup.get(_match_key(part))
+        if found:
+            return found
+
+    if facet == "era":
+        decade = _decade(text)
+        if decade:
+            return decade
+
+    return (parts[0] if parts else text).strip().title()
+
+
+def facet_filter_sql(facet: str) -> str:
+    """WHERE fragment matching ``ci.<facet>_id`` against one canonical name."""
+    return f"ci.{facet}_id = (SELECT id FROM {FACET_TABLES[facet]} WHERE name = ?)"
+
+
+def facet_aliases(facet: str, name: str) -> tuple[str, ...]:
+    """A canonical name and the spellings of it raw values may use."""
+    # Two-letter synonyms ("sf") would match inside too many words
+    aliases = (name, *(s for s in VOCABULARIES[facet].get(name, ()) if len(s) > 2))
+    decade = re.fullmatch(r"(1[89]|20)(\d0)s", name) if facet == "era" else None
+    if decade:
+        aliases += (f"{decade.group(2)}s",)
+    return aliases
+
+
+def facet_like_sql(facet: str, name: str) -> tuple[str, list[str]]:
+    """WHERE fragment and params matching the raw ``ci.<facet>`` text.
+
+    For catalogs without ``<facet>_id``: the raw text may spell the value
+    any way the vocabulary knows (a "sci-fi" filter, canonically "Science
+    Fiction", must still match "Sci-Fi").
+    """
+    aliases = facet_aliases(facet, name)
+    sql = " OR ".join([f"ci.{facet} LIKE ?"] * len(aliases))
+    return f"({sql})", [f"%{alias}%" for alias in aliases]
+
+
+@dataclass(frozen=True)
+class FacetValue:
+    name: Optional[str]
+    id: Optional[int]
+
+
+async def init_facet_tables(conn: aiosqlite.Connection) -> None:
+    """Create the lookup tables and seed the canonical vocabulary (caller commits)."""
+    for facet, table in FACET_TABLES.items():
+        await conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                canonical INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        await conn.executemany(
+            f"INSERT OR IGNORE INTO {table} (name, canonical) VALUES (?, 1)",
+            [(name,) for name in VOCABULARIES[facet]],
+        )
+
+
+async def facet_id(conn: aiosqlite.Connection, facet: str, name: str) -> int:
+    """Id of ``name`` in the facet's lookup table, adding it if needed."""
+    table = FACET_TABLES[facet]
+    await conn.execute(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", (name,))
+    cursor = await conn.execute(f"SELECT id FROM {table} WHERE name = ?", (name,))
+    row = await cursor.fetchone()
+    return int(row[0])
+
+
+async def resolve_facet(conn: aiosqlite.Connection, facet: str, value: object) -> FacetValue:
+    name = canonical_facet(facet, value)
+    if name is None:
+        return FacetValue(name=None, id=None)
+    return FacetValue(name=name, id=await facet_id(conn, facet, name))
+
+
+async def set_item_facets(
+    conn: aiosqlite.Connection,
+    video_id: str,
+    *,
+    genre: object = None,
+    mood: object = None,
+    era: object = None,
+) -> None:
+    """Store the lookup ids of genre/mood/era on one item (caller commits).
+
+    The raw text columns are left as they are.
+    """
+    g = await resolve_facet(conn, "genre", genre)
+    m = await resolve_facet(conn, "mood", mood)
+    e = await resolve_facet(conn, "era", era)
+    await conn.execute(
+        "UPDATE catalog_item SET genre_id = ?, mood_id = ?, era_id = ? WHERE video_id = ?",
+        (g.id, m.id, e.id, video_id),
+    )
+
+
+async def needs_facet_normalization(conn: aiosqlite.Connection) -> bool:
+    """True if any item has a facet value without its lookup id."""
+    clauses = " OR ".join(f"({f}_id IS NULL AND {f} IS NOT NULL)" for f in FACETS)
+    cursor = await conn.execute(f"SELECT EXISTS(SELECT 1 FROM catalog_item WHERE {clauses})")
+    return bool((await cursor.fetchone())[0])
+
+
+async def normalize_facets(conn: aiosqlite.Connection) -> int:
+    """Re-resolve every item's genre/mood/era lookup ids in bulk and commit.
+
+    Works per distinct raw value rather than per row: the raw -> id mapping
+    is computed in Python for each distinct value, loaded into a temp table,
+    and applied with one UPDATE per facet. The raw text is not rewritten.
+    Returns the number of facet ids changed.
+    """
+    await conn.execute("CREATE TEMP TABLE IF NOT EXISTS facet_map (raw TEXT PRIMARY KEY, id INTEGER)")
+    changed = 0
+    for facet in FACETS:
+        await conn.execute("DELETE FROM facet_map")
+        cursor = await conn.execute(
+            f"SELECT DISTINCT {facet} FROM catalog_item WHERE {facet} IS NOT NULL"
+        )
+        mapping = []
+        for (raw,) in await cursor.fetchall():
+            value = await resolve_facet(conn, facet, raw)
+            mapping.append((raw, value.id))
+        await conn.executemany("INSERT INTO facet_map (raw, id) VALUES (?, ?)", mapping)
+
+        cursor = await conn.execute(
+            f"""
+            UPDATE catalog_item SET
+                {facet}_id = (SELECT id FROM facet_map WHERE raw = catalog_item.{facet})
+            WHERE {facet} IS NOT NULL
+                AND {facet}_id IS NOT (SELECT id FROM facet_map WHERE raw = catalog_item.{facet})
+            """
+        )
+        changed += max(cursor.rowcount, 0)
+
+    await conn.execute("DROP TABLE IF EXISTS temp.facet_map")
+    if changed:
+        await mark_catalog_changed(conn)
+    await conn.commit()
+    return changed
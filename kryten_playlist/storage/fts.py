@@ -0,0 +1,75 @@
+"""Helpers for building FTS5 MATCH expressions from user input.
+
+User text is never passed to MATCH verbatim: FTS5 has its own query syntax
+(AND/OR/NOT, column filters, quotes) and arbitrary input would either raise a
+syntax error or change the meaning of the query. Instead the text is split
+into bare tokens, each token is quoted, and the final token is made a prefix
+query so results update while the user is still typing.
+"""
+
+from __future__ import annotations
+
+import re
+
+# Columns of the catalog_fts virtual table, in declaration order. bm25() takes
+# one weight per column in this order.
+FTS_COLUMNS = (
+    "video_id",
+    "sanitized_title",
+    "title_base",
+    "synopsis",
+    "cast_list",
+    "director",
+    "llm_notes",
+)
+
+# Title hits should dominate synopsis/notes hits when ranking.
+FTS_WEIGHTS = (0.0, 10.0, 5.0, 1.0, 2.0, 2.0, 1.0)
+
+# Matches what the default unicode61 tokenizer treats as token characters.
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_tokens(text: str | None) -> list[str]:
+    """Split user text into lowercase FTS tokens."""
+    return [t.lower() for t in _TOKEN_RE.findall(text or "")]
+
+
+def fts_phrase(text: str | None, *, prefix: bool = True) -> str | None:
+    """Build a safe FTS5 expression requiring every token of ``text``.
+
+    Returns None when the text contains no searchable tokens.
+    """
+    tokens = fts_tokens(text)
+    if not tokens:
+        return None
+    parts = [f'"{t}"' for t in tokens]
+    if prefix:
+        parts[-1] += "*"
+    return " ".join(parts)
+
+
+def fts_column_filter(columns: tuple[str, ...] | list[str], text: str | None, *, prefix: bool = True) -> str | None:
+    """Restrict a token expression to one or more FTS columns."""
+    phrase = fts_phrase(text, prefix=prefix)
+    if phrase is None:
+        return None
+    if len(columns) == 1:
+        colspec = columns[0]
+    else:
+        colspec = "{" + " ".join(columns) + "}"
+    return f"{colspec} : ({phrase})"
+
+
+def fts_and(*exprs: str | None) -> str | None:
+    """AND together the non-empty expressions."""
+    parts = [f"({e})" for e in exprs if e]
+    if not parts:
+        return None
+    return " AND ".join(parts)
+
+
+def bm25_expr(table: str = "catalog_fts") -> str:
+    """Return the bm25() call with the catalog column weights."""
+    weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+    return f"bm25({table}, {weights})"
@@ -0,0 +1,122 @@
+"""Fetch rows for an arbitrary number of video ids.
+
+Building ``IN (?, ?, ...)`` with one placeholder per id gives every list
+length its own statement text, so nothing is reused from the sqlite3
+statement cache, and marathon-sized playlists run into SQLite's bound
+variable limit. ``fetch_by_video_ids`` instead:
+
+- pads small id sets up to a fixed bucket size (8, 16, 32 or 64
+  placeholders), so only a handful of statement texts ever exist;
+- loads larger sets into ``temp.lookup_ids`` with ``executemany`` (in
+  chunks) and runs the query once against that table.
+
+Writing the temp table opens a transaction that the helper then commits,
+so it is only used on connections the caller has to itself (a ReadPool
+checkout, or one opened for the call). On a shared connection, such as the
+writer when there is no read pool, another task's transaction could
+interleave with it; there, and whenever a transaction is already open,
+larger sets are queried in bucket-sized chunks instead. Temp table use is
+serialized per connection.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import weakref
+from typing import Any, Iterable
+
+import aiosqlite
+
+INLINE_MAX = 64
+INSERT_CHUNK = 1000
+
+_LOOKUP_DDL = "CREATE TEMP TABLE IF NOT EXISTS lookup_ids (video_id TEXT PRIMARY KEY)"
+_LOOKUP_SELECT = "(SELECT video_id FROM temp.lookup_ids)"
+
+_locks: "weakref.WeakKeyDictionary[aiosqlite.Connection, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+
+def unique_ids(video_ids: Iterable[Any]) -> list[str]:
+    """Stripped, non-empty ids with duplicates removed, in first-seen order."""
+    seen: dict[str, None] = {}
+    for v in video_ids or []:
+        vid = str(v or "").strip()
+        if vid:
+            seen.setdefault(vid, None)
+    return list(seen)
+
+
+def _bucket(n: int) -> int:
+    size = 8
+    while size < n:
+        size *= 2
+    return size
+
+
+def _inline(ids: list[str]) -> tuple[str, list[str]]:
+    """``(?, ..., ?)`` padded to the bucket size by repeating the last id."""
+    size = _bucket(len(ids))
+    params = ids + [ids[-1]] * (size - len(ids))
+    return "(" + ",".join("?" * size) + ")", params
+
+
+async def fetch_by_video_ids(
+    conn: aiosqlite.Connection,
+    sql: str,
+    video_ids: Iterable[Any],
+    *,
+    private_connection: bool = False,
+) -> list[Any]:
+    """Run ``sql`` for ``video_ids`` and return all rows.
+
+    ``sql`` must contain an ``{ids}`` slot where the id list goes, e.g.
+    ``"SELECT ... FROM catalog_item ci WHERE ci.video_id IN {ids}"``. Rows
+    come back in no particular order; see ``order_by_request``. Pass
+    ``private_connection=True`` only if nothing else uses ``conn`` for the
+    duration of the call; that allows the temp-table join.
+    """
+    ids = unique_ids(video_ids)
+    if not ids:
+        return []
+
+    if len(ids) <= INLINE_MAX:
+        ids_sql, params = _inline(ids)
+        cursor = await conn.execute(sql.format(ids=ids_sql), params)
+        return list(await cursor.fetchall())
+
+    if not private_connection:
+        return await _fetch_in_chunks(conn, sql, ids)
+
+    lock = _locks.setdefault(conn, asyncio.Lock())
+    async with lock:
+        if conn.in_transaction:
+            return await _fetch_in_chunks(conn, sql, ids)
+
+        await conn.execute(_LOOKUP_DDL)
+        try:
+            for start in range(0, len(ids), INSERT_CHUNK):
+                await conn.executemany(
+                    "INSERT OR IGNORE INTO temp.lookup_ids (video_id) VALUES (?)",
+                    [(vid,) for vid in ids[start : start + INSERT_CHUNK]],
+                )
+            cursor = await conn.execute(sql.format(ids=_LOOKUP_SELECT))
+            return list(await cursor.fetchall())
+        finally:
+            await conn.execute("DELETE FROM temp.lookup_ids")
+            # Only temp rows were written; end the implicit transaction so
+            # the connection does not keep its read snapshot open.
+            await conn.commit()
+
+
+async def _fetch_in_chunks(conn: aiosqlite.Connection, sql: str, ids: list[str]) -> list[Any]:
+    rows: list[Any] = []
+    for start in range(0, len(ids), INLINE_MAX):
+        ids_sql, params = _inline(ids[start : start + INLINE_MAX])
+        cursor = await conn.execute(sql.format(ids=ids_sql), params)
+        rows.extend(await cursor.fetchall())
+    return rows
+
+
+def order_by_request(video_ids: Iterable[Any], by_id: dict[str, Any]) -> dict[str, Any]:
+    """Re-key ``by_id`` in request order, dropping ids that were not found."""
+    return {vid: by_id[vid] for vid in unique_ids(video_ids) if vid in by_id}
@@ -0,0 +1,170 @@
+"""Normalized people (cast and directors) for indexed lookups.
+
+Enrichment stores ``cast_list`` as a JSON array and ``director`` as free text on
+``catalog_item``; both are also mirrored into ``catalog_person`` and
+``item_person`` (see ``catalog/enhanced_schema.py``) so actor/director facets
+and filmographies are index lookups rather than substring scans.
+
+Names are matched on a normalized key (accents stripped, casefolded,
+punctuation dropped). Each person also has a surname-first key, so a prefix
+search for "romero" finds "George A. Romero".
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import unicodedata
+from typing import Any, Iterable
+
+import aiosqlite
+
+from kryten_playlist.storage.catalog_meta import mark_catalog_changed
+
+ROLE_ACTOR = "actor"
+ROLE_DIRECTOR = "director"
+
+_PUNCT_RE = re.compile(r"[^\w\s'-]", re.UNICODE)
+_DIRECTOR_SPLIT_RE = re.compile(r"\s*[,;/&]\s*")
+
+
+def person_key(name: str) -> str:
+    """Normalize a person name (or a typed prefix of one) for matching."""
+    text = unicodedata.normalize("NFKD", str(name or ""))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = _PUNCT_RE.sub(" ", text.casefold())
+    return " ".join(text.split())
+
+
+def surname_key(key: str) -> str:
+    """Surname-first form of a normalized key ("george a romero" -> "romero george a")."""
+    parts = key.split()
+    if len(parts) < 2:
+        return key
+    return " ".join([parts[-1], *parts[:-1]])
+
+
+def prefix_range(key: str) -> tuple[str, str]:
+    """Half-open [lo, hi) range covering every key that starts with ``key``."""
+    return key, key + "\uffff"
+
+
+def parse_cast(value: Any) -> list[str]:
+    """Accept a list, a JSON-encoded list or a comma separated string."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return []
+        try:
+            value = json.loads(text)
+        except ValueError:
+            value = text.split(",")
+        if isinstance(value, str):
+            value = [value]
+    if not isinstance(value, (list, tuple)):
+        return []
+    return [str(v).strip() for v in value if str(v or "").strip()]
+
+
+def parse_directors(value: Any) -> list[str]:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if str(v or "").strip()]
+    return [p for p in _DIRECTOR_SPLIT_RE.split(str(value).strip()) if p]
+
+
+def person_filter_sql(role: str) -> str:
+    """WHERE fragment restricting ``ci`` to items credited to a person prefix.
+
+    Takes four parameters: the name-key range then the surname-key range
+    (see ``person_filter_params``). Both ranges are served by indexes.
+    """
+    return (
+        "ci.video_id IN (SELECT ip.video_id FROM item_person ip "
+        f"WHERE ip.role = '{role}' AND ip.person_id IN ("
+        "SELECT id FROM catalog_person WHERE name_key >= ? AND name_key < ? "
+        "UNION SELECT id FROM catalog_person WHERE surname_key >= ? AND surname_key < ?))"
+    )
+
+
+def person_filter_params(name: str) -> list[str]:
+    key = person_key(name)
+    return [*prefix_range(key), *prefix_range(key)]
+
+
+async def _person_id(conn: aiosqlite.Connection, name: str) -> int | None:
+    key = person_key(name)
+    if not key:
+        return None
+    await conn.execute(
+        "INSERT INTO catalog_person (name, name_key, surname_key) VALUES (?, ?, ?) "
+        "ON CONFLICT(name_key) DO NOTHING",
+        (name, key, surname_key(key)),
+    )
+    cursor = await conn.execute("SELECT id FROM catalog_person WHERE name_key = ?", (key,))
+    row = await cursor.fetchone()
+    return int(row[0]) if row else None
+
+
+async def set_item_people(
+    conn: aiosqlite.Connection,
+    video_id: str,
+    *,
+    cast: Any,
+    director: Any,
+) -> None:
+    """Replace the people credited on ``video_id`` (caller commits)."""
+    await conn.execute("DELETE FROM item_person WHERE video_id = ?", (video_id,))
+
+    credits: list[tuple[str, Iterable[str]]] = [
+        (ROLE_ACTOR, parse_cast(cast)),
+        (ROLE_DIRECTOR, parse_directors(director)),
+    ]
+    for role, names in credits:
+        for billing, name in enumerate(names):
+            person_id = await _person_id(conn, name)
+            if person_id is None:
+                continue
+            await conn.execute(
+                "INSERT OR IGNORE INTO item_person (video_id, person_id, role, billing) "
+                "VALUES (?, ?, ?, ?)",
+                (video_id, person_id, role, billing),
+            )
+
+
+async def prune_people(conn: aiosqlite.Connection) -> None:
+    """Drop people no longer credited on any item (caller commits)."""
+    await conn.execute(
+        "DELETE FROM catalog_person WHERE NOT EXISTS "
+        "(SELECT 1 FROM item_person ip WHERE ip.person_id = catalog_person.id)"
+    )
+
+
+async def backfill_people(conn: aiosqlite.Connection, *, batch_size: int = 500) -> int:
+    """Populate catalog_person/item_person from existing cast_list/director values.
+
+    Safe to re-run: each item's credits are replaced. Commits every
+    ``batch_size`` items and returns the number of items processed.
+    """
+    cursor = await conn.execute(
+        "SELECT video_id, cast_list, director FROM catalog_item "
+        "WHERE cast_list IS NOT NULL OR director IS NOT NULL"
+    )
+    rows = await cursor.fetchall()
+
+    count = 0
+    for video_id, cast_list, director in rows:
+        await set_item_people(conn, video_id, cast=cast_list, director=director)
+        count += 1
+        if count % batch_size == 0:
+            await mark_catalog_changed(conn)
+            await conn.commit()
+
+    await prune_people(conn)
+    if count:
+        await mark_catalog_changed(conn)
+    await conn.commit()
+    return count
@@ -0,0 +1,165 @@
+"""Materialized popularity scores used to boost search ranking.
+
+Play and like counts live in NATS KV, which is far too slow to consult per
+search. ``PopularityMaterializer`` periodically copies them into the
+``catalog_popularity`` table as one precomputed ``score`` per video, so the
+search query only adds a primary-key join to rank by relevance and
+popularity together.
+
+``score`` is in [0, 1]: ``log1p(plays + LIKE_WEIGHT * likes)`` divided by the
+same value for the most popular item, so one runaway favourite does not
+flatten everyone else to zero.
+
+Every catalog item has a row (zero for items nobody has played or liked),
+so ``sort=popular`` can walk the ``(score, video_id)`` index and join
+items, rather than sorting the catalog. Items added since the last refresh
+are missing from that ordering until the next one.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import math
+from typing import Awaitable, Callable, Mapping
+
+import aiosqlite
+
+from kryten_playlist.storage.search_cache import invalidate_search_caches
+
+logger = logging.getLogger(__name__)
+
+POPULARITY_TABLE = "catalog_popularity"
+
+# A like counts as this many plays
+LIKE_WEIGHT = 3
+# bm25 is scaled by up to (1 + POPULARITY_BOOST) for the most popular item
+POPULARITY_BOOST = 0.5
+
+_POPULARITY_DDL = f"""
+CREATE TABLE IF NOT EXISTS {POPULARITY_TABLE} (
+    video_id TEXT PRIMARY KEY,
+    plays INTEGER NOT NULL DEFAULT 0,
+    likes INTEGER NOT NULL DEFAULT 0,
+    score REAL NOT NULL DEFAULT 0
+) WITHOUT ROWID
+"""
+_POPULARITY_INDEX = f"CREATE INDEX IF NOT EXISTS idx_{POPULARITY_TABLE}_score ON {POPULARITY_TABLE}(score, video_id)"
+
+
+async def init_popularity_table(conn: aiosqlite.Connection) -> None:
+    """Create ``catalog_popularity`` if missing (caller commits)."""
+    await conn.execute(_POPULARITY_DDL)
+    await conn.execute(_POPULARITY_INDEX)
+
+
+def popularity_scores(
+    plays: Mapping[str, int],
+    likes: Mapping[str, int],
+) -> dict[str, tuple[int, int, float]]:
+    """``{video_id: (plays, likes, score)}`` for every video with activity."""
+    raw = {}
+    for vid in set(plays) | set(likes):
+        played, liked = max(0, int(plays.get(vid, 0))), max(0, int(likes.get(vid, 0)))
+        if played or liked:
+            raw[vid] = (played, liked, math.log1p(played + LIKE_WEIGHT * liked))
+    top = max((w for _, _, w in raw.values()), default=0.0)
+    if top <= 0:
+        return {}
+    return {vid: (played, liked, round(w / top, 6)) for vid, (played, liked, w) in raw.items()}
+
+
+async def materialize_popularity(
+    conn: aiosqlite.Connection,
+    plays: Mapping[str, int],
+    likes: Mapping[str, int],
+) -> int:
+    """Bring ``catalog_popularity`` in line with the counts and the catalog, and commit.
+
+    Only rows whose values changed are written. Counts for videos that are
+    not in the catalog are ignored. Returns the number of rows inserted,
+    updated or deleted; cached search pages are dropped when it is
+    non-zero, since their order may have changed.
+
+    ``conn`` should be a connection of its own, not the catalog writer: a
+    commit here would otherwise also commit whatever a catalog rebuild has
+    written so far. On failure (e.g. the database stayed locked by a
+    rebuild) the writes are rolled back.
+    """
+    wanted = popularity_scores(plays, likes)
+    cursor = await conn.execute(f"SELECT video_id, plays, likes, score FROM {POPULARITY_TABLE}")
+    current = {r[0]: (r[1], r[2], r[3]) for r in await cursor.fetchall()}
+
+    upserts = [(vid, *values) for vid, values in wanted.items() if current.get(vid) != values]
+    resets = [(vid,) for vid, values in current.items() if vid not in wanted and values != (0, 0, 0.0)]
+
+    before = conn.total_changes
+    try:
+        changed = await _write_popularity(conn, upserts, resets) - before
+        await conn.commit()
+    except BaseException:
+        await conn.rollback()
+        raise
+    if changed:
+        invalidate_search_caches()
+    return changed
+
+
+async def _write_popularity(
+    conn: aiosqlite.Connection,
+    upserts: list[tuple[str, int, int, float]],
+    resets: list[tuple[str]],
+) -> int:
+    await conn.executemany(
+        f"INSERT INTO {POPULARITY_TABLE} (video_id, plays, likes, score) "
+        "SELECT video_id, ?, ?, ? FROM catalog_item WHERE video_id = ? "
+        "ON CONFLICT(video_id) DO UPDATE SET plays = excluded.plays, likes = excluded.likes, "
+        "score = excluded.score",
+        [(played, liked, score, vid) for vid, played, liked, score in upserts],
+    )
+    await conn.executemany(
+        f"UPDATE {POPULARITY_TABLE} SET plays = 0, likes = 0, score = 0 WHERE video_id = ?",
+        resets,
+    )
+    # Zero rows for new catalog items; drop rows of removed ones
+    await conn.execute(
+        f"INSERT OR IGNORE INTO {POPULARITY_TABLE} (video_id) SELECT video_id FROM catalog_item"
+    )
+    await conn.execute(
+        f"DELETE FROM {POPULARITY_TABLE} WHERE video_id NOT IN (SELECT video_id FROM catalog_item)"
+    )
+    return conn.total_changes
+
+
+class PopularityMaterializer:
+    """Periodically copies KV play/like counts into ``catalog_popularity``."""
+
+    def __init__(
+        self,
+        conn: aiosqlite.Connection,
+        *,
+        plays: Callable[[], Awaitable[Mapping[str, int]]],
+        likes: Callable[[], Awaitable[Mapping[str, int]]],
+    ):
+        self._conn = conn
+        self._plays = plays
+        self._likes = likes
+
+    async def refresh(self) -> int:
+        """Materialize once. Returns the number of rows changed."""
+        plays, likes = await asyncio.gather(self._plays(), self._likes())
+        changed = await materialize_popularity(self._conn, plays, likes)
+        if changed:
+            logger.info(f"Popularity scores updated for {changed} videos")
+        return changed
+
+    async def run(self, shutdown_event: asyncio.Event, *, interval_seconds: float = 300.0) -> None:
+        """Refresh every ``interval_seconds`` until ``shutdown_event`` is set."""
+        while not shutdown_event.is_set():
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Popularity refresh failed: {e}")
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(shutdown_event.wait(), timeout=interval_seconds)
@@ -0,0 +1,125 @@
+"""Random sampling of catalog rows without ``ORDER BY RANDOM()``.
+
+``ORDER BY RANDOM()`` evaluates the filter over every candidate, then sorts
+the whole set just to read the first few rows. ``sample_rows`` instead
+probes random rowids: it draws a batch of points from ``[min(rowid),
+max(rowid)]`` and keeps those that exist and match the filter, in the
+order drawn (one ``rowid IN (...)`` primary-key lookup per batch).
+Every candidate row is equally likely at every draw, holes left by
+deletes included, and drawing k rows costs about k / density lookups,
+whatever the catalog size.
+
+When the filter matches too small a share of the rowid range for probing
+to pay off, or draws keep landing on rows already returned (the sample is
+approaching the size of the candidate set), the sampler switches to
+enumerating the remaining candidate rowids and shuffling them, so iterating
+to exhaustion still yields every candidate exactly once.
+
+The same seed over the same catalog yields the same sequence.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from typing import Any, AsyncIterator, Optional, Sequence
+
+import aiosqlite
+
+# Below this share of matching rowids, enumerate the candidates instead
+MIN_DENSITY = 0.02
+# Rowids drawn per probe statement: a power of two in this range, so there
+# are only a few statement shapes to prepare, and well under SQLite's
+# default limit of 999 bound parameters
+MIN_PROBES, MAX_PROBES = 64, 512
+# Rows fetched per statement while enumerating (padded to a power of two)
+FETCH_CHUNK = 512
+
+
+def _bucket(n: int) -> int:
+    """The smallest power of two in ``[MIN_PROBES, MAX_PROBES]`` at least ``n``."""
+    size = MIN_PROBES
+    while size < n and size < MAX_PROBES:
+        size *= 2
+    return size
+
+
+def _placeholders(n: int) -> str:
+    return "(" + ",".join("?" * n) + ")"
+
+
+async def sample_rows(
+    conn: aiosqlite.Connection,
+    columns: str,
+    where: str = "",
+    params: Sequence[Any] = (),
+    *,
+    k: Optional[int] = None,
+    seed: Optional[int] = None,
+    table: str = "catalog_item",
+) -> AsyncIterator[tuple]:
+    """Yield up to ``k`` distinct rows of ``table`` matching ``where``, in random order.
+
+    ``columns`` and ``where`` are SQL fragments over ``table``'s own
+    columns; ``params`` binds the placeholders in ``where``. With ``k``
+    None the iterator runs until every matching row has been yielded, so
+    callers can stop as soon as they have enough.
+    """
+    if k is not None and k <= 0:
+        return
+    rng = random.Random(seed)
+    params = tuple(params)
+    condition = f" AND ({where})" if where else ""
+
+    cursor = await conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table}")
+    low, high = await cursor.fetchone()
+    if low is None:
+        return
+
+    seen: set[int] = set()
+    drawn = matched = 0
+    while True:
+        # Size the batch for the rows still wanted at the density seen so far
+        density = matched / drawn if drawn else 1.0
+        if drawn >= MIN_PROBES and density < MIN_DENSITY:
+            break
+        # Open-ended callers often stop early: grow the batches geometrically
+        wanted = k - len(seen) if k is not None else max(MIN_PROBES // 4, len(seen))
+        size = math.ceil(wanted / max(density, MIN_DENSITY))
+        probes = [rng.randint(low, high) for _ in range(_bucket(size))]
+        cursor = await conn.execute(
+            f"SELECT rowid, {columns} FROM {table} WHERE rowid IN {_placeholders(len(probes))}{condition}",
+            (*probes, *params),
+        )
+        rows = {row[0]: tuple(row[1:]) for row in await cursor.fetchall()}
+        hits = sum(1 for rowid in probes if rowid in rows)
+        drawn += len(probes)
+        matched += hits
+
+        fresh = 0
+        for rowid in probes:
+            if rowid in rows and rowid not in seen:
+                seen.add(rowid)
+                fresh += 1
+                yield rows[rowid]
+                if k is not None and len(seen) >= k:
+                    return
+        if hits and fresh < hits / 2:
+            break  # mostly repeats: few candidates left unseen
+
+    cursor = await conn.execute(f"SELECT rowid FROM {table} WHERE {where or '1'}", params)
+    rest = [rowid for (rowid,) in await cursor.fetchall() if rowid not in seen]
+    rng.shuffle(rest)
+    if k is not None:
+        rest = rest[: k - len(seen)]
+    for i in range(0, len(rest), FETCH_CHUNK):
+        chunk = rest[i : i + FETCH_CHUNK]
+        size = _bucket(len(chunk))
+        cursor = await conn.execute(
+            f"SELECT rowid, {columns} FROM {table} WHERE rowid IN {_placeholders(size)}",
+            chunk + chunk[-1:] * (size - len(chunk)),
+        )
+        rows = {row[0]: tuple(row[1:]) for row in await cursor.fetchall()}
+        for rowid in chunk:
+            if rowid in rows:
+                yield rows[rowid]
@@ -2,6 +2,11 @@ from __future__ import annotations
 
 import aiosqlite
 
+from kryten_playlist.storage.catalog_meta import init_catalog_meta
+from kryten_playlist.storage.catalog_schema import invalidate_catalog_schema
+from kryten_playlist.storage.catalog_subsets import init_catalog_subsets
+from kryten_playlist.storage.popularity import init_popularity_table
+
 
 async def init_catalog_schema(conn: aiosqlite.Connection) -> None:
     """Initialize catalog schema.
@@ -83,4 +88,9 @@ async def init_catalog_schema(conn: aiosqlite.Connection) -> None:
         """
     )
 
+    await init_catalog_meta(conn)
+    await init_popularity_table(conn)
+    await init_catalog_subsets(conn, columns | {"mediacms_category"})
+
     await conn.commit()
+    invalidate_catalog_schema()
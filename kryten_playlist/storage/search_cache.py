@@ -0,0 +1,177 @@
+"""In-process caches for catalog search.
+
+Every cache is scoped to a catalog version (see ``storage/catalog_meta.py``),
+so writes from other processes are picked up by key alone. Writers in this
+process also call ``invalidate_search_caches`` after committing, which drops
+entries straight away instead of on the next lookup.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class VersionedCache:
+    """LRU of values keyed by filter signature, scoped to a catalog version.
+
+    Entries are only valid for the catalog version they were computed
+    against; the first lookup under a new version drops everything.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self._max_entries = max(1, int(max_entries))
+        self._version: str | None = None
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        _live_caches.add(self)
+
+    def _sync_version(self, version: str) -> None:
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def get(self, version: str, signature: Hashable) -> Any | None:
+        self._sync_version(version)
+        value = self._entries.get(signature)
+        if value is not None:
+            self._entries.move_to_end(signature)
+        return value
+
+    def put(self, version: str, signature: Hashable, value: Any) -> None:
+        self._sync_version(version)
+        self._entries[signature] = value
+        self._entries.move_to_end(signature)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._version = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_live_caches: "weakref.WeakSet[VersionedCache]" = weakref.WeakSet()
+
+
+def invalidate_search_caches() -> None:
+    """Drop the entries of every live search cache in this process.
+
+    Called by ingest, rebuild and enrichment after they commit.
+    """
+    for cache in list(_live_caches):
+        cache.clear()
+
+
+class TotalsCache(VersionedCache):
+    """Search result totals keyed by filter signature."""
+
+
+class FacetCountsCache(VersionedCache):
+    """Per-facet value counts keyed by filter signature."""
+
+    def __init__(self, max_entries: int = 256):
+        super().__init__(max_entries)
+
+
+class SearchResultCache(VersionedCache):
+    """LRU with TTL for search result pages and the category list.
+
+    Concurrent misses for the same key are coalesced: the first caller
+    computes, the others wait for it and read its result.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 300.0,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(max_entries)
+        self._ttl = float(ttl_seconds)
+        self._clock = clock
+        self._locks: dict[Hashable, asyncio.Lock] = {}
+        self._waiting: dict[Hashable, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+
+    def get(self, version: str, signature: Hashable) -> Any | None:
+        self._sync_version(version)
+        entry = self._entries.get(signature)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[signature]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(signature)
+        return value
+
+    def put(self, version: str, signature: Hashable, value: Any) -> None:
+        super().put(version, signature, (self._clock() + self._ttl, value))
+
+    async def get_or_compute(
+        self,
+        version: str,
+        signature: Hashable,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        value = self.get(version, signature)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        key = (version, signature)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._waiting[key] = self._waiting.get(key, 0) + 1
+        try:
+            async with lock:
+                value = self.get(version, signature)
+                if value is not None:
+                    self.hits += 1
+                    return value
+                self.misses += 1
+                value = await compute()
+                self.put(version, signature, value)
+                return value
+        finally:
+            self._waiting[key] -= 1
+            if not self._waiting[key]:
+                del self._waiting[key]
+                del self._locks[key]
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "max_entries": self._max_entries,
+            "ttl_seconds": self._ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class CandidatePoolCache(SearchResultCache):
+    """Duration-fitting candidate pools keyed by filter signature.
+
+    A pool can hold most of the catalog, so far fewer entries are kept
+    than for search pages.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 8,
+        ttl_seconds: float = 900.0,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(max_entries, ttl_seconds, clock=clock)
@@ -0,0 +1,388 @@
+"""Catalog search query language.
+
+The search box accepts, besides plain words, ``field:value`` terms,
+quoted phrases and negation, all ANDed together::
+
+    genre:horror era:1980s -tag:gore "night of" dur:<90m
+
+Fields (with aliases): ``genre``, ``mood``, ``era``, ``category``/``cat``,
+``series``, ``title``, ``actor``/``cast``, ``director``/``dir``, ``theme``,
+``tag``, ``duration``/``dur`` and ``year``. Values may be quoted
+(``actor:"ken foree"``). ``duration`` and ``year`` take a comparison
+(``<90m``, ``>=1h30m``, ``=1979``) or a range (``60m-2h``, ``1970-1979``);
+a bare duration number is minutes. A ``word:`` prefix that is not a known
+field is plain text, so titles such as "Trek: TNG" still search as before.
+
+``parse_query`` turns the text into an AST; ``compile_query`` turns the AST
+into parameterized WHERE fragments for one catalog schema, choosing the FTS
+index for text, the ``<facet>_id`` lookups, the people index and the
+duration/year indexes where that schema has them and LIKE otherwise.
+Compiled queries are cached by normalized query text and schema.
+"""
+
+from __future__ import annotations
+
+import functools
+import re
+from dataclasses import dataclass
+from typing import Optional, Union
+
+from kryten_playlist.storage.catalog_schema import CatalogSchema
+from kryten_playlist.storage.facets import canonical_facet, facet_filter_sql, facet_like_sql
+from kryten_playlist.storage.fts import fts_column_filter, fts_tokens
+from kryten_playlist.storage.people import (
+    ROLE_ACTOR,
+    ROLE_DIRECTOR,
+    person_filter_params,
+    person_filter_sql,
+    person_key,
+)
+
+PLAN_CACHE_SIZE = 1024
+
+FIELD_ALIASES = {
+    "genre": "genre",
+    "mood": "mood",
+    "era": "era",
+    "category": "category",
+    "cat": "category",
+    "series": "series",
+    "title": "title",
+    "actor": "actor",
+    "cast": "actor",
+    "director": "director",
+    "dir": "director",
+    "theme": "theme",
+    "tag": "tag",
+    "duration": "duration",
+    "dur": "duration",
+    "year": "year",
+}
+RANGE_FIELDS = ("duration", "year")
+
+# FTS columns (and LIKE columns without FTS) searched by each text field
+_TEXT_COLUMNS = {
+    "series": ("title_base",),
+    "title": ("sanitized_title",),
+    "actor": ("cast_list",),
+    "director": ("director",),
+    "theme": ("synopsis", "llm_notes"),
+}
+_TITLE_COLUMNS = ("sanitized_title", "title_base")
+
+_TERM_RE = re.compile(r'\s*(-?)(?:([A-Za-z]+):)?("([^"]*)"?|[^\s"]+)')
+_DURATION_RE = re.compile(r"^(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s)?$")
+_COMPARE_RE = re.compile(r"^(<=|>=|<|>|=)?(.+)$")
+# Longest duration a query may name; anything longer binds past SQLite's int64
+MAX_DURATION_SECONDS = 366 * 24 * 3600
+
+
+class QuerySyntaxError(ValueError):
+    """The query text could not be parsed."""
+
+
+@dataclass(frozen=True)
+class Text:
+    """Free text; a phrase must match as consecutive words."""
+
+    value: str
+    phrase: bool = False
+
+    def __str__(self) -> str:
+        return f'"{self.value}"' if self.phrase else self.value
+
+
+@dataclass(frozen=True)
+class Match:
+    """``field:value`` for the facet, category, tag and text fields."""
+
+    field: str
+    value: str
+
+    def __str__(self) -> str:
+        value = f'"{self.value}"' if (" " in self.value or not self.value) else self.value
+        return f"{self.field}:{value}"
+
+
+@dataclass(frozen=True)
+class Range:
+    """Inclusive bounds on ``duration`` (seconds) or ``year``."""
+
+    field: str
+    low: Optional[int]
+    high: Optional[int]
+
+    def __str__(self) -> str:
+        def fmt(v: int) -> str:
+            return f"{v}s" if self.field == "duration" else str(v)
+
+        if self.low is not None and self.high is not None:
+            if self.low == self.high:
+                return f"{self.field}:={fmt(self.low)}"
+            return f"{self.field}:{fmt(self.low)}-{fmt(self.high)}"
+        if self.low is not None:
+            return f"{self.field}:>={fmt(self.low)}"
+        return f"{self.field}:<={fmt(self.high)}"  # type: ignore[arg-type]
+
+
+@dataclass(frozen=True)
+class Not:
+    term: Union[Text, Match, Range]
+
+    def __str__(self) -> str:
+        return f"-{self.term}"
+
+
+Term = Union[Text, Match, Range, Not]
+
+
+@dataclass(frozen=True)
+class Query:
+    terms: tuple[Term, ...]
+
+    def __str__(self) -> str:
+        return " ".join(str(t) for t in self.terms)
+
+    @property
+    def text(self) -> str:
+        """The positive free text (words and phrases), space-separated."""
+        return " ".join(t.value for t in self.terms if isinstance(t, Text))
+
+    def without_text(self) -> "Query":
+        """The same query with the positive free text removed."""
+        return Query(tuple(t for t in self.terms if not isinstance(t, Text)))
+
+
+def _parse_duration(text: str) -> int:
+    if text.isdigit():
+        return _bounded_duration(text, int(text) * 60)
+    m = _DURATION_RE.match(text)
+    if not m or not any(m.groups()):
+        raise QuerySyntaxError(f"invalid duration: {text!r}")
+    h, mins, s = (int(g or 0) for g in m.groups())
+    return _bounded_duration(text, h * 3600 + mins * 60 + s)
+
+
+def _bounded_duration(text: str, seconds: int) -> int:
+    if seconds > MAX_DURATION_SECONDS:
+        raise QuerySyntaxError(f"duration too long: {text!r}")
+    return seconds
+
+
+def _parse_year(text: str) -> int:
+    if not text.isdigit() or len(text) != 4:
+        raise QuerySyntaxError(f"invalid year: {text!r}")
+    return int(text)
+
+
+def _parse_range(field: str, value: str) -> Range:
+    parse = _parse_duration if field == "duration" else _parse_year
+    value = value.replace(" ", "")
+    if "-" in value and not value.startswith(("<", ">", "=")):
+        low_text, _, high_text = value.partition("-")
+        low, high = parse(low_text), parse(high_text)
+        if low > high:
+            low, high = high, low
+        return Range(field, low, high)
+
+    m = _COMPARE_RE.match(value)
+    if not m:
+        raise QuerySyntaxError(f"{field}: needs a value")
+    op, number = m.group(1) or "=", parse(m.group(2))
+    if op == "<":
+        return Range(field, None, number - 1)
+    if op == "<=":
+        return Range(field, None, number)
+    if op == ">":
+        return Range(field, number + 1, None)
+    if op == ">=":
+        return Range(field, number, None)
+    return Range(field, number, number)
+
+
+def _normalize_match(field: str, value: str) -> str:
+    if field in ("genre", "mood", "era"):
+        return canonical_facet(field, value) or ""
+    if field == "category":
+        return value.strip()
+    return " ".join(value.split()).casefold()
+
+
+def parse_query(text: str | None) -> Query:
+    """Parse query text into a ``Query``. Raises QuerySyntaxError."""
+    terms: list[Term] = []
+    pos = 0
+    source = str(text or "")
+    while pos < len(source):
+        m = _TERM_RE.match(source, pos)
+        if not m or m.end() == pos:
+            break
+        pos = m.end()
+        negated, field_name, raw, quoted = m.group(1), m.group(2), m.group(3), m.group(4)
+        value = quoted if quoted is not None else raw
+
+        field = FIELD_ALIASES.get(field_name.casefold()) if field_name else None
+        term: Union[Text, Match, Range, None]
+        if field in RANGE_FIELDS:
+            term = _parse_range(field, value)
+        elif field:
+            normalized = _normalize_match(field, value)
+            if not normalized:
+                raise QuerySyntaxError(f"{field}: needs a value")
+            term = Match(field, normalized)
+        else:
+            if field_name:
+                # Not a field: keep "word:" as part of the text
+                value = f"{field_name}:{value}"
+            words = " ".join(value.split()).casefold()
+            term = Text(words, phrase=quoted is not None) if fts_tokens(words) else None
+
+        if term is None:
+            continue
+        terms.append(Not(term) if negated else term)
+    return Query(tuple(terms))
+
+
+def normalize_query_text(text: str | None) -> str:
+    """Cache key for query text: whitespace collapsed and casefolded."""
+    return " ".join(str(text or "").split()).casefold()
+
+
+@dataclass(frozen=True)
+class CompiledQuery:
+    query: Query
+    fts: Optional[str]  # ANDed into the catalog_fts MATCH expression
+    where: tuple[str, ...]
+    params: tuple[object, ...]
+    plan: tuple[str, ...]  # one note per term: which index or scan serves it
+
+
+def _fts_expr(columns: tuple[str, ...], term: Union[Text, Match], *, prefix: bool) -> Optional[str]:
+    if isinstance(term, Text) and term.phrase:
+        tokens = fts_tokens(term.value)
+        if not tokens:
+            return None
+        colspec = columns[0] if len(columns) == 1 else "{" + " ".join(columns) + "}"
+        return f'{colspec} : ("{" ".join(tokens)}")'
+    return fts_column_filter(columns, term.value, prefix=prefix)
+
+
+class _Compiler:
+    def __init__(self, schema: CatalogSchema):
+        self.schema = schema
+        self.fts: list[str] = []
+        self.where: list[str] = []
+        self.params: list[object] = []
+        self.plan: list[str] = []
+
+    def add(self, sql: str, params: list[object], negated: bool, note: str) -> None:
+        # "IS NOT 1" keeps rows where the condition is false or NULL
+        self.where.append(f"({sql}) IS NOT 1" if negated else sql)
+        self.params.extend(params)
+        self.plan.append(note)
+
+    def text(self, columns: tuple[str, ...], term: Union[Text, Match], negated: bool, label: str) -> None:
+        schema = self.schema
+        if schema.has_fts:
+            # Exclusions match whole words: "-gore" should not drop "Gorehounds"
+            expr = _fts_expr(columns, term, prefix=not negated)
+            if expr is None:
+                return
+            if negated:
+                self.add(
+                    "ci.rowid IN (SELECT rowid FROM catalog_fts WHERE catalog_fts MATCH ?)",
+                    [expr],
+                    True,
+                    f"{label}: catalog_fts anti-join",
+                )
+            else:
+                self.fts.append(expr)
+                self.plan.append(f"{label}: catalog_fts MATCH")
+            return
+
+        like_columns = [c for c in columns if schema.has(c)] or list(schema.search_columns)
+        if columns == _TITLE_COLUMNS:
+            like_columns = list(schema.search_columns)
+        clauses = [f"ci.{c} LIKE ?" for c in like_columns]
+        self.add(
+            f"({' OR '.join(clauses)})",
+            [f"%{term.value}%"] * len(clauses),
+            negated,
+            f"{label}: LIKE scan of {', '.join(like_columns)}",
+        )
+
+    def match(self, term: Match, negated: bool) -> None:
+        schema, field, value = self.schema, term.field, term.value
+        if field in ("genre", "mood", "era"):
+            if schema.has(f"{field}_id"):
+                self.add(facet_filter_sql(field), [value], negated, f"{field}: index on {field}_id")
+            else:
+                sql, params = facet_like_sql(field, value)
+                self.add(sql, params, negated, f"{field}: LIKE scan")
+        elif field == "category":
+            self.add(
+                schema.category_name_filter,
+                [value],
+                negated,
+                "category: catalog_item_category lookup",
+            )
+        elif field == "tag":
+            if not schema.has_tags:
+                raise QuerySyntaxError("tag: is not available for this catalog")
+            self.add(
+                "ci.video_id IN (SELECT it.video_id FROM catalog_item_tag it "
+                "JOIN catalog_tag t ON t.id = it.tag_id WHERE t.name = ? COLLATE NOCASE)",
+                [value],
+                negated,
+                "tag: catalog_item_tag lookup",
+            )
+        elif field in ("actor", "director") and schema.has_people and person_key(value):
+            role = ROLE_ACTOR if field == "actor" else ROLE_DIRECTOR
+            self.add(person_filter_sql(role), person_filter_params(value), negated, f"{field}: people index")
+        else:
+            self.text(_TEXT_COLUMNS[field], term, negated, field)
+
+    def range(self, term: Range, negated: bool) -> None:
+        column = "duration_seconds" if term.field == "duration" else "year"
+        if not self.schema.has(column):
+            raise QuerySyntaxError(f"{term.field}: is not available for this catalog")
+        if term.low is not None and term.high is not None:
+            sql, params = f"ci.{column} BETWEEN ? AND ?", [term.low, term.high]
+        elif term.low is not None:
+            sql, params = f"ci.{column} >= ?", [term.low]
+        else:
+            sql, params = f"ci.{column} <= ?", [term.high]
+        self.add(sql, params, negated, f"{term.field}: range on {column}")
+
+    def compile(self, query: Query) -> CompiledQuery:
+        words = [t for t in query.terms if isinstance(t, Text) and not t.phrase]
+        if words:
+            # Bare words form one prefix query, as plain searches always have
+            self.text(_TITLE_COLUMNS, Text(" ".join(t.value for t in words)), False, "text")
+        for t in query.terms:
+            negated = isinstance(t, Not)
+            term = t.term if isinstance(t, Not) else t
+            if isinstance(term, Text):
+                if term.phrase or negated:
+                    self.text(_TITLE_COLUMNS, term, negated, "phrase" if term.phrase else "text")
+            elif isinstance(term, Match):
+                self.match(term, negated)
+            else:
+                self.range(term, negated)
+        fts = " AND ".join(f"({e})" for e in self.fts) or None
+        return CompiledQuery(query, fts, tuple(self.where), tuple(self.params), tuple(self.plan))
+
+
+@functools.lru_cache(maxsize=PLAN_CACHE_SIZE)
+def _compile_normalized(text: str, schema: CatalogSchema) -> CompiledQuery:
+    return _Compiler(schema).compile(parse_query(text))
+
+
+def compile_query(text: str | None, schema: CatalogSchema) -> CompiledQuery:
+    """Parse and compile ``text`` for ``schema``, through the plan cache."""
+    return _compile_normalized(normalize_query_text(text), schema)
+
+
+def plan_cache_stats() -> dict[str, int]:
+    info = _compile_normalized.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": PLAN_CACHE_SIZE}
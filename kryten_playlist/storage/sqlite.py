@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import time
+from collections import deque
 from dataclasses import dataclass
 from pathlib import Path
+from typing import AsyncIterator
 
 import aiosqlite
 
@@ -22,3 +27,122 @@ class SqliteDb:
         await conn.execute("PRAGMA journal_mode=WAL")
         await conn.execute("PRAGMA foreign_keys=ON")
         return conn
+
+    async def connect_reader(self) -> aiosqlite.Connection:
+        """Open a read-only connection.
+
+        Relies on the writer (``connect``) having put the database in WAL
+        mode, so readers never block on, or are blocked by, the writer.
+        """
+        uri = f"{self._cfg.path.resolve().as_uri()}?mode=ro"
+        conn = await aiosqlite.connect(uri, uri=True)
+        conn.row_factory = aiosqlite.Row
+        return conn
+
+
+class PoolMetrics:
+    """Checkout statistics for a ReadPool.
+
+    ``wait`` is the time spent waiting for a free connection; ``hold`` is the
+    time a connection stayed checked out (i.e. the latency of the work done
+    with it). Percentiles are computed over the most recent samples.
+    """
+
+    def __init__(self, window: int = 1024):
+        self.checkouts = 0
+        self.waits = 0  # checkouts that found no idle connection
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+        self._wait_samples: deque[float] = deque(maxlen=window)
+        self._hold_samples: deque[float] = deque(maxlen=window)
+
+    def record_wait(self, seconds: float, *, waited: bool) -> None:
+        self.checkouts += 1
+        if waited:
+            self.waits += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        self._wait_samples.append(seconds)
+
+    def record_hold(self, seconds: float) -> None:
+        self.hold_total += seconds
+        self.hold_max = max(self.hold_max, seconds)
+        self._hold_samples.append(seconds)
+
+    @staticmethod
+    def _percentile(samples: deque[float], pct: float) -> float:
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[idx]
+
+    def as_dict(self) -> dict[str, float | int]:
+        n = max(self.checkouts, 1)
+        return {
+            "checkouts": self.checkouts,
+            "waits": self.waits,
+            "wait_avg_ms": 1000.0 * self.wait_total / n,
+            "wait_p95_ms": 1000.0 * self._percentile(self._wait_samples, 95),
+            "wait_max_ms": 1000.0 * self.wait_max,
+            "hold_avg_ms": 1000.0 * self.hold_total / n,
+            "hold_p50_ms": 1000.0 * self._percentile(self._hold_samples, 50),
+            "hold_p95_ms": 1000.0 * self._percentile(self._hold_samples, 95),
+            "hold_max_ms": 1000.0 * self.hold_max,
+        }
+
+
+class ReadPool:
+    """A fixed-size pool of read-only SQLite connections.
+
+    aiosqlite runs each connection on its own worker thread, so a pool lets
+    independent reads proceed in parallel instead of queueing behind one
+    connection (and behind long write transactions on the writer).
+    """
+
+    def __init__(self, db: SqliteDb, size: int = 4):
+        self._db = db
+        self._size = max(1, int(size))
+        self._idle: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        self._conns: list[aiosqlite.Connection] = []
+        self.metrics = PoolMetrics()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    async def open(self) -> None:
+        for _ in range(self._size):
+            conn = await self._db.connect_reader()
+            self._conns.append(conn)
+            self._idle.put_nowait(conn)
+
+    async def close(self) -> None:
+        for conn in self._conns:
+            with contextlib.suppress(Exception):
+                await conn.close()
+        self._conns.clear()
+        self._idle = asyncio.Queue()
+
+    @contextlib.asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Check out a connection for the duration of the block."""
+        started = time.perf_counter()
+        waited = self._idle.empty()
+        conn = await self._idle.get()
+        checked_out = time.perf_counter()
+        self.metrics.record_wait(checked_out - started, waited=waited)
+        try:
+            yield conn
+        finally:
+            self.metrics.record_hold(time.perf_counter() - checked_out)
+            self._idle.put_nowait(conn)
+
+    def stats(self) -> dict[str, float | int]:
+        return {
+            "size": self._size,
+            "idle": self._idle.qsize(),
+            **self.metrics.as_dict(),
+        }
@@ -0,0 +1,383 @@
+"""In-memory prefix index for search-box autocomplete.
+
+Suggestions are titles (one per enriched item) and series names (one per
+distinct ``title_base`` of TV items). Every word start of a normalized name
+is a key, so "dead" suggests "Dawn of the Dead" as well as "Dead Alive";
+keys are kept in one sorted list and a prefix is a ``bisect`` range of it.
+
+Entries are ranked by play count (series by the sum over their episodes).
+For prefixes of up to ``PRECOMPUTED_PREFIX`` characters, where a range can
+cover most of the catalog, the top entries are precomputed per prefix;
+longer prefixes select the best-ranked entries from their (short) range.
+
+Rebuilding after a catalog change reuses the keys computed for unchanged
+names, and after an enrichment batch reads only the newly enriched items; a
+play-count update only re-ranks.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import logging
+import re
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Mapping, Optional
+
+import aiosqlite
+
+from kryten_playlist.storage.catalog_meta import CatalogVersion, get_catalog_version
+from kryten_playlist.storage.catalog_schema import get_catalog_schema
+from kryten_playlist.storage.sqlite import ReadPool
+
+logger = logging.getLogger(__name__)
+
+KIND_TITLE = "title"
+KIND_SERIES = "series"
+
+PRECOMPUTED_PREFIX = 3
+PRECOMPUTED_TOP = 25
+# Words that never start a key unless they start the name
+STOPWORDS = frozenset({"a", "an", "and", "of", "the", "in", "on", "to"})
+
+_NON_WORD_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize_title(text: str | None) -> str:
+    """Accent-free, casefolded words separated by single spaces."""
+    folded = str(text or "").casefold()
+    if not folded.isascii():
+        folded = unicodedata.normalize("NFKD", folded)
+        folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return " ".join(_NON_WORD_RE.sub(" ", folded).split())
+
+
+def title_keys(text: str | None) -> tuple[str, ...]:
+    """The normalized name from each word start on ("dawn of the dead" -> ..., "dead")."""
+    words = normalize_title(text).split()
+    return tuple(
+        " ".join(words[i:])
+        for i in range(len(words))
+        if i == 0 or words[i] not in STOPWORDS
+    )
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    kind: str
+    text: str
+    video_id: Optional[str]  # None for series
+    plays: int
+
+
+@dataclass(frozen=True)
+class _Entry:
+    kind: str
+    text: str
+    video_ids: tuple[str, ...]
+    visible: bool  # shown to users without include_uncategorized
+
+
+class SuggestIndex:
+    """Immutable prefix index for one catalog version and play-count snapshot."""
+
+    def __init__(
+        self,
+        entries: list[_Entry],
+        *,
+        version: CatalogVersion,
+        plays: Mapping[str, int],
+        key_cache: dict[str, tuple[str, ...]],
+        keys: Optional[list[str]] = None,
+        key_entry: Optional[array] = None,
+    ):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self._entries = entries
+        self._key_cache = key_cache
+
+        if keys is None or key_entry is None:
+            pairs = sorted(
+                (key, i) for i, e in enumerate(entries) for key in key_cache[e.text]
+            )
+            keys = [k for k, _ in pairs]
+            key_entry = array("I", (i for _, i in pairs))
+        self._keys = keys
+        self._key_entry = key_entry
+
+        self._plays = array("q", (sum(int(plays.get(v, 0)) for v in e.video_ids) for e in entries))
+        order = sorted(
+            range(len(entries)),
+            key=lambda i: (-self._plays[i], len(entries[i].text), entries[i].text, entries[i].kind),
+        )
+        self._rank = array("I", bytes(4 * len(entries)))
+        for position, i in enumerate(order):
+            self._rank[i] = position
+
+        # prefix -> best entries, for public and include_uncategorized access
+        self._top: tuple[dict[str, list[int]], dict[str, list[int]]] = ({}, {})
+        for i in order:
+            prefixes = {
+                key[:n]
+                for key in key_cache[entries[i].text]
+                for n in range(1, min(PRECOMPUTED_PREFIX, len(key)) + 1)
+            }
+            levels = self._top if entries[i].visible else self._top[1:]
+            for table in levels:
+                for p in prefixes:
+                    top = table.setdefault(p, [])
+                    if len(top) < PRECOMPUTED_TOP:
+                        top.append(i)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def with_plays(self, plays: Mapping[str, int]) -> "SuggestIndex":
+        """Same entries and keys, re-ranked by new play counts."""
+        return SuggestIndex(
+            self._entries,
+            version=self.version,
+            plays=plays,
+            key_cache=self._key_cache,
+            keys=self._keys,
+            key_entry=self._key_entry,
+        )
+
+    def suggest(self, prefix: str, *, limit: int = 10, include_uncategorized: bool = False) -> list[Suggestion]:
+        p = normalize_title(prefix)
+        if not p or limit < 1:
+            return []
+
+        if len(p) <= PRECOMPUTED_PREFIX and limit <= PRECOMPUTED_TOP:
+            ids = self._top[1 if include_uncategorized else 0].get(p, [])[:limit]
+        else:
+            lo = bisect_left(self._keys, p)
+            hi = bisect_left(self._keys, p + "\uffff", lo)
+            found = {
+                i
+                for i in self._key_entry[lo:hi]
+                if include_uncategorized or self._entries[i].visible
+            }
+            ids = heapq.nsmallest(limit, found, key=self._rank.__getitem__)
+
+        out = []
+        for i in ids:
+            e = self._entries[i]
+            out.append(
+                Suggestion(
+                    kind=e.kind,
+                    text=e.text,
+                    video_id=e.video_ids[0] if e.kind == KIND_TITLE else None,
+                    plays=self._plays[i],
+                )
+            )
+        return out
+
+
+def build_suggest_index(
+    rows: list[tuple[str, str, Optional[str], bool, bool]],
+    *,
+    version: CatalogVersion,
+    plays: Mapping[str, int],
+    previous: Optional[SuggestIndex] = None,
+) -> SuggestIndex:
+    """Build from ``(video_id, title, title_base, is_tv, visible)`` rows.
+
+    Keys already computed by ``previous`` are reused for unchanged names.
+    """
+    entries: list[_Entry] = []
+    series: dict[str, list[tuple[str, bool]]] = {}
+    for video_id, title, title_base, is_tv, visible in rows:
+        if not title:
+            continue
+        entries.append(_Entry(KIND_TITLE, title, (video_id,), bool(visible)))
+        if is_tv and title_base:
+            series.setdefault(title_base, []).append((video_id, bool(visible)))
+    for name, episodes in series.items():
+        entries.append(
+            _Entry(
+                KIND_SERIES,
+                name,
+                tuple(v for v, _ in episodes),
+                any(visible for _, visible in episodes),
+            )
+        )
+
+    old = previous._key_cache if previous is not None else {}
+    key_cache: dict[str, tuple[str, ...]] = {}
+    for e in entries:
+        if e.text not in key_cache:
+            keys = old.get(e.text)
+            key_cache[e.text] = keys if keys is not None else title_keys(e.text)
+
+    return SuggestIndex(entries, version=version, plays=plays, key_cache=key_cache)
+
+
+async def load_suggest_rows(
+    conn: aiosqlite.Connection,
+    *,
+    schema_owner: object | None = None,
+    enriched_since: Optional[str] = None,
+) -> list[tuple[str, str, Optional[str], bool, bool]]:
+    """Rows for ``build_suggest_index``: the items search can return.
+
+    With ``enriched_since``, only items enriched at or after that time.
+    """
+    schema = await get_catalog_schema(schema_owner or conn, conn)
+    base = "ci.title_base" if schema.has("title_base") else "NULL"
+    is_tv = "ci.is_tv" if schema.has("is_tv") else "0"
+    where, params = "", []
+    if schema.has("llm_enriched_at"):
+        where = "WHERE ci.llm_enriched_at IS NOT NULL"
+        if enriched_since is not None:
+            where += " AND ci.llm_enriched_at >= ?"
+            params.append(enriched_since)
+    cursor = await conn.execute(
+        f"SELECT ci.video_id, ci.{schema.title_expr}, {base}, {is_tv}, "
+        "(ci.mediacms_category IS NOT NULL AND ci.mediacms_category != 'Uncategorized') "
+        f"FROM catalog_item ci {where}",
+        params,
+    )
+    return [(str(r[0]), r[1], r[2], bool(r[3]), bool(r[4])) for r in await cursor.fetchall()]
+
+
+async def last_enriched_at(conn: aiosqlite.Connection, *, schema_owner: object | None = None) -> Optional[str]:
+    """The latest ``llm_enriched_at``, or None if there is none (or no such column)."""
+    schema = await get_catalog_schema(schema_owner or conn, conn)
+    if not schema.has("llm_enriched_at"):
+        return None
+    cursor = await conn.execute("SELECT MAX(llm_enriched_at) FROM catalog_item")
+    row = await cursor.fetchone()
+    return row[0] if row else None
+
+
+class SuggestIndexManager:
+    """Keeps ``current`` in step with the catalog version and play counts.
+
+    A new ``snapshot_id`` (ingest or rebuild) triggers a full rebuild on the
+    next ``refresh``. Generation-only bumps (enrichment batches) are
+    coalesced to at most one update per ``min_rebuild_seconds``, which reads
+    only the items enriched since the last one. The index is re-ranked when
+    play counts are older than ``plays_refresh_seconds``.
+    """
+
+    def __init__(
+        self,
+        source: aiosqlite.Connection | ReadPool,
+        *,
+        plays: Optional[Callable[[], Awaitable[Mapping[str, int]]]] = None,
+        plays_refresh_seconds: float = 300.0,
+        min_rebuild_seconds: float = 60.0,
+    ):
+        self._source = source
+        self._plays = plays
+        self._plays_refresh = float(plays_refresh_seconds)
+        self._plays_at = 0.0
+        self._min_rebuild = float(min_rebuild_seconds)
+        self._lock = asyncio.Lock()
+        self.current: Optional[SuggestIndex] = None
+        # Catalog version the index reflects, when it was brought up to it,
+        # and the rows and enrichment time it was built from
+        self._version: Optional[CatalogVersion] = None
+        self._updated_at = 0.0
+        self._rows: dict[str, tuple[str, str, Optional[str], bool, bool]] = {}
+        self._enriched_at: Optional[str] = None
+
+    @contextlib.asynccontextmanager
+    async def _reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        if isinstance(self._source, ReadPool):
+            async with self._source.acquire() as conn:
+                yield conn
+        else:
+            yield self._source
+
+    async def _load_plays(self) -> Mapping[str, int]:
+        self._plays_at = time.monotonic()
+        if self._plays is None:
+            return {}
+        try:
+            return await self._plays()
+        except Exception as e:
+            logger.warning(f"Could not load play counts for suggestions: {e}")
+            return {}
+
+    def _is_fresh(self, version: CatalogVersion) -> bool:
+        if self.current is None or self._version is None:
+            return False
+        if self._version == version:
+            return True
+        if self._version.snapshot_id != version.snapshot_id:
+            return False
+        return time.monotonic() - self._updated_at < self._min_rebuild
+
+    async def refresh(self) -> bool:
+        """Rebuild, update or re-rank if needed. Returns True if ``current`` changed."""
+        async with self._lock:
+            cur = self.current
+            rows = None
+            async with self._reader() as conn:
+                version = await get_catalog_version(conn)
+                if version is None:
+                    return False
+                if not self._is_fresh(version):
+                    full = self._version is None or self._version.snapshot_id != version.snapshot_id
+                    since = None if full else self._enriched_at
+                    full = full or since is None
+                    enriched_at = await last_enriched_at(conn, schema_owner=self._source)
+                    rows = await load_suggest_rows(conn, schema_owner=self._source, enriched_since=since)
+
+            if rows is not None and not full:
+                # Items enriched right at the last update are read again
+                rows = [row for row in rows if self._rows.get(row[0]) != row]
+                if not rows:
+                    # Nothing newly enriched (e.g. a popularity or people update)
+                    self._version, self._updated_at = version, time.monotonic()
+                    self._enriched_at = enriched_at
+                    rows = None
+
+            plays_stale = time.monotonic() - self._plays_at >= self._plays_refresh
+            if rows is not None:
+                started = time.perf_counter()
+                merged = {} if full else dict(self._rows)
+                merged.update((row[0], row) for row in rows)
+                plays = await self._load_plays()
+                # Building takes a few seconds at 100k items; keep it off the loop
+                self.current = await asyncio.to_thread(
+                    build_suggest_index, list(merged.values()), version=version, plays=plays, previous=cur
+                )
+                self._rows = merged
+                self._version, self._updated_at = version, time.monotonic()
+                self._enriched_at = enriched_at
+                logger.info(
+                    f"Suggest index {'built' if full else f'updated with {len(rows)} enriched items'}: "
+                    f"{len(self.current)} entries, version {version.key}, "
+                    f"{(time.perf_counter() - started) * 1000:.0f} ms"
+                )
+                return True
+            if cur is not None and plays_stale and self._plays is not None:
+                self.current = await asyncio.to_thread(cur.with_plays, await self._load_plays())
+                return True
+            return False
+
+    async def run(self, shutdown_event: asyncio.Event, *, poll_seconds: float = 30.0) -> None:
+        """Poll until ``shutdown_event`` is set."""
+        while not shutdown_event.is_set():
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Suggest index refresh failed: {e}")
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(shutdown_event.wait(), timeout=poll_seconds)
+
+    def stats(self) -> dict[str, Any]:
+        cur = self.current
+        return {
+            "enabled": cur is not None,
+            "entries": len(cur) if cur is not None else 0,
+            "version": self._version.key if cur is not None and self._version is not None else None,
+        }
@@ -0,0 +1,127 @@
+"""Typo-tolerant title matching over the trigram index.
+
+``catalog_title_trgm`` (see ``catalog/enhanced_schema.py``) is an FTS5 table
+using the ``trigram`` tokenizer over ``sanitized_title``, ``title_base`` and
+``raw_title``. A fuzzy query is answered in two steps:
+
+1. Candidates: the query's in-word trigrams are looked up in the index's
+   vocabulary (``catalog_title_trgm_vocab``) and the rarest few are matched;
+   the rows containing the most of them are kept. Common trigrams ("the",
+   "ing") would match most of the catalog and carry no signal, so they are
+   left out of the lookup but still count when scoring.
+2. Scoring: each candidate title is compared with the query on padded word
+   trigrams (as pg_trgm does), mixing how much of the query the title covers
+   with their overall overlap.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Iterable
+
+import aiosqlite
+
+TRIGRAM_TABLE = "catalog_title_trgm"
+TRIGRAM_VOCAB = "catalog_title_trgm_vocab"
+
+# Rarest query trigrams used to fetch candidates, and how many candidates to score
+MATCH_TRIGRAMS = 6
+CANDIDATE_LIMIT = 200
+MIN_SCORE = 0.3
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _words(text: str | None, *, strip_accents: bool = True) -> list[str]:
+    folded = str(text or "").casefold()
+    if strip_accents and not folded.isascii():
+        folded = unicodedata.normalize("NFKD", folded)
+        folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return _WORD_RE.findall(folded)
+
+
+def word_trigrams(text: str | None) -> set[str]:
+    """Padded trigrams of every word ("dawn" -> "  d", " da", "daw", "awn", "wn ")."""
+    grams: set[str] = set()
+    for word in _words(text):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def match_trigrams(text: str | None) -> list[str]:
+    """Unpadded in-word trigrams, as stored by the FTS5 trigram tokenizer.
+
+    Accents are kept: the tokenizer only folds case.
+    """
+    seen: dict[str, None] = {}
+    for word in _words(text, strip_accents=False):
+        for i in range(len(word) - 2):
+            seen.setdefault(word[i : i + 3], None)
+    return list(seen)
+
+
+def similarity(query: str | set[str], text: str | None) -> float:
+    """Score in [0, 1]: mean of query coverage and trigram Jaccard overlap.
+
+    Coverage lets "grindhose" score well against the longer
+    "Grindhouse: Planet Terror"; the Jaccard half ranks the closer-length
+    title ("Grindhouse") above it.
+    """
+    q = query if isinstance(query, set) else word_trigrams(query)
+    t = word_trigrams(text)
+    if not q or not t:
+        return 0.0
+    shared = len(q & t)
+    return (shared / len(q) + shared / len(q | t)) / 2
+
+
+def best_similarity(query: str | set[str], texts: Iterable[str | None]) -> float:
+    q = query if isinstance(query, set) else word_trigrams(query)
+    return max((similarity(q, t) for t in set(texts) if t), default=0.0)
+
+
+def _quote(gram: str) -> str:
+    return '"' + gram.replace('"', '""') + '"'
+
+
+async def rarest_trigrams(
+    conn: aiosqlite.Connection,
+    grams: list[str],
+    *,
+    keep: int = MATCH_TRIGRAMS,
+) -> list[str]:
+    """The ``keep`` query trigrams that occur in the fewest titles.
+
+    Trigrams that do not occur at all are dropped: they cannot produce a
+    candidate.
+    """
+    if not grams:
+        return []
+    placeholders = ",".join("?" * len(grams))
+    cursor = await conn.execute(
+        f"SELECT term, doc FROM {TRIGRAM_VOCAB} WHERE term IN ({placeholders})",
+        grams,
+    )
+    counts = {row[0]: row[1] for row in await cursor.fetchall()}
+    present = [g for g in grams if counts.get(g)]
+    present.sort(key=lambda g: counts[g])
+    return present[:keep]
+
+
+def candidate_filter(grams: list[str]) -> tuple[str, list[str]]:
+    """WHERE fragment limiting ``ci`` to the titles sharing the most of ``grams``.
+
+    Each trigram is its own MATCH (reading a doclist is cheap) and rows are
+    ranked by how many of them they contain, which avoids computing bm25
+    over every row that shares a single common trigram.
+    """
+    branches = " UNION ALL ".join(
+        [f"SELECT rowid FROM {TRIGRAM_TABLE} WHERE {TRIGRAM_TABLE} MATCH ?"] * len(grams)
+    )
+    sql = (
+        f"ci.rowid IN (SELECT rowid FROM ({branches}) "
+        f"GROUP BY rowid ORDER BY COUNT(*) DESC LIMIT {CANDIDATE_LIMIT})"
+    )
+    return sql, [_quote(g) for g in grams]
@@ -6,7 +6,16 @@ from fastapi import FastAPI, HTTPException
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 
-from kryten_playlist.web.routes import auth, catalog, marathon, nowplaying, playlists, queue, stats
+from kryten_playlist.web.routes import (
+    auth,
+    catalog,
+    fit,
+    marathon,
+    nowplaying,
+    playlists,
+    queue,
+    stats,
+)
 from kryten_playlist.web.ui import router as ui_router
 
 
@@ -24,6 +33,7 @@ def create_app() -> FastAPI:
     app.include_router(playlists.router, prefix="/api/v1/playlists", tags=["playlists"])
     app.include_router(queue.router, prefix="/api/v1/queue", tags=["queue"])
     app.include_router(marathon.router, prefix="/api/v1/marathon", tags=["marathon"])
+    app.include_router(fit.router, prefix="/api/v1/fit", tags=["fit"])
     app.include_router(stats.router, prefix="/api/v1/stats", tags=["stats"])
 
     # Serve frontend static assets (production build)
@@ -10,6 +10,7 @@ from fastapi import Depends, HTTPException, Request
 from kryten_playlist.auth.otp import parse_iso, utcnow
 from kryten_playlist.domain.schemas import Role
 from kryten_playlist.nats.kv import BUCKET_ACL, BUCKET_AUTH, KvJson
+from kryten_playlist.storage.catalog_repo import CatalogRepository
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +61,41 @@ def get_sqlite(request: Request) -> Any:
     return conn
 
 
+def get_catalog_reader(request: Request) -> Any:
+    """Read-only connection pool for catalog queries, or the writer if none."""
+    pool = getattr(request.app.state, "sqlite_read_pool", None)
+    if pool is not None:
+        return pool
+    return get_sqlite(request)
+
+
+def get_catalog_index(request: Request) -> Any:
+    """The in-memory catalog index manager, or None when disabled."""
+    return getattr(request.app.state, "catalog_index", None)
+
+
+def get_fit_pools(request: Request) -> Any:
+    """The shared duration-fitting candidate pool cache, or None when disabled."""
+    return getattr(request.app.state, "fit_pools", None)
+
+
+def get_catalog_suggest(request: Request) -> Any:
+    """The autocomplete index manager, or None when disabled."""
+    return getattr(request.app.state, "catalog_suggest", None)
+
+
+def get_catalog_repo(request: Request) -> CatalogRepository:
+    """Build a CatalogRepository wired to the app's shared catalog caches."""
+    conn = get_catalog_reader(request)
+    return CatalogRepository(
+        conn,
+        totals_cache=getattr(request.app.state, "catalog_totals", None),
+        facet_cache=getattr(request.app.state, "catalog_facets", None),
+        index=get_catalog_index(request),
+        result_cache=getattr(request.app.state, "catalog_results", None),
+    )
+
+
 def get_request_ip(request: Request) -> str:
     # For now, trust direct client connection.
     host = request.client.host if request.client else ""
@@ -159,6 +195,13 @@ def require_admin(session: Session = Depends(require_session)) -> Session:
     return require_role(session, {"admin"})
 
 
+def may_see_uncategorized(session: Session | None, config: Any) -> bool:
+    """Admins and blessed users may see items outside the public categories."""
+    if not session:
+        return False
+    return session.role == "admin" or session.username in config.blessed_users
+
+
 async def get_user_from_channel_userlist(
     channel: str,
     username: str,
@@ -1,17 +1,37 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 
 from kryten_playlist.domain.schemas import (
+    CatalogFacetsOut,
     CatalogItemOut,
     CatalogSearchOut,
     CategoriesOut,
+    FacetValueOut,
+    FilmographyItemOut,
+    FilmographyOut,
     PendingCountOut,
+    PersonRole,
+    SearchExplainOut,
+    SearchSort,
+    SeriesEpisodeOut,
+    SeriesEpisodesOut,
+    SeriesGroupOut,
+    SuggestionOut,
+    SuggestOut,
+)
+from kryten_playlist.storage.catalog_repo import SearchFilters
+from kryten_playlist.web.deps import (
+    Session,
+    get_catalog_repo,
+    get_catalog_suggest,
+    get_config,
+    may_see_uncategorized,
+    require_admin,
+    require_session,
 )
-from kryten_playlist.storage.catalog_repo import CatalogRepository
-from kryten_playlist.web.deps import Session, get_config, get_sqlite, require_session
 
 router = APIRouter()
 
@@ -24,8 +44,7 @@ async def get_pending_count(
     """Get count of items waiting for enrichment."""
     # Only admins or blessed users typically care, but we'll allow anyone to see the count
     # if it's just for a UI indicator.
-    conn = get_sqlite(request)
-    repo = CatalogRepository(conn)
+    repo = get_catalog_repo(request)
     count = await repo.get_pending_count()
     return PendingCountOut(count=count)
 
@@ -43,8 +62,16 @@ async def search(
     genre: Optional[str] = None,
     mood: Optional[str] = None,
     era: Optional[str] = None,
+    min_duration: Optional[int] = Query(default=None, ge=0, description="Seconds, inclusive"),
+    max_duration: Optional[int] = Query(default=None, ge=0, description="Seconds, inclusive"),
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    sort: Optional[SearchSort] = None,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
+    fuzzy: bool = False,
+    group_by: Optional[Literal["series"]] = None,
     session: Optional[Session] = Depends(require_session),
 ) -> CatalogSearchOut:
     if limit < 1:
@@ -54,33 +81,80 @@ async def search(
     if offset < 0:
         offset = 0
 
-    conn = get_sqlite(request)
-    repo = CatalogRepository(conn)
+    repo = get_catalog_repo(request)
     config = get_config(request)
 
-    # Determine access level
-    include_uncategorized = False
-    if session:
-        if session.role == "admin":
-            include_uncategorized = True
-        elif session.username in config.blessed_users:
-            include_uncategorized = True
+    include_uncategorized = may_see_uncategorized(session, config)
 
-    res = await repo.search(
-        q=q,
-        categories=category,
-        limit=limit,
-        offset=offset,
-        series=series,
-        title=title,
-        theme=theme,
-        actor=actor,
-        director=director,
-        genre=genre,
-        mood=mood,
-        era=era,
-        include_uncategorized=include_uncategorized,
-    )
+    if group_by == "series":
+        if cursor:
+            raise HTTPException(status_code=400, detail="cursor is not supported with group_by")
+        if sort not in (None, "relevance"):
+            raise HTTPException(status_code=400, detail="sort is not supported with group_by")
+        try:
+            grouped = await repo.search_series(
+                SearchFilters(
+                    q=q,
+                    categories=tuple(category),
+                    series=series,
+                    title=title,
+                    theme=theme,
+                    actor=actor,
+                    director=director,
+                    genre=genre,
+                    mood=mood,
+                    era=era,
+                    min_duration=min_duration,
+                    max_duration=max_duration,
+                    year_from=year_from,
+                    year_to=year_to,
+                    include_uncategorized=include_uncategorized,
+                ),
+                limit=limit,
+                offset=offset,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return CatalogSearchOut(
+            snapshot_id=grouped.snapshot_id,
+            items=[],
+            total=grouped.total,
+            groups=[SeriesGroupOut(**g) for g in grouped.groups],
+        )
+
+    async def run(fuzzy: bool):
+        return await repo.search(
+            q=q,
+            categories=category,
+            limit=limit,
+            offset=offset,
+            series=series,
+            title=title,
+            theme=theme,
+            actor=actor,
+            director=director,
+            genre=genre,
+            mood=mood,
+            era=era,
+            min_duration=min_duration,
+            max_duration=max_duration,
+            year_from=year_from,
+            year_to=year_to,
+            sort=sort,
+            include_uncategorized=include_uncategorized,
+            cursor=cursor,
+            fuzzy=fuzzy,
+        )
+
+    try:
+        used_fuzzy = fuzzy and bool(q)
+        res = await run(used_fuzzy)
+        # Nothing matched exactly: retry the first page as a typo-tolerant search
+        if not used_fuzzy and q and res.total == 0 and offset == 0 and not cursor:
+            res = await run(True)
+            used_fuzzy = True
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     items: list[CatalogItemOut] = []
     for raw in res.items:
@@ -98,16 +172,213 @@ async def search(
             )
         )
 
-    return CatalogSearchOut(snapshot_id=res.snapshot_id, items=items, total=res.total)
+    return CatalogSearchOut(
+        snapshot_id=res.snapshot_id,
+        items=items,
+        total=res.total,
+        next_cursor=res.next_cursor,
+        fuzzy=used_fuzzy,
+    )
+
 
-    return CatalogSearchOut(snapshot_id=res.snapshot_id, items=items, total=res.total)
+@router.get("/search/explain", response_model=SearchExplainOut)
+async def explain_search(
+    request: Request,
+    q: Optional[str] = None,
+    category: list[str] = Query(default=[]),
+    series: Optional[str] = None,
+    title: Optional[str] = None,
+    theme: Optional[str] = None,
+    actor: Optional[str] = None,
+    director: Optional[str] = None,
+    genre: Optional[str] = None,
+    mood: Optional[str] = None,
+    era: Optional[str] = None,
+    min_duration: Optional[int] = Query(default=None, ge=0),
+    max_duration: Optional[int] = Query(default=None, ge=0),
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    sort: Optional[SearchSort] = None,
+    limit: int = 50,
+    session: Session = Depends(require_admin),
+) -> SearchExplainOut:
+    """Show the SQL, per-term index choices and SQLite plan for a search."""
+    repo = get_catalog_repo(request)
+    filters = SearchFilters(
+        q=q,
+        categories=tuple(category),
+        series=series,
+        title=title,
+        theme=theme,
+        actor=actor,
+        director=director,
+        genre=genre,
+        mood=mood,
+        era=era,
+        min_duration=min_duration,
+        max_duration=max_duration,
+        year_from=year_from,
+        year_to=year_to,
+        include_uncategorized=may_see_uncategorized(session, get_config(request)),
+    )
+    try:
+        found = await repo.explain_search(filters, limit=max(1, min(limit, 200)), sort=sort)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return SearchExplainOut(
+        query=found.query,
+        plan=found.plan,
+        sql=found.sql,
+        params=found.params,
+        sqlite_plan=found.sqlite_plan,
+        plan_cached=found.plan_cached,
+    )
+
+
+@router.get("/series/{title_base:path}/episodes", response_model=SeriesEpisodesOut)
+async def series_episodes(
+    request: Request,
+    title_base: str,
+    session: Optional[Session] = Depends(require_session),
+) -> SeriesEpisodesOut:
+    """Expand one group of a group_by=series search."""
+    repo = get_catalog_repo(request)
+    rows = await repo.get_series_episodes(
+        title_base,
+        include_uncategorized=may_see_uncategorized(session, get_config(request)),
+    )
+    if not rows:
+        raise HTTPException(status_code=404, detail="Series not found")
+    return SeriesEpisodesOut(title_base=title_base, items=[SeriesEpisodeOut(**raw) for raw in rows])
+
+
+@router.get("/suggest", response_model=SuggestOut)
+async def suggest(
+    request: Request,
+    q: str = "",
+    limit: int = 10,
+    session: Optional[Session] = Depends(require_session),
+) -> SuggestOut:
+    """Titles and series names starting with ``q``, most played first."""
+    limit = max(1, min(limit, 50))
+    include_uncategorized = may_see_uncategorized(session, get_config(request))
+
+    manager = get_catalog_suggest(request)
+    index = manager.current if manager is not None else None
+    if index is not None:
+        found = index.suggest(q, limit=limit, include_uncategorized=include_uncategorized)
+        return SuggestOut(
+            items=[
+                SuggestionOut(kind=s.kind, text=s.text, video_id=s.video_id, plays=s.plays)
+                for s in found
+            ]
+        )
+
+    # Index disabled or still building: plain title search
+    if not q.strip():
+        return SuggestOut(items=[])
+    repo = get_catalog_repo(request)
+    try:
+        res = await repo.search(
+            q=q,
+            categories=[],
+            limit=limit,
+            offset=0,
+            include_uncategorized=include_uncategorized,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return SuggestOut(
+        items=[
+            SuggestionOut(kind="title", text=str(raw.get("title") or ""), video_id=raw.get("video_id"))
+            for raw in res.items
+        ]
+    )
+
+
+@router.get("/facets", response_model=CatalogFacetsOut)
+async def facets(
+    request: Request,
+    q: Optional[str] = None,
+    category: list[str] = Query(default=[]),
+    series: Optional[str] = None,
+    title: Optional[str] = None,
+    theme: Optional[str] = None,
+    actor: Optional[str] = None,
+    director: Optional[str] = None,
+    genre: Optional[str] = None,
+    mood: Optional[str] = None,
+    era: Optional[str] = None,
+    min_duration: Optional[int] = Query(default=None, ge=0, description="Seconds, inclusive"),
+    max_duration: Optional[int] = Query(default=None, ge=0, description="Seconds, inclusive"),
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    session: Optional[Session] = Depends(require_session),
+) -> CatalogFacetsOut:
+    """Item counts per genre, mood, era and category under the given filter."""
+    repo = get_catalog_repo(request)
+    config = get_config(request)
+
+    try:
+        counts = await repo.facet_counts(
+            SearchFilters(
+                q=q,
+                categories=tuple(category),
+                series=series,
+                title=title,
+                theme=theme,
+                actor=actor,
+                director=director,
+                genre=genre,
+                mood=mood,
+                era=era,
+                min_duration=min_duration,
+                max_duration=max_duration,
+                year_from=year_from,
+                year_to=year_to,
+                include_uncategorized=may_see_uncategorized(session, config),
+            )
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return CatalogFacetsOut(
+        **{
+            facet: [FacetValueOut(value=v, count=c) for v, c in values]
+            for facet, values in counts.items()
+        }
+    )
 
 
 @router.get("/categories", response_model=CategoriesOut)
 async def categories(
     request: Request,
 ) -> CategoriesOut:
-    conn = get_sqlite(request)
-    repo = CatalogRepository(conn)
+    repo = get_catalog_repo(request)
     cats = await repo.get_categories()
     return CategoriesOut(categories=cats)
+
+
+@router.get("/filmography", response_model=FilmographyOut)
+async def filmography(
+    request: Request,
+    name: str,
+    role: Optional[PersonRole] = None,
+    session: Optional[Session] = Depends(require_session),
+) -> FilmographyOut:
+    """Every catalog item crediting one actor or director."""
+    repo = get_catalog_repo(request)
+    config = get_config(request)
+
+    found = await repo.get_filmography(
+        name,
+        role=role,
+        include_uncategorized=may_see_uncategorized(session, config),
+    )
+    if found is None:
+        raise HTTPException(status_code=404, detail="Person not found")
+
+    person, rows = found
+    return FilmographyOut(
+        name=person,
+        items=[FilmographyItemOut(**raw) for raw in rows],
+    )
@@ -0,0 +1,116 @@
+"""Duration fitting API routes."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel, Field
+
+from kryten_playlist.fit_apply import MAX_FIT_ITEMS, MAX_FIT_SECONDS, FitRequest, run_fit
+from kryten_playlist.web.deps import (
+    Session,
+    get_catalog_index,
+    get_catalog_reader,
+    get_client,
+    get_config,
+    get_fit_pools,
+    get_kv,
+    get_service,
+    may_see_uncategorized,
+    require_admin,
+    require_blessed,
+    require_session,
+)
+
+router = APIRouter()
+
+
+class FitIn(BaseModel):
+    target_seconds: Optional[int] = Field(None, gt=0, le=MAX_FIT_SECONDS)
+    end_time: Optional[datetime] = None
+    start_time: Optional[datetime] = None
+    filter_tv: Optional[bool] = None
+    filter_tags: Optional[list[str]] = None
+    filter_categories: Optional[list[str]] = None
+    filter_era: Optional[str] = None
+    filter_genre: Optional[str] = None
+    exclude_weekend_only: bool = False
+    max_items: int = Field(100, ge=1, le=MAX_FIT_ITEMS)
+    order_by: Literal["random", "duration_asc", "duration_desc", "title"] = "random"
+    seed: Optional[int] = None
+    tolerance: int = Field(0, ge=0)
+    action: Literal["preview", "save", "queue"] = "preview"
+    name: str = Field("", max_length=200)
+    mode: Literal["preserve_current", "append", "hard_replace", "insert_next"] = "append"
+
+
+class FitItemOut(BaseModel):
+    video_id: str
+    title: Optional[str] = None
+    duration_seconds: int
+
+
+class FitOut(BaseModel):
+    status: Literal["ok", "error"]
+    action: str
+    items: list[FitItemOut]
+    total_duration: int
+    target_duration: int
+    slack: int
+    utilization: float
+    optimality_gap: int
+    solve_ms: float
+    playlist_id: Optional[str] = None
+    enqueued_count: int = 0
+    failed: list[dict] = Field(default_factory=list)
+
+
+@router.post("", response_model=FitOut)
+async def fit_endpoint(
+    payload: FitIn,
+    request: Request,
+    session: Session = Depends(require_session),
+    sqlite_conn=Depends(get_catalog_reader),
+    catalog_index=Depends(get_catalog_index),
+    pool_cache=Depends(get_fit_pools),
+) -> FitOut:
+    """Fit a lineup to a duration or end time; preview it, save it or queue it."""
+    fit_request = FitRequest(**payload.model_dump())
+    try:
+        fit_request.validate()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    kv = client = None
+    channel = ""
+    if fit_request.action != "preview":
+        require_blessed(session)
+    if fit_request.action == "save":
+        kv = get_kv(request)
+    elif fit_request.action == "queue":
+        if fit_request.mode == "hard_replace":
+            require_admin(session)
+        client = get_client(request)
+        channel = get_service(request).resolved_channel
+        if not channel:
+            raise HTTPException(status_code=503, detail="No resolved channel")
+
+    result = await run_fit(
+        fit_request,
+        sqlite_conn=sqlite_conn,
+        catalog_index=catalog_index,
+        pool_cache=pool_cache,
+        kv=kv,
+        client=client,
+        channel=channel,
+        owner=session.username,
+        include_uncategorized=may_see_uncategorized(session, get_config(request)),
+    )
+    if result.status != "ok":
+        if result.error == "playlist_name_taken":
+            raise HTTPException(status_code=409, detail="You already have a playlist with this name")
+        raise HTTPException(status_code=400, detail=result.error or "Fit failed")
+
+    return FitOut(**result.as_dict())
@@ -19,7 +19,13 @@ from kryten_playlist.domain.schemas import (
 )
 from kryten_playlist.nats.kv import BUCKET_PLAYLISTS
 from kryten_playlist.storage.catalog_repo import CatalogRepository
-from kryten_playlist.web.deps import Session, get_kv, get_sqlite, require_blessed, require_session
+from kryten_playlist.web.deps import (
+    Session,
+    get_catalog_repo,
+    get_kv,
+    require_blessed,
+    require_session,
+)
 
 router = APIRouter()
 
@@ -100,19 +106,22 @@ async def list_playlists(
     return PlaylistIndexOut(playlists=refs, total=len(refs))
 
 
-@router.post("", response_model=PlaylistCreateOut)
-async def create_playlist(
-    payload: PlaylistCreateIn,
-    session: Session = Depends(require_session),
-    kv=Depends(get_kv),
-) -> PlaylistCreateOut:
-    """Create a new playlist with visibility setting."""
-    require_blessed(session)
+async def insert_playlist(
+    kv: Any,
+    *,
+    owner: str,
+    name: str,
+    video_ids: list[str],
+    visibility: Visibility = "private",
+) -> str:
+    """Write a new playlist and its index entry; returns the playlist id.
 
-    name = payload.name.strip()
-    if not name:
-        raise HTTPException(status_code=400, detail="Playlist name is required")
+    Shared by the create endpoint and callers without an HTTP session
+    (fitted lineups saved over NATS).
 
+    Raises:
+        ValueError: If ``owner`` already has a playlist named ``name``.
+    """
     now = utcnow()
     created_at = isoformat(now)
 
@@ -127,19 +136,19 @@ async def create_playlist(
         if not isinstance(meta, dict):
             continue
         meta_owner = meta.get("owner") or meta.get("created_by", "")
-        if meta_owner == session.username and str(meta.get("name") or "").strip() == name:
-            raise HTTPException(status_code=409, detail="You already have a playlist with this name")
+        if meta_owner == owner and str(meta.get("name") or "").strip() == name:
+            raise ValueError("playlist_name_taken")
 
     playlist_id = secrets.token_urlsafe(12)
 
     playlist_doc = {
         "playlist_id": playlist_id,
         "name": name,
-        "visibility": payload.visibility,
-        "owner": session.username,
-        "items": [{"video_id": it.video_id} for it in payload.items],
+        "visibility": visibility,
+        "owner": owner,
+        "items": [{"video_id": vid} for vid in video_ids],
         "forked_from": None,
-        "created_by": session.username,
+        "created_by": owner,
         "created_at": created_at,
         "updated_at": created_at,
         "schema_version": CURRENT_SCHEMA_VERSION,
@@ -147,12 +156,12 @@ async def create_playlist(
 
     playlists[playlist_id] = {
         "name": name,
-        "visibility": payload.visibility,
-        "owner": session.username,
-        "created_by": session.username,
+        "visibility": visibility,
+        "owner": owner,
+        "created_by": owner,
         "created_at": created_at,
         "updated_at": created_at,
-        "item_count": len(payload.items),
+        "item_count": len(video_ids),
         "forked_from_owner": None,
     }
     index["playlists"] = playlists
@@ -160,6 +169,32 @@ async def create_playlist(
 
     await kv.put_json(BUCKET_PLAYLISTS, f"playlists/{playlist_id}", playlist_doc)
     await kv.put_json(BUCKET_PLAYLISTS, "playlists/index", index)
+    return playlist_id
+
+
+@router.post("", response_model=PlaylistCreateOut)
+async def create_playlist(
+    payload: PlaylistCreateIn,
+    session: Session = Depends(require_session),
+    kv=Depends(get_kv),
+) -> PlaylistCreateOut:
+    """Create a new playlist with visibility setting."""
+    require_blessed(session)
+
+    name = payload.name.strip()
+    if not name:
+        raise HTTPException(status_code=400, detail="Playlist name is required")
+
+    try:
+        playlist_id = await insert_playlist(
+            kv,
+            owner=session.username,
+            name=name,
+            video_ids=[it.video_id for it in payload.items],
+            visibility=payload.visibility,
+        )
+    except ValueError:
+        raise HTTPException(status_code=409, detail="You already have a playlist with this name")
 
     return PlaylistCreateOut(playlist_id=playlist_id)
 
@@ -169,7 +204,7 @@ async def get_playlist(
     playlist_id: str,
     session: Session = Depends(require_session),
     kv=Depends(get_kv),
-    sqlite_conn=Depends(get_sqlite),
+    catalog_repo: CatalogRepository = Depends(get_catalog_repo),
 ) -> PlaylistDetailOut:
     """Get a playlist by ID with visibility enforcement."""
     doc = await kv.get_json(BUCKET_PLAYLISTS, f"playlists/{playlist_id}")
@@ -206,7 +241,6 @@ async def get_playlist(
 
     # Parse items and enrich with catalog metadata
     items = []
-    catalog_repo = CatalogRepository(sqlite_conn)
 
     # Get all video IDs from items
     video_ids = []
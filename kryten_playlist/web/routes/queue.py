@@ -20,10 +20,12 @@ from kryten_playlist.queue_apply import apply_playlist_to_queue
 from kryten_playlist.storage.catalog_repo import CatalogRepository
 from kryten_playlist.web.deps import (
     Session,
+    get_catalog_index,
+    get_catalog_reader,
+    get_catalog_repo,
     get_client,
     get_kv,
     get_service,
-    get_sqlite,
     require_admin,
     require_blessed,
     require_session,
@@ -109,7 +111,8 @@ async def apply_to_queue(
     client=Depends(get_client),
     service=Depends(get_service),
     kv=Depends(get_kv),
-    sqlite_conn=Depends(get_sqlite),
+    sqlite_conn=Depends(get_catalog_reader),
+    catalog_index=Depends(get_catalog_index),
 ) -> QueueApplyOut:
     require_blessed(session)
     if payload.mode == "hard_replace":
@@ -119,6 +122,7 @@ async def apply_to_queue(
         client=client,
         kv=kv,
         sqlite_conn=sqlite_conn,
+        catalog_index=catalog_index,
         channel=service.resolved_channel,
         playlist_id=payload.playlist_id,
         mode=payload.mode,
@@ -142,14 +146,13 @@ async def add_to_queue(
     session: Session = Depends(require_blessed),
     client=Depends(get_client),
     service=Depends(get_service),
-    sqlite=Depends(get_sqlite),
+    repo: CatalogRepository = Depends(get_catalog_repo),
 ) -> QueueAddOut:
     """Add a single item to the queue."""
     channel = service.resolved_channel
     if not channel:
         raise HTTPException(status_code=503, detail="No resolved channel")
 
-    repo = CatalogRepository(sqlite)
     try:
         item = await repo.get_item(payload.video_id)
     except Exception as e:
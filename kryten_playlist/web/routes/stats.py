@@ -8,15 +8,25 @@ from typing import Any
 from fastapi import APIRouter, Depends, Request
 
 from kryten_playlist.domain.schemas import (
+    CatalogIndexStatsOut,
     CurrentVideoOut,
+    DbPoolStatsOut,
     LikeCurrentOut,
+    SearchCacheStatsOut,
     StatsItemOut,
     TopLikedOut,
     TopPlayedOut,
 )
 from kryten_playlist.nats.kv import BUCKET_ANALYTICS, BUCKET_LIKES, KvJson
 from kryten_playlist.storage.catalog_repo import CatalogRepository
-from kryten_playlist.web.deps import Session, get_kv, get_sqlite, require_session
+from kryten_playlist.web.deps import (
+    Session,
+    get_catalog_index,
+    get_catalog_repo,
+    get_kv,
+    require_admin,
+    require_session,
+)
 
 router = APIRouter()
 
@@ -160,7 +170,7 @@ async def top_played(
     limit: int = 10,
     session: Session = Depends(require_session),
     kv: KvJson = Depends(get_kv),
-    sqlite_conn=Depends(get_sqlite),
+    repo: CatalogRepository = Depends(get_catalog_repo),
 ) -> TopPlayedOut:
     """Get top played videos."""
     if limit < 1:
@@ -177,7 +187,6 @@ async def top_played(
     video_ids = [vid for vid, _ in sorted_items]
 
     # Fetch titles from catalog
-    repo = CatalogRepository(sqlite_conn)
     catalog_items = await repo.get_items_by_video_ids(video_ids)
 
     items: list[StatsItemOut] = []
@@ -199,7 +208,7 @@ async def top_liked(
     limit: int = 10,
     session: Session = Depends(require_session),
     kv: KvJson = Depends(get_kv),
-    sqlite_conn=Depends(get_sqlite),
+    repo: CatalogRepository = Depends(get_catalog_repo),
 ) -> TopLikedOut:
     """Get top liked videos."""
     if limit < 1:
@@ -216,7 +225,6 @@ async def top_liked(
     video_ids = [vid for vid, _ in sorted_items]
 
     # Fetch titles from catalog
-    repo = CatalogRepository(sqlite_conn)
     catalog_items = await repo.get_items_by_video_ids(video_ids)
 
     items: list[StatsItemOut] = []
@@ -232,11 +240,56 @@ async def top_liked(
     return TopLikedOut(items=items)
 
 
+@router.get("/db-pool", response_model=DbPoolStatsOut)
+async def db_pool_stats(
+    request: Request,
+    session: Session = Depends(require_admin),
+) -> DbPoolStatsOut:
+    """Get SQLite read pool metrics (wait time for a connection, query hold time)."""
+    pool = getattr(request.app.state, "sqlite_read_pool", None)
+    if pool is None:
+        return DbPoolStatsOut(enabled=False)
+    return DbPoolStatsOut(enabled=True, **pool.stats())
+
+
+@router.get("/search-cache", response_model=SearchCacheStatsOut)
+async def search_cache_stats(
+    request: Request,
+    session: Session = Depends(require_admin),
+) -> SearchCacheStatsOut:
+    """Get catalog search result cache hit/miss counters."""
+    cache = getattr(request.app.state, "catalog_results", None)
+    if cache is None:
+        return SearchCacheStatsOut(enabled=False)
+    return SearchCacheStatsOut(enabled=True, **cache.stats())
+
+
+@router.get("/catalog-index", response_model=CatalogIndexStatsOut)
+async def catalog_index_stats(
+    session: Session = Depends(require_admin),
+    manager=Depends(get_catalog_index),
+) -> CatalogIndexStatsOut:
+    """Get in-memory catalog index size and version."""
+    if manager is None:
+        return CatalogIndexStatsOut(enabled=False)
+    return CatalogIndexStatsOut(**manager.stats())
+
+
 # ---------------------------------------------------------------------------
 # Internal helpers for service.py to call
 # ---------------------------------------------------------------------------
 
 
+async def get_play_counts(kv: KvJson) -> dict[str, int]:
+    """Play counts by video id."""
+    return await _get_play_counts(kv)
+
+
+async def get_like_counts(kv: KvJson) -> dict[str, int]:
+    """Like counts by video id."""
+    return await _get_like_counts(kv)
+
+
 async def increment_play_count(kv: KvJson, video_id: str) -> int:
     """Increment play count for a video. Returns new count."""
     counts = await _get_play_counts(kv)
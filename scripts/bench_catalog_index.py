@@ -0,0 +1,114 @@
+"""Compare catalog lookups through SQLite with the in-memory catalog index.
+
+Builds a throwaway enhanced-schema catalog of synthetic items and times the
+hot paths both ways:
+
+    python scripts/bench_catalog_index.py --items 50000 --batch 50 --rounds 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from kryten_playlist.catalog.enhanced_schema import init_enhanced_schema
+from kryten_playlist.storage.catalog_index import CatalogIndexManager
+from kryten_playlist.storage.catalog_meta import mark_catalog_changed
+from kryten_playlist.storage.catalog_repo import CatalogRepository
+from kryten_playlist.storage.facets import GENRE_VOCABULARY, init_facet_tables
+from kryten_playlist.storage.sqlite import ReadPool, SqliteConfig, SqliteDb
+
+GENRES = list(GENRE_VOCABULARY)
+
+
+async def _populate(conn, n: int, rng: random.Random) -> None:
+    await init_enhanced_schema(conn)
+    await init_facet_tables(conn)
+    cursor = await conn.execute("SELECT id, name FROM catalog_genre")
+    genre_ids = {name: gid for gid, name in await cursor.fetchall()}
+    rows = []
+    for i in range(n):
+        title = f"Synthetic Feature {i}"
+        genre = rng.choice(GENRES)
+        rows.append(
+            (
+                f"vid{i:07d}", title, title, title, "bench", "Movies", "2025-01-01",
+                rng.randint(600, 10800), rng.randint(1920, 2024), genre, genre_ids[genre],
+                f"A synthetic synopsis for item {i}.", f"https://example.invalid/{i}.jpg",
+            )
+        )
+    await conn.executemany(
+        "INSERT INTO catalog_item (video_id, raw_title, sanitized_title, title_base, snapshot_id, "
+        "mediacms_category, llm_enriched_at, duration_seconds, year, genre, genre_id, synopsis, "
+        "thumbnail_url) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    await mark_catalog_changed(conn, snapshot_id="bench")
+    await conn.commit()
+
+
+async def _time(label: str, rounds: int, fn) -> float:
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    p50 = statistics.median(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"  {label:<28} p50 {p50:8.3f} ms   p95 {p95:8.3f} ms")
+    return p50
+
+
+async def main(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SqliteDb(SqliteConfig(path=Path(tmp) / "bench.sqlite3"))
+        writer = await db.connect()
+        await _populate(writer, args.items, rng)
+
+        pool = ReadPool(db, size=2)
+        await pool.open()
+        manager = CatalogIndexManager(pool, memory_budget_mb=args.memory_mb)
+        started = time.perf_counter()
+        await manager.refresh()
+        load_ms = (time.perf_counter() - started) * 1000
+        index = manager.current
+        if index is None:
+            print("Index did not fit the memory budget")
+            return
+        print(
+            f"{args.items} items, index load {load_ms:.0f} ms, "
+            f"~{index.memory_bytes / 1024 / 1024:.1f} MiB"
+        )
+
+        sqlite_repo = CatalogRepository(pool)
+        index_repo = CatalogRepository(pool, index=manager)
+        batches = [
+            [f"vid{rng.randrange(args.items):07d}" for _ in range(args.batch)]
+            for _ in range(args.rounds)
+        ]
+        it_sqlite, it_index = iter(batches), iter(batches)
+
+        print(f"get_items_by_video_ids ({args.batch} ids)")
+        a = await _time("sqlite", args.rounds, lambda: sqlite_repo.get_items_by_video_ids(next(it_sqlite)))
+        b = await _time("index", args.rounds, lambda: index_repo.get_items_by_video_ids(next(it_index)))
+        print(f"  speedup {a / b:.1f}x")
+
+        await pool.close()
+        await writer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=50000)
+    parser.add_argument("--batch", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--memory-mb", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,40 @@
+"""Shared catalog fixtures for the storage and search tests."""
+
+from __future__ import annotations
+
+import aiosqlite
+import pytest_asyncio
+
+from kryten_playlist.catalog.enhanced_schema import init_enhanced_schema
+from kryten_playlist.storage.facets import set_item_facets
+from kryten_playlist.storage.people import set_item_people
+
+
+async def insert_item(conn: aiosqlite.Connection, video_id: str, title: str, **fields) -> None:
+    """Insert a listed, enriched catalog item; ``fields`` override or add columns."""
+    row = {
+        "video_id": video_id,
+        "raw_title": title,
+        "sanitized_title": title,
+        "title_base": title,
+        "snapshot_id": "snap1",
+        "mediacms_category": "Movies",
+        "llm_enriched_at": "2025-01-01T00:00:00+00:00",
+        **fields,
+    }
+    cols = ", ".join(row)
+    placeholders = ", ".join("?" * len(row))
+    await conn.execute(f"INSERT INTO catalog_item ({cols}) VALUES ({placeholders})", list(row.values()))
+    # Mirror enrich_item, which normalizes facets and indexes people
+    await set_item_facets(conn, video_id, genre=row.get("genre"), mood=row.get("mood"), era=row.get("era"))
+    await set_item_people(conn, video_id, cast=row.get("cast_list"), director=row.get("director"))
+
+
+@pytest_asyncio.fixture
+async def catalog_db():
+    """An empty in-memory catalog on the enhanced schema."""
+    conn = await aiosqlite.connect(":memory:")
+    conn.row_factory = aiosqlite.Row
+    await init_enhanced_schema(conn)
+    yield conn
+    await conn.close()
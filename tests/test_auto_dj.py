@@ -0,0 +1,200 @@
+"""Tests for the auto-DJ queue top-up."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import aiosqlite
+import pytest
+import pytest_asyncio
+from kryten.mock import MockKrytenClient
+
+from kryten_playlist import auto_dj
+from kryten_playlist.auto_dj import AutoDj, QueueRuntime, read_queue_runtime
+from kryten_playlist.catalog.enhanced_schema import init_enhanced_schema
+from kryten_playlist.catalog.models import generate_manifest_url
+from kryten_playlist.queue_apply import QueueApplyResult
+from kryten_playlist.storage.catalog_meta import mark_catalog_changed
+from kryten_playlist.storage.facets import set_item_facets
+
+# A Monday morning and a Saturday evening
+WEEKDAY_MORNING = datetime(2025, 3, 3, 9, tzinfo=timezone.utc)
+SATURDAY_NIGHT = datetime(2025, 3, 8, 20, tzinfo=timezone.utc)
+BUCKET = "kryten_lounge_playlist"
+
+
+@pytest_asyncio.fixture
+async def db():
+    conn = await aiosqlite.connect(":memory:")
+    conn.row_factory = aiosqlite.Row
+    await init_enhanced_schema(conn)
+    items = [(f"h{n}", "Horror", 0, 0, 0) for n in range(4)]
+    items += [(f"c{n}", "Comedy", 0, 0, 0) for n in range(4)]
+    items += [(f"p{n}", None, 0, 0, 0) for n in range(4)]
+    items += [("weekend", None, 1, 0, 0), ("prime", None, 0, 1, 0), ("xmas", None, 0, 0, 1)]
+    for vid, genre, weekend, prime, holiday in items:
+        await conn.execute(
+            "INSERT INTO catalog_item (video_id, raw_title, sanitized_title, title_base, "
+            "duration_seconds, weekend_only, prime_time_only, holiday_content, mediacms_category) "
+            "VALUES (?, ?, ?, ?, 1800, ?, ?, ?, 'Movies')",
+            (vid, vid, vid, vid, weekend, prime, holiday),
+        )
+        if genre:
+            await set_item_facets(conn, vid, genre=genre)
+    await conn.commit()
+    yield conn
+    await conn.close()
+
+
+def _mk_client() -> MockKrytenClient:
+    return MockKrytenClient(
+        {
+            "nats": {"servers": ["nats://example:4222"]},
+            "channels": [{"domain": "example.com", "channel": "lounge"}],
+            "service": {"name": "test", "version": "0.0.0"},
+        }
+    )
+
+
+def _queue_item(uid: int, video_id: str, seconds: int) -> dict:
+    media = {"id": generate_manifest_url(video_id), "seconds": seconds, "type": "cm"}
+    return {"uid": uid, "media": media}
+
+
+def _dj(db, client, *, clock=WEEKDAY_MORNING, **kwargs) -> AutoDj:
+    options = {"min_runtime_seconds": 1800, "fill_seconds": 3600, "seed": 1, **kwargs}
+    return AutoDj(db, client=client, channel=lambda: "lounge", clock=lambda: clock, **options)
+
+
+def _queued(client) -> list[str]:
+    return [
+        c["data"]["id"].rsplit("/", 1)[-1].split(".")[0]
+        for c in client.get_published_commands()
+        if c["action"] == "addvideo"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_read_queue_runtime():
+    client = _mk_client()
+    items = [_queue_item(1, "p0", 1800), _queue_item(2, "p1", 1200), _queue_item(3, "p2", 600)]
+    await client.kv_put(BUCKET, "items", items)
+    await client.kv_put(BUCKET, "current", {"uid": 2, "currentTime": 200})
+
+    runtime = await read_queue_runtime(client, "lounge")
+    assert runtime.count == 2
+    assert runtime.remaining_seconds == 1000 + 600
+    assert runtime.video_ids == {"p0", "p1", "p2"}
+
+    empty = await read_queue_runtime(client, "other")
+    assert (empty.count, empty.remaining_seconds) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_tops_up_a_low_queue_once(db):
+    client = _mk_client()
+    await client.kv_put(BUCKET, "items", [_queue_item(1, "p0", 1500)])
+    await client.kv_put(BUCKET, "current", {"uid": 1, "currentTime": 0})
+    dj = _dj(db, client)
+
+    assert await dj.tick() == 2
+    picked = _queued(client)
+    assert len(picked) == 2
+    # Not what is already queued, and only what a weekday morning allows
+    assert not set(picked) & {"p0", "weekend", "prime", "xmas"}
+
+    # The robot has not caught up yet: the pending items count as queued
+    assert await dj.tick() == 0
+
+    # Once enough is queued nothing more is added
+    items = [_queue_item(1, "p0", 1500)]
+    items += [_queue_item(2 + n, vid, 1800) for n, vid in enumerate(picked)]
+    await client.kv_put(BUCKET, "items", items)
+    client.clear_published_commands()
+    assert await dj.tick() == 0
+    assert client.get_published_commands() == []
+
+
+@pytest.mark.asyncio
+async def test_only_enqueued_items_are_recorded(db, monkeypatch):
+    client = _mk_client()
+    dj = _dj(db, client, fill_seconds=1800 * 4, max_items=4)
+    await dj.refresh_pool()
+    # Gone from the catalog, but the pool has not reloaded yet
+    await db.execute("DELETE FROM catalog_item WHERE video_id NOT IN ('h0', 'c0', 'p0')")
+    await db.commit()
+
+    enqueued = await dj.tick()
+    picked = _queued(client)
+    assert 0 < enqueued == len(picked) < 4
+    assert set(dj._pending) == set(picked)
+    assert list(dj._recent) == picked
+
+    async def refused(**kwargs):
+        return QueueApplyResult(status="error", error="robot offline")
+
+    monkeypatch.setattr(auto_dj, "apply_video_ids_to_queue", refused)
+    dj._pending.clear()
+    dj._recent.clear()
+    assert await dj.tick() == 0
+    assert dj._pending == {} and list(dj._recent) == []
+
+
+@pytest.mark.asyncio
+async def test_scheduling_flags_follow_the_clock(db):
+    dj = _dj(db, _mk_client(), clock=SATURDAY_NIGHT, fill_seconds=1800 * 14, max_items=20)
+    await dj.refresh_pool()
+    fill = dj.plan_fill(QueueRuntime(0, 0, frozenset()))
+    picked = {it["video_id"] for it in fill.items}
+    assert {"weekend", "prime"} <= picked
+    assert "xmas" not in picked
+
+
+@pytest.mark.asyncio
+async def test_genre_rotation_and_recent_exclusion(db):
+    dj = _dj(db, _mk_client(), genres=["horror", "Comedy", "Western"], recent_limit=6)
+    await dj.refresh_pool()
+    empty = QueueRuntime(0, 0, frozenset())
+
+    fills = []
+    for _ in range(4):
+        fill = dj.plan_fill(empty)
+        fills.append((dj.last_genre, sorted(it["video_id"] for it in fill.items)))
+        for it in fill.items:
+            dj.note_played(it["video_id"])
+
+    # Western has no items, so the rotation skips it
+    assert [genre for genre, _ in fills] == ["Horror", "Comedy", "Horror", "Comedy"]
+    assert all(vid[0] == genre[0].lower() for genre, ids in fills for vid in ids)
+    # Recently played items are not picked again while in the window
+    assert not set(fills[0][1]) & set(fills[2][1])
+    assert not set(fills[1][1]) & set(fills[3][1])
+
+    # The window rolls: the first fill's plays are eligible again
+    fill = dj.plan_fill(empty)
+    assert sorted(it["video_id"] for it in fill.items) == fills[0][1]
+
+
+@pytest.mark.asyncio
+async def test_pool_is_loaded_once_per_catalog_version(db):
+    client = _mk_client()
+    dj = _dj(db, client)
+    statements: list[str] = []
+    await db.set_trace_callback(statements.append)
+    try:
+        for _ in range(3):
+            await dj.refresh_pool()
+        dj.note_played(generate_manifest_url("h0"))
+
+        await db.execute("DELETE FROM catalog_item WHERE video_id = 'h1'")
+        await mark_catalog_changed(db)
+        await db.commit()
+        assert await dj.refresh_pool()
+    finally:
+        await db.set_trace_callback(None)
+    assert len([s for s in statements if "FROM catalog_item WHERE duration_seconds" in s]) == 2
+    assert dj.pool_size == 14
+
+    # Plays recorded before the reload stay excluded
+    fill = dj.plan_fill(QueueRuntime(0, 0, frozenset()))
+    assert "h0" not in {it["video_id"] for it in fill.items}
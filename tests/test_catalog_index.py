@@ -0,0 +1,172 @@
+"""Tests for the in-memory columnar catalog index."""
+
+from __future__ import annotations
+
+import aiosqlite
+import pytest
+import pytest_asyncio
+from conftest import insert_item
+
+from kryten_playlist.catalog.duration_fitting import fit_to_duration
+from kryten_playlist.catalog.synth import SynthOptions, write_synth_catalog
+from kryten_playlist.storage.catalog_index import CatalogIndexManager
+from kryten_playlist.storage.catalog_meta import mark_catalog_changed
+from kryten_playlist.storage.catalog_repo import CatalogRepository
+from kryten_playlist.storage.catalog_subsets import ENRICHED_PREDICATE, VISIBLE_PREDICATE
+
+
+@pytest_asyncio.fixture
+async def db(catalog_db):
+    conn = catalog_db
+
+    await insert_item(
+        conn, "v1", "Night of the Living Dead", genre="Horror", mood="creepy", era="60s",
+        year=1968, synopsis="Strangers hole up in a farmhouse.", duration_seconds=5760,
+        thumbnail_url="https://example.invalid/v1.jpg",
+    )
+    await insert_item(conn, "v2", "Dawn of the Dead", genre="Horror", year=1978, duration_seconds=7620)
+    await insert_item(conn, "v3", "Kolchak S01E01", genre="Mystery", is_tv=1, duration_seconds=3000)
+    await insert_item(conn, "v4", "Dead Alive", genre="Comedy", llm_enriched_at=None)
+    await insert_item(conn, "v5", "Deadly Friend", mediacms_category=None, duration_seconds=5500)
+    await insert_item(conn, "v6", "Uncategorized Thing", mediacms_category="Uncategorized", genre="Horror")
+    await mark_catalog_changed(conn, snapshot_id="snap1")
+    await conn.commit()
+
+    yield conn
+
+
+@pytest.mark.asyncio
+async def test_index_lookups_match_sqlite(db):
+    manager = CatalogIndexManager(db)
+    assert await manager.refresh() is True
+    index = manager.current
+    assert index is not None and len(index) == 6
+
+    ids = ["v3", "v1", "v5", "missing", "v6", "v4", "v2"]
+    expected = await CatalogRepository(db).get_items_by_video_ids(ids)
+    assert index.get_items(ids) == expected
+    # v5 has no mediacms_category and is omitted, like the SQLite path
+    assert "v5" not in expected
+    assert index.get_item("v1") == await CatalogRepository(db).get_item("v1")
+    assert index.get_item("v5") is None
+
+
+@pytest.mark.asyncio
+async def test_manager_swaps_on_snapshot_change(db):
+    manager = CatalogIndexManager(db, min_reload_seconds=3600)
+    await manager.refresh()
+    first = manager.current
+
+    assert await manager.refresh() is False
+    assert manager.current is first
+
+    # Generation-only bumps are coalesced within min_reload_seconds
+    await db.execute("UPDATE catalog_item SET duration_seconds = 1 WHERE video_id = 'v1'")
+    await mark_catalog_changed(db)
+    await db.commit()
+    assert await manager.refresh() is False
+    assert manager.current is first
+
+    # A new snapshot always reloads
+    await insert_item(db, "v7", "Day of the Dead", snapshot_id="snap2")
+    await mark_catalog_changed(db, snapshot_id="snap2")
+    await db.commit()
+    assert await manager.refresh() is True
+    assert manager.current is not first
+    assert manager.current.version.snapshot_id == "snap2"
+    assert manager.current.get_item("v7")["snapshot_id"] == "snap2"
+    assert manager.current.get_item("v1")["duration_seconds"] == 1
+    # The old snapshot object is untouched
+    assert first.get_item("v7") is None
+
+
+@pytest.mark.asyncio
+async def test_manager_respects_memory_budget(db):
+    manager = CatalogIndexManager(db, memory_budget_mb=1)
+    manager._budget = 1024  # far smaller than six rows
+    assert await manager.refresh() is False
+    assert manager.current is None
+    assert manager.over_budget is True
+    # The same version is not retried on every poll
+    assert await manager.refresh() is False
+
+    stats = manager.stats()
+    assert stats["enabled"] is False and stats["over_budget"] is True
+
+
+@pytest.mark.asyncio
+async def test_repository_serves_lookups_from_index(db):
+    manager = CatalogIndexManager(db)
+    await manager.refresh()
+    repo = CatalogRepository(db, index=manager)
+
+    statements: list[str] = []
+    await db.set_trace_callback(statements.append)
+    try:
+        items = await repo.get_items_by_video_ids(["v1", "v2"])
+        item = await repo.get_item("v3")
+    finally:
+        await db.set_trace_callback(None)
+
+    assert set(items) == {"v1", "v2"}
+    assert item["title"] == "Kolchak S01E01"
+    assert statements == []
+
+
+@pytest.mark.asyncio
+async def test_fit_candidates_match_sqlite():
+    conn = await aiosqlite.connect(":memory:")
+    conn.row_factory = aiosqlite.Row
+    try:
+        await write_synth_catalog(conn, SynthOptions(count=1500, seed=5))
+        await conn.execute("UPDATE catalog_item SET weekend_only = 1 WHERE rowid % 7 = 0")
+        await conn.execute("UPDATE catalog_item SET duration_seconds = NULL WHERE rowid % 11 = 0")
+        await mark_catalog_changed(conn)
+        await conn.commit()
+        manager = CatalogIndexManager(conn)
+        await manager.refresh()
+        index = manager.current
+
+        cases = [
+            ({}, "1"),
+            ({"include_uncategorized": True}, "1"),
+            ({"is_tv": True}, "is_tv = 1"),
+            ({"is_tv": False, "exclude_weekend_only": True}, "is_tv = 0 AND weekend_only = 0"),
+            ({"genre": "horror"}, "genre_id = (SELECT id FROM catalog_genre WHERE name = 'Horror')"),
+            (
+                {"genre": "Horror", "era": "80s"},
+                "genre_id = (SELECT id FROM catalog_genre WHERE name = 'Horror') "
+                "AND era_id = (SELECT id FROM catalog_era WHERE name = '1980s')",
+            ),
+        ]
+        for kwargs, where in cases:
+            # Fits follow search's access rule
+            access = ENRICHED_PREDICATE
+            if not kwargs.get("include_uncategorized"):
+                access += f" AND ({VISIBLE_PREDICATE})"
+            for target in (1500, 3600, 4 * 3600):
+                cursor = await conn.execute(
+                    f"SELECT video_id FROM catalog_item WHERE {where} AND {access} "
+                    "AND duration_seconds > 0 AND duration_seconds <= ?",
+                    (target,),
+                )
+                expected = sorted(r[0] for r in await cursor.fetchall())
+                assert expected or target < 4 * 3600
+                drawn = [c[0] for c in index.fit_candidates(max_duration=target, seed=1, **kwargs)]
+                assert sorted(drawn) == expected, (kwargs, target)
+                assert drawn == [c[0] for c in index.fit_candidates(max_duration=target, seed=1, **kwargs)]
+
+        ordered = list(index.fit_candidates(max_duration=3600, order_by="duration_desc"))
+        assert [d for _, _, d in ordered] == sorted((d for _, _, d in ordered), reverse=True)
+        assert list(index.fit_candidates(max_duration=3600, genre="No Such Genre")) == []
+
+        statements: list[str] = []
+        await conn.set_trace_callback(statements.append)
+        try:
+            result = await fit_to_duration(conn, 4 * 3600, filter_tv=False, seed=3, index=manager)
+        finally:
+            await conn.set_trace_callback(None)
+        assert statements == []
+        assert result.items and result.total_duration <= 4 * 3600
+    finally:
+        await conn.close()
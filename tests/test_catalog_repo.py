@@ -0,0 +1,510 @@
+"""Tests for CatalogRepository search and lookups."""
+
+from __future__ import annotations
+
+import dataclasses
+from types import SimpleNamespace
+
+import httpx
+import pytest
+import pytest_asyncio
+from conftest import insert_item
+
+from kryten_playlist.catalog.enhanced_schema import init_enhanced_schema
+from kryten_playlist.storage.catalog_meta import get_catalog_version, mark_catalog_changed
+from kryten_playlist.storage.catalog_repo import CatalogRepository, SearchFilters
+from kryten_playlist.storage.catalog_schema import get_catalog_schema
+from kryten_playlist.storage.facets import canonical_facet, normalize_facets, set_item_facets
+from kryten_playlist.storage.fts import fts_column_filter, fts_phrase
+from kryten_playlist.storage.people import backfill_people, person_key, surname_key
+from kryten_playlist.storage.search_cache import FacetCountsCache, SearchResultCache, TotalsCache
+from kryten_playlist.web.app import create_app
+
+
+@pytest_asyncio.fixture
+async def db(catalog_db):
+    conn = catalog_db
+
+    await insert_item(
+        conn, "v1", "Night of the Living Dead",
+        cast_list='["Duane Jones", "Judith O\'Dea"]', director="George A. Romero",
+        genre="Horror", synopsis="Strangers hole up in a farmhouse.", duration_seconds=5760,
+    )
+    await insert_item(
+        conn, "v2", "Dawn of the Dead",
+        cast_list='["David Emge", "Ken Foree"]', director="George A. Romero",
+        genre="Horror", synopsis="Survivors take refuge in a shopping mall.", duration_seconds=7620,
+    )
+    await insert_item(
+        conn, "v3", "The Night Stalker S01E01", title_base="The Night Stalker",
+        genre="Mystery", synopsis="A reporter chases a vampire.", duration_seconds=3000,
+    )
+    await insert_item(conn, "v4", "Dead Alive", genre="Comedy", llm_enriched_at=None)
+    await insert_item(conn, "v5", "Deadly Friend", mediacms_category=None)
+    await conn.commit()
+
+    yield conn
+
+
+def test_fts_phrase_quotes_tokens_and_prefixes_last():
+    assert fts_phrase('night "of" the liv') == '"night" "of" "the" "liv"*'
+    assert fts_phrase("  ") is None
+    assert fts_column_filter(("a", "b"), "x") == '{a b} : ("x"*)'
+
+
+@pytest.mark.asyncio
+async def test_search_free_text_uses_fts(db):
+    repo = CatalogRepository(db)
+    res = await repo.search(q="dead", categories=[], limit=10, offset=0)
+
+    ids = {it["video_id"] for it in res.items}
+    # v4 is unenriched, v5 is uncategorized
+    assert ids == {"v1", "v2"}
+    assert res.total == 2
+
+
+@pytest.mark.asyncio
+async def test_search_prefix_matches_partial_word(db):
+    repo = CatalogRepository(db)
+    res = await repo.search(q="nigh", categories=[], limit=10, offset=0)
+
+    assert {it["video_id"] for it in res.items} == {"v1", "v3"}
+
+
+@pytest.mark.asyncio
+async def test_search_requires_all_tokens(db):
+    repo = CatalogRepository(db)
+    res = await repo.search(q="dawn dead", categories=[], limit=10, offset=0)
+
+    assert [it["video_id"] for it in res.items] == ["v2"]
+
+
+@pytest.mark.asyncio
+async def test_search_text_facets(db):
+    repo = CatalogRepository(db)
+
+    res = await repo.search(q=None, categories=[], limit=10, offset=0, actor="ken foree")
+    assert [it["video_id"] for it in res.items] == ["v2"]
+
+    res = await repo.search(q=None, categories=[], limit=10, offset=0, director="romero")
+    assert {it["video_id"] for it in res.items} == {"v1", "v2"}
+
+    res = await repo.search(q=None, categories=[], limit=10, offset=0, theme="vampire")
+    assert [it["video_id"] for it in res.items] == ["v3"]
+
+    res = await repo.search(q=None, categories=[], limit=10, offset=0, series="night stalker")
+    assert [it["video_id"] for it in res.items] == ["v3"]
+
+
+@pytest.mark.asyncio
+async def test_search_uncategorized_visible_when_allowed(db):
+    await insert_item(db, "v6", "Deadwood", mediacms_category=None)
+    await db.commit()
+    repo = CatalogRepository(db)
+
+    res = await repo.search(q="deadwood", categories=[], limit=10, offset=0)
+    assert res.total == 0
+
+    res = await repo.search(
+        q="deadwood", categories=[], limit=10, offset=0, include_uncategorized=True
+    )
+    assert [it["video_id"] for it in res.items] == ["v6"]
+
+
+@pytest.mark.asyncio
+async def test_search_without_text_orders_by_title(db):
+    repo = CatalogRepository(db)
+    res = await repo.search(q=None, categories=[], limit=10, offset=0, genre="horror")
+
+    assert [it["title"] for it in res.items] == ["Dawn of the Dead", "Night of the Living Dead"]
+
+
+@pytest.mark.asyncio
+async def test_search_falls_back_to_like_without_fts(catalog_db):
+    conn = catalog_db
+    await conn.executescript(
+        "DROP TRIGGER catalog_fts_insert; DROP TRIGGER catalog_fts_update;"
+        "DROP TRIGGER catalog_fts_delete; DROP TABLE catalog_fts;"
+    )
+    await insert_item(conn, "v1", "Hellraiser")
+    await conn.commit()
+
+    repo = CatalogRepository(conn)
+    res = await repo.search(q="llrai", categories=[], limit=10, offset=0)
+    assert [it["video_id"] for it in res.items] == ["v1"]
+
+
+@pytest.mark.asyncio
+async def test_init_enhanced_schema_backfills_fts_index(catalog_db):
+    conn = catalog_db
+    await insert_item(conn, "v1", "Hellraiser")
+    await conn.execute("INSERT INTO catalog_fts(catalog_fts) VALUES('delete-all')")
+    await conn.commit()
+
+    await init_enhanced_schema(conn)
+
+    cursor = await conn.execute(
+        "SELECT rowid FROM catalog_fts WHERE catalog_fts MATCH 'hellraiser'"
+    )
+    assert len(await cursor.fetchall()) == 1
+
+
+@pytest.mark.asyncio
+async def test_search_cursor_pages_through_all_rows(db):
+    for i in range(7):
+        await insert_item(db, f"p{i}", f"Zombie Part {i}", genre="Horror")
+    await db.commit()
+    repo = CatalogRepository(db)
+
+    seen: list[str] = []
+    cursor = None
+    while True:
+        res = await repo.search(q=None, categories=[], limit=3, offset=0, genre="horror", cursor=cursor)
+        seen.extend(it["video_id"] for it in res.items)
+        if res.next_cursor is None:
+            break
+        cursor = res.next_cursor
+
+    offset_res = await repo.search(q=None, categories=[], limit=100, offset=0, genre="horror")
+    assert seen == [it["video_id"] for it in offset_res.items]
+    assert len(seen) == 9
+
+
+@pytest.mark.asyncio
+async def test_search_cursor_with_fts_ranking(db):
+    for i in range(5):
+        await insert_item(db, f"z{i}", f"Zombie {'Zombie ' * i}Holiday")
+    await db.commit()
+    repo = CatalogRepository(db)
+
+    first = await repo.search(q="zombie", categories=[], limit=2, offset=0)
+    second = await repo.search(q="zombie", categories=[], limit=2, offset=0, cursor=first.next_cursor)
+    full = await repo.search(q="zombie", categories=[], limit=10, offset=0)
+
+    paged = [it["video_id"] for it in first.items + second.items]
+    assert paged == [it["video_id"] for it in full.items][:4]
+
+
+@pytest.mark.asyncio
+async def test_search_rejects_foreign_cursor(db):
+    repo = CatalogRepository(db)
+    res = await repo.search(q=None, categories=[], limit=1, offset=0)
+
+    with pytest.raises(ValueError):
+        await repo.search(q="dead", categories=[], limit=1, offset=0, cursor=res.next_cursor)
+    with pytest.raises(ValueError):
+        await repo.search(q=None, categories=[], limit=1, offset=0, cursor="not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_search_totals_cached_until_catalog_changes(db):
+    cache = TotalsCache()
+    repo = CatalogRepository(db, totals_cache=cache)
+
+    res = await repo.search(q="dead", categories=[], limit=1, offset=0)
+    assert res.total == 2
+    assert len(cache) == 1
+
+    # A write that does not bump the catalog version is not observed...
+    await insert_item(db, "v7", "Dead Heat")
+    await db.commit()
+    res = await repo.search(q="dead", categories=[], limit=1, offset=0)
+    assert res.total == 2
+
+    # ...but marking the catalog changed drops the cached total.
+    await mark_catalog_changed(db)
+    await db.commit()
+    res = await repo.search(q="dead", categories=[], limit=1, offset=0)
+    assert res.total == 3
+
+
+@pytest.mark.asyncio
+async def test_catalog_version_tracks_snapshot_and_generation(db):
+    before = await get_catalog_version(db)
+    await mark_catalog_changed(db, snapshot_id="snap2")
+    after = await get_catalog_version(db)
+
+    assert after.snapshot_id == "snap2"
+    assert after.generation == before.generation + 1
+    assert after.key != before.key
+
+
+@pytest.mark.asyncio
+async def test_schema_detected_once_per_connection(db):
+    statements: list[str] = []
+    await db.set_trace_callback(statements.append)
+    repo = CatalogRepository(db)
+
+    await repo.search(q="dead", categories=[], limit=10, offset=0)
+    await repo.get_item("v1")
+    await repo.get_items_by_video_ids(["v1", "v2"])
+    assert sum("PRAGMA table_info" in s for s in statements) == 2  # catalog_item + catalog_category
+
+    # Re-running schema init drops the cached descriptor.
+    await init_enhanced_schema(db)
+    statements.clear()
+    await repo.get_item("v1")
+    assert any("PRAGMA table_info(catalog_item)" in s for s in statements)
+
+
+@pytest.mark.asyncio
+async def test_schema_descriptor_for_enhanced_db(db):
+    schema = await get_catalog_schema(db, db)
+    assert schema.is_enhanced and schema.has_fts
+    assert schema.title_expr == "sanitized_title AS title"
+    assert schema.search_columns == ("sanitized_title", "raw_title")
+    assert await get_catalog_schema(db, db) is schema
+
+
+@pytest.mark.asyncio
+async def test_categories_on_enhanced_schema(db):
+    await db.execute("INSERT INTO catalog_category (name) VALUES ('Movies'), ('Cult')")
+    await db.execute(
+        "INSERT INTO catalog_item_category (video_id, category_id) "
+        "SELECT 'v2', id FROM catalog_category WHERE name = 'Cult'"
+    )
+    await db.commit()
+    repo = CatalogRepository(db)
+
+    assert await repo.get_categories() == ["Cult", "Movies"]
+    res = await repo.search(q="dead", categories=["Cult"], limit=10, offset=0)
+    assert [it["video_id"] for it in res.items] == ["v2"]
+
+
+def test_person_keys_normalize_names():
+    assert person_key("  George A.  Romero ") == "george a romero"
+    assert person_key("Judith O'Dea") == "judith o'dea"
+    assert person_key("Dario Argénto") == "dario argento"
+    assert surname_key("george a romero") == "romero george a"
+
+
+@pytest.mark.asyncio
+async def test_search_people_facets_use_index(db):
+    repo = CatalogRepository(db)
+
+    # Surname prefix and full name both resolve through catalog_person
+    res = await repo.search(q=None, categories=[], limit=10, offset=0, actor="for")
+    assert [it["video_id"] for it in res.items] == ["v2"]
+    res = await repo.search(q=None, categories=[], limit=10, offset=0, director="george a. romero")
+    assert {it["video_id"] for it in res.items} == {"v1", "v2"}
+    # ...but not arbitrary substrings
+    res = await repo.search(q=None, categories=[], limit=10, offset=0, actor="oree")
+    assert res.items == []
+
+    cursor = await db.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM catalog_person WHERE surname_key >= ? AND surname_key < ?",
+        ("for", "for\uffff"),
+    )
+    plan = " ".join(r[3] for r in await cursor.fetchall())
+    assert "idx_catalog_person_surname" in plan
+
+
+@pytest.mark.asyncio
+async def test_filmography_lists_credits(db):
+    await insert_item(
+        db, "v6", "Martin", year=1978,
+        cast_list='["John Amplas"]', director="George A. Romero",
+    )
+    await insert_item(
+        db, "v7", "Creepshow 2", year=1987,
+        cast_list='["George A. Romero"]', director="Michael Gornick",
+    )
+    await db.commit()
+    repo = CatalogRepository(db)
+
+    name, items = await repo.get_filmography("george a romero")
+    assert name == "George A. Romero"
+    assert [it["video_id"] for it in items if it["year"]] == ["v6", "v7"]
+    assert {it["video_id"] for it in items} == {"v1", "v2", "v6", "v7"}
+    assert next(it for it in items if it["video_id"] == "v7")["roles"] == ["actor"]
+
+    name, items = await repo.get_filmography("George A. Romero", role="actor")
+    assert [it["video_id"] for it in items] == ["v7"]
+
+    assert await repo.get_filmography("Nobody") is None
+
+
+@pytest.mark.asyncio
+async def test_backfill_people_from_existing_rows(db):
+    await db.execute("DELETE FROM item_person")
+    await db.execute("DELETE FROM catalog_person")
+    await db.commit()
+
+    assert await backfill_people(db) == 2  # only v1 and v2 have credits
+
+    repo = CatalogRepository(db)
+    res = await repo.search(q=None, categories=[], limit=10, offset=0, actor="duane")
+    assert [it["video_id"] for it in res.items] == ["v1"]
+
+
+def test_canonical_facet_maps_synonyms():
+    assert canonical_facet("genre", "Sci-Fi") == "Science Fiction"
+    assert canonical_facet("genre", "horror/comedy") == "Horror"
+    assert canonical_facet("mood", "feel-good") == "Uplifting"
+    assert canonical_facet("era", "80's") == "1980s"
+    assert canonical_facet("era", "early seventies") == "1970s"
+    assert canonical_facet("genre", "weird stuff") == "Weird Stuff"
+    assert canonical_facet("genre", "  ") is None
+
+
+@pytest.mark.asyncio
+async def test_search_facets_filter_on_lookup_ids(db):
+    repo = CatalogRepository(db)
+
+    res = await repo.search(q=None, categories=[], limit=10, offset=0, genre="HORROR")
+    assert {it["video_id"] for it in res.items} == {"v1", "v2"}
+    assert {it["genre"] for it in res.items} == {"Horror"}
+
+    cursor = await db.execute(
+        "EXPLAIN QUERY PLAN SELECT video_id FROM catalog_item ci "
+        "WHERE ci.genre_id = (SELECT id FROM catalog_genre WHERE name = ?)",
+        ("Horror",),
+    )
+    plan = " ".join(r[3] for r in await cursor.fetchall())
+    assert "idx_catalog_item_genre_id" in plan
+
+
+@pytest.mark.asyncio
+async def test_normalize_facets_migrates_raw_values(db):
+    await db.execute(
+        "UPDATE catalog_item SET genre = 'sci-fi', genre_id = NULL, era = '80s', era_id = NULL "
+        "WHERE video_id = 'v3'"
+    )
+    await db.commit()
+
+    assert await normalize_facets(db) == 2
+    assert await normalize_facets(db) == 0
+
+    repo = CatalogRepository(db)
+    res = await repo.search(q=None, categories=[], limit=10, offset=0, genre="science fiction", era="1980s")
+    # The ids are resolved, the raw text is left alone
+    assert [(it["video_id"], it["genre"], it["era"]) for it in res.items] == [("v3", "sci-fi", "80s")]
+
+
+@pytest.mark.asyncio
+async def test_compound_facets_keep_their_raw_text(db):
+    await insert_item(db, "v6", "Shaun of the Dead", genre="Horror/Comedy", duration_seconds=5940)
+    await db.commit()
+    assert await normalize_facets(db) == 0
+
+    repo = CatalogRepository(db)
+    res = await repo.search(q=None, categories=[], limit=10, offset=0, genre="slasher")
+    assert ("v6", "Horror/Comedy") in [(it["video_id"], it["genre"]) for it in res.items]
+
+
+@pytest.mark.asyncio
+async def test_facet_filters_without_ids_match_any_spelling(db, monkeypatch):
+    await insert_item(db, "v6", "Alien", genre="Sci-Fi", era="'70s")
+    await db.commit()
+    repo = CatalogRepository(db)
+    schema = await repo._schema(db)
+    without_ids = dataclasses.replace(schema, columns=schema.columns - {"genre_id", "era_id"})
+
+    async def legacy_schema(conn):
+        return without_ids
+
+    monkeypatch.setattr(repo, "_schema", legacy_schema)
+    for genre, era in (("sci-fi", None), ("science fiction", "1970s"), ("SciFi", "70s")):
+        res = await repo.search(q=None, categories=[], limit=10, offset=0, genre=genre, era=era)
+        assert [it["video_id"] for it in res.items] == ["v6"], (genre, era)
+
+
+@pytest.mark.asyncio
+async def test_facet_counts_under_filter(db):
+    await db.execute("INSERT INTO catalog_category (name) VALUES ('Cult')")
+    await db.execute(
+        "INSERT INTO catalog_item_category (video_id, category_id) "
+        "SELECT video_id, (SELECT id FROM catalog_category WHERE name = 'Cult') "
+        "FROM catalog_item WHERE video_id IN ('v1', 'v2')"
+    )
+    await db.commit()
+    repo = CatalogRepository(db)
+
+    counts = await repo.facet_counts(SearchFilters())
+    assert counts["genre"] == [("Horror", 2), ("Mystery", 1)]
+    assert counts["category"] == [("Cult", 2)]
+
+    counts = await repo.facet_counts(SearchFilters(q="night"))
+    assert counts["genre"] == [("Horror", 1), ("Mystery", 1)]
+    assert counts["category"] == [("Cult", 1)]
+
+    # Access control applies: v5 (uncategorized) only counts when allowed
+    await set_item_facets(db, "v5", genre="slasher")
+    await db.commit()
+    counts = await repo.facet_counts(SearchFilters(include_uncategorized=True))
+    assert counts["genre"][0] == ("Horror", 3)
+
+
+@pytest.mark.asyncio
+async def test_facets_route_takes_the_search_range_filters(db):
+    app = create_app()
+    app.state.config = SimpleNamespace(disable_auth=True, blessed_users=[])
+    app.state.sqlite = db
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        params = {"max_duration": 6000}
+        facets = (await client.get("/api/v1/catalog/facets", params=params)).json()
+        found = (await client.get("/api/v1/catalog/search", params=params)).json()
+    assert facets["genre"] == [{"value": "Horror", "count": 1}, {"value": "Mystery", "count": 1}]
+    assert sum(g["count"] for g in facets["genre"]) == found["total"]
+
+
+@pytest.mark.asyncio
+async def test_facet_counts_cached_per_version(db):
+    cache = FacetCountsCache()
+    repo = CatalogRepository(db, facet_cache=cache)
+
+    first = await repo.facet_counts(SearchFilters(genre="horror"))
+    await set_item_facets(db, "v3", genre="horror")
+    await db.commit()
+    assert await repo.facet_counts(SearchFilters(genre="horror")) is first
+
+    await mark_catalog_changed(db)
+    await db.commit()
+    counts = await repo.facet_counts(SearchFilters(genre="horror"))
+    assert counts["genre"] == [("Horror", 3)]
+
+
+def test_search_filters_normalize_to_one_key():
+    a = SearchFilters(q="  Night  of ", categories=("TV", "Movies", "TV"), genre="sci-fi", actor="Ken FOREE")
+    b = SearchFilters(q="night of", categories=("Movies", "TV"), genre="Science Fiction", actor="ken foree")
+    assert a.normalized() == b.normalized()
+    assert a.normalized() != SearchFilters(q="night of", include_uncategorized=True).normalized()
+
+
+@pytest.mark.asyncio
+async def test_search_results_cached_per_normalized_filters(db):
+    cache = SearchResultCache()
+    repo = CatalogRepository(db, result_cache=cache)
+
+    first = await repo.search(q="Dead", categories=[], limit=10, offset=0)
+    assert await repo.search(q=" dead ", categories=[], limit=10, offset=0) is first
+    assert cache.stats()["hits"] == 1
+
+    # Access level is part of the key
+    wider = await repo.search(q="dead", categories=[], limit=10, offset=0, include_uncategorized=True)
+    assert wider is not first
+
+    await insert_item(db, "v7", "Dead Heat")
+    await mark_catalog_changed(db)
+    await db.commit()
+    res = await repo.search(q="dead", categories=[], limit=10, offset=0)
+    assert res.total == 3
+
+
+@pytest.mark.asyncio
+async def test_categories_cached(db):
+    cache = SearchResultCache()
+    repo = CatalogRepository(db, result_cache=cache)
+    await db.execute("INSERT INTO catalog_category (name) VALUES ('Movies')")
+    await mark_catalog_changed(db)
+    await db.commit()
+
+    assert await repo.get_categories() == ["Movies"]
+    await db.execute("INSERT INTO catalog_category (name) VALUES ('TV')")
+    await db.commit()
+    assert await repo.get_categories() == ["Movies"]
+
+    await mark_catalog_changed(db)
+    await db.commit()
+    assert await repo.get_categories() == ["Movies", "TV"]
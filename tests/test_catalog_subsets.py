@@ -0,0 +1,83 @@
+"""Tests for the subset partial indexes and the maintained pending counter."""
+
+from __future__ import annotations
+
+import aiosqlite
+import pytest
+import pytest_asyncio
+
+from kryten_playlist.catalog.enhanced_schema import init_enhanced_schema
+from kryten_playlist.storage.catalog_repo import CatalogRepository, SearchFilters
+from kryten_playlist.storage.catalog_subsets import read_pending_count
+
+
+async def _insert_item(conn: aiosqlite.Connection, video_id: str, category: str | None, enriched: bool) -> None:
+    await conn.execute(
+        "INSERT INTO catalog_item (video_id, raw_title, sanitized_title, title_base, mediacms_category, "
+        "llm_enriched_at) VALUES (?, ?, ?, ?, ?, ?)",
+        (video_id, video_id, video_id, video_id, category, "2025-01-01" if enriched else None),
+    )
+
+
+@pytest_asyncio.fixture
+async def db():
+    conn = await aiosqlite.connect(":memory:")
+    conn.row_factory = aiosqlite.Row
+    await init_enhanced_schema(conn)
+    yield conn
+    await conn.close()
+
+
+@pytest.mark.asyncio
+async def test_pending_counter_follows_writes(db):
+    repo = CatalogRepository(db)
+    assert await repo.get_pending_count() == 0
+
+    for vid in ("a", "b", "c"):
+        await _insert_item(db, vid, "Movies", enriched=False)
+    await _insert_item(db, "d", "Movies", enriched=True)
+    assert await repo.get_pending_count() == 3
+
+    await db.execute("UPDATE catalog_item SET llm_enriched_at = '2025-02-01' WHERE video_id IN ('a', 'b')")
+    # Re-enriching an enriched item or touching other columns changes nothing
+    await db.execute("UPDATE catalog_item SET llm_enriched_at = '2025-03-01', synopsis = 'x' WHERE video_id = 'd'")
+    assert await repo.get_pending_count() == 1
+
+    await db.execute("UPDATE catalog_item SET llm_enriched_at = NULL WHERE video_id = 'd'")
+    await db.execute("DELETE FROM catalog_item WHERE video_id = 'c'")
+    assert await repo.get_pending_count() == 1
+    await db.commit()
+
+    # A stale counter (e.g. writes made without the triggers) is recounted on init
+    await db.execute("UPDATE catalog_meta SET value = '42' WHERE key = 'pending_count'")
+    await init_enhanced_schema(db)
+    assert await read_pending_count(db) == 1
+
+
+@pytest.mark.asyncio
+async def test_pending_count_without_counter(db):
+    await _insert_item(db, "a", "Movies", enriched=False)
+    await db.execute("DELETE FROM catalog_meta WHERE key = 'pending_count'")
+    assert await read_pending_count(db) is None
+    assert await CatalogRepository(db).get_pending_count() == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("include_uncategorized", "index"),
+    [(False, "idx_catalog_item_visible_title"), (True, "idx_catalog_item_enriched_title")],
+)
+async def test_browse_uses_subset_index(db, include_uncategorized, index):
+    await _insert_item(db, "a", "Movies", enriched=True)
+    await _insert_item(db, "b", "Uncategorized", enriched=True)
+    await _insert_item(db, "c", None, enriched=False)
+    await db.commit()
+
+    repo = CatalogRepository(db)
+    filters = SearchFilters(include_uncategorized=include_uncategorized)
+    plan = " ".join((await repo.explain_search(filters)).sqlite_plan)
+    assert index in plan
+    assert "TEMP B-TREE" not in plan
+
+    res = await repo.search(q=None, categories=[], limit=10, offset=0, include_uncategorized=include_uncategorized)
+    assert [i["video_id"] for i in res.items] == (["a", "b"] if include_uncategorized else ["a"])
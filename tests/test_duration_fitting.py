@@ -9,11 +9,13 @@ import pytest_asyncio
 from kryten_playlist.catalog.duration_fitting import (
     FitResult,
     calculate_end_time,
+    fit_pool,
     fit_to_duration,
     fit_to_end_time,
     format_duration,
 )
 from kryten_playlist.catalog.enhanced_schema import init_enhanced_schema
+from kryten_playlist.storage.facets import set_item_facets
 
 
 @pytest_asyncio.fixture
@@ -38,8 +40,9 @@ async def db():
     for vid, title, duration in items:
         await conn.execute(
             """
-            INSERT INTO catalog_item (video_id, raw_title, sanitized_title, title_base, duration_seconds, is_tv)
-            VALUES (?, ?, ?, ?, ?, ?)
+            INSERT INTO catalog_item (video_id, raw_title, sanitized_title, title_base, duration_seconds, is_tv,
+                                      mediacms_category, llm_enriched_at)
+            VALUES (?, ?, ?, ?, ?, ?, 'Movies', '2025-01-01T00:00:00+00:00')
             """,
             (vid, title, title, title, duration, vid == "vid6"),
         )
@@ -93,6 +96,67 @@ async def test_fit_to_duration_filter_tv(db):
     assert "vid6" not in video_ids
 
 
+@pytest.mark.asyncio
+async def test_fit_to_duration_random_is_seeded(db):
+    """Random fills repeat for a seed and never include an item twice."""
+    fills = [await fit_to_duration(db, 50000, seed=s) for s in (1, 1, 2, 3, 4)]
+    orders = [[it["video_id"] for it in f.items] for f in fills]
+
+    assert orders[0] == orders[1]
+    assert any(order != orders[0] for order in orders[2:])
+    for order in orders:
+        # Everything with a duration fits into 50000s
+        assert sorted(order) == ["vid1", "vid2", "vid3", "vid4", "vid6"]
+
+
+@pytest.mark.asyncio
+async def test_fit_to_duration_fills_the_slot(db):
+    """Fills are chosen as a whole rather than greedily in candidate order."""
+    # Greedy from the longest would take 3600 + 300 and strand 5 minutes
+    result = await fit_to_duration(db, 4200, order_by="duration_desc")
+    assert sorted(it["video_id"] for it in result.items) == ["vid2", "vid6"]
+    assert result.slack == 0
+    assert result.optimal
+
+    # No exact fill exists: the best one is proven optimal
+    result = await fit_to_duration(db, 5000, seed=2)
+    assert result.total_duration == 4500
+    assert result.optimality_gap == 0
+    assert result.solve_ms >= 0
+
+
+@pytest.mark.asyncio
+async def test_truncated_pool_is_not_proven_optimal(db):
+    """A pool cut off at pool_size is not every candidate."""
+    result = fit_pool([("a", "a", 10), ("b", "b", 10), ("c", "c", 30)], 30, pool_size=2)
+    assert result.total_duration == 20
+    assert not result.optimal
+
+    # The ordered SQL path reads at most pool_size rows
+    result = await fit_to_duration(db, 4200, order_by="duration_asc", pool_size=2)
+    assert result.total_duration == 2100
+    assert result.optimality_gap > 0
+
+    # Fewer rows than pool_size: that is the whole pool
+    result = await fit_to_duration(db, 5000, order_by="duration_asc", pool_size=10)
+    assert result.total_duration == 4500
+    assert result.optimal
+
+
+@pytest.mark.asyncio
+async def test_fit_to_duration_filter_genre_and_era(db):
+    """Facet filters accept synonyms and match on the normalized ids."""
+    await set_item_facets(db, "vid2", genre="Sci-Fi", era="'80s")
+    await set_item_facets(db, "vid3", genre="science fiction", era="1990s")
+    await db.commit()
+
+    result = await fit_to_duration(db, 50000, filter_genre="scifi", order_by="title")
+    assert {it["video_id"] for it in result.items} == {"vid2", "vid3"}
+
+    result = await fit_to_duration(db, 50000, filter_genre="Sci-Fi", filter_era="80s", order_by="title")
+    assert [it["video_id"] for it in result.items] == ["vid2"]
+
+
 @pytest.mark.asyncio
 async def test_fit_to_duration_max_items(db):
     """Test max_items limit."""
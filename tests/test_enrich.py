@@ -170,10 +170,16 @@ async def test_enrich_item_updates_database(
         row = await cursor.fetchone()
 
         assert row[0] == mock_llm_response["synopsis"]
-        assert row[1] == "Sci-Fi"
-        assert row[2] == "cerebral"
-        assert row[3] == "1990s"
+        # The raw values are kept; their lookup ids are the canonical names
+        assert tuple(row[1:4]) == ("Sci-Fi", "cerebral", "1990s")
         assert row[4] is not None  # llm_enriched_at set
+        cursor = await conn.execute(
+            "SELECT g.name, m.name, e.name FROM catalog_item ci "
+            "JOIN catalog_genre g ON g.id = ci.genre_id "
+            "JOIN catalog_mood m ON m.id = ci.mood_id "
+            "JOIN catalog_era e ON e.id = ci.era_id WHERE ci.video_id = 'abc123'"
+        )
+        assert tuple(await cursor.fetchone()) == ("Science Fiction", "Cerebral", "1990s")
 
 
 @pytest.mark.asyncio
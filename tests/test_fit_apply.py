@@ -0,0 +1,236 @@
+"""Tests for fitting lineups and previewing, saving or queueing them."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import aiosqlite
+import httpx
+import pytest
+import pytest_asyncio
+from kryten.mock import MockKrytenClient
+
+from kryten_playlist.catalog.duration_fitting import fit_to_duration
+from kryten_playlist.catalog.enhanced_schema import init_enhanced_schema
+from kryten_playlist.fit_apply import FitRequest, run_fit
+from kryten_playlist.nats.kv import BUCKET_PLAYLISTS, KvJson, KvNamespace
+from kryten_playlist.storage.catalog_meta import mark_catalog_changed
+from kryten_playlist.storage.search_cache import CandidatePoolCache
+from kryten_playlist.web.app import create_app
+from kryten_playlist.web.deps import Session, require_session
+
+
+@pytest_asyncio.fixture
+async def db():
+    conn = await aiosqlite.connect(":memory:")
+    conn.row_factory = aiosqlite.Row
+    await init_enhanced_schema(conn)
+    items = [
+        ("short", 300, 0),
+        ("half", 1800, 0),
+        ("hour", 3600, 0),
+        ("movie", 7200, 0),
+        ("episode", 2400, 1),
+        ("episode2", 1200, 1),
+    ]
+    for vid, duration, is_tv in items:
+        await conn.execute(
+            "INSERT INTO catalog_item (video_id, raw_title, sanitized_title, title_base, "
+            "duration_seconds, is_tv, mediacms_category, llm_enriched_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, 'Movies', '2025-01-01T00:00:00+00:00')",
+            (vid, vid, vid, vid, duration, is_tv),
+        )
+    await conn.commit()
+    yield conn
+    await conn.close()
+
+
+def _mk_client() -> MockKrytenClient:
+    return MockKrytenClient(
+        {
+            "nats": {"servers": ["nats://example:4222"]},
+            "channels": [{"domain": "example.com", "channel": "lounge"}],
+            "service": {"name": "test", "version": "0.0.0"},
+        }
+    )
+
+
+async def _selects(conn, run):
+    statements: list[str] = []
+    await conn.set_trace_callback(statements.append)
+    try:
+        result = await run()
+    finally:
+        await conn.set_trace_callback(None)
+    return result, [s for s in statements if "FROM catalog_item" in s]
+
+
+@pytest.mark.asyncio
+async def test_pool_cache_serves_repeat_fits(db):
+    pools = CandidatePoolCache()
+
+    async def fit(target, **kwargs):
+        return await fit_to_duration(db, target, pool_cache=pools, **kwargs)
+
+    first, queries = await _selects(db, lambda: fit(5400, seed=1))
+    assert len(queries) == 1
+    assert first.total_duration == 5400
+
+    # New targets, seeds and orders reuse the pool
+    for target, kwargs in ((4200, {"seed": 2}), (3000, {"order_by": "duration_desc"}), (600, {"order_by": "title"})):
+        result, queries = await _selects(db, lambda: fit(target, **kwargs))
+        assert queries == []
+        uncached = await fit_to_duration(db, target, **kwargs)
+        assert result.total_duration == uncached.total_duration
+    assert len(pools) == 1
+
+    # Other filters get a pool of their own
+    tv, queries = await _selects(db, lambda: fit(3600, filter_tv=True))
+    assert len(queries) == 1
+    assert sorted(it["video_id"] for it in tv.items) == ["episode", "episode2"]
+
+    # A catalog change drops the pools
+    await db.execute("DELETE FROM catalog_item WHERE video_id = 'half'")
+    await mark_catalog_changed(db)
+    await db.commit()
+    result, queries = await _selects(db, lambda: fit(5400, seed=1))
+    assert len(queries) == 1
+    assert "half" not in {it["video_id"] for it in result.items}
+
+
+@pytest.mark.asyncio
+async def test_preview_save_and_queue(db):
+    client = _mk_client()
+    kv = KvJson(client, KvNamespace("test"))
+    await kv.ensure_buckets()
+
+    preview = await run_fit(FitRequest(target_seconds=4200, order_by="duration_desc"), sqlite_conn=db)
+    body = preview.as_dict()
+    assert body["status"] == "ok" and body["slack"] == 0
+    assert client.get_published_commands() == []
+
+    saved = await run_fit(
+        FitRequest(target_seconds=4200, order_by="duration_desc", action="save", name="Tonight"),
+        sqlite_conn=db,
+        kv=kv,
+        owner="alice",
+    )
+    assert saved.status == "ok"
+    doc = await kv.get_json(BUCKET_PLAYLISTS, f"playlists/{saved.playlist_id}")
+    assert doc["owner"] == "alice"
+    assert [it["video_id"] for it in doc["items"]] == [it["video_id"] for it in preview.fit.items]
+    index = await kv.get_json(BUCKET_PLAYLISTS, "playlists/index")
+    assert index["playlists"][saved.playlist_id]["item_count"] == len(doc["items"])
+
+    again = await run_fit(
+        FitRequest(target_seconds=600, action="save", name="Tonight"), sqlite_conn=db, kv=kv, owner="alice"
+    )
+    assert again.status == "error" and again.error == "playlist_name_taken"
+
+    queued = await run_fit(
+        FitRequest(target_seconds=4200, order_by="duration_desc", action="queue"),
+        sqlite_conn=db,
+        client=client,
+        channel="lounge",
+    )
+    assert queued.status == "ok"
+    assert queued.enqueued_count == len(preview.fit.items)
+    assert [c["action"] for c in client.get_published_commands()] == ["addvideo"] * queued.enqueued_count
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {},
+        {"target_seconds": 3600, "end_time": "2025-01-01T20:00:00Z"},
+        {"target_seconds": "soon"},
+        {"target_seconds": 0},
+        {"end_time": "tonight"},
+        {"target_seconds": 3600, "order_by": "loudest"},
+        {"target_seconds": 3600, "action": "save"},
+        {"target_seconds": 3600, "action": "queue", "mode": "shuffle"},
+    ],
+)
+def test_request_validation(payload):
+    with pytest.raises(ValueError):
+        FitRequest.from_dict(payload)
+
+
+def test_request_from_dict():
+    request = FitRequest.from_dict(
+        {
+            "end_time": "2025-01-01T20:00:00",
+            "filter_tags": "noir",
+            "filter_tv": 0,
+            "seed": "7",
+            "action": "queue",
+            "mode": "insert_next",
+        }
+    )
+    assert request.end_time is not None and request.end_time.tzinfo is not None
+    assert request.filter_tags == ["noir"]
+    assert request.filter_tv is False
+    assert request.seed == 7
+
+
+@pytest.mark.asyncio
+async def test_route_takes_naive_times_as_utc(db):
+    app = create_app()
+    app.state.config = SimpleNamespace(disable_auth=True, blessed_users=[])
+    app.state.sqlite = db
+    # Naive, as a browser datetime-local field sends it
+    end = (datetime.now(timezone.utc) + timedelta(hours=2)).replace(tzinfo=None)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post("/api/v1/fit", json={"end_time": end.isoformat()})
+    assert resp.status_code == 200
+    assert 7100 <= resp.json()["target_duration"] <= 7200
+
+    request = FitRequest(end_time=end, start_time=end - timedelta(hours=1))
+    request.validate()
+    assert request.end_time.tzinfo is not None and request.start_time.tzinfo is not None
+
+
+@pytest.mark.asyncio
+async def test_viewer_previews_leave_out_uncategorized_items(db):
+    await db.executemany(
+        "INSERT INTO catalog_item (video_id, raw_title, sanitized_title, title_base, "
+        "duration_seconds, is_tv, mediacms_category, llm_enriched_at) VALUES (?, ?, ?, ?, ?, 0, ?, ?)",
+        [
+            ("hidden", "hidden", "hidden", "hidden", 600, "Uncategorized", "2025-01-01T00:00:00+00:00"),
+            ("raw", "raw", "raw", "raw", 900, "Movies", None),
+        ],
+    )
+    await mark_catalog_changed(db)
+    await db.commit()
+
+    app = create_app()
+    app.state.config = SimpleNamespace(disable_auth=False, blessed_users=[])
+    app.state.sqlite = db
+    role = "viewer"
+    app.dependency_overrides[require_session] = lambda: Session(
+        session_id="s1", username="alice", role=role, expires_at=datetime.now(timezone.utc) + timedelta(hours=1)
+    )
+
+    async def preview(**payload) -> set[str]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            resp = await client.post("/api/v1/fit", json={"target_seconds": 20000, **payload})
+        assert resp.status_code == 200
+        return {it["video_id"] for it in resp.json()["items"]}
+
+    # Sampled and ordered candidates alike; unenriched items are never offered
+    for order_by in ("random", "title"):
+        assert not {"hidden", "raw"} & await preview(order_by=order_by, seed=1)
+    role = "admin"
+    assert "hidden" in await preview(order_by="title")
+    assert "raw" not in await preview(order_by="title")
+
+    # Cached pools are kept apart per visibility
+    pools = CandidatePoolCache()
+    viewer = await fit_to_duration(db, 20000, pool_cache=pools)
+    admin = await fit_to_duration(db, 20000, pool_cache=pools, include_uncategorized=True)
+    assert "hidden" not in {it["video_id"] for it in viewer.items}
+    assert "hidden" in {it["video_id"] for it in admin.items}
+    assert len(pools) == 2
@@ -0,0 +1,94 @@
+"""Tests for the subset-sum fit solver."""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from kryten_playlist.catalog.fit_solver import MITM_MAX_ITEMS, SubsetSumSolver
+
+
+def _solve(durations, target, *, exhausted=True, **kwargs):
+    solver = SubsetSumSolver(target, **kwargs)
+    for duration in durations:
+        solver.add(duration)
+    return solver.solve(exhausted=exhausted)
+
+
+def _best_total(durations, target):
+    reachable = {0}
+    for duration in durations:
+        reachable |= {s + duration for s in reachable if s + duration <= target}
+    return max(reachable)
+
+
+@pytest.mark.parametrize("size", [8, MITM_MAX_ITEMS + 40])
+def test_finds_the_best_fill(size):
+    rng = random.Random(size)
+    for _ in range(20):
+        durations = [rng.randint(600, 9000) for _ in range(size)]
+        target = rng.randint(3600, 6 * 3600)
+        solution = _solve(durations, target)
+        assert len(set(solution.picks)) == len(solution.picks)
+        assert solution.total == sum(durations[i] for i in solution.picks)
+        assert solution.total == _best_total(durations, target)
+        assert solution.gap == 0
+
+
+def test_beats_a_greedy_fill():
+    # Greedy takes the 3000 and strands 1000s; two 2000s fill the slot
+    solution = _solve([3000, 2000, 2000], 4000)
+    assert solution.picks == [1, 2]
+    assert solution.total == 4000
+
+
+@pytest.mark.parametrize("padding", [0, MITM_MAX_ITEMS])
+def test_max_items(padding):
+    durations = [1000] * 4 + [3900] + [5000] * padding
+    solution = _solve(durations, 4000, max_items=1)
+    assert [durations[i] for i in solution.picks] == [3900]
+
+    solution = _solve(durations, 4000, max_items=4)
+    assert solution.total == 4000 and len(solution.picks) == 4
+
+
+def test_coarse_resolution_never_overruns():
+    rng = random.Random(3)
+    durations = [rng.randint(1200, 3000) for _ in range(200)]
+    for target in range(3600, 4 * 3600, 997):
+        solution = _solve(durations, target, resolution=60)
+        assert solution.total <= target
+        assert solution.gap <= target - solution.total
+
+    with pytest.raises(ValueError):
+        SubsetSumSolver(3600, resolution=0)
+
+
+def test_tolerance_stops_early_and_bounds_the_gap():
+    solver = SubsetSumSolver(10_000, tolerance=500)
+    fed = 0
+    for duration in [4000, 3000, 2600, 100, 100, 100] + [50] * 100:
+        fed += 1
+        if solver.add(duration):
+            break
+    assert fed == 3
+    solution = solver.solve()
+    assert solution.total == 9600
+    # Not exhausted: only the target bounds the fill
+    assert solution.gap == 400
+
+
+
+def test_early_stop_waits_for_a_fill_within_max_items():
+    # 30 + 30 + 40 reaches the target first, but only two may be picked:
+    # stopping there would leave 30 + 40. Two 45s get within tolerance.
+    solver = SubsetSumSolver(100, tolerance=10, max_items=2)
+    fed = 0
+    for duration in [30, 30, 40, 45, 45, 50, 50]:
+        fed += 1
+        if solver.add(duration):
+            break
+    assert fed == 5
+    solution = solver.solve()
+    assert solution.total == 90 and len(solution.picks) == 2
@@ -0,0 +1,138 @@
+"""Tests for bulk video_id lookups (padded IN lists and the temp-table join)."""
+
+from __future__ import annotations
+
+import pytest
+import pytest_asyncio
+
+from kryten_playlist.catalog.enhanced_schema import init_enhanced_schema
+from kryten_playlist.catalog.markdown_export import export_playlist_markdown
+from kryten_playlist.storage import id_lookup
+from kryten_playlist.storage.catalog_repo import CatalogRepository
+from kryten_playlist.storage.id_lookup import fetch_by_video_ids, unique_ids
+from kryten_playlist.storage.sqlite import ReadPool, SqliteConfig, SqliteDb
+
+N_ITEMS = 2500
+
+
+@pytest_asyncio.fixture
+async def sqlite_db(tmp_path):
+    db = SqliteDb(SqliteConfig(path=tmp_path / "catalog.sqlite3"))
+    writer = await db.connect()
+    await init_enhanced_schema(writer)
+    await writer.executemany(
+        "INSERT INTO catalog_item (video_id, raw_title, sanitized_title, title_base, snapshot_id, "
+        "mediacms_category, duration_seconds) VALUES (?, ?, ?, ?, 'snap1', ?, ?)",
+        [
+            (f"v{i:05d}", f"Item {i}", f"Item {i}", f"Item {i}", None if i % 100 == 0 else "Movies", 60 * i)
+            for i in range(N_ITEMS)
+        ],
+    )
+    await writer.execute("INSERT INTO catalog_tag (id, name) VALUES (1, 'grindhouse')")
+    await writer.execute(
+        "INSERT INTO catalog_item_tag (video_id, tag_id, confidence) VALUES ('v02001', 1, 0.9)"
+    )
+    await writer.commit()
+    yield db, writer
+    await writer.close()
+
+
+def test_unique_ids_keeps_first_seen_order():
+    assert unique_ids([" b", "a", "", None, "b", "c "]) == ["b", "a", "c"]
+
+
+@pytest.mark.asyncio
+async def test_small_sets_reuse_bucketed_statements(sqlite_db):
+    _, writer = sqlite_db
+    statements: list[str] = []
+    await writer.set_trace_callback(statements.append)
+    try:
+        for n in (1, 3, 7):
+            rows = await fetch_by_video_ids(
+                writer,
+                "SELECT video_id FROM catalog_item WHERE video_id IN {ids}",
+                [f"v{i:05d}" for i in range(1, n + 1)],
+            )
+            assert len(rows) == n
+    finally:
+        await writer.set_trace_callback(None)
+
+    # The trace shows expanded SQL: every lookup bound exactly 8 ids
+    assert len(statements) == 3
+    assert all(s.count("'v") == 8 for s in statements)
+
+
+@pytest.mark.asyncio
+async def test_large_lookup_uses_temp_table_and_keeps_request_order(sqlite_db):
+    db, writer = sqlite_db
+    ids = [f"v{i:05d}" for i in reversed(range(N_ITEMS))] + ["missing", "v00005"]
+
+    pool = ReadPool(db, size=1)
+    await pool.open()
+    try:
+        repo = CatalogRepository(pool)
+        items = await repo.get_items_by_video_ids(ids)
+        # Every 100th item has no category and is omitted
+        expected = [vid for vid in ids[:N_ITEMS] if int(vid[1:]) % 100 != 0]
+        assert list(items) == expected
+        assert items["v00042"]["duration_seconds"] == 60 * 42
+
+        async with pool.acquire() as conn:
+            assert not conn.in_transaction
+            cursor = await conn.execute("SELECT COUNT(*) FROM temp.lookup_ids")
+            assert (await cursor.fetchone())[0] == 0
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_large_lookup_inside_transaction_falls_back_to_chunks(sqlite_db):
+    _, writer = sqlite_db
+    await writer.execute("UPDATE catalog_item SET duration_seconds = 1 WHERE video_id = 'v00001'")
+    assert writer.in_transaction
+
+    statements: list[str] = []
+    await writer.set_trace_callback(statements.append)
+    try:
+        rows = await fetch_by_video_ids(
+            writer,
+            "SELECT video_id, duration_seconds FROM catalog_item WHERE video_id IN {ids}",
+            [f"v{i:05d}" for i in range(200)],
+            private_connection=True,
+        )
+    finally:
+        await writer.set_trace_callback(None)
+
+    assert len(rows) == 200
+    assert writer.in_transaction  # caller's transaction left alone
+    assert not any("lookup_ids" in s for s in statements)
+    assert len(statements) == 200 // id_lookup.INLINE_MAX + 1
+    await writer.rollback()
+
+
+@pytest.mark.asyncio
+async def test_large_lookup_on_shared_connection_writes_and_commits_nothing(sqlite_db):
+    _, writer = sqlite_db
+    statements: list[str] = []
+    await writer.set_trace_callback(statements.append)
+    try:
+        items = await CatalogRepository(writer).get_items_by_video_ids(
+            [f"v{i:05d}" for i in range(1, 300)]
+        )
+    finally:
+        await writer.set_trace_callback(None)
+
+    assert len(items) == 299 - 2  # v00100 and v00200 have no category
+    assert not writer.in_transaction
+    assert not any("lookup_ids" in s for s in statements)
+    assert not any(s.split()[0].upper() in ("INSERT", "DELETE", "COMMIT") for s in statements)
+
+
+@pytest.mark.asyncio
+async def test_markdown_export_handles_marathon_playlists(sqlite_db, tmp_path):
+    items = [{"video_id": f"v{i:05d}"} for i in range(2000, N_ITEMS)] * 2
+    md = await export_playlist_markdown(str(tmp_path / "catalog.sqlite3"), items, "Marathon")
+
+    assert md.index("### 1. 🎬 Item 2000") < md.index("### 2. 🎬 Item 2001")
+    assert f"### {len(items)}. 🎬 Item {N_ITEMS - 1}" in md
+    assert "**Tags:** `grindhouse`" in md
@@ -0,0 +1,123 @@
+"""Tests for materialized popularity scores and boosted ranking."""
+
+from __future__ import annotations
+
+import aiosqlite
+import pytest
+import pytest_asyncio
+
+from kryten_playlist.catalog.enhanced_schema import init_enhanced_schema
+from kryten_playlist.storage.catalog_meta import mark_catalog_changed
+from kryten_playlist.storage.catalog_repo import CatalogRepository
+from kryten_playlist.storage.popularity import (
+    PopularityMaterializer,
+    materialize_popularity,
+    popularity_scores,
+)
+from kryten_playlist.storage.search_cache import SearchResultCache
+from kryten_playlist.storage.sqlite import SqliteConfig, SqliteDb
+
+
+async def _insert_item(conn: aiosqlite.Connection, video_id: str, title: str) -> None:
+    await conn.execute(
+        "INSERT INTO catalog_item (video_id, raw_title, sanitized_title, title_base, snapshot_id, "
+        "mediacms_category, llm_enriched_at) VALUES (?, ?, ?, ?, 'snap1', 'Movies', '2025-01-01')",
+        (video_id, title, title, title),
+    )
+
+
+@pytest_asyncio.fixture
+async def db():
+    conn = await aiosqlite.connect(":memory:")
+    conn.row_factory = aiosqlite.Row
+    await init_enhanced_schema(conn)
+    await _insert_item(conn, "v1", "Zombie Island")
+    await _insert_item(conn, "v2", "Zombie Lake")
+    await _insert_item(conn, "v3", "Zombie Zombie Holocaust")
+    await mark_catalog_changed(conn, snapshot_id="snap1")
+    await conn.commit()
+    yield conn
+    await conn.close()
+
+
+def test_scores_are_log_scaled_to_the_top_item():
+    scores = popularity_scores({"a": 100, "b": 9, "c": 0}, {"b": 1})
+    assert scores["a"] == (100, 0, 1.0)
+    assert 0 < scores["b"][2] < 1
+    assert "c" not in scores
+    assert popularity_scores({}, {}) == {}
+
+
+@pytest.mark.asyncio
+async def test_materialize_writes_only_changes(db):
+    # v1 and v2 scored, v3 gets a zero row; counts for unknown videos are ignored
+    assert await materialize_popularity(db, {"v1": 5, "v2": 1, "gone": 2}, {}) == 3
+    assert await materialize_popularity(db, {"v1": 5, "v2": 1, "gone": 2}, {}) == 0
+    # v2 is reset, v1 keeps its (top) score of 1.0, v3 is scored
+    assert await materialize_popularity(db, {"v1": 5, "v3": 2}, {}) == 2
+
+    cursor = await db.execute("SELECT video_id, plays, score FROM catalog_popularity ORDER BY video_id")
+    rows = [tuple(r) for r in await cursor.fetchall()]
+    assert [r[:2] for r in rows] == [("v1", 5), ("v2", 0), ("v3", 2)]
+    assert rows[0][2] == 1.0
+
+    await db.execute("DELETE FROM catalog_item WHERE video_id = 'v2'")
+    await db.commit()
+    assert await materialize_popularity(db, {"v1": 5, "v3": 2}, {}) == 1
+
+
+@pytest.mark.asyncio
+async def test_popular_titles_rank_higher_among_close_matches(db):
+    cache = SearchResultCache()
+    repo = CatalogRepository(db, result_cache=cache)
+
+    async def order() -> list[str]:
+        res = await repo.search(q="zombie", categories=[], limit=10, offset=0)
+        return [item["video_id"] for item in res.items]
+
+    # Pure bm25: the title repeating "zombie" ranks first, the two others tie
+    before = await order()
+    assert before[0] == "v3"
+
+    async def plays():
+        return {"v2": 50, "v1": 1}
+
+    async def likes():
+        return {"v2": 5}
+
+    assert await PopularityMaterializer(db, plays=plays, likes=likes).refresh() == 3
+    # Materializing dropped the cached page; v2 now beats v1
+    after = await order()
+    assert after.index("v2") < after.index("v1")
+    assert cache.stats()["entries"] == 1
+
+    # Paging by cursor follows the boosted order
+    first = await repo.search(q="zombie", categories=[], limit=1, offset=0)
+    rest = await repo.search(q="zombie", categories=[], limit=10, offset=0, cursor=first.next_cursor)
+    assert [first.items[0]["video_id"], *(i["video_id"] for i in rest.items)] == after
+
+
+@pytest.mark.asyncio
+async def test_materialize_on_its_own_connection_leaves_a_rebuild_alone(tmp_path):
+    db = SqliteDb(SqliteConfig(path=tmp_path / "catalog.sqlite3"))
+    writer = await db.connect()
+    await init_enhanced_schema(writer)
+    await _insert_item(writer, "v1", "Zombie Island")
+    await writer.commit()
+    popularity = await aiosqlite.connect((tmp_path / "catalog.sqlite3").as_posix(), timeout=0.05)
+    try:
+        # A rebuild is half way through on the writer
+        await writer.execute("BEGIN EXCLUSIVE")
+        await writer.execute("DELETE FROM catalog_item")
+
+        with pytest.raises(aiosqlite.OperationalError):
+            await materialize_popularity(popularity, {"v1": 3}, {})
+        assert not popularity.in_transaction
+        assert writer.in_transaction
+
+        await _insert_item(writer, "v2", "Zombie Lake")
+        await writer.commit()
+        assert await materialize_popularity(popularity, {"v2": 3}, {}) == 1
+    finally:
+        await popularity.close()
+        await writer.close()
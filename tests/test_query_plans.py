@@ -0,0 +1,401 @@
+"""Query plan regression suite for the catalog's hot queries.
+
+Loads a synthetic catalog into both schema variants and runs every query
+shape the repository, duration fitting and the enrichment selectors
+produce through ``EXPLAIN QUERY PLAN``. A shape fails when SQLite falls back
+to a full ``SCAN`` of ``catalog_item`` without an index, unless the shape
+lists the reason that scan is expected, or when a full-text MATCH ends up
+re-run per row of an outer loop. Each shape is also timed; p50/p95
+latencies are printed (``pytest -s``) and written as JSON to
+``$KRYTEN_QUERY_PLAN_REPORT`` when set.
+
+``$KRYTEN_QUERY_PLAN_ITEMS`` sets the catalog size (default 100000) and
+``$KRYTEN_QUERY_PLAN_ROUNDS`` the timed runs per shape (default 10).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import re
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+import aiosqlite
+import pytest
+import pytest_asyncio
+
+from kryten_playlist.catalog.duration_fitting import fit_to_duration
+from kryten_playlist.catalog.enhanced_schema import init_enhanced_schema
+from kryten_playlist.catalog.enrich import (
+    ENRICHMENT_COLUMNS,
+    enrichment_filter,
+    enrichment_selector,
+)
+from kryten_playlist.storage.catalog_meta import mark_catalog_changed
+from kryten_playlist.storage.catalog_repo import CatalogRepository, SearchFilters
+from kryten_playlist.storage.facets import (
+    ERA_VOCABULARY,
+    FACET_TABLES,
+    GENRE_VOCABULARY,
+    MOOD_VOCABULARY,
+)
+from kryten_playlist.storage.people import person_key, surname_key
+from kryten_playlist.storage.popularity import materialize_popularity
+from kryten_playlist.storage.sampling import sample_rows
+from kryten_playlist.storage.schema import init_catalog_schema
+
+ITEMS = int(os.environ.get("KRYTEN_QUERY_PLAN_ITEMS", "100000"))
+ROUNDS = int(os.environ.get("KRYTEN_QUERY_PLAN_ROUNDS", "10"))
+REPORT = os.environ.get("KRYTEN_QUERY_PLAN_REPORT")
+
+# catalog_item as kryten-llm writes it, before init_catalog_schema runs
+_ITEM_DDL = """
+CREATE TABLE catalog_item (
+    video_id TEXT PRIMARY KEY,
+    raw_title TEXT NOT NULL,
+    thumbnail_url TEXT,
+    duration_seconds INTEGER,
+    sanitized_title TEXT NOT NULL,
+    title_base TEXT NOT NULL,
+    year INTEGER,
+    season INTEGER,
+    episode INTEGER,
+    episode_title TEXT,
+    is_tv INTEGER NOT NULL DEFAULT 0,
+    synopsis TEXT,
+    cast_list TEXT,
+    director TEXT,
+    genre TEXT,
+    mood TEXT,
+    era TEXT,
+    llm_notes TEXT,
+    weekend_only INTEGER NOT NULL DEFAULT 0,
+    snapshot_id TEXT,
+    created_at TEXT NOT NULL DEFAULT (datetime('now')),
+    llm_enriched_at TEXT,
+    mediacms_category TEXT NULL
+)
+"""
+
+_WORDS = (
+    "night dead dawn star space island lake house return revenge city dark blood moon "
+    "shadow zombie alien robot mountain river love last first killer ghost planet war"
+).split()
+_PEOPLE = [f"{first} {last}" for first in ("Ken", "Ann", "Joe", "Mia", "Sam", "Liv") for last in (
+    "Foree", "Jones", "Romero", "Carpenter", "Hooper", "Craven", "Cunningham", "Raimi"
+)]
+_CATEGORIES = ["Movies"] * 12 + ["TV"] * 6 + ["Cartoons", "Documentaries", "Uncategorized", None]
+
+
+def _rows(n: int, rng: random.Random) -> list[tuple]:
+    genres, moods, eras = list(GENRE_VOCABULARY), list(MOOD_VOCABULARY), list(ERA_VOCABULARY)
+    rows = []
+    series = 0
+    i = 0
+    while i < n:
+        title = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 4))).title()
+        category = rng.choice(_CATEGORIES)
+        episodes = rng.randint(4, 40) if category == "TV" else 1
+        series += 1
+        for e in range(min(episodes, n - i)):
+            is_tv = episodes > 1
+            season, episode = (e // 12 + 1, e % 12 + 1) if is_tv else (None, None)
+            name = f"{title} S{season:02d}E{episode:02d}" if is_tv else title
+            enriched = rng.random() < 0.9
+            rows.append((
+                f"vid{i:07d}", f"{name} [{series}].mp4", f"https://example.invalid/{i}.jpg",
+                rng.randint(1200, 3000) if is_tv else rng.randint(4800, 9000) if rng.random() < 0.97 else None,
+                name, title, rng.randint(1930, 2024), season, episode, is_tv,
+                f"Synthetic synopsis {i} about the {rng.choice(_WORDS)}." if enriched else None,
+                json.dumps(rng.sample(_PEOPLE, 3)) if enriched else None,
+                rng.choice(_PEOPLE) if enriched else None,
+                rng.choice(genres) if enriched else None,
+                rng.choice(moods) if enriched else None,
+                rng.choice(eras) if enriched else None,
+                int(rng.random() < 0.05), "bench",
+                f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                "2025-01-01T00:00:00+00:00" if enriched else None, category,
+            ))
+            i += 1
+    return rows
+
+
+_COLUMNS = (
+    "video_id, raw_title, thumbnail_url, duration_seconds, sanitized_title, title_base, year, "
+    "season, episode, is_tv, synopsis, cast_list, director, genre, mood, era, weekend_only, "
+    "snapshot_id, created_at, llm_enriched_at, mediacms_category"
+)
+
+
+async def _insert_rows(conn: aiosqlite.Connection, rows: list[tuple], extra: str = "") -> None:
+    columns = _COLUMNS + extra
+    placeholders = ", ".join("?" * len(rows[0]))
+    await conn.executemany(f"INSERT INTO catalog_item ({columns}) VALUES ({placeholders})", rows)
+
+
+async def _enhanced_catalog(path: str) -> aiosqlite.Connection:
+    conn = await aiosqlite.connect(path)
+    conn.row_factory = aiosqlite.Row
+    await init_enhanced_schema(conn)
+    rows = _rows(ITEMS, random.Random(17))
+
+    # Bulk load: without the per-row FTS/trigram sync triggers, then let
+    # init_enhanced_schema put them back and rebuild both indexes at once.
+    # Facet ids and people are written directly, as enrichment would.
+    await conn.execute("DROP TRIGGER catalog_fts_insert")
+    await conn.execute("DROP TRIGGER catalog_title_trgm_insert")
+    facet_ids = {}
+    for facet, table in FACET_TABLES.items():
+        cursor = await conn.execute(f"SELECT name, id FROM {table}")
+        facet_ids[facet] = dict(await cursor.fetchall())
+    await _insert_rows(
+        conn,
+        [(*r, facet_ids["genre"].get(r[13]), facet_ids["mood"].get(r[14]), facet_ids["era"].get(r[15])) for r in rows],
+        ", genre_id, mood_id, era_id",
+    )
+    await conn.executemany(
+        "INSERT INTO catalog_person (name, name_key, surname_key) VALUES (?, ?, ?)",
+        [(name, person_key(name), surname_key(person_key(name))) for name in _PEOPLE],
+    )
+    cursor = await conn.execute("SELECT name, id FROM catalog_person")
+    person_ids = dict(await cursor.fetchall())
+    credits = []
+    for r in rows:
+        if r[11]:
+            credits.extend((r[0], person_ids[name], "actor", n) for n, name in enumerate(json.loads(r[11])))
+            credits.append((r[0], person_ids[r[12]], "director", 0))
+    await conn.executemany(
+        "INSERT INTO item_person (video_id, person_id, role, billing) VALUES (?, ?, ?, ?)", credits
+    )
+
+    await conn.execute(
+        "INSERT INTO catalog_category (name) SELECT DISTINCT mediacms_category FROM catalog_item "
+        "WHERE mediacms_category IS NOT NULL"
+    )
+    await conn.execute(
+        "INSERT INTO catalog_item_category (video_id, category_id) SELECT ci.video_id, cc.id "
+        "FROM catalog_item ci JOIN catalog_category cc ON cc.name = ci.mediacms_category"
+    )
+    await conn.execute("INSERT INTO catalog_tag (name) VALUES ('gore'), ('cult'), ('holiday')")
+    await conn.execute(
+        "INSERT INTO catalog_item_tag (video_id, tag_id) "
+        "SELECT video_id, 1 + rowid % 3 FROM catalog_item WHERE rowid % 7 = 0"
+    )
+    await conn.commit()
+    await init_enhanced_schema(conn)
+    await mark_catalog_changed(conn, snapshot_id="bench")
+    await conn.commit()
+    rng = random.Random(5)
+    await materialize_popularity(
+        conn, {f"vid{rng.randrange(ITEMS):07d}": rng.randint(1, 500) for _ in range(ITEMS // 20)}, {}
+    )
+    return conn
+
+
+async def _legacy_catalog(path: str) -> aiosqlite.Connection:
+    conn = await aiosqlite.connect(path)
+    conn.row_factory = aiosqlite.Row
+    await conn.execute(_ITEM_DDL)
+    await _insert_rows(conn, _rows(ITEMS, random.Random(17)))
+    await init_catalog_schema(conn)
+    await conn.execute(
+        "INSERT INTO catalog_category (category) SELECT DISTINCT mediacms_category FROM catalog_item "
+        "WHERE mediacms_category IS NOT NULL"
+    )
+    await conn.execute(
+        "INSERT INTO catalog_item_category (video_id, category) "
+        "SELECT video_id, mediacms_category FROM catalog_item WHERE mediacms_category IS NOT NULL"
+    )
+    await conn.commit()
+    return conn
+
+
+class _PlanRecorder:
+    """Connection wrapper that EXPLAINs each SELECT before running it.
+
+    Explaining in place (rather than afterwards) keeps temp tables the
+    statement depends on, such as ``temp.lookup_ids``, in scope.
+    """
+
+    def __init__(self, conn: aiosqlite.Connection):
+        self._conn = conn
+        self.plans: list[tuple[str, list[str]]] = []
+
+    async def execute(self, sql: str, *args: Any):
+        if sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            cursor = await self._conn.execute(f"EXPLAIN QUERY PLAN {sql}", *args)
+            self.plans.append((sql, [str(r[3]) for r in await cursor.fetchall()]))
+        return await self._conn.execute(sql, *args)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+
+# A plan line that reads the whole of catalog_item without an index
+_TABLE_SCAN = re.compile(r"^SCAN (catalog_item|ci)$")
+# catalog_fts probed by rowid, i.e. the MATCH re-evaluated once per outer row
+_FTS_PER_ROW = re.compile(r"^SCAN catalog_fts VIRTUAL TABLE INDEX \d+:=")
+
+
+@dataclass(frozen=True)
+class Shape:
+    name: str
+    run: Callable[[CatalogRepository, Any], Awaitable[Any]]
+    schemas: tuple[str, ...] = ("enhanced", "legacy")
+    # Why a full scan of catalog_item is expected, if it is
+    scan_reason: Optional[str] = None
+
+
+def _search_shape(**kwargs: Any) -> Callable[[CatalogRepository, Any], Awaitable[Any]]:
+    async def run(repo: CatalogRepository, conn: Any) -> Any:
+        params = dict(kwargs)
+        return await repo.search(
+            q=params.pop("q", None), categories=params.pop("categories", []), limit=50, offset=0, **params
+        )
+
+    return run
+
+
+async def _next_page(repo: CatalogRepository, conn: Any) -> Any:
+    first = await repo.search(q=None, categories=[], limit=50, offset=0, sort="year")
+    return await repo.search(q=None, categories=[], limit=50, offset=0, sort="year", cursor=first.next_cursor)
+
+
+def _fit(**kwargs: Any) -> Callable[[CatalogRepository, Any], Awaitable[Any]]:
+    return lambda repo, conn: fit_to_duration(conn, 4 * 3600, **kwargs)
+
+
+def _enrichment(**kwargs: Any) -> Callable[[CatalogRepository, Any], Awaitable[Any]]:
+    async def run(repo: CatalogRepository, conn: Any) -> Any:
+        count_sql, select_sql = enrichment_selector(limit=100, **kwargs)
+        await (await conn.execute(count_sql)).fetchone()
+        return await (await conn.execute(select_sql)).fetchall()
+
+    return run
+
+
+def _sample(**kwargs: Any) -> Callable[[CatalogRepository, Any], Awaitable[Any]]:
+    async def run(repo: CatalogRepository, conn: Any) -> Any:
+        where = enrichment_filter(**kwargs)
+        return [row async for row in sample_rows(conn, ENRICHMENT_COLUMNS, where, k=100, seed=1)]
+
+    return run
+
+
+_IDS_SMALL = [f"vid{i:07d}" for i in range(0, 5000, 250)]
+_IDS_LARGE = [f"vid{i:07d}" for i in range(0, 50000, 100)]
+
+SHAPES = [
+    # CatalogRepository.search
+    Shape("search browse", _search_shape()),
+    Shape("search text", _search_shape(q="night"), ("enhanced",)),
+    # LIKE '%text%' is tested per row, but only along the visible-subset index
+    Shape("search text (legacy LIKE)", _search_shape(q="night"), ("legacy",)),
+    Shape("search text + genre", _search_shape(q="dead", genre="Horror"), ("enhanced",)),
+    Shape("search genre", _search_shape(genre="Horror"), ("enhanced",)),
+    Shape("search mood + era", _search_shape(mood="Dark", era="1980s"), ("enhanced",)),
+    Shape("search category", _search_shape(categories=["Cartoons"]), ("enhanced",)),
+    Shape("search series", _search_shape(series="Night Dead"), ("enhanced",)),
+    Shape("search actor", _search_shape(actor="Ken Foree"), ("enhanced",)),
+    Shape("search director", _search_shape(director="Joe Romero"), ("enhanced",)),
+    Shape("search query language", _search_shape(q="genre:horror -tag:gore dur:<90m"), ("enhanced",)),
+    Shape("search tag", _search_shape(q="tag:cult"), ("enhanced",)),
+    Shape("search duration range", _search_shape(min_duration=5400, max_duration=6000), ("enhanced",)),
+    Shape("search year range", _search_shape(year_from=1980, year_to=1984), ("enhanced",)),
+    Shape("search sort duration", _search_shape(sort="duration"), ("enhanced",)),
+    Shape("search sort recent", _search_shape(sort="recent"), ("enhanced",)),
+    Shape("search sort popular", _search_shape(sort="popular"), ("enhanced",)),
+    Shape("search cursor page", _next_page, ("enhanced",)),
+    Shape("search fuzzy", _search_shape(q="nite of the dedd", fuzzy=True), ("enhanced",)),
+    Shape(
+        "search group_by series",
+        lambda repo, conn: repo.search_series(SearchFilters(genre="Horror"), limit=50, offset=0),
+        ("enhanced",),
+    ),
+    Shape(
+        "series episodes",
+        lambda repo, conn: repo.get_series_episodes("Night Dead"),
+        ("enhanced",),
+    ),
+    # Lookups by id
+    Shape("items by ids (inline)", lambda repo, conn: repo.get_items_by_video_ids(_IDS_SMALL)),
+    Shape("items by ids (temp table)", lambda repo, conn: repo.get_items_by_video_ids(_IDS_LARGE)),
+    Shape("item by id", lambda repo, conn: repo.get_item("vid0001234")),
+    # Duration fitting
+    Shape("fit random", _fit(), ("enhanced",)),
+    Shape("fit tv by duration", _fit(filter_tv=True, order_by="duration_desc"), ("enhanced",)),
+    Shape("fit genre + era", _fit(filter_genre="Horror", filter_era="1980s"), ("enhanced",)),
+    Shape("fit categories", _fit(filter_categories=["Cartoons"]), ("enhanced",)),
+    Shape("fit tags", _fit(filter_tags=["cult"], exclude_weekend_only=True), ("enhanced",)),
+    # Enrichment selectors
+    Shape("enrich pending", _enrichment(), ("enhanced",)),
+    Shape("enrich pending tv", _enrichment(tv_only=True), ("enhanced",)),
+    Shape("enrich re-verify", _enrichment(enriched_only=True), ("enhanced",)),
+    Shape("enrich all by title", _enrichment(force_all=True), ("enhanced",)),
+    Shape("enrich sample", _sample(), ("enhanced",)),
+    Shape("enrich sample tv", _sample(tv_only=True), ("enhanced",)),
+]
+
+_latencies: dict[str, dict[str, float]] = {}
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def catalogs(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("query_plans")
+    started = time.perf_counter()
+    conns = {
+        "enhanced": await _enhanced_catalog(str(tmp / "enhanced.sqlite3")),
+        "legacy": await _legacy_catalog(str(tmp / "legacy.sqlite3")),
+    }
+    print(f"\nloaded {ITEMS} items into both schemas in {time.perf_counter() - started:.1f}s")
+    yield conns
+    for conn in conns.values():
+        await conn.close()
+
+    width = max(len(k) for k in _latencies) if _latencies else 0
+    for key, stats in sorted(_latencies.items()):
+        print(f"  {key:<{width}}  p50 {stats['p50_ms']:8.3f} ms   p95 {stats['p95_ms']:8.3f} ms")
+    if REPORT:
+        with open(REPORT, "w", encoding="utf-8") as fh:
+            json.dump({"items": ITEMS, "rounds": ROUNDS, "shapes": _latencies}, fh, indent=2, sort_keys=True)
+
+
+@pytest.mark.asyncio(loop_scope="module")
+@pytest.mark.parametrize(
+    ("schema", "shape"),
+    [(schema, shape) for shape in SHAPES for schema in shape.schemas],
+    ids=[f"{schema}: {shape.name}" for shape in SHAPES for schema in shape.schemas],
+)
+async def test_query_plan(catalogs, schema: str, shape: Shape):
+    recorder = _PlanRecorder(catalogs[schema])
+    repo = CatalogRepository(recorder)
+    await shape.run(repo, recorder)
+
+    statements = [(sql, plan) for sql, plan in recorder.plans if "catalog_item" in sql]
+    assert statements, f"{shape.name} ran no catalog_item queries"
+    scans = [
+        (" ".join(sql.split()), plan)
+        for sql, plan in statements
+        if any(_TABLE_SCAN.match(line) for line in plan)
+    ]
+    if shape.scan_reason is None:
+        assert not scans, f"unexpected SCAN catalog_item in {shape.name}: {scans}"
+    else:
+        assert scans, f"{shape.name} no longer scans catalog_item; drop its scan_reason"
+    per_row = [" ".join(sql.split()) for sql, plan in statements if any(_FTS_PER_ROW.match(line) for line in plan)]
+    assert not per_row, f"catalog_fts is not the outer loop in {shape.name}: {per_row}"
+
+    samples = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        await shape.run(CatalogRepository(catalogs[schema]), catalogs[schema])
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    _latencies[f"{schema}: {shape.name}"] = {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[max(0, int(len(samples) * 0.95) - 1)], 3),
+    }
@@ -0,0 +1,101 @@
+"""Tests for rowid-probing random sampling."""
+
+from __future__ import annotations
+
+from collections import Counter
+
+import aiosqlite
+import pytest
+import pytest_asyncio
+
+from kryten_playlist.storage.sampling import sample_rows
+
+
+@pytest_asyncio.fixture
+async def db():
+    conn = await aiosqlite.connect(":memory:")
+    await conn.execute("CREATE TABLE catalog_item (video_id TEXT PRIMARY KEY, n INTEGER NOT NULL)")
+    await conn.executemany(
+        "INSERT INTO catalog_item (video_id, n) VALUES (?, ?)", [(f"v{i}", i) for i in range(1000)]
+    )
+    # Holes in the rowid range, as left behind by deletes
+    await conn.execute("DELETE FROM catalog_item WHERE n BETWEEN 200 AND 399")
+    await conn.commit()
+    yield conn
+    await conn.close()
+
+
+async def _sample(conn, where="", params=(), **kwargs) -> list[int]:
+    return [n for (n,) in [row async for row in sample_rows(conn, "n", where, params, **kwargs)]]
+
+
+@pytest.mark.asyncio
+async def test_seeded_samples_repeat(db):
+    first = await _sample(db, k=20, seed=11)
+    assert first == await _sample(db, k=20, seed=11)
+    assert first != await _sample(db, k=20, seed=12)
+    assert len(set(first)) == 20
+    assert not any(200 <= n <= 399 for n in first)
+
+
+@pytest.mark.asyncio
+async def test_exhausting_the_sampler_yields_every_match_once(db):
+    rows = await _sample(db, "n % 7 = ?", (3,), seed=5)
+    assert sorted(rows) == [n for n in range(1000) if n % 7 == 3 and not 200 <= n <= 399]
+
+    # k larger than the candidate set stops at the candidates
+    assert sorted(await _sample(db, "n >= ?", (995,), k=50, seed=1)) == [995, 996, 997, 998, 999]
+    assert await _sample(db, "n < 0") == []
+    assert await _sample(db, k=0) == []
+
+
+@pytest.mark.asyncio
+async def test_probing_does_not_enumerate(db, monkeypatch):
+    statements: list[str] = []
+    execute = db.execute
+
+    async def recording_execute(sql, *args):
+        statements.append(sql)
+        return await execute(sql, *args)
+
+    monkeypatch.setattr(db, "execute", recording_execute)
+    rows = await _sample(db, "n % 2 = 0", k=10, seed=3)
+    assert len(rows) == 10 and all(n % 2 == 0 for n in rows)
+    # The bounds, then a single batch of probes
+    assert len(statements) == 2
+
+    # Too sparse to probe: enumerate the few candidates instead
+    statements.clear()
+    assert sorted(await _sample(db, "n % 100 = ?", (7,), seed=3)) == [7, 107, 407, 507, 607, 707, 807, 907]
+    assert any(sql.startswith("SELECT rowid FROM") for sql in statements)
+    assert len(statements) < 8
+
+
+@pytest.mark.asyncio
+async def test_draws_are_spread_over_the_catalog(db):
+    counts = Counter()
+    for seed in range(200):
+        for n in await _sample(db, k=5, seed=seed):
+            counts[n // 200] += 1
+    # Rows after the deleted 200..399 gap are not favoured: each populated
+    # fifth of the range gets about a quarter of the draws
+    assert set(counts) == {0, 2, 3, 4}
+    assert all(150 < c < 350 for c in counts.values())
+
+
+@pytest.mark.asyncio
+async def test_statements_bind_a_few_bounded_sizes(db, monkeypatch):
+    sizes: list[int] = []
+    execute = db.execute
+
+    async def recording_execute(sql, *args):
+        if "rowid IN (" in sql:
+            sizes.append(sql.split("rowid IN (", 1)[1].split(")", 1)[0].count("?"))
+        return await execute(sql, *args)
+
+    monkeypatch.setattr(db, "execute", recording_execute)
+    # Probing batches, then enumeration chunks
+    assert len(await _sample(db, k=700, seed=2)) == 700
+    assert len(await _sample(db, "n % 3 = ?", (1,), seed=2)) == 267
+    assert set(sizes) <= {64, 128, 256, 512}
+    assert 512 in sizes
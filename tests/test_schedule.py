@@ -0,0 +1,151 @@
+"""Tests for the multi-block schedule planner."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import aiosqlite
+import pytest
+import pytest_asyncio
+
+from kryten_playlist.catalog.enhanced_schema import init_enhanced_schema
+from kryten_playlist.catalog.schedule import ScheduleBlock, plan_schedule, repeat_daily
+from kryten_playlist.catalog.synth import SynthOptions, write_synth_catalog
+from kryten_playlist.storage.facets import set_item_facets
+
+# A Monday
+MONDAY = datetime(2025, 3, 3, tzinfo=timezone.utc)
+
+
+def _block(day: int, hour: int, hours: float, **kwargs) -> ScheduleBlock:
+    start = MONDAY + timedelta(days=day, hours=hour)
+    return ScheduleBlock(start=start, end=start + timedelta(hours=hours), **kwargs)
+
+
+@pytest_asyncio.fixture
+async def db():
+    conn = await aiosqlite.connect(":memory:")
+    conn.row_factory = aiosqlite.Row
+    await init_enhanced_schema(conn)
+    items = [
+        # video_id, duration, is_tv, weekend_only, prime_time_only, holiday_content
+        ("plain1", 1800, 0, 0, 0, 0),
+        ("plain2", 1800, 0, 0, 0, 0),
+        ("plain3", 3600, 0, 0, 0, 0),
+        ("tv1", 1800, 1, 0, 0, 0),
+        ("weekend", 1800, 0, 1, 0, 0),
+        ("prime", 1800, 0, 0, 1, 0),
+        ("xmas", 1800, 0, 0, 0, 1),
+    ]
+    for vid, duration, is_tv, weekend, prime, holiday in items:
+        await conn.execute(
+            "INSERT INTO catalog_item (video_id, raw_title, sanitized_title, title_base, duration_seconds, "
+            "is_tv, weekend_only, prime_time_only, holiday_content) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (vid, vid, vid, vid, duration, is_tv, weekend, prime, holiday),
+        )
+    await set_item_facets(conn, "plain3", genre="Horror")
+    await conn.commit()
+    yield conn
+    await conn.close()
+
+
+def _ids(plan, n):
+    return sorted(it["video_id"] for it in plan.blocks[n].result.items)
+
+
+@pytest.mark.asyncio
+async def test_flags_decide_where_items_play(db):
+    plan = await plan_schedule(
+        db,
+        [
+            _block(0, 9, 1),  # weekday morning
+            _block(5, 20, 0.5),  # Saturday prime time
+            _block(24, 9, 0.5, holiday=True),
+        ],
+        seed=1,
+    )
+    morning, saturday, holiday = (_ids(plan, n) for n in range(3))
+    assert "weekend" not in morning and "prime" not in morning and "xmas" not in morning
+    assert holiday == ["xmas"]
+    assert saturday and "xmas" not in saturday
+    assert plan.blocks[0].utilization == 100.0
+    assert plan.blocks[2].result.slack == 0
+
+
+@pytest.mark.asyncio
+async def test_blocks_share_one_pool_without_repeats(db):
+    statements: list[str] = []
+    await db.set_trace_callback(statements.append)
+    try:
+        plan = await plan_schedule(
+            db,
+            [
+                _block(0, 9, 1, filter_tv=False),
+                _block(0, 10, 1, filter_tv=False),
+                _block(0, 11, 1, filter_genre="horror"),
+                _block(0, 12, 0.5, filter_tv=True),
+            ],
+            seed=3,
+        )
+    finally:
+        await db.set_trace_callback(None)
+    # One facet lookup and one pool query, however many blocks
+    assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 2
+
+    # The horror block is the narrowest, so it gets plain3 before the
+    # general movie blocks can use it up
+    assert _ids(plan, 2) == ["plain3"]
+    assert _ids(plan, 3) == ["tv1"]
+    scheduled = [vid for n in range(4) for vid in _ids(plan, n)]
+    assert len(scheduled) == len(set(scheduled))
+    assert [b.eligible for b in plan.blocks][2:] == [1, 1]
+
+
+@pytest.mark.asyncio
+async def test_plan_validation_and_empty(db):
+    with pytest.raises(ValueError):
+        await plan_schedule(db, [_block(0, 9, 2), _block(0, 10, 1)])
+    plan = await plan_schedule(db, [])
+    assert plan.blocks == [] and plan.utilization == 0.0
+
+    plan = await plan_schedule(db, [_block(0, 9, 1, filter_genre="Western")])
+    assert plan.blocks[0].result.items == []
+
+
+@pytest.mark.asyncio
+async def test_week_plan_over_synthetic_catalog():
+    conn = await aiosqlite.connect(":memory:")
+    conn.row_factory = aiosqlite.Row
+    try:
+        await write_synth_catalog(conn, SynthOptions(count=4000, seed=9))
+        day = [
+            ScheduleBlock(MONDAY + timedelta(hours=8), MONDAY + timedelta(hours=12), "morning", filter_tv=True),
+            ScheduleBlock(MONDAY + timedelta(hours=19), MONDAY + timedelta(hours=23), "prime", filter_tv=False),
+            ScheduleBlock(MONDAY + timedelta(hours=23), MONDAY + timedelta(hours=26), "late", filter_genre="Horror"),
+        ]
+        blocks = repeat_daily(day, 7)
+        plan = await plan_schedule(conn, blocks, seed=4)
+        again = await plan_schedule(conn, blocks, seed=4)
+
+        assert [b.block.start for b in plan.blocks] == sorted(b.start for b in blocks)
+        assert [b.result.items for b in plan.blocks] == [b.result.items for b in again.blocks]
+        assert plan.utilization > 99.0
+
+        scheduled = [it["video_id"] for b in plan.blocks for it in b.result.items]
+        assert len(scheduled) == len(set(scheduled))
+        for block_plan in plan.blocks:
+            block = block_plan.block
+            ids = [it["video_id"] for it in block_plan.result.items]
+            cursor = await conn.execute(
+                f"SELECT MAX(weekend_only), MAX(prime_time_only), MAX(holiday_content), "
+                f"MIN(is_tv), MAX(is_tv) FROM catalog_item WHERE video_id IN ({','.join('?' * len(ids))})",
+                ids,
+            )
+            weekend, prime, holiday, min_tv, max_tv = await cursor.fetchone()
+            assert holiday == 0
+            assert not weekend or block.is_weekend
+            assert not prime or block.is_prime_time
+            if block.filter_tv is not None:
+                assert min_tv == max_tv == int(block.filter_tv)
+    finally:
+        await conn.close()
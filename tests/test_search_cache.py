@@ -0,0 +1,115 @@
+"""Tests for the catalog search result cache."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from kryten_playlist.storage.search_cache import (
+    SearchResultCache,
+    TotalsCache,
+    invalidate_search_caches,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = SearchResultCache(ttl_seconds=60, clock=clock)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        return ["Movies"]
+
+    assert await cache.get_or_compute("s#1", ("categories",), compute) == ["Movies"]
+    clock.now += 59
+    await cache.get_or_compute("s#1", ("categories",), compute)
+    assert calls == 1
+
+    clock.now += 2
+    await cache.get_or_compute("s#1", ("categories",), compute)
+    assert calls == 2
+    assert cache.stats()["expirations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_version_scope():
+    cache = SearchResultCache(max_entries=2)
+
+    async def value(v):
+        return v
+
+    for key in ("a", "b", "c"):
+        await cache.get_or_compute("s#1", key, lambda k=key: value(k))
+    assert len(cache) == 2
+    assert cache.get("s#1", "a") is None
+    assert cache.get("s#1", "c") == "c"
+
+    # A new catalog version starts from an empty cache
+    assert cache.get("s#2", "c") is None
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_compute_once():
+    cache = SearchResultCache()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"total": 3}
+
+    results = await asyncio.gather(*(cache.get_or_compute("s#1", "q", compute) for _ in range(5)))
+
+    assert calls == 1
+    assert all(r is results[0] for r in results)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (4, 1)
+    assert stats["hit_rate"] == 0.8
+
+
+@pytest.mark.asyncio
+async def test_failed_compute_is_not_cached():
+    cache = SearchResultCache()
+
+    async def boom():
+        raise RuntimeError("db gone")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_compute("s#1", "q", boom)
+    assert len(cache) == 0
+
+    async def ok():
+        return "fine"
+
+    assert await cache.get_or_compute("s#1", "q", ok) == "fine"
+
+
+@pytest.mark.asyncio
+async def test_invalidate_hook_clears_every_live_cache():
+    results = SearchResultCache()
+    totals = TotalsCache()
+
+    async def value():
+        return 1
+
+    await results.get_or_compute("s#1", "q", value)
+    totals.put("s#1", "sig", 7)
+
+    invalidate_search_caches()
+
+    assert len(results) == 0
+    assert len(totals) == 0
@@ -0,0 +1,170 @@
+"""Tests for the search query language and its SQL compilation."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import aiosqlite
+import httpx
+import pytest
+import pytest_asyncio
+from conftest import insert_item
+
+from kryten_playlist.storage.catalog_repo import CatalogRepository, SearchFilters
+from kryten_playlist.storage.catalog_schema import get_catalog_schema
+from kryten_playlist.storage.schema import init_catalog_schema
+from kryten_playlist.storage.search_query import (
+    Match,
+    Not,
+    QuerySyntaxError,
+    Range,
+    Text,
+    compile_query,
+    parse_query,
+    plan_cache_stats,
+)
+from kryten_playlist.web.app import create_app
+
+
+@pytest_asyncio.fixture
+async def db(catalog_db):
+    conn = catalog_db
+
+    await insert_item(
+        conn, "v1", "Night of the Living Dead", genre="Horror", era="1960s",
+        director="George A. Romero", duration_seconds=5760, year=1968,
+    )
+    await insert_item(
+        conn, "v2", "Dawn of the Dead", genre="Horror", era="1970s",
+        cast_list='["Ken Foree"]', director="George A. Romero", duration_seconds=7620, year=1978,
+    )
+    await insert_item(conn, "v3", "The Evil Dead", genre="Horror", era="1980s", duration_seconds=5100, year=1981)
+    await insert_item(conn, "v4", "Re-Animator", genre="Horror", era="1980s", duration_seconds=5160, year=1985)
+    await insert_item(conn, "v5", "Night Shift", genre="Comedy", era="1980s", duration_seconds=6360, year=1982)
+    await conn.execute("INSERT INTO catalog_tag (id, name) VALUES (1, 'gore')")
+    await conn.execute("INSERT INTO catalog_item_tag (video_id, tag_id) VALUES ('v4', 1)")
+    await conn.execute("INSERT INTO catalog_category (id, name) VALUES (1, 'Movies')")
+    await conn.execute(
+        "INSERT INTO catalog_item_category (video_id, category_id) SELECT video_id, 1 FROM catalog_item"
+    )
+    await conn.commit()
+
+    yield conn
+
+
+def test_parse_builds_ast_and_renders_canonical_text():
+    query = parse_query('Genre:Horror era:80s -tag:Gore "Night of" dur:<90m year:1970-1979 trek:tng')
+    assert query.terms == (
+        Match("genre", "Horror"),
+        Match("era", "1980s"),
+        Not(Match("tag", "gore")),
+        Text("night of", phrase=True),
+        Range("duration", None, 5399),
+        Range("year", 1970, 1979),
+        Text("trek:tng"),
+    )
+    assert str(query) == 'genre:Horror era:1980s -tag:gore "night of" duration:<=5399s year:1970-1979 trek:tng'
+    assert parse_query(str(query)) == query
+    assert query.text == "night of trek:tng"
+    assert str(query.without_text()).startswith("genre:Horror")
+
+    assert parse_query("dur:1h30m-2h").terms == (Range("duration", 5400, 7200),)
+    assert parse_query("dur:>90").terms == (Range("duration", 5401, None),)
+    with pytest.raises(QuerySyntaxError):
+        parse_query("year:80s")
+    with pytest.raises(QuerySyntaxError):
+        parse_query("dur:<soon")
+    # Too long to bind as a 64-bit integer, or to mean anything
+    for text in ("dur:99999999999999999999999", "dur:<99999999999999999999h", "dur:1-9000000h"):
+        with pytest.raises(QuerySyntaxError):
+            parse_query(text)
+
+
+@pytest.mark.asyncio
+async def test_compile_uses_indexes_and_caches_by_normalized_text(db):
+    schema = await get_catalog_schema(db, db)
+    compiled = compile_query("genre:horror  -tag:gore dead dur:<90m", schema)
+    assert compiled.fts == '({sanitized_title title_base} : ("dead"*))'
+    assert compiled.plan == (
+        "text: catalog_fts MATCH",
+        "genre: index on genre_id",
+        "tag: catalog_item_tag lookup",
+        "duration: range on duration_seconds",
+    )
+    assert compiled.params == ("Horror", "gore", 5399)
+
+    before = plan_cache_stats()["hits"]
+    assert compile_query("GENRE:Horror -tag:gore  DEAD dur:<90m", schema) is compiled
+    assert plan_cache_stats()["hits"] == before + 1
+
+
+@pytest.mark.asyncio
+async def test_search_with_query_language(db):
+    repo = CatalogRepository(db)
+
+    async def ids(q: str) -> list[str]:
+        res = await repo.search(q=q, categories=[], limit=20, offset=0)
+        return sorted(item["video_id"] for item in res.items)
+
+    assert await ids("genre:horror era:1980s") == ["v3", "v4"]
+    assert await ids("genre:horror era:1980s -tag:gore") == ["v3"]
+    assert await ids('"night of"') == ["v1"]
+    assert await ids("night -shift") == ["v1"]
+    assert await ids("dur:<90m") == ["v3", "v4"]
+    assert await ids("dur:90m-2h year:>=1980") == ["v5"]
+    assert await ids("dead director:romero -actor:foree") == ["v1"]
+    assert await ids("cat:movies -genre:horror") == ["v5"]
+
+    # Facet counts take the same language
+    counts = await repo.facet_counts(SearchFilters(q="era:1980s"))
+    assert dict(counts["genre"]) == {"Horror": 2, "Comedy": 1}
+
+    with pytest.raises(ValueError):
+        await repo.search(q="year:soon", categories=[], limit=20, offset=0)
+
+
+@pytest.mark.asyncio
+async def test_explain_reports_plan_and_sqlite_plan(db):
+    repo = CatalogRepository(db)
+    plan = await repo.explain_search(SearchFilters(q="Dead genre:horror dur:<90m"))
+
+    assert plan.query == "dead genre:Horror duration:<=5399s"
+    assert plan.plan[-1].startswith("order: bm25 rank")
+    assert "catalog_fts MATCH ?" in plan.sql
+    assert any("catalog_fts VIRTUAL TABLE" in row for row in plan.sqlite_plan)
+    assert plan.params[-2:] == [50, 0]
+
+    again = await repo.explain_search(SearchFilters(q="dead  GENRE:horror dur:<90m"))
+    assert again.plan_cached is True
+
+
+@pytest.mark.asyncio
+async def test_legacy_schema_falls_back_to_like():
+    conn = await aiosqlite.connect(":memory:")
+    conn.row_factory = aiosqlite.Row
+    try:
+        await init_catalog_schema(conn)
+        schema = await get_catalog_schema(conn, conn)
+        compiled = compile_query('"night of" -dead', schema)
+        assert compiled.fts is None
+        assert compiled.where == ("(ci.title LIKE ?)", "((ci.title LIKE ?)) IS NOT 1")
+        assert compiled.params == ("%night of%", "%dead%")
+        with pytest.raises(QuerySyntaxError):
+            compile_query("tag:gore", schema)
+    finally:
+        await conn.close()
+
+
+@pytest.mark.asyncio
+async def test_routes_reject_bad_queries_with_400(db):
+    app = create_app()
+    app.state.config = SimpleNamespace(disable_auth=True, blessed_users=[])
+    app.state.sqlite = db
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for path in ("/api/v1/catalog/search", "/api/v1/catalog/facets"):
+            for q in ("year:abc", "dur:99999999999999999999999"):
+                resp = await client.get(path, params={"q": q})
+                assert resp.status_code == 400, (path, q)
+        resp = await client.get("/api/v1/catalog/facets", params={"q": "genre:horror"})
+        assert resp.status_code == 200
@@ -0,0 +1,95 @@
+"""Tests for range filters and index-backed search sorts."""
+
+from __future__ import annotations
+
+import pytest
+import pytest_asyncio
+from conftest import insert_item
+
+from kryten_playlist.storage.catalog_repo import CatalogRepository, SearchFilters
+from kryten_playlist.storage.popularity import materialize_popularity
+
+
+@pytest_asyncio.fixture
+async def db(catalog_db):
+    conn = catalog_db
+
+    items = [
+        ("v1", "Night of the Living Dead", 5760, 1968, "2025-01-05"),
+        ("v2", "Dawn of the Dead", 7620, 1978, "2025-01-01"),
+        ("v3", "The Evil Dead", 5100, 1981, "2025-01-03"),
+        ("v4", "Re-Animator", 5160, 1985, "2025-01-04"),
+        ("v5", "Night Shift", 6360, 1982, "2025-01-02"),
+    ]
+    for vid, title, duration, year, created in items:
+        await insert_item(conn, vid, title, duration_seconds=duration, year=year, created_at=created)
+    await insert_item(conn, "v6", "Unknown Runtime", created_at="2025-01-06")
+    await conn.commit()
+    await materialize_popularity(conn, {"v3": 40, "v5": 10, "v1": 1}, {})
+
+    yield conn
+
+
+async def _ids(repo: CatalogRepository, q: str | None = None, **kwargs) -> list[str]:
+    res = await repo.search(q=q, categories=[], limit=20, offset=0, **kwargs)
+    return [item["video_id"] for item in res.items]
+
+
+@pytest.mark.asyncio
+async def test_sorts_and_range_filters(db):
+    repo = CatalogRepository(db)
+
+    # Unknown durations and years are left out of those orderings
+    assert await _ids(repo, sort="duration") == ["v3", "v4", "v1", "v5", "v2"]
+    assert await _ids(repo, sort="year") == ["v4", "v5", "v3", "v2", "v1"]
+    assert await _ids(repo, sort="recent") == ["v6", "v1", "v4", "v3", "v5", "v2"]
+    assert (await _ids(repo, sort="popular"))[:3] == ["v3", "v5", "v1"]
+    assert await _ids(repo, q="dead", sort="popular") == ["v3", "v1", "v2"]
+
+    assert await _ids(repo, min_duration=5700, max_duration=7000, sort="duration") == ["v1", "v5"]
+    assert await _ids(repo, year_from=1980, year_to=1982, sort="year") == ["v5", "v3"]
+    assert await _ids(repo, q="night", year_to=1970) == ["v1"]
+
+    with pytest.raises(ValueError):
+        await repo.search(q=None, categories=[], limit=20, offset=0, sort="loudest")
+
+
+@pytest.mark.asyncio
+async def test_descending_cursor_paging(db):
+    repo = CatalogRepository(db)
+    expected = await _ids(repo, sort="recent")
+
+    seen: list[str] = []
+    cursor = None
+    while True:
+        res = await repo.search(q=None, categories=[], limit=2, offset=0, sort="recent", cursor=cursor)
+        seen.extend(item["video_id"] for item in res.items)
+        if not res.next_cursor:
+            break
+        cursor = res.next_cursor
+    assert seen == expected
+
+    # A cursor is tied to the order it was issued for
+    with pytest.raises(ValueError):
+        await repo.search(q=None, categories=[], limit=2, offset=0, sort="year", cursor=cursor)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("sort", "filters", "index"),
+    [
+        ("duration", SearchFilters(), "idx_catalog_item_duration_seconds_video"),
+        ("duration", SearchFilters(min_duration=5000, max_duration=6000), "idx_catalog_item_duration_seconds_video"),
+        ("year", SearchFilters(), "idx_catalog_item_year_video"),
+        ("recent", SearchFilters(), "idx_catalog_item_created_at_video"),
+        ("popular", SearchFilters(), "idx_catalog_popularity_score"),
+        ("title", SearchFilters(), "idx_catalog_item_visible_title"),
+    ],
+)
+async def test_sorts_walk_an_index(db, sort, filters, index):
+    await db.execute("ANALYZE")
+    repo = CatalogRepository(db)
+    plan = await repo.explain_search(filters, sort=sort)
+    sqlite_plan = " ".join(plan.sqlite_plan)
+    assert index in sqlite_plan
+    assert "TEMP B-TREE" not in sqlite_plan
@@ -0,0 +1,86 @@
+"""Tests for series-collapsed search and episode expansion."""
+
+from __future__ import annotations
+
+import pytest
+import pytest_asyncio
+from conftest import insert_item
+
+from kryten_playlist.storage.catalog_repo import CatalogRepository, SearchFilters
+
+
+@pytest_asyncio.fixture
+async def db(catalog_db):
+    conn = catalog_db
+
+    episodes = [
+        ("k3", 2, 1), ("k1", 1, 1), ("k2", 1, 2), ("k4", 2, 2),
+    ]
+    for vid, season, episode in episodes:
+        await insert_item(
+            conn, vid, f"Kolchak S{season:02d}E{episode:02d}", title_base="Kolchak: The Night Stalker",
+            season=season, episode=episode, is_tv=1, duration_seconds=3000, mediacms_category="TV",
+            episode_title=f"Episode {season}-{episode}",
+        )
+    await insert_item(
+        conn, "k5", "Kolchak S03E01", title_base="Kolchak: The Night Stalker",
+        season=3, episode=1, is_tv=1, mediacms_category="Uncategorized",
+    )
+    await insert_item(conn, "m1", "Night of the Living Dead", mediacms_category="Movies", duration_seconds=5760)
+    await insert_item(conn, "m2", "Night Shift", mediacms_category="Movies", duration_seconds=6360)
+    await conn.commit()
+
+    yield conn
+
+
+@pytest.mark.asyncio
+async def test_group_by_series_collapses_episodes(db):
+    repo = CatalogRepository(db)
+    res = await repo.search_series(SearchFilters(), limit=10, offset=0)
+
+    assert res.total == 3
+    assert [g["title_base"] for g in res.groups] == [
+        "Kolchak: The Night Stalker", "Night Shift", "Night of the Living Dead",
+    ]
+    kolchak = res.groups[0]
+    assert kolchak["episode_count"] == 4
+    assert (kolchak["first_season"], kolchak["last_season"]) == (1, 2)
+    assert kolchak["total_duration_seconds"] == 12000
+    assert kolchak["is_tv"] is True and kolchak["video_id"] is None
+    assert res.groups[1]["video_id"] == "m2"
+
+    # Text search: groups ordered by best match; uncategorized episodes counted when allowed
+    res = await repo.search_series(SearchFilters(q="night", include_uncategorized=True), limit=10, offset=0)
+    assert res.total == 3
+    assert {g["title_base"]: g["episode_count"] for g in res.groups}["Kolchak: The Night Stalker"] == 5
+
+    page = await repo.search_series(SearchFilters(), limit=1, offset=1)
+    assert [g["title_base"] for g in page.groups] == ["Night Shift"]
+    assert page.total == 3
+
+
+@pytest.mark.asyncio
+async def test_grouping_walks_season_episode_index(db):
+    repo = CatalogRepository(db)
+    schema = await repo._schema(db)
+    query = repo._build_query(schema, SearchFilters())
+    cursor = await db.execute(
+        f"EXPLAIN QUERY PLAN SELECT ci.title_base, COUNT(*) FROM {query.from_sql} {query.where_sql} "
+        "GROUP BY ci.title_base ORDER BY ci.title_base",
+        query.params,
+    )
+    plan = " ".join(str(r[3]) for r in await cursor.fetchall())
+    assert "idx_catalog_item_season_episode" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.asyncio
+async def test_series_episodes_in_order(db):
+    repo = CatalogRepository(db)
+    rows = await repo.get_series_episodes("Kolchak: The Night Stalker")
+    assert [r["video_id"] for r in rows] == ["k1", "k2", "k3", "k4"]
+    assert rows[2]["season"] == 2 and rows[2]["episode_title"] == "Episode 2-1"
+
+    rows = await repo.get_series_episodes("Kolchak: The Night Stalker", include_uncategorized=True)
+    assert rows[-1]["video_id"] == "k5"
+    assert await repo.get_series_episodes("Nope") == []
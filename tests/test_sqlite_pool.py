@@ -0,0 +1,87 @@
+"""Tests for the read-only SQLite connection pool."""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+
+import pytest
+import pytest_asyncio
+
+from kryten_playlist.catalog.enhanced_schema import init_enhanced_schema
+from kryten_playlist.storage.catalog_repo import CatalogRepository
+from kryten_playlist.storage.sqlite import ReadPool, SqliteConfig, SqliteDb
+
+
+@pytest_asyncio.fixture
+async def sqlite_db(tmp_path):
+    db = SqliteDb(SqliteConfig(path=tmp_path / "catalog.sqlite3"))
+    writer = await db.connect()
+    await init_enhanced_schema(writer)
+    await writer.execute(
+        "INSERT INTO catalog_item (video_id, raw_title, sanitized_title, title_base, snapshot_id, "
+        "mediacms_category, llm_enriched_at) "
+        "VALUES ('v1', 'Dawn of the Dead', 'Dawn of the Dead', 'Dawn of the Dead', 'snap1', 'Movies', '2025-01-01')"
+    )
+    await writer.commit()
+    yield db, writer
+    await writer.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_readers_are_read_only(sqlite_db):
+    db, _ = sqlite_db
+    pool = ReadPool(db, size=2)
+    await pool.open()
+    try:
+        async with pool.acquire() as conn:
+            with pytest.raises(sqlite3.OperationalError):
+                await conn.execute("DELETE FROM catalog_item")
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_sees_writer_commits(sqlite_db):
+    db, writer = sqlite_db
+    pool = ReadPool(db, size=2)
+    await pool.open()
+    try:
+        repo = CatalogRepository(pool)
+        assert (await repo.get_item("v1"))["title"] == "Dawn of the Dead"
+        assert await repo.get_item("v2") is None
+
+        await writer.execute(
+            "INSERT INTO catalog_item (video_id, raw_title, sanitized_title, title_base, snapshot_id, mediacms_category) "
+            "VALUES ('v2', 'Day of the Dead', 'Day of the Dead', 'Day of the Dead', 'snap1', 'Movies')"
+        )
+        await writer.commit()
+
+        assert (await repo.get_item("v2"))["title"] == "Day of the Dead"
+        res = await repo.search("dead", [], limit=10, offset=0)
+        assert [i["video_id"] for i in res.items] == ["v1"]
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics_count_waits(sqlite_db):
+    db, _ = sqlite_db
+    pool = ReadPool(db, size=1)
+    await pool.open()
+    try:
+        async def hold():
+            async with pool.acquire():
+                await asyncio.sleep(0.02)
+
+        await asyncio.gather(hold(), hold(), hold())
+
+        stats = pool.stats()
+        assert stats["size"] == 1
+        assert stats["idle"] == 1
+        assert stats["checkouts"] == 3
+        assert stats["waits"] == 2
+        assert stats["wait_max_ms"] > 0
+        assert stats["hold_p95_ms"] >= stats["hold_p50_ms"] > 0
+    finally:
+        await pool.close()
@@ -0,0 +1,167 @@
+"""Tests for the autocomplete prefix index."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import httpx
+import pytest
+import pytest_asyncio
+from conftest import insert_item
+
+from kryten_playlist.storage.catalog_meta import CatalogVersion, mark_catalog_changed
+from kryten_playlist.storage.suggest import (
+    SuggestIndexManager,
+    build_suggest_index,
+    normalize_title,
+    title_keys,
+)
+from kryten_playlist.web.app import create_app
+
+
+@pytest_asyncio.fixture
+async def db(catalog_db):
+    conn = catalog_db
+
+    await insert_item(conn, "v1", "Night of the Living Dead")
+    await insert_item(conn, "v2", "Dawn of the Dead")
+    await insert_item(conn, "v3", "Kolchak S01E01", title_base="Kolchak: The Night Stalker", is_tv=1)
+    await insert_item(conn, "v4", "Kolchak S01E02", title_base="Kolchak: The Night Stalker", is_tv=1)
+    await insert_item(conn, "v5", "Dead Alive", llm_enriched_at=None)
+    await insert_item(conn, "v6", "Deadly Friend", mediacms_category="Uncategorized")
+    await insert_item(conn, "v7", "Déjà Vu")
+    await mark_catalog_changed(conn, snapshot_id="snap1")
+    await conn.commit()
+
+    yield conn
+
+
+def test_keys_start_at_every_significant_word():
+    assert normalize_title("  Kolchak: The  Night-Stalker ") == "kolchak the night stalker"
+    assert normalize_title("Déjà Vu") == "deja vu"
+    assert title_keys("Dawn of the Dead") == ("dawn of the dead", "dead")
+
+
+@pytest.mark.asyncio
+async def test_suggestions_ranked_by_plays_and_access(db):
+    plays = {"v1": 3, "v2": 10, "v3": 4, "v4": 5}
+    manager = SuggestIndexManager(db, plays=lambda: _async(plays))
+    assert await manager.refresh() is True
+    index = manager.current
+
+    # Short prefix (precomputed) and long prefix (bisect range) agree on order
+    assert [s.video_id for s in index.suggest("d")] == ["v2", "v1", "v7"]
+    for q in ("dea", "dead"):
+        assert [s.video_id for s in index.suggest(q)] == ["v2", "v1"], q
+
+    # Series entries sum their episodes' plays; unenriched items never appear
+    night = index.suggest("night")
+    assert [(s.kind, s.text, s.plays) for s in night] == [
+        ("series", "Kolchak: The Night Stalker", 9),
+        ("title", "Night of the Living Dead", 3),
+    ]
+    assert index.suggest("dead al") == []
+
+    # Uncategorized items only for include_uncategorized
+    assert index.suggest("deadly") == []
+    assert [s.video_id for s in index.suggest("deadly", include_uncategorized=True)] == ["v6"]
+    assert [s.video_id for s in index.suggest("DEJA")] == ["v7"]
+    assert [s.text for s in index.suggest("kolchak", limit=1)] == ["Kolchak: The Night Stalker"]
+
+
+@pytest.mark.asyncio
+async def test_refresh_rebuilds_on_version_change_and_reranks_on_plays(db):
+    plays = {"v1": 1, "v2": 2}
+    manager = SuggestIndexManager(
+        db, plays=lambda: _async(plays), plays_refresh_seconds=3600, min_rebuild_seconds=0
+    )
+    await manager.refresh()
+    first = manager.current
+    assert [s.video_id for s in first.suggest("dea")] == ["v2", "v1"]
+    assert await manager.refresh() is False
+
+    await insert_item(db, "v8", "Dead Ringers")
+    await mark_catalog_changed(db)
+    await db.commit()
+    plays["v8"] = 50
+    assert await manager.refresh() is True
+    assert manager.current is not first
+    assert [s.video_id for s in manager.current.suggest("dead")] == ["v8", "v2", "v1"]
+    # Keys for unchanged titles are carried over, not recomputed
+    assert manager.current._key_cache["Dawn of the Dead"] is first._key_cache["Dawn of the Dead"]
+
+    # Re-ranking keeps the keys and only changes the order
+    plays["v1"] = 100
+    manager._plays_refresh = 0
+    before = manager.current
+    assert await manager.refresh() is True
+    assert manager.current._keys is before._keys
+    assert [s.video_id for s in manager.current.suggest("dea")] == ["v1", "v8", "v2"]
+
+
+@pytest.mark.asyncio
+async def test_enrichment_updates_are_coalesced_and_incremental(db):
+    manager = SuggestIndexManager(db, min_rebuild_seconds=3600)
+    await manager.refresh()
+    first = manager.current
+
+    # An enrichment batch within the interval waits for the next one
+    await insert_item(db, "v8", "Dead Ringers", llm_enriched_at="2025-02-01T00:00:00+00:00")
+    await mark_catalog_changed(db)
+    await db.commit()
+    assert await manager.refresh() is False
+    assert manager.current is first
+
+    # Once due, only the newly enriched items are read
+    manager._min_rebuild = 0
+    statements: list[str] = []
+    await db.set_trace_callback(statements.append)
+    try:
+        assert await manager.refresh() is True
+    finally:
+        await db.set_trace_callback(None)
+    assert any("llm_enriched_at >= '2025-01-01T00:00:00+00:00'" in sql for sql in statements)
+    assert [s.video_id for s in manager.current.suggest("dead r")] == ["v8"]
+    assert [s.video_id for s in manager.current.suggest("dawn")] == ["v2"]
+
+    # A generation bump with nothing newly enriched keeps the index
+    await mark_catalog_changed(db)
+    await db.commit()
+    updated = manager.current
+    assert await manager.refresh() is False
+    assert manager.current is updated
+
+    # A new snapshot is rebuilt in full
+    await db.execute("DELETE FROM catalog_item WHERE video_id = 'v2'")
+    await mark_catalog_changed(db, snapshot_id="snap2")
+    await db.commit()
+    manager._min_rebuild = 3600
+    assert await manager.refresh() is True
+    assert manager.current.suggest("dawn") == []
+
+
+@pytest.mark.asyncio
+async def test_route_falls_back_to_title_search_without_index(db):
+    app = create_app()
+    app.state.config = SimpleNamespace(disable_auth=True, blessed_users=[])
+    app.state.sqlite = db
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get("/api/v1/catalog/suggest", params={"q": "dawn"})
+        assert resp.status_code == 200
+        assert [(s["kind"], s["video_id"]) for s in resp.json()["items"]] == [("title", "v2")]
+
+        resp = await client.get("/api/v1/catalog/suggest", params={"q": " "})
+        assert resp.json() == {"items": []}
+
+
+def test_limit_beyond_precomputed_top_scans_range():
+    rows = [(f"v{i}", f"Zed {i}", None, False, True) for i in range(40)]
+    index = build_suggest_index(rows, version=CatalogVersion("s", 1), plays={f"v{i}": i for i in range(40)})
+    found = index.suggest("z", limit=30)
+    assert len(found) == 30
+    assert [s.video_id for s in found[:2]] == ["v39", "v38"]
+
+
+async def _async(value):
+    return value
@@ -0,0 +1,86 @@
+"""Tests for the synthetic catalog generator."""
+
+from __future__ import annotations
+
+import re
+
+import aiosqlite
+import pytest
+
+from kryten_playlist.catalog.ingest import ingest_catalog
+from kryten_playlist.catalog.synth import (
+    SynthConnector,
+    SynthOptions,
+    synth_items,
+    write_synth_catalog,
+)
+from kryten_playlist.catalog.title_sanitizer import parse_title
+from kryten_playlist.storage.catalog_repo import CatalogRepository
+
+
+def test_same_seed_same_catalog():
+    first = list(synth_items(SynthOptions(count=500, seed=7)))
+    assert first == list(synth_items(SynthOptions(count=500, seed=7)))
+    assert first != list(synth_items(SynthOptions(count=500, seed=8)))
+    assert len({s.item.video_id for s in first}) == 500
+
+
+def test_noisy_titles_parse_back():
+    items = list(synth_items(SynthOptions(count=2000, seed=1, tv_ratio=0.4)))
+    for synth in items:
+        assert parse_title(synth.item.title).title_base.lower() == synth.title_base.lower(), synth.item.title
+
+    tv = sum(parse_title(s.item.title).is_tv for s in items)
+    assert 0.35 < tv / len(items) < 0.45
+    # Release noise is really there to be stripped
+    assert any(s.item.title.endswith(".mkv") for s in items)
+    assert any(re.search(r" - \d+x\d{2}", s.item.title) for s in items)
+    assert any(not s.item.categories for s in items)
+
+
+@pytest.mark.asyncio
+async def test_write_synth_catalog_is_searchable():
+    conn = await aiosqlite.connect(":memory:")
+    conn.row_factory = aiosqlite.Row
+    try:
+        assert await write_synth_catalog(conn, SynthOptions(count=1500, seed=2), batch_size=400) == 1500
+
+        cursor = await conn.execute(
+            "SELECT (SELECT COUNT(*) FROM catalog_fts), "
+            "(SELECT COUNT(*) FROM catalog_item WHERE llm_enriched_at IS NOT NULL AND genre_id IS NULL), "
+            "(SELECT COUNT(DISTINCT video_id) FROM item_person)"
+        )
+        fts_rows, unlinked_genres, credited = await cursor.fetchone()
+        assert fts_rows == 1500
+        assert unlinked_genres == 0
+        assert credited > 1000
+
+        repo = CatalogRepository(conn)
+        word = parse_title((await (await conn.execute("SELECT raw_title FROM catalog_item")).fetchone())[0])
+        res = await repo.search(q=word.title_base.split()[0], categories=[], limit=5, offset=0)
+        assert res.items
+        cursor = await conn.execute("SELECT name FROM catalog_person LIMIT 1")
+        actor = (await cursor.fetchone())[0]
+        res = await repo.search(q=None, categories=[], limit=5, offset=0, actor=actor)
+        assert res.items
+
+        with pytest.raises(ValueError):
+            await write_synth_catalog(conn, SynthOptions(count=10))
+    finally:
+        await conn.close()
+
+
+@pytest.mark.asyncio
+async def test_synth_connector_feeds_ingest(tmp_path):
+    db_path = str(tmp_path / "catalog.db")
+    stats = await ingest_catalog("synth", db_path, connector=SynthConnector(300, seed=4))
+    assert stats["new"] == 300
+
+    async with aiosqlite.connect(db_path) as conn:
+        cursor = await conn.execute(
+            "SELECT COUNT(*), SUM(is_tv), SUM(llm_enriched_at IS NULL) FROM catalog_item"
+        )
+        total, tv, pending = await cursor.fetchone()
+    assert total == 300
+    assert 0 < tv < 300
+    assert pending == 300
@@ -48,6 +48,11 @@ class TestMovieTitles:
         result = parse_title("The.Lord.of.the.Rings.2001.Extended.1080p.mkv")
         assert result.sanitized == "The Lord of the Rings (2001)"
 
+    def test_year_ending_in_5_before_resolution(self) -> None:
+        # "5.1" is an audio channel tag only when it stands alone
+        assert parse_title("Night.Tide.1965.1080p.HDTV.mkv").sanitized == "Night Tide (1965)"
+        assert parse_title("Night.Tide.1961.DTS.5.1.mkv").sanitized == "Night Tide (1961)"
+
 
 class TestTVTitles:
     """Tests for TV show title parsing."""
@@ -0,0 +1,120 @@
+"""Tests for the trigram title index and fuzzy search."""
+
+from __future__ import annotations
+
+import aiosqlite
+import pytest
+import pytest_asyncio
+
+from kryten_playlist.catalog.enhanced_schema import init_enhanced_schema
+from kryten_playlist.storage.catalog_repo import CatalogRepository
+from kryten_playlist.storage.facets import set_item_facets
+from kryten_playlist.storage.trigram import (
+    candidate_filter,
+    match_trigrams,
+    rarest_trigrams,
+    similarity,
+    word_trigrams,
+)
+
+TITLES = {
+    "v1": ("Grindhouse", None),
+    "v2": ("Grindhouse: Planet Terror", "Grindhouse"),
+    "v3": ("Anthony Bourdain: Parts Unknown S01E01", "Anthony Bourdain: Parts Unknown"),
+    "v4": ("The House on Haunted Hill", None),
+    "v5": ("Dawn of the Dead", None),
+}
+
+
+@pytest_asyncio.fixture
+async def db():
+    conn = await aiosqlite.connect(":memory:")
+    conn.row_factory = aiosqlite.Row
+    await init_enhanced_schema(conn)
+    for vid, (title, base) in TITLES.items():
+        await conn.execute(
+            "INSERT INTO catalog_item (video_id, raw_title, sanitized_title, title_base, snapshot_id, "
+            "mediacms_category, llm_enriched_at, genre) VALUES (?, ?, ?, ?, 'snap1', 'Movies', '2025-01-01', ?)",
+            (vid, f"{title} (1080p)", title, base or title, None),
+        )
+        await set_item_facets(conn, vid, genre="Horror" if vid in ("v1", "v2", "v4") else None)
+    await conn.commit()
+    yield conn
+    await conn.close()
+
+
+def test_trigram_helpers():
+    assert word_trigrams("Dawn") == {"  d", " da", "daw", "awn", "wn "}
+    assert match_trigrams("Dawn dawn") == ["daw", "awn"]
+    assert match_trigrams("of") == []
+    sql, params = candidate_filter(["abc", 'a"b'])
+    assert sql.count("MATCH ?") == 2
+    assert params == ['"abc"', '"a""b"']
+
+
+def test_similarity_prefers_closer_titles():
+    exact = similarity("grindhouse", "Grindhouse")
+    typo = similarity("grindhose", "Grindhouse")
+    longer = similarity("grindhose", "Grindhouse: Planet Terror")
+    unrelated = similarity("grindhose", "Dawn of the Dead")
+    assert exact == 1.0
+    assert typo > longer > unrelated
+    assert similarity("bourdian", "Anthony Bourdain") > 0.3
+
+
+@pytest.mark.asyncio
+async def test_rarest_trigrams_skip_unknown_and_common(db):
+    grams = await rarest_trigrams(db, ["hou", "ous", "bou", "zzz"], keep=2)
+    assert "zzz" not in grams
+    assert grams[0] == "bou"  # one title, vs. three with "hou"
+
+
+@pytest.mark.asyncio
+async def test_fuzzy_search_finds_misspelled_titles(db):
+    repo = CatalogRepository(db)
+
+    res = await repo.search(q="grindhose", categories=[], limit=10, offset=0, fuzzy=True)
+    # v2's series title is "Grindhouse" too, so both score the same
+    assert [i["video_id"] for i in res.items] == ["v1", "v2"]
+    assert res.items[0]["score"] == res.items[1]["score"]
+
+    res = await repo.search(q="bourdian", categories=[], limit=10, offset=0, fuzzy=True)
+    assert [i["video_id"] for i in res.items] == ["v3"]
+
+    # Exact search finds nothing for the typo
+    res = await repo.search(q="bourdian", categories=[], limit=10, offset=0)
+    assert res.total == 0
+
+
+@pytest.mark.asyncio
+async def test_fuzzy_search_applies_other_filters(db):
+    repo = CatalogRepository(db)
+    res = await repo.search(q="haunted hose", categories=[], limit=10, offset=0, genre="horror", fuzzy=True)
+    ids = [i["video_id"] for i in res.items]
+    assert ids[0] == "v4"
+    assert "v3" not in ids
+
+
+@pytest.mark.asyncio
+async def test_trigram_index_follows_title_changes_only(db):
+    await db.execute("UPDATE catalog_item SET sanitized_title = 'Suspiria', title_base = 'Suspiria', raw_title = 'Suspiria' WHERE video_id = 'v5'")
+    await db.commit()
+    repo = CatalogRepository(db)
+    res = await repo.search(q="suspirai", categories=[], limit=5, offset=0, fuzzy=True)
+    assert [i["video_id"] for i in res.items] == ["v5"]
+
+    statements: list[str] = []
+    await db.set_trace_callback(statements.append)
+    await db.execute("UPDATE catalog_item SET synopsis = 'Witches.' WHERE video_id = 'v5'")
+    await db.set_trace_callback(None)
+    await db.commit()
+    assert not any("catalog_title_trgm" in s for s in statements)
+
+
+@pytest.mark.asyncio
+async def test_candidate_lookup_does_not_scan_catalog(db):
+    sql, params = candidate_filter(["gri", "ndh"])
+    cursor = await db.execute(f"EXPLAIN QUERY PLAN SELECT ci.video_id FROM catalog_item ci WHERE {sql}", params)
+    plan = " | ".join(str(r["detail"]) for r in await cursor.fetchall())
+    assert "SCAN ci" not in plan
+    assert "catalog_title_trgm" in plan